@@ -1,9 +1,25 @@
 # app.py - Configuración principal de Flask
-from flask import Flask, render_template
+import logging
+import time
+from flask import Flask, render_template, jsonify, session, request, g, Response
 from flask_cors import CORS
 # Asumo que usuario_routes.py existe o lo crearás.
 from routes.usuario_routes import usuario_bp
 from routes.roles_routes import role_bp  # Importación del Blueprint de Roles
+from routes.dispositivo_routes import dispositivo_bp
+from routes.estadisticas_routes import estadisticas_bp
+from config.database import DatabaseConfig
+from routes.auth import identidad
+from config.metrics import metrics
+from config import logs
+from services.password_service import password_service
+from services.roles_service import roles_cache
+from repositories.usuario_repository import usuarios_cache
+from services.estadisticas_service import estadisticas_cache
+
+# Logs JSON por línea, escritos desde un hilo de fondo (ver config/logs.py)
+logs.configurar_logging()
+access_logger = logging.getLogger('netmonitor.access')
 
 app = Flask(__name__)
 app.secret_key = 'utnc'  # Necesario para las sesiones
@@ -13,6 +29,55 @@ CORS(app)
 # Nota: usuario_bp se asume ya definido en routes/usuario_routes.py
 app.register_blueprint(usuario_bp)
 app.register_blueprint(role_bp)  # Registro del Blueprint de Roles
+app.register_blueprint(dispositivo_bp)
+app.register_blueprint(estadisticas_bp)
+
+
+# Read-your-writes: tras una escritura, las lecturas de la misma sesión van al
+# primario durante DatabaseConfig.READ_YOUR_WRITES_WINDOW segundos. La ventana
+# viaja en la cookie de sesión para que funcione entre workers de Gunicorn.
+@app.before_request
+def restaurar_ventana_lectura():
+    DatabaseConfig.iniciar_peticion(session.get('db_leer_primario_hasta'))
+
+@app.after_request
+def guardar_ventana_lectura(response):
+    hasta = DatabaseConfig.leer_del_primario_hasta()
+    if hasta and hasta != session.get('db_leer_primario_hasta'):
+        session['db_leer_primario_hasta'] = hasta
+    return response
+
+
+# Métricas y log de acceso por ruta. Se etiqueta con la regla
+# ('/api/users/<int:user_id>'), no con la URL, para acotar la cardinalidad.
+# El request id llega en X-Request-ID (p. ej. desde nginx) o se genera, y se
+# devuelve en la respuesta para poder cruzarlo con los logs.
+@app.before_request
+def iniciar_cronometro():
+    logs.asegurar_listener()
+    g.request_id = logs.iniciar_peticion(request.headers.get('X-Request-ID'))
+    g.inicio_peticion = time.perf_counter()
+
+@app.after_request
+def registrar_metricas(response):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        duracion = time.perf_counter() - inicio
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        metrics.observe('netmonitor_http_request_duration_seconds', duracion,
+                        endpoint=ruta, method=request.method)
+        metrics.inc('netmonitor_http_requests_total', endpoint=ruta, method=request.method,
+                    status=response.status_code)
+        metrics.maybe_flush()
+        access_logger.info('Petición atendida', extra={
+            'method': request.method,
+            'path': request.path,
+            'endpoint': ruta,
+            'status': response.status_code,
+            'duration_ms': round(duracion * 1000, 2),
+        })
+        response.headers['X-Request-ID'] = g.request_id
+    return response
 
 
 @app.route("/")
@@ -40,6 +105,37 @@ def roles_template():
 def dispositivos_template():
     return render_template('dispositivos.html')
 
+@app.route('/api/db/status')
+def db_status():
+    """Introspección del failover: endpoint activo, breakers y pools."""
+    if not identidad():
+        return jsonify({'success': False, 'message': 'Acceso denegado'}), 401
+    return jsonify({'success': True, 'status': DatabaseConfig().estado()}), 200
+
+@app.route('/api/hash/status')
+def hash_status():
+    """Métricas del pool de bcrypt: espera en cola, tiempo de hash y rechazos."""
+    if not identidad():
+        return jsonify({'success': False, 'message': 'Acceso denegado'}), 401
+    return jsonify({'success': True, 'status': password_service.stats()}), 200
+
+@app.route('/api/cache/status')
+def cache_status():
+    """Aciertos, fallos y expulsiones de las cachés en memoria de este worker."""
+    if not identidad():
+        return jsonify({'success': False, 'message': 'Acceso denegado'}), 401
+    return jsonify({'success': True, 'status': {
+        'usuarios': usuarios_cache.stats(),
+        'roles': roles_cache.stats(),
+        'estadisticas': estadisticas_cache.stats(),
+    }}), 200
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato de texto de Prometheus, sumadas entre todos los workers."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == "__main__":
+    metrics.volcar_al_salir()
     app.run(debug=True)
 
@@ -0,0 +1,137 @@
+# asgi.py - Punto de entrada ASGI (modo asyncio)
+#
+#   hypercorn asgi:app --workers 4 --bind 0.0.0.0:8000
+#
+# Las rutas calientes y ligadas a la BD (login, sesión, listado, búsqueda y
+# CRUD de usuarios, lecturas de roles) se atienden con Quart sobre aiomysql:
+# un worker mantiene cientos de peticiones en vuelo mientras esperan a MySQL.
+# También los eventos en vivo de dispositivos (SSE): una corrutina por cliente.
+# El resto (plantillas, estáticos, importación/exportación, escrituras de
+# roles, estado y métricas) se delega a la app Flask de app.py en un pool de
+# hilos. Las dos apps comparten clave secreta y formato de la cookie de sesión,
+# así que una sesión abierta en una vale en la otra. app.py con Gunicorn sigue
+# siendo el despliegue síncrono (gunicorn.conf.py).
+import logging
+import time
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, g, request, session
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+from app import app as flask_app
+from config import logs
+from config.async_database import AsyncDatabaseConfig
+from config.database import DatabaseConfig
+from config.metrics import metrics
+from routes.async_dispositivo_routes import dispositivo_bp
+from routes.async_roles_routes import role_bp
+from routes.async_usuario_routes import usuario_bp
+from services.token_service import token_service
+
+access_logger = logging.getLogger('netmonitor.access')
+
+# Cuerpo máximo que se acepta para las rutas delegadas (importación de usuarios)
+WSGI_MAX_BODY = 64 * 1024 * 1024
+
+quart_app = Quart(__name__, static_folder=None)
+quart_app.secret_key = flask_app.secret_key
+# Fuera de un contexto de Flask el servicio de tokens necesita su propia clave
+token_service.secret_key = flask_app.secret_key
+# Proceso servidor: el último intervalo de métricas se vuelca al terminar
+metrics.volcar_al_salir()
+
+quart_app.register_blueprint(usuario_bp)
+quart_app.register_blueprint(role_bp)
+quart_app.register_blueprint(dispositivo_bp)
+
+
+# Read-your-writes: misma ventana en la cookie de sesión que en app.py
+@quart_app.before_request
+async def restaurar_ventana_lectura():
+    DatabaseConfig.iniciar_peticion(session.get('db_leer_primario_hasta'))
+
+@quart_app.after_request
+async def guardar_ventana_lectura(response):
+    hasta = DatabaseConfig.leer_del_primario_hasta()
+    if hasta and hasta != session.get('db_leer_primario_hasta'):
+        session['db_leer_primario_hasta'] = hasta
+    return response
+
+
+# Métricas, log de acceso y request id con las mismas etiquetas que app.py
+@quart_app.before_request
+async def iniciar_cronometro():
+    logs.asegurar_listener()
+    g.request_id = logs.iniciar_peticion(request.headers.get('X-Request-ID'))
+    g.inicio_peticion = time.perf_counter()
+
+@quart_app.after_request
+async def registrar_metricas(response):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        duracion = time.perf_counter() - inicio
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        metrics.observe('netmonitor_http_request_duration_seconds', duracion,
+                        endpoint=ruta, method=request.method)
+        metrics.inc('netmonitor_http_requests_total', endpoint=ruta, method=request.method,
+                    status=response.status_code)
+        metrics.maybe_flush()
+        access_logger.info('Petición atendida', extra={
+            'method': request.method,
+            'path': request.path,
+            'endpoint': ruta,
+            'status': response.status_code,
+            'duration_ms': round(duracion * 1000, 2),
+        })
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+# CORS: como flask_cors con la configuración por defecto de app.py. Las
+# peticiones OPTIONS (preflight) se delegan a Flask.
+@quart_app.after_request
+async def cabeceras_cors(response):
+    if 'Origin' in request.headers:
+        response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@quart_app.after_serving
+async def cerrar_pools():
+    await AsyncDatabaseConfig.close_pools()
+
+
+class Despachador:
+    """App ASGI que reparte cada petición entre la app asyncio y la síncrona.
+
+    Una petición va a Quart si alguna de sus rutas la atiende con ese método;
+    si no (404 o 405 en Quart), a Flask, que resuelve también sus propios
+    errores. Los eventos que no son HTTP (lifespan) son siempre de Quart.
+    """
+
+    def __init__(self, asyncio_app, wsgi_app):
+        self.asyncio_app = asyncio_app
+        self.wsgi_app = AsyncioWSGIMiddleware(wsgi_app, max_body_size=WSGI_MAX_BODY)
+        self._rutas = asyncio_app.url_map.bind('')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self.es_asyncio(scope['path'], scope['method']):
+            await self.asyncio_app(scope, receive, send)
+        else:
+            await self.wsgi_app(scope, receive, send)
+
+    def es_asyncio(self, path: str, method: str) -> bool:
+        if method == 'OPTIONS':
+            return False
+        try:
+            self._rutas.match(path, method=method)
+        except RequestRedirect:
+            # Barra final que falta ('/api/roles'): redirige Quart
+            return True
+        except HTTPException:
+            return False
+        return True
+
+
+app = Despachador(quart_app, flask_app)
@@ -0,0 +1,463 @@
+# benchmarks/bench_app.py
+"""Prueba de carga reproducible de la API completa bajo Gunicorn.
+
+Siembra `roles` y `users` a la escala indicada en un SQLite temporal (ver
+sqlite_standin.py) o en un MySQL dedicado, arranca la app real con Gunicorn
+(benchmarks/bench_wsgi.py) o, con --server hypercorn, el modo asyncio de
+asgi.py (benchmarks/bench_asgi.py) y, escenario por escenario, la golpea con
+`--clients` clientes concurrentes con keep-alive y sesión iniciada:
+
+    login    POST /api/login
+    list     GET  /api/users?limit=50 siguiendo next_cursor
+    search   GET  /api/users/search?q=...
+    current  GET  /api/user/current
+    crud     POST /api/register -> PUT -> PATCH toggle-active -> DELETE
+    roles    GET  /api/roles/ y /api/roles/<id>
+
+Por escenario informa peticiones, errores, throughput, p50/p95/p99 y
+consultas SQL por petición (cabecera X-Bench-Queries). Con --check compara
+contra benchmarks/baseline.json y sale con código 1 si hay regresión: p95
+o throughput peor que la tolerancia, o más consultas por petición. La
+latencia depende de la máquina: regenera la línea base (--save-baseline) en
+la máquina donde se vaya a comparar; las consultas por petición no.
+
+--db-latency-ms añade a cada sentencia de SQLite una espera que simula la
+red hasta MySQL; bench_async.py la usa para comparar ambos servidores.
+
+Uso:
+    python -m benchmarks.bench_app --users 10000 --clients 16 --seconds 5
+    python -m benchmarks.bench_app --save-baseline
+    python -m benchmarks.bench_app --check --tolerance 0.5
+    python -m benchmarks.bench_app --in-process --scenarios list search
+    python -m benchmarks.bench_app --server hypercorn --db-latency-ms 5 --pool-size 32 --clients 128
+    python -m benchmarks.bench_app --backend mysql --mysql-user root --mysql-database netmonitor_bench
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import bcrypt
+
+from benchmarks import sqlite_standin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+SCENARIOS = ["login", "list", "search", "current", "crud", "roles"]
+PASSWORD = "bench123"
+SEARCH_TERMS = ["user12", "user7", "bench", "r99", "@bench.mx", "user4321"]
+
+
+# --- Clientes ---
+
+class HttpClient:
+    """Cliente HTTP/1.1 con keep-alive y la cookie de sesión de Flask."""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookie = None
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+    def request(self, method, path, body=None):
+        headers = {"Connection": "keep-alive"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Conexión cerrada por el servidor: se reintenta una vez con otra
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+        data = response.read()
+        for cookie in response.msg.get_all("Set-Cookie") or []:
+            if cookie.startswith("session="):
+                value = cookie.split(";", 1)[0]
+                self.cookie = value if value != "session=" else None
+        return response.status, response.getheader("X-Bench-Queries"), data
+
+    def close(self):
+        self.conn.close()
+
+
+class InProcessClient:
+    """Mismo interfaz sobre el test client de Flask (sin red ni Gunicorn)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.headers.get("X-Bench-Queries"), response.get_data()
+
+    def close(self):
+        pass
+
+
+# --- Escenarios ---
+
+class Recorder:
+    """Muestras de un escenario: latencia (ms), consultas y código de estado."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.queries = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.recording = False
+
+    def call(self, client, method, path, body=None, expect=(200, 201, 304)):
+        start = time.perf_counter()
+        status, queries, data = client.request(method, path, body)
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.recording:
+            with self.lock:
+                self.latencies.append(elapsed)
+                self.statuses[status] += 1
+                if queries is not None:
+                    self.queries.append(int(queries))
+                if status not in expect:
+                    self.errors += 1
+        return status, json.loads(data) if data else None
+
+
+def login(client, recorder, username="bench_admin"):
+    return recorder.call(client, "POST", "/api/login", {"usuario": username, "contrasena": PASSWORD})
+
+
+def iniciar_sesion(client, intentos=20):
+    """Login inicial de cada cliente. Reintenta el 503 del control de admisión de bcrypt,
+    que con cientos de clientes arrancando a la vez es la respuesta esperada."""
+    for intento in range(intentos):
+        status, _, body = client.request("POST", "/api/login", {"usuario": "bench_admin", "contrasena": PASSWORD})
+        if status == 200:
+            return
+        if status != 503:
+            break
+        time.sleep(0.05 * (intento + 1))
+    raise RuntimeError(f"login inicial fallido ({status}): {body[:200]!r}")
+
+
+def scenario_login(client, recorder, state, rng):
+    login(client, recorder, f"user{rng.randrange(state['users'])}")
+
+
+def scenario_list(client, recorder, state, rng):
+    path = "/api/users?limit=50"
+    if state.get("cursor"):
+        path += f"&cursor={state['cursor']}"
+    status, body = recorder.call(client, "GET", path)
+    # Se recorren hasta 5 páginas y se vuelve a empezar
+    state["pages"] = state.get("pages", 0) + 1
+    state["cursor"] = body.get("next_cursor") if status == 200 and body and state["pages"] % 5 else None
+
+
+def scenario_search(client, recorder, state, rng):
+    recorder.call(client, "GET", f"/api/users/search?q={rng.choice(SEARCH_TERMS)}&limit=50")
+
+
+def scenario_current(client, recorder, state, rng):
+    recorder.call(client, "GET", "/api/user/current")
+
+
+def scenario_crud(client, recorder, state, rng):
+    state["n"] = state.get("n", 0) + 1
+    nombre = f"b{state['tag']}_{state['n']}"
+    status, body = recorder.call(client, "POST", "/api/register", {
+        "nombre_usuario": nombre,
+        "correo_electronico": f"{nombre}@bench.mx",
+        "contrasena": PASSWORD,
+    })
+    if status != 201 or not body:
+        return
+    user_id = body["user_id"]
+    recorder.call(client, "PUT", f"/api/users/{user_id}", {"email": f"{nombre}@upd.bench.mx"})
+    recorder.call(client, "PATCH", f"/api/users/{user_id}/toggle-active")
+    recorder.call(client, "DELETE", f"/api/users/{user_id}")
+
+
+def scenario_roles(client, recorder, state, rng):
+    if rng.random() < 0.5:
+        recorder.call(client, "GET", "/api/roles/")
+    else:
+        recorder.call(client, "GET", f"/api/roles/{rng.randint(1, len(sqlite_standin.ROLES))}")
+
+
+RUNNERS = {
+    "login": scenario_login,
+    "list": scenario_list,
+    "search": scenario_search,
+    "current": scenario_current,
+    "crud": scenario_crud,
+    "roles": scenario_roles,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_scenario(name, make_client, args, seed):
+    recorder = Recorder()
+    runner = RUNNERS[name]
+    start_recording = time.monotonic() + args.warmup
+    stop = start_recording + args.seconds
+    failures = []
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        state = {"users": args.users, "tag": f"{os.getpid()}_{seed}_{index}"}
+        client = make_client()
+        try:
+            iniciar_sesion(client)
+            while time.monotonic() < stop:
+                recorder.recording = time.monotonic() >= start_recording
+                runner(client, recorder, state, rng)
+        except Exception as e:  # un cliente caído invalida la medición
+            failures.append(repr(e))
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(recorder.latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": recorder.errors + len(failures),
+        "rps": round(count / args.seconds, 1),
+        "p50_ms": _round(percentile(latencies, 0.50)),
+        "p95_ms": _round(percentile(latencies, 0.95)),
+        "p99_ms": _round(percentile(latencies, 0.99)),
+        "queries_per_request": round(sum(recorder.queries) / len(recorder.queries), 2) if recorder.queries else None,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items())},
+        "client_failures": failures[:3],
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+# --- Datos y servidor ---
+
+def seed_database(args, workdir):
+    """Siembra la BD y devuelve las variables de entorno para bench_wsgi."""
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.bcrypt_rounds)).decode("utf-8")
+    env = {
+        "BENCH_BACKEND": args.backend,
+        "BENCH_BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "BENCH_CACHE_DIR": os.path.join(workdir, "cache"),
+        "NETMONITOR_METRICS_DIR": os.path.join(workdir, "metrics"),
+        "NETMONITOR_LOG_LEVEL": "WARNING",
+        "BENCH_DB_LATENCY_MS": str(args.db_latency_ms),
+    }
+    if args.pool_size:
+        env["BENCH_POOL_SIZE"] = str(args.pool_size)
+    if args.backend == "mysql":
+        import mysql.connector
+        config = {"host": args.mysql_host, "port": args.mysql_port, "user": args.mysql_user,
+                  "password": args.mysql_password, "database": args.mysql_database}
+        connection = mysql.connector.connect(**config)
+        try:
+            sqlite_standin.seed(connection, args.users, password_hash, mysql=True)
+        finally:
+            connection.close()
+        env.update({"BENCH_MYSQL_HOST": args.mysql_host, "BENCH_MYSQL_PORT": str(args.mysql_port),
+                    "BENCH_MYSQL_USER": args.mysql_user, "BENCH_MYSQL_PASSWORD": args.mysql_password,
+                    "BENCH_MYSQL_DATABASE": args.mysql_database})
+    else:
+        path = os.path.join(workdir, "bench.sqlite3")
+        connection = sqlite_standin.SQLiteConnection(path)
+        try:
+            sqlite_standin.seed(connection, args.users, password_hash)
+        finally:
+            connection.close()
+        env["BENCH_SQLITE_PATH"] = path
+    return env
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, env, port):
+    """Lanza Gunicorn (gthread, síncrono) o Hypercorn (asyncio) y espera a que acepte conexiones."""
+    if args.server == "hypercorn":
+        command = [sys.executable, "-m", "hypercorn", "-w", str(args.workers), "-b", f"127.0.0.1:{port}",
+                   "--log-level", "warning", "benchmarks.bench_asgi:app"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-k", "gthread",
+                   "--threads", str(args.threads), "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+                   "benchmarks.bench_wsgi:app"]
+    server_env = dict(os.environ, **env)
+    server_env["PYTHONPATH"] = ROOT + os.pathsep + server_env.get("PYTHONPATH", "")
+    process = subprocess.Popen(command, cwd=ROOT, env=server_env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{args.server} terminó al arrancar (código {process.returncode})")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{args.server} no respondió en 30 s")
+
+
+# --- Línea base ---
+
+def compare(results, baseline, args):
+    """Lista de regresiones de `results` frente a `baseline` (vacía si no hay)."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} errores")
+        if base.get("p95_ms") and current["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + args.tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms > {base['p95_ms']} ms (+{args.tolerance:.0%})")
+        # Misma proporción en ambos sentidos: con tolerancia 1.0, el doble de p95 o la mitad de req/s
+        if base.get("rps") and current["rps"] < base["rps"] / (1 + args.tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s < {base['rps']} req/s / {1 + args.tolerance:g}")
+        base_q, current_q = base.get("queries_per_request"), current["queries_per_request"]
+        if base_q is not None and current_q is not None and current_q > base_q + args.query_tolerance:
+            regressions.append(f"{name}: {current_q} consultas/petición > {base_q}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'escenario':<10}{'peticiones':>11}{'errores':>9}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['requests']:>11}{r['errors']:>9}{r['rps']:>9}"
+              f"{_fmt(r['p50_ms'])}{_fmt(r['p95_ms'])}{_fmt(r['p99_ms'])}"
+              f"{r['queries_per_request'] if r['queries_per_request'] is not None else '-':>11}")
+        for failure in r["client_failures"]:
+            print(f"    cliente caído: {failure}")
+
+
+def _fmt(value):
+    return f"{value if value is not None else '-':>9}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000, help="usuarios sembrados")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duración medida de cada escenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos sin medir al inicio de cada escenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--server", choices=["gunicorn", "hypercorn"], default="gunicorn",
+                        help="gunicorn: app.py síncrona; hypercorn: asgi.py (asyncio)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="hilos por worker de Gunicorn")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="conexiones por worker (DatabaseConfig.POOL_SIZE; por defecto el de la app)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="latencia simulada por sentencia con SQLite")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4,
+                        help="coste de los hashes sembrados (12 en producción; bajo para medir el resto)")
+    parser.add_argument("--in-process", action="store_true", help="test client de Flask en lugar de Gunicorn")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--mysql-host", default="127.0.0.1")
+    parser.add_argument("--mysql-port", type=int, default=3306)
+    parser.add_argument("--mysql-user", default="root")
+    parser.add_argument("--mysql-password", default="")
+    parser.add_argument("--mysql-database", default="netmonitor_bench",
+                        help="BD dedicada: sus tablas users y roles se recrean")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="sale con 1 si hay regresión frente a la línea base")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="margen relativo de p95 y req/s (la latencia en una máquina compartida es ruidosa)")
+    parser.add_argument("--query-tolerance", type=float, default=0.1, help="margen absoluto de consultas/petición")
+    parser.add_argument("--json", action="store_true", help="resultados en JSON")
+    return parser
+
+
+def run(args):
+    """Siembra la BD, arranca el servidor y mide cada escenario. Devuelve {escenario: resultado}."""
+    workdir = tempfile.mkdtemp(prefix="netmonitor-bench-")
+    process = None
+    try:
+        env = seed_database(args, workdir)
+        if args.in_process:
+            os.environ.update(env)
+            from benchmarks.bench_wsgi import app
+            make_client = lambda: InProcessClient(app)  # noqa: E731
+        else:
+            port = free_port()
+            process = start_server(args, env, port)
+            make_client = lambda: HttpClient(port)  # noqa: E731
+
+        results = {}
+        for seed, name in enumerate(args.scenarios):
+            results[name] = run_scenario(name, make_client, args, seed)
+        return results
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+
+    params = {k: getattr(args, k) for k in ("users", "clients", "seconds", "workers", "threads",
+                                             "bcrypt_rounds", "in_process", "backend", "server",
+                                             "pool_size", "db_latency_ms")}
+    if args.json:
+        print(json.dumps({"params": params, "results": results}, indent=2))
+    else:
+        print_table(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Línea base guardada en {args.baseline}", file=sys.stderr)
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"Aviso: parámetros distintos a la línea base {baseline.get('params')}", file=sys.stderr)
+        regressions = compare(results, baseline, args)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones frente a la línea base", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
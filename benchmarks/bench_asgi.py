@@ -0,0 +1,47 @@
+# benchmarks/bench_asgi.py
+"""Entrada ASGI del benchmark: asgi.py apuntando a la BD sembrada.
+
+Hypercorn la carga con `benchmarks.bench_asgi:app`. Mismas variables de entorno
+que bench_wsgi.py (que configura también la app Flask a la que se delegan las
+rutas síncronas); las rutas asyncio usan AsyncDatabaseConfig con
+sqlite_async_factory o, con BENCH_BACKEND=mysql, aiomysql.
+
+Cada respuesta lleva `X-Bench-Queries`: sentencias SQL de esa petición.
+"""
+import os
+
+from benchmarks import bench_wsgi
+from benchmarks import sqlite_standin
+from config.async_database import AsyncDatabaseConfig
+from config.async_pool import conectar_aiomysql
+from routes import async_roles_routes, async_usuario_routes
+
+from asgi import app, quart_app  # noqa: F401
+
+
+def bench_async_db_config() -> AsyncDatabaseConfig:
+    """AsyncDatabaseConfig del benchmark según BENCH_BACKEND."""
+    if os.environ.get("BENCH_BACKEND", "sqlite") == "mysql":
+        return AsyncDatabaseConfig(configs=[bench_wsgi.mysql_config()],
+                                   factory=sqlite_standin.async_counting_factory(conectar_aiomysql))
+    return AsyncDatabaseConfig(configs=[bench_wsgi.sqlite_config()], factory=sqlite_standin.sqlite_async_factory)
+
+
+def configurar():
+    db_config = bench_async_db_config()
+    async_usuario_routes.usuario_service.usuario_repository.db_config = db_config
+    async_roles_routes.roles_service.repository.db_config = db_config
+
+
+@quart_app.before_request
+async def _reset_contador():
+    sqlite_standin.reset_queries()
+
+
+@quart_app.after_request
+async def _cabecera_consultas(response):
+    response.headers["X-Bench-Queries"] = str(sqlite_standin.queries())
+    return response
+
+
+configurar()
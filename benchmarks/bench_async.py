@@ -0,0 +1,70 @@
+# benchmarks/bench_async.py
+"""Compara el modo síncrono (Gunicorn gthread) con el asyncio (Hypercorn + asgi.py).
+
+Repite bench_app.py con cada servidor y varios niveles de concurrencia, con
+la misma BD sembrada, los mismos workers y el mismo tamaño de pool, y una
+latencia simulada por sentencia (--db-latency-ms) para que el tiempo de la
+petición lo domine la espera a la BD, como con MySQL en otra máquina.
+
+Con Gunicorn las peticiones en vuelo por worker las acota --threads; con
+Hypercorn, el pool de conexiones (--pool-size). Por encima de ese número los
+clientes hacen cola en el servidor y el p95 crece con la concurrencia.
+
+Los clientes son hilos de este proceso: con cientos de ellos el generador
+de carga también compite por la CPU, así que la comparación es entre los dos
+servidores en la misma máquina, no una cifra absoluta.
+
+Uso:
+    python -m benchmarks.bench_async
+    python -m benchmarks.bench_async --clients 16 64 256 --db-latency-ms 5 --pool-size 32
+    python -m benchmarks.bench_async --backend mysql --mysql-user root --db-latency-ms 0
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import bench_app
+
+SERVERS = ["gunicorn", "hypercorn"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--scenarios", nargs="+", choices=bench_app.SCENARIOS, default=["list", "current", "crud"])
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=32)
+    parser.add_argument("--json", action="store_true", help="resultados en JSON")
+    args, rest = parser.parse_known_args()
+
+    results = {}
+    for clients in args.clients:
+        for server in SERVERS:
+            run_args = bench_app.build_parser().parse_args(rest + [
+                "--server", server,
+                "--clients", str(clients),
+                "--db-latency-ms", str(args.db_latency_ms),
+                "--pool-size", str(args.pool_size),
+                "--scenarios", *args.scenarios,
+            ])
+            print(f"{server} con {clients} clientes...", file=sys.stderr)
+            results.setdefault(str(clients), {})[server] = bench_app.run(run_args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'escenario':<10}{'clientes':>9}{'servidor':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'errores':>9}{'x req/s':>9}")
+    for scenario in args.scenarios:
+        for clients, by_server in results.items():
+            base = by_server["gunicorn"][scenario]["rps"]
+            for server in SERVERS:
+                r = by_server[server][scenario]
+                ratio = f"{r['rps'] / base:.2f}" if base else "-"
+                print(f"{scenario:<10}{clients:>9}{server:>10}{r['rps']:>9}{bench_app._fmt(r['p50_ms'])}"
+                      f"{bench_app._fmt(r['p95_ms'])}{bench_app._fmt(r['p99_ms'])}{r['errors']:>9}{ratio:>9}")
+
+
+if __name__ == "__main__":
+    main()
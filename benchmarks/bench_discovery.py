@@ -0,0 +1,137 @@
+# benchmarks/bench_discovery.py
+"""Importación en bloque y descubrimiento de dispositivos (services/dispositivo_service.py).
+
+Sobre un SQLite temporal (ver sqlite_standin.py):
+
+- importación: `--import-rows` filas CSV generadas por import_devices (validación,
+  destinos existentes por conjuntos y executemany por bloques), y la misma
+  importación repetida, donde todas las filas se rechazan por duplicadas.
+- descubrimiento: `--red` (loopback: 127.0.0.0/8 llega entero al host) con un
+  servidor TCP en uno de cada `--cada` hosts, en un proceso aparte; los demás
+  rechazan la conexión. Para cada `--tasa` se barre la red con discover_devices:
+  hosts/s, sondas/s frente al límite, y si encontró exactamente los servidores.
+  El primer barrido da de alta los destinos; los siguientes los ven existentes.
+
+Con --check sale con 1 si algún barrido no encuentra todos los servidores, da
+alguno de más o supera su tasa en más de un 2 %.
+
+Uso:
+    python -m benchmarks.bench_discovery
+    python -m benchmarks.bench_discovery --red 127.42.0.0/20 --tasa 1000 5000 --check
+    python -m benchmarks.bench_discovery --icmp        # también echo ICMP (todos responden)
+"""
+import argparse
+import asyncio
+import ipaddress
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import sqlite_standin
+
+
+def servir(hosts, conexion):
+    """Proceso hijo: un servidor en cada host de `hosts`, todos en el mismo puerto; envía el puerto."""
+    async def principal():
+        primero = await asyncio.start_server(lambda r, w: w.close(), hosts[0], 0, backlog=1024)
+        puerto = primero.sockets[0].getsockname()[1]
+        servidores = [primero] + [await asyncio.start_server(lambda r, w: w.close(), host, puerto, backlog=1024)
+                                  for host in hosts[1:]]
+        conexion.send(puerto)
+        await asyncio.Event().wait()
+    asyncio.run(principal())
+
+
+def csv_dispositivos(filas: int) -> str:
+    lineas = ["nombre,host,metodo,puerto,intervalo_s,activo"]
+    for i in range(filas):
+        host = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        if i % 5 == 0:
+            lineas.append(f"ping{i},{host},icmp,,300,1")
+        else:
+            lineas.append(f"web{i},{host},tcp,{80 + i % 3},60,")
+    return "\n".join(lineas) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-rows", type=int, default=20000)
+    parser.add_argument("--red", default="127.42.0.0/22")
+    parser.add_argument("--cada", type=int, default=7, help="un servidor TCP cada N hosts de la red")
+    parser.add_argument("--tasa", type=float, nargs="+", default=[500, 2000, 5000], help="sondas por segundo")
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--icmp", action="store_true", help="enviar también un echo ICMP a cada host")
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    red = ipaddress.ip_network(args.red)
+    hosts = [str(h) for h in red.hosts()]
+    servidos = hosts[::args.cada]
+    correcto = True
+
+    with tempfile.TemporaryDirectory(prefix="bench_discovery_") as workdir:
+        os.environ["NETMONITOR_METRICS_DIR"] = os.path.join(workdir, "metrics")
+        from config.cache import Generation
+        Generation.DIRECTORY = os.path.join(workdir, "cache")
+        from config.database import DatabaseConfig
+        from services.dispositivo_service import DispositivoService
+
+        path = os.path.join(workdir, "bench.sqlite3")
+        connection = sqlite_standin.SQLiteConnection(path)
+        sqlite_standin.seed(connection, 0, "x")
+        connection.close()
+        service = DispositivoService()
+        service.repository.db_config = DatabaseConfig(configs=[{"host": "sqlite", "database": path}],
+                                                      factory=sqlite_standin.sqlite_factory)
+        service.MAX_IMPORT_ROWS = float("inf")
+        service.MAX_SONDAS_DESCUBRIMIENTO = float("inf")
+        service.MAX_TASA_DESCUBRIMIENTO = float("inf")
+
+        contenido = csv_dispositivos(args.import_rows)
+        print(f"importación de {args.import_rows:,} filas CSV")
+        for etapa in ("nuevas", "repetidas"):
+            inicio = time.perf_counter()
+            result = service.import_devices(service.parse_import(contenido, "csv"))
+            segundos = time.perf_counter() - inicio
+            print(f"  {etapa:<10} {result['insertados']:>8,} insertadas {len(result['errores']):>8,} errores "
+                  f"{segundos:>8.3f} s {args.import_rows / segundos:>12,.0f} filas/s")
+
+        padre, hijo = multiprocessing.Pipe()
+        servidor = multiprocessing.Process(target=servir, args=(servidos, hijo), daemon=True)
+        servidor.start()
+        puerto = padre.recv()
+        esperados = {(host, "tcp", puerto) for host in servidos}
+        if args.icmp:
+            esperados |= {(host, "icmp", 0) for host in hosts}
+
+        print(f"\ndescubrimiento de {red} ({len(hosts):,} hosts, servidores TCP en {len(servidos):,}"
+              f"{', ICMP' if args.icmp else ''})")
+        print(f"  {'tasa':>8} {'segundos':>9} {'hosts/s':>9} {'sondas/s':>9} {'respuestas':>11} "
+              f"{'nuevos':>7} {'faltan':>7} {'sobran':>7}")
+        try:
+            for tasa in args.tasa:
+                result = service.discover_devices({"red": args.red, "puertos": [puerto], "icmp": args.icmp,
+                                                   "tasa": tasa, "timeout": args.timeout})
+                if not result["success"]:
+                    print(result["message"])
+                    return 1
+                encontrados = {(r["host"], r["metodo"], r["puerto"]) for r in result["respuestas"]}
+                faltan, sobran = len(esperados - encontrados), len(encontrados - esperados)
+                print(f"  {tasa:>8,.0f} {result['segundos']:>9.3f} {result['hosts_por_segundo']:>9,.0f} "
+                      f"{result['sondas_por_segundo']:>9,.0f} {len(encontrados):>11,} {result['nuevos']:>7,} "
+                      f"{faltan:>7} {sobran:>7}")
+                if faltan or sobran or result["sondas_por_segundo"] > tasa * 1.02:
+                    correcto = False
+        finally:
+            servidor.terminate()
+
+    if args.check and not correcto:
+        print("Algún barrido no encontró exactamente los servidores o superó su tasa")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# benchmarks/bench_failover.py
+"""Mide la latencia de failover con el primario caído, bajo carga.
+
+El primario simulado tarda `--connect-timeout` segundos en fallar (como un
+host que no responde). Sin memoria de salud cada petición pagaría ese
+timeout; con el circuit breaker solo lo pagan las sondas.
+
+Uso:
+    python -m benchmarks.bench_failover --threads 8 --requests 500
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from benchmarks.standin import SimulatedConnection
+from config.database import DatabaseConfig
+
+CONFIGS = [
+    {"host": "primary.invalid", "database": "netmonitor", "user": "bench", "password": "x"},
+    {"host": "secondary.invalid", "database": "netmonitor", "user": "bench", "password": "x"},
+]
+
+
+def make_factory(connect_timeout, primary_down):
+    def factory(**config):
+        if config["host"] == "primary.invalid" and primary_down["value"]:
+            time.sleep(connect_timeout)
+            raise mysql.connector.errors.InterfaceError("Can't connect to MySQL server (simulado)")
+        return SimulatedConnection(0.003, 0.0003, **config)
+    return factory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--connect-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    primary_down = {"value": True}
+    db_config = DatabaseConfig(configs=CONFIGS, factory=make_factory(args.connect_timeout, primary_down))
+
+    def one_request(_):
+        start = time.perf_counter()
+        with db_config.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        latencies = sorted(executor.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"primario caído: p50={p50:.2f} ms  p99={p99:.2f} ms  max={latencies[-1] * 1000:.2f} ms  "
+          f"throughput={args.requests / elapsed:.1f} req/s")
+    print("estado:", db_config.get_failover().snapshot())
+
+    # Recuperación del primario: la sonda de fondo debe hacer failback sola
+    primary_down["value"] = False
+    deadline = time.monotonic() + DatabaseConfig.FAILOVER_MAX_BACKOFF
+    while db_config.get_failover().breakers[0].state != "closed" and time.monotonic() < deadline:
+        time.sleep(0.1)
+    with db_config.get_connection():
+        pass
+    print("tras recuperar el primario:", db_config.get_failover().snapshot()["active_endpoint"])
+    DatabaseConfig.close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/bench_history.py
+"""Histórico de dispositivos: escritura por lotes y consultas de rango con meses de datos.
+
+Siembra en un SQLite temporal (ver sqlite_standin.py) el histórico de
+`--devices` dispositivos comprobados cada `--interval` segundos durante
+`--days` días, respetando la retención de cada nivel:
+
+- los dos últimos días pasan por el camino real del monitor: cada resultado
+  entra en AcumuladorMuestras y se escribe por lotes (muestras cada 5 s de
+  tráfico simulado, agregados cada 60 s). Mide muestras por segundo.
+- lo anterior se siembra directamente como agregados (1m los últimos 14
+  días; 1h y 1d todo el periodo), como si lo hubiera escrito el monitor.
+
+Después mide HistorialService.get_history (resolución automática) para
+rangos de 1 hora a todo el periodo, en dispositivos al azar: p50/p95 en ms,
+nivel elegido y puntos devueltos. Con --raw compara con pedir las muestras
+crudas del último día.
+
+Uso:
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --devices 50 --days 180 --raw
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks import sqlite_standin
+
+RANGOS = [("1 hora", 3600), ("6 horas", 6 * 3600), ("1 día", 86400), ("7 días", 7 * 86400),
+          ("30 días", 30 * 86400), ("90 días", 90 * 86400), ("180 días", 180 * 86400), ("1 año", 365 * 86400)]
+
+
+def latencia(dispositivo_id: int, ts: int):
+    """Latencia sintética (ms) o None si la comprobación falla (~2 %)."""
+    r = random.Random(dispositivo_id * 1000003 + ts)
+    return None if r.random() < 0.02 else 1 + dispositivo_id % 20 + r.random() * 5
+
+
+def sembrar_agregados(historial, resoluciones, devices: int, desde: int, hasta: int, interval: int):
+    """Agregados sintéticos de [desde, hasta) sin pasar por muestras crudas."""
+    por_bucket = {segundos: max(1, segundos // interval) for segundos in resoluciones.values()}
+    filas = []
+    for nombre, segundos in resoluciones.items():
+        inicio = desde - desde % segundos
+        for dispositivo_id in range(1, devices + 1):
+            for bucket in range(inicio, hasta - hasta % segundos, segundos):
+                muestras = por_bucket[segundos]
+                exitos = muestras - muestras // 50
+                media = latencia(dispositivo_id, bucket) or 5.0
+                filas.append((dispositivo_id, segundos, bucket, muestras, exitos, media * exitos,
+                              media * 0.5, media * 2))
+                if len(filas) >= 20000:
+                    historial.repository.acumular_agregados(filas)
+                    filas = []
+    if filas:
+        historial.repository.acumular_agregados(filas)
+
+
+def ingerir(historial, acumulador, devices: int, desde: int, hasta: int, interval: int):
+    """Resultados de [desde, hasta) por el camino del monitor. Devuelve muestras escritas."""
+    from services.sondeo_service import Resultado
+    total = 0
+    siguiente_agregado = desde + 60
+    for ts in range(desde, hasta, 5):
+        # Cada dispositivo cae en una ranura de 5 s de su intervalo
+        for dispositivo_id in range(1, devices + 1):
+            if (ts + dispositivo_id * 5) % interval < 5:
+                valor = latencia(dispositivo_id, ts)
+                acumulador.agregar(Resultado(dispositivo_id, valor is not None, valor,
+                                             None if valor is not None else "Tiempo de espera agotado", ts))
+        filas = acumulador.extraer_muestras()
+        if filas:
+            total += historial.repository.insertar_muestras(filas)
+        if ts >= siguiente_agregado:
+            siguiente_agregado += 60
+            historial.repository.acumular_agregados(acumulador.extraer_agregados())
+    historial.repository.acumular_agregados(acumulador.extraer_agregados())
+    return total
+
+
+def medir(historial, devices: int, desde: int, hasta: int, repeticiones: int, resolucion: str = None):
+    tiempos, puntos, nivel = [], 0, None
+    for _ in range(repeticiones):
+        dispositivo_id = random.randint(1, devices)
+        inicio = time.perf_counter()
+        result = historial.get_history(dispositivo_id, desde, hasta, resolucion)
+        tiempos.append(time.perf_counter() - inicio)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        puntos, nivel = len(result["puntos"]), result["resolucion"]
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2] * 1000, tiempos[int(len(tiempos) * 0.95)] * 1000, nivel, puntos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--interval", type=int, default=30, help="segundos entre comprobaciones")
+    parser.add_argument("--repeat", type=int, default=50, help="consultas por rango")
+    parser.add_argument("--raw", action="store_true", help="comparar con el último día en crudo")
+    args = parser.parse_args()
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory(prefix="bench_history_") as workdir:
+        from config.cache import Generation
+        Generation.DIRECTORY = os.path.join(workdir, "cache")
+        from config.database import DatabaseConfig
+        from services.historial_service import AcumuladorMuestras, HistorialService
+
+        path = os.path.join(workdir, "bench.sqlite3")
+        connection = sqlite_standin.SQLiteConnection(path)
+        sqlite_standin.seed(connection, 0, "x")
+        sqlite_standin.seed_devices(connection, [(f"disp{i}", f"10.0.{i >> 8}.{i & 255}", "tcp", 443, args.interval)
+                                                 for i in range(args.devices)])
+        connection.close()
+
+        historial = HistorialService()
+        db_config = DatabaseConfig(configs=[{"host": "sqlite", "database": path}],
+                                   factory=sqlite_standin.sqlite_factory)
+        historial.repository.db_config = db_config
+        historial.dispositivos.db_config = db_config
+
+        ahora = int(time.time())
+        crudo_desde = ahora - historial.RETENCION["raw"]
+        inicio = time.perf_counter()
+        sembrar_agregados(historial, {"1m": 60}, args.devices,
+                          max(ahora - historial.RETENCION["1m"], ahora - args.days * 86400), crudo_desde,
+                          args.interval)
+        sembrar_agregados(historial, {"1h": 3600, "1d": 86400}, args.devices, ahora - args.days * 86400,
+                          crudo_desde, args.interval)
+        sembrado = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        muestras = ingerir(historial, AcumuladorMuestras(), args.devices, crudo_desde, ahora, args.interval)
+        ingesta = time.perf_counter() - inicio
+
+        connection = sqlite_standin.SQLiteConnection(path)
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM device_rollups")
+        agregados = cursor.fetchone()[0]
+        connection.close()
+
+        print(f"{args.devices} dispositivos cada {args.interval} s, {args.days} días "
+              f"({os.path.getsize(path) / 1e6:.0f} MB en SQLite)")
+        print(f"  agregados            {agregados:,} filas (sembrado directo en {sembrado:.1f} s)")
+        print(f"  ingesta              {muestras:,} muestras en {ingesta:.1f} s "
+              f"({muestras / ingesta:,.0f} muestras/s, con sus agregados 1m/1h/1d)")
+        print(f"  {'rango':<10} {'nivel':>5} {'puntos':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for nombre, segundos in RANGOS:
+            if segundos > args.days * 86400:
+                break
+            p50, p95, nivel, puntos = medir(historial, args.devices, ahora - segundos, ahora, args.repeat)
+            print(f"  {nombre:<10} {nivel:>5} {puntos:>7} {p50:8.2f} {p95:8.2f}")
+        if args.raw:
+            p50, p95, nivel, puntos = medir(historial, args.devices, ahora - 86400, ahora, args.repeat, "raw")
+            print(f"  {'1 día':<10} {nivel:>5} {puntos:>7} {p50:8.2f} {p95:8.2f}   (crudo forzado)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# benchmarks/bench_list_path.py
+"""Memoria y throughput del camino de listado de usuarios, fila -> JSON.
+
+Siembra N usuarios en un SQLite temporal (ver sqlite_standin.py), ejecuta el
+SELECT real de los listados (UsuarioRepository._select_listado) y compara:
+
+    dicts    cursor de diccionarios -> Usuario.from_dict -> to_dict -> jsonify
+             (un dict por fila del cursor, otro por to_dict y un __dict__ por Usuario)
+    tuplas   cursor de tuplas -> Usuario.fabrica (alias resueltos una vez por
+             consulta) -> Usuario.lista_json (sin dicts intermedios)
+
+Para cada camino informa, con el mejor de --repeat intentos, el tiempo de
+lectura y construcción, el de serialización, filas por segundo, la memoria
+que retienen los Usuario construidos y el pico de memoria de todo el camino
+(tracemalloc). Comprueba además que ambos producen exactamente el mismo JSON.
+
+Uso:
+    python -m benchmarks.bench_list_path                    # 100k usuarios
+    python -m benchmarks.bench_list_path --users 10000 100000 --include-rol
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+
+from benchmarks import sqlite_standin
+from models.usuario import Usuario
+from repositories.usuario_repository import UsuarioRepository
+
+# Hash de relleno: el listado nunca lee password_hash
+PASSWORD_HASH = "$2b$04$" + "x" * 53
+
+
+def leer_dicts(connection, query):
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(query)
+    usuarios = [Usuario.from_dict(row) for row in cursor.fetchall()]
+    cursor.close()
+    return usuarios
+
+
+def leer_tuplas(connection, query):
+    cursor = connection.cursor()
+    cursor.execute(query)
+    usuarios = UsuarioRepository._usuarios(cursor.description, cursor.fetchall())
+    cursor.close()
+    return usuarios
+
+
+def serializar_dicts(json_provider, usuarios):
+    # Lo que hace jsonify en modo no debug
+    return json_provider.dumps([u.to_dict() for u in usuarios], separators=(",", ":"))
+
+
+def serializar_tuplas(_json_provider, usuarios):
+    return Usuario.lista_json(usuarios)
+
+
+CAMINOS = {
+    "dicts": (leer_dicts, serializar_dicts),
+    "tuplas": (leer_tuplas, serializar_tuplas),
+}
+
+
+def medir_tiempo(connection, query, json_provider, leer, serializar, repeat):
+    """Mejor (lectura, serialización) en segundos de `repeat` intentos."""
+    mejor_lectura = mejor_json = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        inicio = time.perf_counter()
+        usuarios = leer(connection, query)
+        leido = time.perf_counter()
+        texto = serializar(json_provider, usuarios)
+        fin = time.perf_counter()
+        mejor_lectura = min(mejor_lectura, leido - inicio)
+        mejor_json = min(mejor_json, fin - leido)
+        del usuarios, texto
+    return mejor_lectura, mejor_json
+
+
+def medir_memoria(connection, query, json_provider, leer, serializar):
+    """(bytes retenidos por los Usuario, pico de todo el camino) con tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        usuarios = leer(connection, query)
+        retenido = tracemalloc.get_traced_memory()[0] - base
+        texto = serializar(json_provider, usuarios)
+        pico = tracemalloc.get_traced_memory()[1] - base
+        del usuarios, texto
+    finally:
+        tracemalloc.stop()
+    return retenido, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--include-rol", action="store_true", help="listado con ?include=rol (JOIN a roles)")
+    args = parser.parse_args()
+
+    json_provider = Flask(__name__).json
+    query = UsuarioRepository()._select_listado(args.include_rol) + " ORDER BY u.created_at DESC, u.id DESC"
+
+    for total in args.users:
+        with tempfile.TemporaryDirectory(prefix="bench_list_") as workdir:
+            connection = sqlite_standin.SQLiteConnection(os.path.join(workdir, "bench.sqlite3"))
+            # seed añade bench_admin a los N usuarios
+            sqlite_standin.seed(connection, total - 1, PASSWORD_HASH)
+
+            textos = {nombre: serializar(json_provider, leer(connection, query))
+                      for nombre, (leer, serializar) in CAMINOS.items()}
+            iguales = textos["dicts"] == textos["tuplas"]
+            tamano = len(textos["dicts"])
+            del textos
+
+            print(f"\n{total:,} usuarios{' con rol' if args.include_rol else ''} "
+                  f"(JSON {tamano / 1e6:.1f} MB, idéntico: {'sí' if iguales else 'NO'})")
+            print(f"  {'camino':8} {'lectura':>10} {'json':>10} {'total':>10} {'filas/s':>10} "
+                  f"{'retenido':>11} {'pico':>11}")
+            for nombre, (leer, serializar) in CAMINOS.items():
+                lectura, serial = medir_tiempo(connection, query, json_provider, leer, serializar, args.repeat)
+                retenido, pico = medir_memoria(connection, query, json_provider, leer, serializar)
+                print(f"  {nombre:8} {lectura * 1000:8.1f}ms {serial * 1000:8.1f}ms "
+                      f"{(lectura + serial) * 1000:8.1f}ms {total / (lectura + serial):10,.0f} "
+                      f"{retenido / 1e6:9.1f}MB {pico / 1e6:9.1f}MB")
+            connection.close()
+            if not iguales:
+                raise SystemExit("Los dos caminos no producen el mismo JSON")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_login.py
+"""Prueba de carga del login: throughput por núcleo con bcrypt inline vs pool.
+
+Lanza `--clients` hilos haciendo login contra un repositorio en memoria
+(sin MySQL) y, en paralelo, mide la latencia de un endpoint "barato" para
+ver cuánto lo penaliza la tormenta de logins.
+
+Uso:
+    python -m benchmarks.bench_login --clients 32 --seconds 5 --rounds 10
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models.usuario import Usuario
+from services.password_service import PasswordService
+from services.usuario_service import UsuarioService
+
+
+class MemoryRepository:
+    """Repositorio mínimo con un único usuario, para aislar el coste de bcrypt."""
+
+    def __init__(self, password):
+        self.usuario = Usuario(id=1, nombre='bench', email='bench@example.com',
+                               password_hash=Usuario.hash_password(password), activo=1,
+                               intentos_fallidos=0)
+
+    def find_by_username_or_email(self, _):
+        return Usuario(**{s: getattr(self.usuario, s) for s in Usuario.__slots__})
+
+    def registrar_login_exitoso(self, *args):
+        pass
+
+    def registrar_login_fallido(self, *args):
+        return 0
+
+
+class InlinePasswordService:
+    """Comportamiento anterior: bcrypt en el hilo de la petición."""
+
+    def verificar(self, usuario, password):
+        return usuario.verify_password(password)
+
+
+def run(label, service, clients, seconds):
+    stop = time.monotonic() + seconds
+    counts = {'ok': 0, 'rechazadas': 0}
+    lock = threading.Lock()
+
+    def client():
+        while time.monotonic() < stop:
+            result = service.authenticate_user('bench', 'secreto123')
+            with lock:
+                counts['ok' if result['success'] else 'rechazadas'] += 1
+            if not result['success']:
+                time.sleep(0.05)  # un cliente real reintenta tras un 503, no en bucle
+
+    def cheap_latency():
+        samples = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            sum(range(2000))  # trabajo Python trivial, como un endpoint barato
+            samples.append(time.perf_counter() - start)
+            time.sleep(0.01)
+        return samples
+
+    with ThreadPoolExecutor(max_workers=clients + 1) as executor:
+        probe = executor.submit(cheap_latency)
+        for _ in range(clients):
+            executor.submit(client)
+    samples = sorted(probe.result())
+
+    cores = os.cpu_count() or 1
+    rate = counts['ok'] / seconds
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000 if samples else 0.0
+    print(f"{label:<8} logins/s={rate:8.1f}  por núcleo={rate / cores:7.1f}  "
+          f"rechazadas(503)={counts['rechazadas']:5d}  endpoint barato p99={p99:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=Usuario.BCRYPT_ROUNDS, help='coste bcrypt')
+    parser.add_argument('--queue', type=int, default=PasswordService.MAX_COLA)
+    args = parser.parse_args()
+
+    Usuario.BCRYPT_ROUNDS = args.rounds
+    repository = MemoryRepository('secreto123')
+    print(f"{args.clients} clientes, {args.seconds:.0f}s, bcrypt rounds={args.rounds}, núcleos={os.cpu_count()}")
+
+    service = UsuarioService()
+    service.usuario_repository = repository
+
+    service.password_service = InlinePasswordService()
+    run('inline', service, args.clients, args.seconds)
+
+    pool = PasswordService(max_cola=args.queue)
+    service.password_service = pool
+    run('pool', service, args.clients, args.seconds)
+    stats = pool.stats()
+    print(f"pool: espera en cola media={stats['espera_cola']['avg_ms']} ms  "
+          f"hash medio={stats['hash']['avg_ms']} ms  rechazos={stats['rechazos']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_polling.py
+"""Throughput del monitor de dispositivos (scripts/monitor.py) en un solo núcleo.
+
+Levanta `--listeners` servidores TCP locales en un proceso aparte, siembra
+`--devices` dispositivos en un SQLite temporal (ver sqlite_standin.py) que
+apuntan a ellos (una fracción `--down-fraction` a un puerto cerrado, que
+rechaza la conexión, y `--icmp-fraction` con ICMP a loopback) y ejecuta el
+Monitor real: planificador asyncio, reglas de estado y escritura por lotes.
+
+Informa comprobaciones por minuto frente al objetivo (dispositivos / intervalo
+* 60), retraso de arranque respecto al vencimiento (p50/p95/p99/máx), CPU del
+proceso del monitor (fracción de un núcleo), escrituras por lotes, cambios
+de estado y filas guardadas en el histórico. Con --check sale con 1 si no alcanza el 95 % del objetivo.
+
+Uso:
+    python -m benchmarks.bench_polling                          # 2000 disp. cada 10 s = 12k/min
+    python -m benchmarks.bench_polling --devices 5000 --interval 20 --seconds 60
+    python -m benchmarks.bench_polling --icmp-fraction 0.2 --check
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+from benchmarks import sqlite_standin
+
+
+def servir(listeners: int, conexion):
+    """Proceso hijo: `listeners` servidores que aceptan y cierran; envía sus puertos."""
+    async def principal():
+        servidores = [await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0, backlog=1024)
+                      for _ in range(listeners)]
+        conexion.send([s.sockets[0].getsockname()[1] for s in servidores])
+        await asyncio.Event().wait()
+    asyncio.run(principal())
+
+
+def puerto_cerrado() -> int:
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    puerto = s.getsockname()[1]
+    s.close()
+    return puerto
+
+
+def dispositivos(args, puertos):
+    cerrado = puerto_cerrado()
+    caidos = int(args.devices * args.down_fraction)
+    icmp = int(args.devices * args.icmp_fraction)
+    filas = []
+    for i in range(args.devices):
+        # Una IP de loopback por dispositivo (127.0.0.0/8 llega entero al host):
+        # la clave única es (host, método, puerto)
+        host = f"127.{1 + (i >> 16)}.{(i >> 8) & 255}.{i & 255}"
+        if i < icmp:
+            filas.append((f"icmp{i}", host, "icmp", 0, args.interval))
+        elif i < icmp + caidos:
+            filas.append((f"caido{i}", host, "tcp", cerrado, args.interval))
+        else:
+            filas.append((f"disp{i}", host, "tcp", puertos[i % len(puertos)], args.interval))
+    return filas
+
+
+def percentil(valores, fraccion):
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(len(valores) * fraccion))]
+
+
+async def medir(monitor, args):
+    planificador = monitor.planificador
+    tarea = asyncio.create_task(monitor.ejecutar())
+    await asyncio.sleep(args.warmup)
+    inicial = planificador.comprobaciones
+    planificador.retrasos(reiniciar=True)
+    cpu, reloj = time.process_time(), time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    cpu, reloj = time.process_time() - cpu, time.perf_counter() - reloj
+    comprobaciones = planificador.comprobaciones - inicial
+    retrasos = sorted(planificador.retrasos())
+    monitor.detener()
+    await tarea
+    return comprobaciones, reloj, cpu, retrasos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--interval", type=int, default=10, help="segundos entre comprobaciones de cada dispositivo")
+    parser.add_argument("--seconds", type=float, default=60.0, help="duración medida")
+    parser.add_argument("--warmup", type=float, default=None, help="segundos sin medir (por defecto, un intervalo)")
+    parser.add_argument("--listeners", type=int, default=20)
+    parser.add_argument("--down-fraction", type=float, default=0.1)
+    parser.add_argument("--icmp-fraction", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--check", action="store_true", help="sale con 1 si no alcanza el 95 %% del objetivo")
+    args = parser.parse_args()
+    if args.warmup is None:
+        args.warmup = float(args.interval)
+
+    with tempfile.TemporaryDirectory(prefix="bench_polling_") as workdir:
+        # Generaciones y métricas aisladas de las reales, antes de importar el monitor
+        os.environ["NETMONITOR_METRICS_DIR"] = os.path.join(workdir, "metrics")
+        from config.cache import Generation
+        Generation.DIRECTORY = os.path.join(workdir, "cache")
+        from config.database import DatabaseConfig
+        from services.monitor_service import Monitor
+
+        padre, hijo = multiprocessing.Pipe()
+        servidor = multiprocessing.Process(target=servir, args=(args.listeners, hijo), daemon=True)
+        servidor.start()
+        puertos = padre.recv()
+
+        path = os.path.join(workdir, "bench.sqlite3")
+        connection = sqlite_standin.SQLiteConnection(path)
+        sqlite_standin.seed(connection, 0, "x")
+        sqlite_standin.seed_devices(connection, dispositivos(args, puertos))
+        connection.close()
+
+        monitor = Monitor(max_concurrentes=args.concurrency, timeout=args.timeout)
+        db_config = DatabaseConfig(configs=[{"host": "sqlite", "database": path}],
+                                   factory=sqlite_standin.sqlite_factory)
+        monitor.repository.db_config = db_config
+        monitor.historial.repository.db_config = db_config
+        monitor.eventos.db_config = db_config
+        try:
+            comprobaciones, reloj, cpu, retrasos = asyncio.run(medir(monitor, args))
+        finally:
+            servidor.terminate()
+
+        connection = sqlite_standin.SQLiteConnection(path)
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM device_samples")
+        muestras = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM device_rollups")
+        agregados = cursor.fetchone()[0]
+        connection.close()
+
+    objetivo = args.devices / args.interval * 60
+    por_minuto = comprobaciones / reloj * 60
+    print(f"{args.devices:,} dispositivos cada {args.interval} s, {args.seconds:.0f} s medidos "
+          f"({args.listeners} listeners, {args.down_fraction:.0%} caídos, {args.icmp_fraction:.0%} ICMP)")
+    print(f"  comprobaciones/min  {por_minuto:10,.0f}   objetivo {objetivo:,.0f} ({por_minuto / objetivo:.1%})")
+    print(f"  retraso ms          p50={percentil(retrasos, 0.5) * 1000:.2f} p95={percentil(retrasos, 0.95) * 1000:.2f} "
+          f"p99={percentil(retrasos, 0.99) * 1000:.2f} máx={(retrasos[-1] if retrasos else 0) * 1000:.2f}")
+    print(f"  CPU del monitor     {cpu / reloj:.1%} de un núcleo ({cpu / max(comprobaciones, 1) * 1e6:.0f} µs por comprobación)")
+    print(f"  escrituras en lote  {monitor.volcados}   cambios de estado {monitor.transiciones}")
+    print(f"  histórico           {muestras:,} muestras, {agregados:,} filas de agregados")
+    if args.check and por_minuto < objetivo * 0.95:
+        print("No alcanza el 95 % del objetivo")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
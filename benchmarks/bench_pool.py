@@ -0,0 +1,79 @@
+# benchmarks/bench_pool.py
+"""Compara latencia por petición con y sin pool de conexiones.
+
+Uso:
+    python -m benchmarks.bench_pool                 # sustituto simulado
+    python -m benchmarks.bench_pool --mysql         # MySQL real de DatabaseConfig
+    python -m benchmarks.bench_pool --threads 16 --requests 2000
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from benchmarks.standin import simulated_factory
+from config.database import DatabaseConfig
+
+# Una petición de login típica hacía 4 consultas, cada una en su propia conexión
+QUERIES_PER_REQUEST = 4
+
+
+def request_without_pool(config, factory):
+    for _ in range(QUERIES_PER_REQUEST):
+        connection = factory(**config)
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+
+def request_with_pool(db_config):
+    for _ in range(QUERIES_PER_REQUEST):
+        with db_config.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+
+
+def run(label, fn, threads, requests):
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<10} media={statistics.mean(latencies) * 1000:7.2f} ms  "
+          f"p50={p50:7.2f} ms  p99={p99:7.2f} ms  "
+          f"throughput={requests / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mysql", action="store_true", help="usar el MySQL configurado en DatabaseConfig")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    factory = mysql.connector.connect if args.mysql else simulated_factory()
+    db_config = DatabaseConfig(factory=None if args.mysql else factory)
+    DatabaseConfig.POOL_SIZE = args.threads
+    config = db_config.configs[0]
+
+    print(f"{args.requests} peticiones, {args.threads} hilos, {QUERIES_PER_REQUEST} consultas/petición")
+    run("sin pool", lambda: request_without_pool(config, factory), args.threads, args.requests)
+    run("con pool", lambda: request_with_pool(db_config), args.threads, args.requests)
+    DatabaseConfig.close_pools()
+
+
+if __name__ == "__main__":
+    main()
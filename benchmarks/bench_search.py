@@ -0,0 +1,144 @@
+# benchmarks/bench_search.py
+"""Latencia de búsqueda de usuarios: LIKE '%term%' vs índice FULLTEXT ngram.
+
+Crea una tabla temporal `bench_users_search` en el MySQL de DatabaseConfig
+con la misma forma que `users`, la llena con N usuarios sintéticos para cada
+escala y mide ambas consultas. La tabla se elimina al terminar.
+
+Antes de medir comprueba que MATCH devuelve las mismas filas que LIKE para
+cada término: un índice con filas de menos (p. ej. creado con las stopwords
+de InnoDB activas) sería más rápido por no encontrar nada. Si no coinciden
+termina con código 1.
+
+Uso:
+    python -m benchmarks.bench_search                       # 10k, 100k y 1M
+    python -m benchmarks.bench_search --sizes 10000 --repeat 50
+"""
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config.database import DatabaseConfig, WRITE
+from repositories.usuario_repository import UsuarioRepository
+
+TABLE = "bench_users_search"
+COLUMNS = "id, uuid, nombre, email, rol_id, activo, ultimo_acceso, created_at, updated_at"
+TERMS = ["ana", "rodri", "mx", "user_12", "gmail", "zq"]
+
+
+def create_table(cursor):
+    # Como en migrations/002_users_fulltext.sql: sin stopwords en el índice ngram
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(
+        f"CREATE TABLE {TABLE} ("
+        "id INT AUTO_INCREMENT PRIMARY KEY, uuid CHAR(36), nombre VARCHAR(50) UNIQUE, "
+        "email VARCHAR(150) UNIQUE, password_hash VARCHAR(255), rol_id INT, activo TINYINT, "
+        "ultimo_acceso DATETIME NULL, created_at DATETIME, updated_at DATETIME, "
+        "INDEX idx_created_at_id (created_at, id), "
+        "FULLTEXT INDEX ft_nombre_email (nombre, email) WITH PARSER ngram)"
+    )
+
+
+def seed(connection, cursor, total, start):
+    names = ["ana", "luis", "maria", "jose", "rodrigo", "carmen", "pedro", "sofia", "diego", "lucia"]
+    domains = ["gmail.com", "utnc.edu.mx", "hotmail.com", "empresa.mx"]
+    now = datetime(2025, 1, 1)
+    batch = []
+    for i in range(start, total):
+        base = f"{random.choice(names)}_{i}_{''.join(random.choices(string.ascii_lowercase, k=3))}"
+        created = now - timedelta(seconds=i)
+        batch.append((str(uuid.uuid4()), base, f"{base}@{random.choice(domains)}", "x",
+                      random.choice([1, 2]), 1, created, created))
+        if len(batch) == 5000:
+            insert(connection, cursor, batch)
+            batch = []
+    if batch:
+        insert(connection, cursor, batch)
+
+
+def insert(connection, cursor, rows):
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (uuid, nombre, email, password_hash, rol_id, activo, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows
+    )
+    connection.commit()
+
+
+def count_rows(cursor, where, params):
+    cursor.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE {where}", params)
+    return cursor.fetchone()[0]
+
+
+def time_query(cursor, query, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with DatabaseConfig().get_connection(WRITE) as connection:
+        cursor = connection.cursor()
+        create_table(cursor)
+        seeded = 0
+        mismatches = []
+        try:
+            for size in sorted(args.sizes):
+                seed(connection, cursor, size, seeded)
+                seeded = size
+                cursor.execute(f"ANALYZE TABLE {TABLE}")
+                cursor.fetchall()
+
+                print(f"\n{size:,} usuarios (límite {args.limit})")
+                for term in TERMS:
+                    escaped = UsuarioRepository._escape_like(term)
+                    like = f"%{escaped}%"
+                    prefix = f"{escaped}%"
+                    phrase = UsuarioRepository._ft_phrase(term)
+                    like_rows = count_rows(cursor, "(nombre LIKE %s OR email LIKE %s)", (like, like))
+                    ft_rows = count_rows(cursor, "MATCH(nombre, email) AGAINST (%s IN BOOLEAN MODE)", (phrase,))
+                    if ft_rows != like_rows:
+                        mismatches.append((size, term, like_rows, ft_rows))
+                    like_ms = time_query(
+                        cursor,
+                        f"SELECT {COLUMNS} FROM {TABLE} WHERE (nombre LIKE %s OR email LIKE %s) "
+                        "ORDER BY created_at DESC, id DESC LIMIT %s",
+                        (like, like, args.limit), args.repeat)
+                    ft_ms = time_query(
+                        cursor,
+                        f"SELECT {COLUMNS} FROM {TABLE} WHERE MATCH(nombre, email) AGAINST (%s IN BOOLEAN MODE) "
+                        "ORDER BY (nombre LIKE %s OR email LIKE %s) DESC, "
+                        "MATCH(nombre, email) AGAINST (%s IN BOOLEAN MODE) DESC, created_at DESC, id DESC LIMIT %s",
+                        (phrase, prefix, prefix, phrase, args.limit), args.repeat)
+                    print(f"  '{term}':  LIKE p50={like_ms[0]:8.2f} ms p99={like_ms[1]:8.2f} ms   "
+                          f"FULLTEXT p50={ft_ms[0]:8.2f} ms p99={ft_ms[1]:8.2f} ms   "
+                          f"filas {like_rows:,}/{ft_rows:,}")
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cursor.close()
+
+    if mismatches:
+        for size, term, like_rows, ft_rows in mismatches:
+            print(f"ERROR {size:,} usuarios, '{term}': LIKE {like_rows:,} filas, FULLTEXT {ft_rows:,}")
+        print("FULLTEXT no devuelve las mismas filas que LIKE: las latencias no son comparables")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_sse.py
+"""Reparto de eventos de dispositivos a muchos clientes SSE (services/eventos_service.py).
+
+Conecta `--clients` suscripciones asyncio al Publicador del proceso (como
+las del endpoint de asgi.py) sobre un SQLite temporal (ver sqlite_standin.py)
+y escribe `--rate` cambios de estado por segundo en device_events durante
+`--seconds` segundos, como el monitor. Una fracción `--slow` de clientes no
+lee nunca: deben desconectarse al llenar su cola sin frenar al resto.
+
+Informa la latencia de entrega (escritura en la BD -> cliente; p50/p99/máx),
+eventos entregados, clientes desconectados por lentos y consultas a la BD
+por segundo del publicador, frente a las que haría cada navegador sondeando
+/api/dispositivos cada `--poll` segundos.
+
+Uso:
+    python -m benchmarks.bench_sse
+    python -m benchmarks.bench_sse --clients 1000 --rate 200 --slow 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import sqlite_standin
+
+
+async def cliente(publicador, SuscripcionAsync, escritos, latencias, lento: bool, fin: asyncio.Event):
+    suscripcion = SuscripcionAsync(publicador.MAX_COLA)
+    await asyncio.to_thread(publicador.suscribir, suscripcion)
+    recibidos = 0
+    try:
+        while not fin.is_set() and not suscripcion.desbordada:
+            if lento:
+                await asyncio.sleep(0.5)
+                continue
+            await suscripcion.esperar(0.5)
+            ahora = time.perf_counter()
+            for texto in suscripcion.tomar():
+                if texto.startswith("id: "):
+                    evento_id = int(texto[4:texto.index("\n")])
+                    latencias.append(ahora - escritos[evento_id])
+                    recibidos += 1
+    finally:
+        publicador.desuscribir(suscripcion)
+    return recibidos, suscripcion.desbordada
+
+
+def escritor(repository, escritos, rate: int, seconds: float, parar: threading.Event):
+    """Hilo que inserta `rate` eventos por segundo en lotes de 100 ms, como los volcados del monitor."""
+    siguiente_id = 1
+    por_lote = max(1, rate // 10)
+    fin = time.perf_counter() + seconds
+    while time.perf_counter() < fin and not parar.is_set():
+        filas = [(siguiente_id + i, "up", "down", int(time.time()), None) for i in range(por_lote)]
+        # El id se fija a mano para apuntar el instante de escritura antes de que sea visible
+        ahora = time.perf_counter()
+        for fila in filas:
+            escritos[fila[0]] = ahora
+        repository.insertar_con_id(filas)
+        siguiente_id += por_lote
+        time.sleep(0.1)
+    return siguiente_id - 1
+
+
+async def medir(args, publicador, SuscripcionAsync, repository):
+    escritos, latencias = {}, []
+    fin = asyncio.Event()
+    lentos = int(args.clients * args.slow)
+    tareas = [asyncio.create_task(cliente(publicador, SuscripcionAsync, escritos, latencias, i < lentos, fin))
+              for i in range(args.clients)]
+    while len(publicador) < args.clients:
+        await asyncio.sleep(0.05)
+    consultas = publicador.consultas
+    inicio = time.perf_counter()
+    parar = threading.Event()
+    total = await asyncio.to_thread(escritor, repository, escritos, args.rate, args.seconds, parar)
+    # Margen para el último lote (INTERVALO del publicador + entrega)
+    await asyncio.sleep(publicador.INTERVALO * 2 + 0.2)
+    reloj = time.perf_counter() - inicio
+    consultas = publicador.consultas - consultas
+    fin.set()
+    resultados = await asyncio.gather(*tareas)
+    return total, latencias, resultados, consultas, reloj, lentos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rate", type=int, default=100, help="cambios de estado por segundo")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--slow", type=float, default=0.02, help="fracción de clientes que no leen")
+    parser.add_argument("--poll", type=float, default=5.0, help="intervalo del sondeo alternativo por navegador")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_sse_") as workdir:
+        os.environ["NETMONITOR_METRICS_DIR"] = os.path.join(workdir, "metrics")
+        from config.cache import Generation
+        Generation.DIRECTORY = os.path.join(workdir, "cache")
+        from config.database import DatabaseConfig
+        from repositories.evento_repository import EventoRepository
+        from services.eventos_service import Publicador, SuscripcionAsync
+
+        path = os.path.join(workdir, "bench.sqlite3")
+        connection = sqlite_standin.SQLiteConnection(path)
+        sqlite_standin.seed(connection, 0, "x")
+        sqlite_standin.seed_devices(connection, [(f"disp{i}", f"10.0.{i >> 8}.{i & 255}", "tcp", 443, 60)
+                                                 for i in range(100)])
+        connection.close()
+        db_config = DatabaseConfig(configs=[{"host": "sqlite", "database": path}],
+                                   factory=sqlite_standin.sqlite_factory)
+
+        class Repositorio(EventoRepository):
+            def insertar_con_id(self, filas):
+                with self.db_config.get_connection() as con:
+                    cursor = con.cursor()
+                    cursor.executemany("INSERT INTO device_events (id, dispositivo_id, anterior, estado, ts, error) "
+                                       "VALUES (%s, 1, %s, %s, %s, %s)", filas)
+                    con.commit()
+                    cursor.close()
+
+        publicador = Publicador()
+        publicador.MAX_SUSCRIPTORES = max(publicador.MAX_SUSCRIPTORES, args.clients)
+        publicador.repository.db_config = db_config
+        publicador.dispositivos.db_config = db_config
+        repository = Repositorio()
+        repository.db_config = db_config
+
+        total, latencias, resultados, consultas, reloj, lentos = asyncio.run(
+            medir(args, publicador, SuscripcionAsync, repository))
+
+    latencias.sort()
+    rapidos = resultados[lentos:]
+    completos = sum(1 for recibidos, _ in rapidos if recibidos == total)
+    desbordados = sum(1 for _, desbordada in resultados if desbordada)
+    print(f"{args.clients} clientes ({lentos} sin leer), {args.rate} eventos/s durante {args.seconds:.0f} s "
+          f"= {total:,} eventos")
+    if latencias:
+        print(f"  entrega ms           p50={latencias[len(latencias) // 2] * 1000:.1f} "
+              f"p99={latencias[int(len(latencias) * 0.99)] * 1000:.1f} máx={latencias[-1] * 1000:.1f}")
+    print(f"  clientes completos   {completos}/{len(rapidos)}   desconectados por lentos {desbordados}/{lentos}")
+    print(f"  consultas a la BD    {consultas / reloj:.1f}/s del publicador "
+          f"(sondeo por navegador cada {args.poll:.0f} s: {args.clients / args.poll:.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
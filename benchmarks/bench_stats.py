@@ -0,0 +1,109 @@
+# benchmarks/bench_stats.py
+"""Coste de /api/stats según el tamaño de users (services/estadisticas_service.py).
+
+Para cada tamaño de `--users` carga un SQLite temporal (ver sqlite_standin.py)
+con roles, estados, últimos accesos y bloqueos repartidos, y mide:
+
+- escaneo: los mismos números con consultas sobre users (GROUP BY por rol y
+  estado, rangos de ultimo_acceso, bloqueados), lo que haría el dashboard sin
+  agregados.
+- agregados: EstadisticasService sin caché (user_counts, user_access_days y
+  el rango de idx_users_bloqueado_hasta).
+- caché: get_stats() entre dos escrituras (memoria del proceso).
+
+Uso:
+    python -m benchmarks.bench_stats
+    python -m benchmarks.bench_stats --users 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import sqlite_standin
+
+ESCANEO = (
+    "SELECT rol_id, activo, COUNT(*) FROM users GROUP BY rol_id, activo",
+    "SELECT SUM(ultimo_acceso >= %s), SUM(ultimo_acceso >= %s), SUM(ultimo_acceso >= %s), "
+    "SUM(ultimo_acceso IS NULL) FROM users",
+    "SELECT COUNT(*) FROM users WHERE bloqueado_hasta > %s",
+)
+
+
+def preparar(path, usuarios):
+    """Carga `usuarios` usuarios y les reparte rol, estado, último acceso y bloqueos."""
+    random.seed(1)
+    connection = sqlite_standin.SQLiteConnection(path)
+    sqlite_standin.seed(connection, usuarios - 1, "x")
+    ahora = datetime.utcnow()
+    filas = []
+    for user_id in range(1, usuarios + 1):
+        acceso = ahora - timedelta(days=random.expovariate(1 / 20)) if random.random() < 0.8 else None
+        bloqueo = ahora + timedelta(minutes=10) if random.random() < 0.001 else None
+        filas.append((random.choice((1, 2, 2, 2, 3)), int(random.random() < 0.9), acceso, bloqueo, user_id))
+    cursor = connection.cursor()
+    cursor.executemany("UPDATE users SET rol_id = %s, activo = %s, ultimo_acceso = %s, bloqueado_hasta = %s "
+                       "WHERE id = %s", filas)
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_stats_") as workdir:
+        os.environ["NETMONITOR_METRICS_DIR"] = os.path.join(workdir, "metrics")
+        from config.cache import Generation
+        Generation.DIRECTORY = os.path.join(workdir, "cache")
+        from config.database import DatabaseConfig
+        from services.estadisticas_service import EstadisticasService, estadisticas_cache
+
+        print(f"{'usuarios':>10} {'escaneo ms':>12} {'agregados ms':>14} {'caché µs':>10}")
+        for usuarios in args.users:
+            path = os.path.join(workdir, f"users_{usuarios}.sqlite3")
+            preparar(path, usuarios)
+            db_config = DatabaseConfig(configs=[{"host": "sqlite", "database": path}],
+                                       factory=sqlite_standin.sqlite_factory)
+            service = EstadisticasService()
+            service.repository.db_config = db_config
+            service.repository.recalcular()
+
+            ahora = datetime.utcnow()
+            desde = [ahora - timedelta(days=dias) for dias in (1, 7, 30)]
+
+            def escaneo():
+                with db_config.get_connection() as con:
+                    cursor = con.cursor()
+                    cursor.execute(ESCANEO[0])
+                    cursor.fetchall()
+                    cursor.execute(ESCANEO[1], desde)
+                    cursor.fetchall()
+                    cursor.execute(ESCANEO[2], (ahora,))
+                    cursor.fetchall()
+                    cursor.close()
+
+            estadisticas_cache.invalidate_all()
+            t_escaneo = medir(escaneo, max(1, args.repeat // 4))
+            t_agregados = medir(service._calcular, args.repeat)
+            service.get_stats()
+            t_cache = medir(service.get_stats, args.repeat * 100)
+            print(f"{usuarios:>10,} {t_escaneo * 1000:>12.1f} {t_agregados * 1000:>14.3f} {t_cache * 1e6:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# benchmarks/bench_wsgi.py
+"""Entrada WSGI del benchmark: la app real apuntando a la BD sembrada.
+
+Gunicorn la carga con `benchmarks.bench_wsgi:app`. La configuración llega por
+variables de entorno (la fija bench_app.py al lanzar el servidor):
+
+    BENCH_BACKEND        sqlite (por defecto) o mysql
+    BENCH_SQLITE_PATH    fichero SQLite sembrado
+    BENCH_MYSQL_HOST / BENCH_MYSQL_PORT / BENCH_MYSQL_USER /
+    BENCH_MYSQL_PASSWORD / BENCH_MYSQL_DATABASE
+    BENCH_BCRYPT_ROUNDS  coste con el que se sembraron los hashes
+    BENCH_CACHE_DIR      directorio de generaciones de caché (aislado del real)
+    BENCH_DB_LATENCY_MS  latencia simulada por sentencia con SQLite (0 = ninguna)
+    BENCH_POOL_SIZE      conexiones por servidor de cada pool (DatabaseConfig.POOL_SIZE)
+
+Cada respuesta lleva `X-Bench-Queries`: sentencias SQL de esa petición.
+"""
+import os
+
+from config.cache import Generation
+
+# Antes de importar la app: las cachés crean sus Generation al importarse
+if os.environ.get("BENCH_CACHE_DIR"):
+    Generation.DIRECTORY = os.environ["BENCH_CACHE_DIR"]
+
+from app import app  # noqa: E402
+from benchmarks import sqlite_standin  # noqa: E402
+from config.database import DatabaseConfig  # noqa: E402
+from models.usuario import Usuario  # noqa: E402
+from repositories.usuario_repository import UsuarioRepository  # noqa: E402
+from routes import roles_routes, usuario_routes  # noqa: E402
+
+
+def mysql_config() -> dict:
+    return {
+        "host": os.environ.get("BENCH_MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("BENCH_MYSQL_PORT", "3306")),
+        "user": os.environ.get("BENCH_MYSQL_USER", "root"),
+        "password": os.environ.get("BENCH_MYSQL_PASSWORD", ""),
+        "database": os.environ.get("BENCH_MYSQL_DATABASE", "netmonitor_bench"),
+    }
+
+
+def sqlite_config() -> dict:
+    return {"host": "sqlite", "database": os.environ.get("BENCH_SQLITE_PATH", "bench.sqlite3")}
+
+
+def bench_db_config() -> DatabaseConfig:
+    """DatabaseConfig del benchmark según BENCH_BACKEND."""
+    if os.environ.get("BENCH_BACKEND", "sqlite") == "mysql":
+        import mysql.connector
+        return DatabaseConfig(configs=[mysql_config()],
+                              factory=sqlite_standin.counting_factory(mysql.connector.connect))
+    return DatabaseConfig(configs=[sqlite_config()], factory=sqlite_standin.sqlite_factory)
+
+
+def configurar():
+    sqlite_standin.LATENCIA = float(os.environ.get("BENCH_DB_LATENCY_MS", "0")) / 1000
+    if os.environ.get("BENCH_POOL_SIZE"):
+        DatabaseConfig.POOL_SIZE = int(os.environ["BENCH_POOL_SIZE"])
+    db_config = bench_db_config()
+    usuario_routes.usuario_service.usuario_repository.db_config = db_config
+    roles_routes.roles_service.repository.db_config = db_config
+    if os.environ.get("BENCH_BACKEND", "sqlite") != "mysql":
+        UsuarioRepository.SEARCH_BACKEND = "like"
+    # Mismo coste que los hashes sembrados: así el login no los rehashea
+    Usuario.BCRYPT_ROUNDS = int(os.environ.get("BENCH_BCRYPT_ROUNDS", "4"))
+
+
+@app.before_request
+def _reset_contador():
+    sqlite_standin.reset_queries()
+
+
+@app.after_request
+def _cabecera_consultas(response):
+    response.headers["X-Bench-Queries"] = str(sqlite_standin.queries())
+    return response
+
+
+configurar()
@@ -0,0 +1,562 @@
+# benchmarks/sqlite_standin.py
+"""Sustituto de MySQL sobre SQLite para el benchmark de la API.
+
+Expone una fábrica compatible con mysql.connector.connect(**config) que se
+pasa a DatabaseConfig(factory=...): los repositorios ejecutan su SQL real,
+traducido lo justo al dialecto de SQLite:
+
+- `%s` -> `?`, y `LIKE %s` -> `LIKE ? ESCAPE '\\'` (MySQL escapa con '\\').
+- `IF(` -> `iif(`; NOW() y LAST_INSERT_ID(expr) como funciones Python.
+- `INSERT IGNORE` -> `INSERT OR IGNORE`; `ON DUPLICATE KEY UPDATE` con
+  `VALUES(col)`, LEAST y GREATEST -> `ON CONFLICT DO UPDATE` con
+  `excluded.col`, min y max.
+- `DELETE ... LIMIT n` -> DELETE de los rowid de un SELECT ... LIMIT n.
+- nombre y email con COLLATE NOCASE, como la collation *_ci de MySQL.
+- Los triggers de agregados de users (migrations/006_user_stats.sql)
+  reescritos para SQLite; con --backend mysql se usan los de la migración.
+- information_schema.TABLES (approx_count) -> COUNT(*) sobre users.
+
+No es equivalente en semántica fina: SQLite evalúa las asignaciones de un
+UPDATE con los valores antiguos (MySQL de izquierda a derecha) y no tiene
+índices FULLTEXT, así que la búsqueda usa el backend 'like'. Sirve para
+comparar versiones del código, no para predecir la latencia con MySQL.
+
+sqlite_async_factory es la variante para AsyncDatabaseConfig (modo asyncio),
+con la interfaz de aiomysql que usan el pool y los repositorios. LATENCIA
+añade a cada sentencia una espera fija que simula el ida y vuelta de red a
+MySQL (time.sleep en síncrono, asyncio.sleep en asyncio): sin ella SQLite
+responde en microsegundos y la concurrencia de E/S no se nota.
+
+Cada sentencia suma en el contador de la petición en curso (ContextVar: vale
+para hilos y para tareas asyncio).
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+SCHEMA = """
+CREATE TABLE roles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    descripcion TEXT,
+    created_at TIMESTAMP
+);
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uuid TEXT NOT NULL,
+    nombre TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    password_hash TEXT NOT NULL,
+    rol_id INTEGER,
+    activo INTEGER DEFAULT 1,
+    ultimo_acceso TIMESTAMP,
+    intentos_fallidos INTEGER DEFAULT 0,
+    bloqueado_hasta TIMESTAMP,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    refresh_revocado_hasta REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX idx_users_created_at_id ON users (created_at, id);
+CREATE INDEX idx_users_bloqueado_hasta ON users (bloqueado_hasta);
+CREATE TABLE user_counts (
+    rol_id INTEGER NOT NULL,
+    activo INTEGER NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (rol_id, activo)
+);
+CREATE TABLE user_access_days (
+    dia DATE NOT NULL PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER users_stats_insert AFTER INSERT ON users BEGIN
+    INSERT INTO user_counts (rol_id, activo, total)
+    VALUES (COALESCE(NEW.rol_id, 0), iif(NEW.activo, 1, 0), 1)
+    ON CONFLICT DO UPDATE SET total = total + 1;
+    INSERT INTO user_access_days (dia, total)
+    SELECT date(NEW.ultimo_acceso), 1 WHERE NEW.ultimo_acceso IS NOT NULL
+    ON CONFLICT DO UPDATE SET total = total + 1;
+END;
+CREATE TRIGGER users_stats_update AFTER UPDATE OF rol_id, activo, ultimo_acceso ON users BEGIN
+    INSERT INTO user_counts (rol_id, activo, total)
+    SELECT COALESCE(OLD.rol_id, 0), iif(OLD.activo, 1, 0), -1
+    WHERE COALESCE(OLD.rol_id, 0) <> COALESCE(NEW.rol_id, 0) OR iif(OLD.activo, 1, 0) <> iif(NEW.activo, 1, 0)
+    ON CONFLICT DO UPDATE SET total = total - 1;
+    INSERT INTO user_counts (rol_id, activo, total)
+    SELECT COALESCE(NEW.rol_id, 0), iif(NEW.activo, 1, 0), 1
+    WHERE COALESCE(OLD.rol_id, 0) <> COALESCE(NEW.rol_id, 0) OR iif(OLD.activo, 1, 0) <> iif(NEW.activo, 1, 0)
+    ON CONFLICT DO UPDATE SET total = total + 1;
+    INSERT INTO user_access_days (dia, total)
+    SELECT date(OLD.ultimo_acceso), -1
+    WHERE OLD.ultimo_acceso IS NOT NULL AND date(OLD.ultimo_acceso) IS NOT date(NEW.ultimo_acceso)
+    ON CONFLICT DO UPDATE SET total = total - 1;
+    INSERT INTO user_access_days (dia, total)
+    SELECT date(NEW.ultimo_acceso), 1
+    WHERE NEW.ultimo_acceso IS NOT NULL AND date(OLD.ultimo_acceso) IS NOT date(NEW.ultimo_acceso)
+    ON CONFLICT DO UPDATE SET total = total + 1;
+END;
+CREATE TRIGGER users_stats_delete AFTER DELETE ON users BEGIN
+    INSERT INTO user_counts (rol_id, activo, total)
+    VALUES (COALESCE(OLD.rol_id, 0), iif(OLD.activo, 1, 0), -1)
+    ON CONFLICT DO UPDATE SET total = total - 1;
+    INSERT INTO user_access_days (dia, total)
+    SELECT date(OLD.ultimo_acceso), -1 WHERE OLD.ultimo_acceso IS NOT NULL
+    ON CONFLICT DO UPDATE SET total = total - 1;
+END;
+CREATE TABLE devices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    host TEXT NOT NULL,
+    metodo TEXT NOT NULL DEFAULT 'tcp',
+    puerto INTEGER NOT NULL DEFAULT 0,
+    intervalo_s INTEGER NOT NULL DEFAULT 60,
+    activo INTEGER NOT NULL DEFAULT 1,
+    estado TEXT NOT NULL DEFAULT 'desconocido',
+    latencia_ms REAL,
+    fallos_consecutivos INTEGER NOT NULL DEFAULT 0,
+    ultimo_chequeo TIMESTAMP,
+    ultimo_cambio TIMESTAMP,
+    ultimo_error TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE (host, metodo, puerto)
+);
+CREATE TABLE device_samples (
+    dispositivo_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    latencia_ms REAL,
+    PRIMARY KEY (dispositivo_id, ts)
+);
+CREATE INDEX idx_device_samples_ts ON device_samples (ts);
+CREATE TABLE device_rollups (
+    dispositivo_id INTEGER NOT NULL,
+    resolucion INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    muestras INTEGER NOT NULL,
+    exitos INTEGER NOT NULL,
+    latencia_suma REAL NOT NULL DEFAULT 0,
+    latencia_min REAL,
+    latencia_max REAL,
+    PRIMARY KEY (dispositivo_id, resolucion, bucket)
+);
+CREATE INDEX idx_device_rollups_resolucion_bucket ON device_rollups (resolucion, bucket);
+CREATE TABLE device_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dispositivo_id INTEGER NOT NULL,
+    anterior TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX idx_device_events_ts ON device_events (ts);
+"""
+
+# Mismo esquema para un MySQL dedicado al benchmark (--backend mysql)
+MYSQL_SCHEMA = [
+    "DROP TABLE IF EXISTS device_events",
+    "DROP TABLE IF EXISTS device_rollups",
+    "DROP TABLE IF EXISTS device_samples",
+    "DROP TABLE IF EXISTS devices",
+    "DROP TABLE IF EXISTS user_access_days",
+    "DROP TABLE IF EXISTS user_counts",
+    "DROP TABLE IF EXISTS users",
+    "DROP TABLE IF EXISTS roles",
+    "CREATE TABLE roles (id INT AUTO_INCREMENT PRIMARY KEY, nombre VARCHAR(50) NOT NULL UNIQUE, "
+    "descripcion VARCHAR(255), created_at DATETIME)",
+    "CREATE TABLE users (id INT AUTO_INCREMENT PRIMARY KEY, uuid CHAR(36) NOT NULL, "
+    "nombre VARCHAR(50) NOT NULL UNIQUE, email VARCHAR(150) NOT NULL UNIQUE, "
+    "password_hash VARCHAR(255) NOT NULL, rol_id INT, activo TINYINT DEFAULT 1, "
+    "ultimo_acceso DATETIME NULL, intentos_fallidos INT DEFAULT 0, bloqueado_hasta DATETIME NULL, "
+    "created_at DATETIME, updated_at DATETIME, refresh_revocado_hasta DOUBLE NOT NULL DEFAULT 0, "
+    "INDEX idx_users_created_at_id (created_at, id), "
+    "INDEX idx_users_bloqueado_hasta (bloqueado_hasta), "
+    "FULLTEXT INDEX ft_users_nombre_email (nombre, email) WITH PARSER ngram)",
+    "CREATE TABLE user_counts (rol_id INT NOT NULL, activo TINYINT NOT NULL, total INT NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (rol_id, activo))",
+    "CREATE TABLE user_access_days (dia DATE NOT NULL PRIMARY KEY, total INT NOT NULL DEFAULT 0)",
+    "CREATE TABLE devices (id INT AUTO_INCREMENT PRIMARY KEY, nombre VARCHAR(100) NOT NULL, "
+    "host VARCHAR(255) NOT NULL, metodo VARCHAR(8) NOT NULL DEFAULT 'tcp', puerto INT NOT NULL DEFAULT 0, "
+    "intervalo_s INT NOT NULL DEFAULT 60, activo TINYINT NOT NULL DEFAULT 1, "
+    "estado VARCHAR(16) NOT NULL DEFAULT 'desconocido', latencia_ms DOUBLE NULL, "
+    "fallos_consecutivos INT NOT NULL DEFAULT 0, ultimo_chequeo DATETIME NULL, ultimo_cambio DATETIME NULL, "
+    "ultimo_error VARCHAR(255) NULL, created_at DATETIME, updated_at DATETIME, "
+    "UNIQUE KEY uq_devices_host_metodo_puerto (host, metodo, puerto), INDEX idx_devices_estado (estado))",
+    "CREATE TABLE device_samples (dispositivo_id INT NOT NULL, ts INT UNSIGNED NOT NULL, ok TINYINT NOT NULL, "
+    "latencia_ms FLOAT NULL, PRIMARY KEY (dispositivo_id, ts), INDEX idx_device_samples_ts (ts))",
+    "CREATE TABLE device_rollups (dispositivo_id INT NOT NULL, resolucion INT NOT NULL, "
+    "bucket INT UNSIGNED NOT NULL, muestras INT NOT NULL, exitos INT NOT NULL, "
+    "latencia_suma DOUBLE NOT NULL DEFAULT 0, latencia_min FLOAT NULL, latencia_max FLOAT NULL, "
+    "PRIMARY KEY (dispositivo_id, resolucion, bucket), "
+    "INDEX idx_device_rollups_resolucion_bucket (resolucion, bucket))",
+    "CREATE TABLE device_events (id BIGINT AUTO_INCREMENT PRIMARY KEY, dispositivo_id INT NOT NULL, "
+    "anterior VARCHAR(16) NOT NULL, estado VARCHAR(16) NOT NULL, ts INT UNSIGNED NOT NULL, "
+    "error VARCHAR(255) NULL, INDEX idx_device_events_ts (ts))",
+]
+
+def _mysql_triggers():
+    """CREATE TRIGGER de migrations/006_user_stats.sql (el bloque entre DELIMITER)."""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "migrations", "006_user_stats.sql")
+    with open(path, encoding="utf-8") as f:
+        bloque = f.read().split("DELIMITER $$")[1].split("DELIMITER ;")[0]
+    return [sentencia.strip() + " END" for sentencia in bloque.split("END$$") if sentencia.strip()]
+
+
+MYSQL_SCHEMA += _mysql_triggers()
+
+ROLES = [("Administrador", "Acceso total"), ("Usuario", "Acceso estándar"), ("Invitado", "Solo lectura")]
+
+# Segundos de espera por sentencia (ida y vuelta simulada a la BD)
+LATENCIA = 0.0
+
+# Lista de un elemento: las copias de contexto (tareas hijas) comparten la cuenta
+_consultas: ContextVar[list] = ContextVar("bench_consultas")
+
+
+def reset_queries():
+    _consultas.set([0])
+
+
+def queries() -> int:
+    """Sentencias ejecutadas por la petición en curso desde el último reset_queries()."""
+    cuenta = _consultas.get(None)
+    return cuenta[0] if cuenta else 0
+
+
+def _contar():
+    cuenta = _consultas.get(None)
+    if cuenta is None:
+        cuenta = [0]
+        _consultas.set(cuenta)
+    cuenta[0] += 1
+
+
+@lru_cache(maxsize=512)
+def translate(query: str) -> str:
+    if "information_schema.TABLES" in query:
+        return "SELECT COUNT(*) FROM users"
+    query = re.sub(r"\bLIKE %s", r"LIKE %s ESCAPE '\\'", query)
+    query = re.sub(r"\bIF\(", "iif(", query)
+    query = query.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    if "ON DUPLICATE KEY UPDATE" in query:
+        query = query.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+        query = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", query)
+        query = query.replace("LEAST(", "min(").replace("GREATEST(", "max(")
+    borrado = re.match(r"DELETE FROM (\w+) WHERE (.+) LIMIT %s$", query)
+    if borrado:
+        tabla, condicion = borrado.groups()
+        query = f"DELETE FROM {tabla} WHERE rowid IN (SELECT rowid FROM {tabla} WHERE {condicion} LIMIT %s)"
+    return query.replace("%s", "?")
+
+
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self._cursor = connection._db.cursor()
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, query, params=()):
+        _contar()
+        if LATENCIA:
+            time.sleep(LATENCIA)
+        self._execute(query, params)
+
+    def executemany(self, query, seq_params):
+        _contar()
+        if LATENCIA:
+            time.sleep(LATENCIA)
+        self._executemany(query, seq_params)
+
+    def _execute(self, query, params):
+        self.connection._last_insert_id = None
+        self._cursor.execute(translate(query), tuple(params or ()))
+        self._after()
+
+    def _executemany(self, query, seq_params):
+        self._cursor.executemany(translate(query), [tuple(p) for p in seq_params])
+        self._after()
+
+    def _after(self):
+        self.rowcount = self._cursor.rowcount
+        # LAST_INSERT_ID(expr) fija el valor que MySQL devuelve en lastrowid
+        stashed = self.connection._last_insert_id
+        self.lastrowid = stashed if stashed is not None else self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, database, timeout=30, **_config):
+        self._db = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES,
+                                   check_same_thread=False, timeout=timeout)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._last_insert_id = None
+        self._db.create_function("NOW", 0, lambda: datetime.utcnow().isoformat(" "))
+        self._db.create_function("LAST_INSERT_ID", 1, self._stash_last_insert_id)
+        self.autocommit = False
+
+    def _stash_last_insert_id(self, value):
+        self._last_insert_id = value
+        return value
+
+    @property
+    def in_transaction(self):
+        return self._db.in_transaction
+
+    def cursor(self, dictionary=False, **_kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def is_connected(self):
+        try:
+            self._db.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._db.close()
+
+
+def sqlite_factory(**config):
+    """Fábrica para DatabaseConfig(configs=[{'host': 'sqlite', 'database': ruta}], factory=...)."""
+    return SQLiteConnection(**config)
+
+
+async def sqlite_async_factory(**config):
+    """Fábrica para AsyncDatabaseConfig(configs=[{'host': 'sqlite', 'database': ruta}], factory=...)."""
+    return AsyncSQLiteConnection(SQLiteConnection(timeout=0, **config))
+
+
+class AsyncSQLiteConnection:
+    """SQLiteConnection con la interfaz de aiomysql que usan AsyncConnectionPool y ConexionAsync.
+
+    Todas las conexiones de un worker comparten el hilo del bucle de eventos:
+    una espera de bloqueo de SQLite (busy timeout) lo pararía entero, así que
+    se abre con timeout=0 y "database is locked" se reintenta con asyncio.sleep.
+    """
+
+    REINTENTO = 0.002      # Segundos entre reintentos con la BD bloqueada
+    ESPERA_MAXIMA = 30.0   # Como el timeout de la conexión síncrona
+
+    def __init__(self, connection: SQLiteConnection):
+        self._connection = connection
+
+    async def cursor(self, *cursor_classes):
+        # aiomysql.DictCursor se reconoce por nombre: aquí no hace falta importar aiomysql
+        dictionary = any(getattr(cls, "__name__", "") == "DictCursor" for cls in cursor_classes)
+        return AsyncSQLiteCursor(self, self._connection.cursor(dictionary=dictionary))
+
+    async def commit(self):
+        await self._reintentar(self._connection.commit)
+
+    async def rollback(self):
+        self._connection.rollback()
+
+    def get_transaction_status(self):
+        return self._connection.in_transaction
+
+    async def ping(self, reconnect=False):
+        if not self._connection.is_connected():
+            raise sqlite3.OperationalError("conexión cerrada")
+
+    def close(self):
+        self._connection.close()
+
+    async def _reintentar(self, operacion, *args):
+        limite = time.monotonic() + self.ESPERA_MAXIMA
+        while True:
+            try:
+                return operacion(*args)
+            except sqlite3.OperationalError as err:
+                if "locked" not in str(err) or time.monotonic() >= limite:
+                    raise
+            await asyncio.sleep(self.REINTENTO)
+
+
+class AsyncSQLiteCursor:
+    def __init__(self, connection: AsyncSQLiteConnection, cursor: SQLiteCursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    async def execute(self, query, params=()):
+        _contar()
+        if LATENCIA:
+            await asyncio.sleep(LATENCIA)
+        await self._connection._reintentar(self._cursor._execute, query, params)
+
+    async def executemany(self, query, seq_params):
+        _contar()
+        if LATENCIA:
+            await asyncio.sleep(LATENCIA)
+        await self._connection._reintentar(self._cursor._executemany, query, list(seq_params))
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    async def close(self):
+        self._cursor.close()
+
+
+def counting_factory(factory):
+    """Envuelve una fábrica real (mysql.connector.connect) para contar sentencias por hilo."""
+    def wrapped(**config):
+        return _CountingConnection(factory(**config))
+    return wrapped
+
+
+class _CountingConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _CountingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        _contar()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        _contar()
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def async_counting_factory(factory):
+    """Igual que counting_factory para una fábrica asyncio (conectar_aiomysql)."""
+    async def wrapped(**config):
+        return _AsyncCountingConnection(await factory(**config))
+    return wrapped
+
+
+class _AsyncCountingConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    async def cursor(self, *args):
+        return _AsyncCountingCursor(await self._connection.cursor(*args))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _AsyncCountingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, *args, **kwargs):
+        _contar()
+        return await self._cursor.execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        _contar()
+        return await self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# --- Datos de prueba ---
+
+def seed_rows(users: int, password_hash: str):
+    """Filas de users: bench_admin (rol 1) y user0..userN-1 (rol 2), con fechas repartidas."""
+    now = datetime(2025, 1, 1)
+    rows = [(str(uuid.uuid4()), "bench_admin", "bench_admin@bench.mx", password_hash, 1, 1, now, now)]
+    for i in range(users):
+        created = now - timedelta(seconds=i + 1)
+        rows.append((str(uuid.uuid4()), f"user{i}", f"user{i}@bench.mx", password_hash,
+                     2, 1, created, created))
+    return rows
+
+
+def seed(connection, users: int, password_hash: str, mysql: bool = False):
+    """Crea el esquema y carga roles y usuarios en una conexión (SQLite o MySQL)."""
+    cursor = connection.cursor()
+    if mysql:
+        for statement in MYSQL_SCHEMA:
+            cursor.execute(statement)
+    else:
+        connection._db.executescript(SCHEMA)
+    now = datetime(2025, 1, 1)
+    cursor.executemany("INSERT INTO roles (nombre, descripcion, created_at) VALUES (%s, %s, %s)",
+                       [(nombre, descripcion, now) for nombre, descripcion in ROLES])
+    rows = seed_rows(users, password_hash)
+    insert = ("INSERT INTO users (uuid, nombre, email, password_hash, rol_id, activo, created_at, updated_at) "
+              "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)")
+    for start in range(0, len(rows), 5000):
+        cursor.executemany(insert, rows[start:start + 5000])
+    connection.commit()
+    cursor.close()
+
+
+def seed_devices(connection, devices):
+    """Carga dispositivos: tuplas (nombre, host, metodo, puerto, intervalo_s)."""
+    now = datetime(2025, 1, 1)
+    cursor = connection.cursor()
+    cursor.executemany(
+        "INSERT INTO devices (nombre, host, metodo, puerto, intervalo_s, activo, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, 1, %s, %s)",
+        [tuple(device) + (now, now) for device in devices])
+    connection.commit()
+    cursor.close()
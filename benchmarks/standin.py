@@ -0,0 +1,72 @@
+# benchmarks/standin.py
+"""Sustituto mínimo de mysql.connector para medir sin un servidor MySQL.
+
+Simula el coste de red: `connect_latency` por handshake TCP+auth y
+`query_latency` por cada sentencia ejecutada.
+"""
+import time
+
+
+class SimulatedCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=None):
+        time.sleep(self.connection.query_latency)
+        self.connection.queries += 1
+        self.connection.in_transaction = not self.connection.autocommit
+        self._rows = [{"id": 1}] if self.dictionary else [(1,)]
+        self.rowcount = 1
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class SimulatedConnection:
+    def __init__(self, connect_latency=0.003, query_latency=0.0003, **config):
+        time.sleep(connect_latency)
+        self.config = config
+        self.query_latency = query_latency
+        self.autocommit = False
+        self.in_transaction = False
+        self.queries = 0
+        self._open = True
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SimulatedCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def is_connected(self):
+        if self._open:
+            time.sleep(self.query_latency)
+        return self._open
+
+    def close(self):
+        self._open = False
+
+
+def simulated_factory(connect_latency=0.003, query_latency=0.0003):
+    """Devuelve una fábrica compatible con mysql.connector.connect(**config)."""
+    def factory(**config):
+        return SimulatedConnection(connect_latency, query_latency, **config)
+    return factory
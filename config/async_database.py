@@ -0,0 +1,226 @@
+# config/async_database.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import aiomysql
+import pymysql
+
+from config.async_pool import AsyncConnectionPool, conectar_aiomysql
+from config.database import DatabaseConfig, ConnectionError, READ, WRITE, slow_query_logger
+from config.failover import endpoint_name
+from config.metrics import metrics
+from config.pool import PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Errores de conexión/consulta del driver asyncio (los de mysql.connector no aplican)
+ERRORES_DRIVER = (pymysql.err.MySQLError, OSError, asyncio.TimeoutError)
+
+
+class AsyncDatabaseConfig(DatabaseConfig):
+    """DatabaseConfig para el modo asyncio (asgi.py), sobre aiomysql.
+
+    Mismos endpoints, réplicas, failover con circuit breaker y ventana
+    read-your-writes que la versión síncrona; cambia el pool, que es un
+    AsyncConnectionPool por endpoint y por bucle de eventos, y get_connection,
+    que es un context manager asíncrono:
+
+        async with db_config.get_connection(READ) as con:
+            cursor = await con.cursor(dictionary=True)
+            await cursor.execute(query, params)
+            fila = await cursor.fetchone()
+
+    `factory` es aquí una corrutina compatible con conectar_aiomysql(**config).
+    """
+
+    # Pools propios: los de la clase base son síncronos
+    _pools: Dict[tuple, AsyncConnectionPool] = {}
+
+    def get_pool(self, config: Dict[str, Any]) -> AsyncConnectionPool:
+        """Pool asyncio del endpoint para el bucle de eventos en curso (se crea la primera vez)."""
+        key = (id(asyncio.get_running_loop()),) + self._endpoint_key(config)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = AsyncConnectionPool(
+                        config,
+                        size=self.POOL_SIZE,
+                        timeout=self.POOL_TIMEOUT,
+                        max_idle=self.POOL_MAX_IDLE,
+                        validation_interval=self.POOL_VALIDATION_INTERVAL,
+                        factory=self.factory,
+                    )
+                    self._pools[key] = pool
+        return pool
+
+    def _probe(self, config: Dict[str, Any]):
+        """Sonda de salud: corre en el hilo de la sonda, con su propio bucle de eventos."""
+        async def sondear():
+            factory = self.factory or conectar_aiomysql
+            connection = await asyncio.wait_for(factory(**config), self.HEALTH_PROBE_TIMEOUT)
+            connection.close()
+        asyncio.run(sondear())
+
+    @classmethod
+    async def close_pools(cls):
+        """Cierra las conexiones ociosas de los pools del bucle de eventos en curso."""
+        loop_id = id(asyncio.get_running_loop())
+        with cls._pools_lock:
+            pools = [pool for key, pool in cls._pools.items() if key[0] == loop_id]
+        for pool in pools:
+            await pool.close_all()
+
+    async def _acquire(self, configs: List[Dict[str, Any]], rotate: bool = False):
+        """Obtiene una conexión del primer endpoint sano de `configs` (ver DatabaseConfig._acquire)."""
+        last_error = None
+        failover = self.get_failover(configs)
+        started_at = time.monotonic()
+        start = next(self._round_robin) if rotate else 0
+
+        for index in failover.candidates(start):
+            config = configs[index]
+            pool = self.get_pool(config)
+            try:
+                connection = await pool.acquire()
+                failover.record_success(index, started_at, had_failures=last_error is not None,
+                                        rotating=rotate)
+                return failover, index, pool, connection
+
+            except PoolTimeoutError as err:
+                # El servidor responde pero el pool está saturado: no es una caída
+                last_error = err
+                logger.warning("Pool agotado", extra={"endpoint": endpoint_name(config), "error": str(err)})
+
+            except ERRORES_DRIVER as err:
+                last_error = err
+                logger.error("Fallo al conectar a la BD", extra={"endpoint": endpoint_name(config), "error": str(err)})
+                failover.record_failure(index, err)
+                await pool.close_all()
+
+        raise ConnectionError(
+            f"Todas las configuraciones de base de datos fallaron. Último error: {last_error}"
+        )
+
+    @asynccontextmanager
+    async def get_connection(self, modo: str = WRITE):
+        """Context manager asíncrono que presta una conexión del pool, con failover.
+
+        Mismo reparto que la versión síncrona: lecturas a las réplicas salvo
+        dentro de la ventana read-your-writes, PRIMARY y escrituras al primario.
+        """
+        target = None
+        if modo == READ and self.replicas and not self._lectura_en_primario():
+            try:
+                target = await self._acquire(self.replicas, rotate=True)
+            except ConnectionError as err:
+                logger.warning("Réplicas no disponibles, leyendo del primario", extra={"error": str(err)})
+
+        if target is None:
+            target = await self._acquire(self.configs)
+            if modo == WRITE:
+                self._marcar_escritura()
+
+        failover, index, pool, connection = target
+        metrics.contar_prestamo()
+        metrics.inc("netmonitor_db_checkouts_total", mode=modo)
+
+        broken = False
+        discard = False
+        try:
+            yield ConexionAsync(connection, self.SLOW_QUERY_MS / 1000, modo, endpoint_name(pool.config))
+        except ERRORES_DRIVER:
+            broken = not await AsyncConnectionPool._is_alive(connection)
+            raise
+        except asyncio.CancelledError:
+            # Cliente desconectado a mitad de una consulta: el estado del protocolo es incierto
+            discard = True
+            raise
+        finally:
+            await pool.release(connection, discard=broken or discard)
+            if broken:
+                failover.record_failure(index, "conexión perdida durante la consulta")
+
+
+class ConexionAsync:
+    """Conexión prestada por AsyncDatabaseConfig.
+
+    Acepta `cursor(dictionary=True)` como mysql.connector (así el SQL de los
+    repositorios se comparte tal cual) y mide cada sentencia para el log de
+    consultas lentas, igual que _ConexionCronometrada.
+    """
+
+    __slots__ = ("_conexion", "_umbral", "_modo", "_endpoint")
+
+    def __init__(self, conexion, umbral: float, modo: str, endpoint: str):
+        self._conexion = conexion
+        self._umbral = umbral
+        self._modo = modo
+        self._endpoint = endpoint
+
+    async def cursor(self, dictionary: bool = False):
+        cursor = await (self._conexion.cursor(aiomysql.DictCursor) if dictionary else self._conexion.cursor())
+        return CursorAsync(cursor, self)
+
+    async def commit(self):
+        await self._conexion.commit()
+
+    async def rollback(self):
+        await self._conexion.rollback()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+
+class CursorAsync:
+    __slots__ = ("_cursor", "_conexion")
+
+    def __init__(self, cursor, conexion: ConexionAsync):
+        self._cursor = cursor
+        self._conexion = conexion
+
+    async def execute(self, operation, params=None):
+        inicio = time.perf_counter()
+        try:
+            return await self._cursor.execute(operation, params)
+        finally:
+            self._registrar(operation, time.perf_counter() - inicio, 1)
+
+    async def executemany(self, operation, seq_params):
+        inicio = time.perf_counter()
+        try:
+            return await self._cursor.executemany(operation, seq_params)
+        finally:
+            lotes = len(seq_params) if hasattr(seq_params, "__len__") else None
+            self._registrar(operation, time.perf_counter() - inicio, lotes)
+
+    async def fetchone(self):
+        return await self._cursor.fetchone()
+
+    async def fetchall(self):
+        return await self._cursor.fetchall()
+
+    async def fetchmany(self, size: int = 1):
+        return await self._cursor.fetchmany(size)
+
+    async def close(self):
+        await self._cursor.close()
+
+    def _registrar(self, operation, duracion: float, lotes: Optional[int]):
+        if self._conexion._umbral <= 0 or duracion < self._conexion._umbral:
+            return
+        metrics.inc("netmonitor_db_slow_queries_total", mode=self._conexion._modo)
+        slow_query_logger.warning("Consulta lenta", extra={
+            "statement": " ".join(str(operation).split())[:500],
+            "duration_ms": round(duracion * 1000, 2),
+            "batch_size": lotes,
+            "mode": self._conexion._modo,
+            "endpoint": self._conexion._endpoint,
+        })
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
@@ -0,0 +1,175 @@
+# config/async_pool.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiomysql
+
+from config.failover import endpoint_name
+from config.metrics import metrics
+from config.pool import PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+async def conectar_aiomysql(**config):
+    """Abre una conexión aiomysql a partir de una configuración de mysql.connector."""
+    return await aiomysql.connect(
+        host=config.get("host", "127.0.0.1"),
+        port=int(config.get("port", 3306)),
+        user=config.get("user"),
+        password=config.get("password", ""),
+        db=config.get("database"),
+        connect_timeout=config.get("connection_timeout", 10),
+        charset="utf8mb4",
+        autocommit=False,
+    )
+
+
+class AsyncConnectionPool:
+    """Versión asyncio de ConnectionPool, para un único servidor y un único bucle de eventos.
+
+    Mismas reglas que el pool síncrono: como mucho `size` conexiones físicas,
+    espera acotada por `timeout`, ping de las ociosas más de
+    `validation_interval` segundos y cierre de las ociosas más de `max_idle`.
+    Esperar una conexión suspende la corrutina, no bloquea el hilo.
+    """
+
+    def __init__(self, config: Dict[str, Any], size: int = 5, timeout: float = 10.0,
+                 max_idle: float = 300.0, validation_interval: float = 5.0,
+                 factory: Optional[Callable[..., Awaitable[Any]]] = None):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.validation_interval = validation_interval
+        self.factory = factory or conectar_aiomysql
+
+        self._idle = deque()  # (conexión, instante en que se devolvió)
+        self._created = 0
+        self._cond = asyncio.Condition()
+
+    # --- Ciclo de vida de conexiones ---
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Toma una conexión del pool, creando una nueva si hay capacidad."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            async with self._cond:
+                self._evict_idle_locked()
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No hay conexiones libres hacia {self.config.get('host')} "
+                            f"tras {timeout:.1f}s (tamaño del pool: {self.size})"
+                        )
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._evict_idle_locked()
+
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    # Reservamos el hueco antes de conectar para no rebasar `size`
+                    self._created += 1
+                    connection, returned_at = None, None
+
+            if connection is None:
+                try:
+                    return await self._connect()
+                except BaseException:
+                    await self._forget()
+                    raise
+
+            if time.monotonic() - returned_at < self.validation_interval or await self._is_alive(connection):
+                return connection
+
+            # La conexión murió mientras estaba ociosa: se descarta y se reintenta
+            self._close_quietly(connection)
+            await self._forget()
+
+    async def release(self, connection, discard: bool = False):
+        """Devuelve una conexión al pool (o la cierra si está rota)."""
+        if not discard:
+            try:
+                # No dejar transacciones abiertas: otra petición vería un snapshot viejo
+                if connection.get_transaction_status():
+                    await connection.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._close_quietly(connection)
+            await self._forget()
+            return
+
+        async with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    async def close_all(self):
+        """Cierra todas las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        async with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado actual del pool, útil para diagnóstico."""
+        return {
+            "host": self.config.get("host"),
+            "size": self.size,
+            "open": self._created,
+            "idle": len(self._idle),
+            "in_use": self._created - len(self._idle),
+        }
+
+    # --- Helpers internos ---
+
+    async def _connect(self):
+        logger.info("Abriendo nueva conexión del pool asyncio", extra={"endpoint": endpoint_name(self.config)})
+        metrics.inc("netmonitor_db_connections_opened_total", endpoint=endpoint_name(self.config))
+        return await self.factory(**self.config)
+
+    async def _forget(self):
+        async with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _evict_idle_locked(self):
+        """Cierra las conexiones ociosas más antiguas que `max_idle` (con el lock tomado)."""
+        if not self._idle:
+            return
+        limit = time.monotonic() - self.max_idle
+        # Las más antiguas están a la izquierda: se reutiliza siempre la más reciente (LIFO)
+        while self._idle and self._idle[0][1] < limit:
+            connection, _ = self._idle.popleft()
+            self._created -= 1
+            self._close_quietly(connection)
+
+    @staticmethod
+    async def _is_alive(connection) -> bool:
+        try:
+            await connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
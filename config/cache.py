@@ -0,0 +1,173 @@
+# config/cache.py
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class Generation:
+    """Marca de generación compartida entre procesos mediante un archivo.
+
+    Cada invalidación escribe un token nuevo (único, no un contador, para que
+    dos invalidaciones simultáneas nunca escriban el mismo valor). Los workers
+    de Gunicorn del mismo host comparan el token y vacían su caché si cambió.
+    """
+
+    # Directorio compartido por todos los workers del host
+    DIRECTORY = os.path.join(tempfile.gettempdir(), "netmonitor-cache")
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.path = os.path.join(directory or self.DIRECTORY, f"{name}.gen")
+
+    def current(self) -> str:
+        try:
+            with open(self.path, "r", encoding="ascii") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def modified(self) -> Optional[float]:
+        """Instante (epoch) de la última invalidación, o None si nunca se invalidó."""
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def ensure(self) -> str:
+        """Token actual, creándolo si aún no existe.
+
+        Sirve para validadores HTTP: si el directorio temporal se vacía (reinicio)
+        se genera un token nuevo en vez de volver a "" y repetir un ETag antiguo.
+        """
+        return self.current() or self.bump()
+
+    def bump(self) -> str:
+        token = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="ascii") as f:
+            f.write(token)
+        # Reemplazo atómico: un lector ve el token viejo o el nuevo, nunca uno a medias
+        os.replace(tmp, self.path)
+        return token
+
+
+class LRUCache:
+    """Caché en memoria LRU con TTL, thread-safe y con contadores.
+
+    - `maxsize`: entradas máximas; al superarlo se expulsa la menos usada.
+    - `ttl`: segundos de vida de cada entrada.
+    - `generation`: si se indica, invalidate_all() avisa a los demás procesos
+      y cada lectura comprueba si otro proceso invalidó.
+    - `namespace`: si se indica, cada clave tiene su propia generación entre
+      procesos: invalidate(key) solo afecta a esa clave en todos los workers.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, generation: Optional[Generation] = None,
+                 namespace: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = generation
+        self.namespace = namespace
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._seen_generation = generation.current() if generation else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self._check_generation()
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is not None and self.namespace and entry[2] != self.key_generation(key).current():
+            # Otro worker modificó esta clave después de cachearla
+            entry = None
+        elif entry is not None and self.generation and entry[2] != self._seen_generation:
+            # Se cargó antes de una invalidación que llegó mientras tanto
+            entry = None
+        with self._lock:
+            if entry is not None and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._data.pop(key, None)
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, token: Optional[str] = None):
+        """Guarda un valor. `token` es la generación (de la clave con `namespace`,
+        de la caché con `generation`) leída ANTES de cargar el valor (ver
+        get_or_load); si no se indica, se usa la actual."""
+        if token is None:
+            token = self._token(key)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl, token)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo carga con `loader()` (None no se cachea)."""
+        marker = object()
+        value = self.get(key, marker)
+        if value is not marker:
+            return value
+        # La generación se lee antes de cargar: si alguien escribe mientras tanto,
+        # el valor quedará marcado como viejo en la siguiente lectura
+        token = self._token(key)
+        value = loader()
+        if value is not None:
+            self.set(key, value, token)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Invalida una clave en este proceso (y en los demás si hay `namespace`)."""
+        if self.namespace:
+            self.key_generation(key).bump()
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_all(self):
+        """Vacía la caché en este proceso y en los demás (vía generación)."""
+        if self.generation:
+            self._seen_generation = self.generation.bump()
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def key_generation(self, key: Hashable) -> Generation:
+        """Generación entre procesos de una clave (requiere `namespace`)."""
+        return Generation(os.path.join(self.namespace, str(key)))
+
+    def _token(self, key: Hashable) -> Optional[str]:
+        if self.namespace:
+            return self.key_generation(key).current()
+        if self.generation:
+            return self.generation.current()
+        return None
+
+    def _check_generation(self):
+        if not self.generation:
+            return
+        current = self.generation.current()
+        if current != self._seen_generation:
+            with self._lock:
+                self._data.clear()
+                self._seen_generation = current
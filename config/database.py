@@ -1,17 +1,65 @@
 # config/database.py
+import itertools
+import logging
+import threading
+import time
 import mysql.connector
 from contextlib import contextmanager
-from typing import Dict, Any, List
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable
+
+from config.pool import ConnectionPool, PoolTimeoutError
+from config.failover import FailoverManager, endpoint_name
+from config.metrics import metrics
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(__name__ + ".slow_query")
 
 # Define una excepción personalizada para un manejo claro de errores
 class ConnectionError(Exception):
     """Excepción levantada cuando todas las configuraciones de BD fallan."""
     pass
 
+# Tipo de operación que pide un repositorio a get_connection()
+READ = "read"
+WRITE = "write"
+# Lectura que necesita el estado más reciente: va al primario, pero no abre
+# la ventana read-your-writes como una escritura
+PRIMARY = "primary"
+
+# Read-your-writes: instante (epoch) hasta el que las lecturas de la petición
+# actual deben ir al primario porque la sesión escribió hace poco.
+_leer_del_primario_hasta: ContextVar[float] = ContextVar("leer_del_primario_hasta", default=0.0)
+
 class DatabaseConfig:
-    def __init__(self):
+    # Parámetros del pool de conexiones (compartido por todas las instancias del proceso)
+    POOL_SIZE = 5                 # Conexiones físicas máximas por servidor
+    POOL_TIMEOUT = 10.0           # Segundos máximos esperando una conexión libre
+    POOL_MAX_IDLE = 300.0         # Segundos antes de cerrar una conexión ociosa
+    POOL_VALIDATION_INTERVAL = 5.0  # Ociosa más tiempo que esto => ping antes de usarla
+
+    # Parámetros del failover (circuit breaker por endpoint)
+    FAILOVER_BASE_BACKOFF = 1.0   # Segundos antes de reintentar un endpoint caído
+    FAILOVER_MAX_BACKOFF = 60.0   # Tope del backoff exponencial
+    HEALTH_PROBE_INTERVAL = 1.0   # Cada cuánto revisa la sonda de fondo los endpoints caídos
+    HEALTH_PROBE_TIMEOUT = 2      # Timeout de conexión (s) de la sonda
+
+    # Segundos tras una escritura en los que la misma sesión lee del primario (0 = desactivado)
+    READ_YOUR_WRITES_WINDOW = 5.0
+
+    # Sentencias más lentas que esto (ms) van al log de consultas lentas (0 = desactivado)
+    SLOW_QUERY_MS = 200.0
+
+    _pools: Dict[tuple, ConnectionPool] = {}
+    _managers: Dict[tuple, FailoverManager] = {}
+    _pools_lock = threading.Lock()
+    _round_robin = itertools.count()
+
+    def __init__(self, configs: Optional[List[Dict[str, Any]]] = None,
+                 factory: Optional[Callable[..., Any]] = None,
+                 replicas: Optional[List[Dict[str, Any]]] = None):
         # Lista de configuraciones de bases de datos, por orden de preferencia
-        self.configs: List[Dict[str, Any]] = [
+        self.configs: List[Dict[str, Any]] = configs if configs is not None else [
             # Configuración Principal (Primary)
             {
                 "host": "127.0.0.1",
@@ -28,43 +76,257 @@ class DatabaseConfig:
                 "password": ":Sa[MX~2l"
             }
         ]
+        # Réplicas de solo lectura. Las lecturas se reparten entre ellas (round-robin);
+        # las escrituras van siempre a `configs`. Sin réplicas todo va a `configs`.
+        self.replicas: List[Dict[str, Any]] = replicas if replicas is not None else []
+        # Fábrica de conexiones físicas (permite usar un sustituto en benchmarks)
+        self.factory = factory
 
-    @contextmanager
-    def get_connection(self):
-        """Context manager para manejo seguro de conexiones con failover."""
+    def get_pool(self, config: Dict[str, Any]) -> ConnectionPool:
+        """Devuelve el pool asociado a una configuración, creándolo la primera vez.
+
+        Los pools se comparten entre todas las instancias de DatabaseConfig del
+        proceso, así cada repositorio reutiliza las mismas conexiones calientes.
+        """
+        key = self._endpoint_key(config)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = ConnectionPool(
+                        config,
+                        size=self.POOL_SIZE,
+                        timeout=self.POOL_TIMEOUT,
+                        max_idle=self.POOL_MAX_IDLE,
+                        validation_interval=self.POOL_VALIDATION_INTERVAL,
+                        factory=self.factory,
+                    )
+                    self._pools[key] = pool
+        return pool
+
+    def get_failover(self, configs: Optional[List[Dict[str, Any]]] = None) -> FailoverManager:
+        """Devuelve el gestor de failover (compartido en el proceso) de una lista de endpoints."""
+        configs = self.configs if configs is None else configs
+        key = tuple(self._endpoint_key(config) for config in configs)
+        manager = self._managers.get(key)
+        if manager is None:
+            with self._pools_lock:
+                manager = self._managers.get(key)
+                if manager is None:
+                    manager = FailoverManager(
+                        configs,
+                        base_backoff=self.FAILOVER_BASE_BACKOFF,
+                        max_backoff=self.FAILOVER_MAX_BACKOFF,
+                        probe_interval=self.HEALTH_PROBE_INTERVAL,
+                    )
+                    manager.set_probe(self._probe)
+                    self._managers[key] = manager
+        return manager
+
+    def estado(self) -> Dict[str, Any]:
+        """Introspección: endpoint activo, estado de cada breaker y de cada pool."""
+        snapshot = self.get_failover().snapshot()
+        snapshot["pools"] = [self.get_pool(config).stats() for config in self.configs]
+        if self.replicas:
+            snapshot["replicas"] = self.get_failover(self.replicas).snapshot()
+            snapshot["replicas"]["pools"] = [self.get_pool(config).stats() for config in self.replicas]
+        return snapshot
+
+    # --- Read-your-writes por sesión ---
+
+    @staticmethod
+    def iniciar_peticion(leer_del_primario_hasta: Optional[float] = None):
+        """Restaura al inicio de cada petición la ventana read-your-writes de la sesión."""
+        _leer_del_primario_hasta.set(leer_del_primario_hasta or 0.0)
+
+    @staticmethod
+    def leer_del_primario_hasta() -> float:
+        """Fin de la ventana read-your-writes actual (para guardarla en la sesión)."""
+        return _leer_del_primario_hasta.get()
+
+    @staticmethod
+    def escritura_reciente() -> bool:
+        """True si la sesión actual escribió dentro de la ventana read-your-writes."""
+        return time.time() < _leer_del_primario_hasta.get()
+
+    @classmethod
+    def _marcar_escritura(cls):
+        """Abre (o alarga) la ventana read-your-writes de la petición actual."""
+        if cls.READ_YOUR_WRITES_WINDOW > 0:
+            _leer_del_primario_hasta.set(time.time() + cls.READ_YOUR_WRITES_WINDOW)
+
+    def _lectura_en_primario(self) -> bool:
+        return self.escritura_reciente()
+
+    def _probe(self, config: Dict[str, Any]):
+        """Sonda de salud: abre y cierra una conexión física con timeout corto."""
+        factory = self.factory or mysql.connector.connect
+        connection = factory(**dict(config, connection_timeout=self.HEALTH_PROBE_TIMEOUT))
+        connection.close()
+
+    def _endpoint_key(self, config: Dict[str, Any]) -> tuple:
+        return (config.get("host"), config.get("port"), config.get("database"),
+                config.get("user"), self.factory)
+
+    @classmethod
+    def close_pools(cls):
+        """Cierra todas las conexiones ociosas de todos los pools del proceso."""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            pool.close_all()
+
+    def _acquire(self, configs: List[Dict[str, Any]], rotate: bool = False):
+        """Obtiene una conexión del primer endpoint sano de `configs`.
+
+        Devuelve (gestor de failover, índice, pool, conexión) o levanta ConnectionError.
+        """
         connection = None
+        pool = None
         last_error = None
+        failover = self.get_failover(configs)
+        started_at = time.monotonic()
+        start = next(self._round_robin) if rotate else 0
         
-        # Intenta conectar con cada configuración en orden
-        for config_num, config in enumerate(self.configs):
+        # Intenta obtener una conexión de cada configuración sana, en orden
+        for index in failover.candidates(start):
+            config = configs[index]
             try:
-                # Intenta crear la conexión con la configuración actual
-                print(f"Intentando conectar a la BD #{config_num + 1} en host: {config['host']}...")
-                connection = mysql.connector.connect(**config)
-                
-                # Si la conexión tiene éxito, salimos del bucle
-                if connection.is_connected():
-                    print(f"Conexión exitosa a la BD #{config_num + 1}.")
-                    break
-                
+                pool = self.get_pool(config)
+                connection = pool.acquire()
+                failover.record_success(index, started_at, had_failures=last_error is not None,
+                                        rotating=rotate)
+                return failover, index, pool, connection
+
+            except PoolTimeoutError as err:
+                # El servidor responde pero el pool está saturado: no es una caída
+                last_error = err
+                logger.warning("Pool agotado", extra={"endpoint": endpoint_name(config), "error": str(err)})
+
             except mysql.connector.Error as err:
-                # Si la conexión falla, guarda el error y pasa a la siguiente configuración
+                # Si la conexión falla, abre el breaker y pasa a la siguiente configuración
                 last_error = err
-                print(f"Fallo al conectar a la BD #{config_num + 1}. Error: {err}")
-                connection = None # Asegúrate de que connection sea None si falla
+                logger.error("Fallo al conectar a la BD", extra={"endpoint": endpoint_name(config), "error": str(err)})
+                failover.record_failure(index, err)
+                pool.close_all()
         
         # Si al final del bucle no hay conexión, levantamos el error
-        if connection is None:
-            raise ConnectionError(
-                f"Todas las configuraciones de base de datos fallaron. Último error: {last_error}"
-            )
+        raise ConnectionError(
+            f"Todas las configuraciones de base de datos fallaron. Último error: {last_error}"
+        )
+
+    @contextmanager
+    def get_connection(self, modo: str = WRITE):
+        """Context manager que presta una conexión del pool, con failover.
+
+        `modo` indica si la operación es de lectura (READ), lectura en el
+        primario (PRIMARY) o escritura (WRITE). Las lecturas se reparten entre
+        las réplicas salvo que la sesión haya escrito dentro de la ventana
+        read-your-writes; PRIMARY y las escrituras van al primario, pero solo
+        las escrituras abren esa ventana. Los endpoints con el circuit breaker abierto se saltan sin
+        esperar su timeout de conexión hasta que vence su backoff.
+        """
+        target = None
+        if modo == READ and self.replicas and not self._lectura_en_primario():
+            try:
+                target = self._acquire(self.replicas, rotate=True)
+            except ConnectionError as err:
+                # Sin réplicas disponibles la lectura la atiende el primario
+                logger.warning("Réplicas no disponibles, leyendo del primario", extra={"error": str(err)})
+
+        if target is None:
+            target = self._acquire(self.configs)
+            if modo == WRITE:
+                self._marcar_escritura()
+
+        failover, index, pool, connection = target
+        metrics.contar_prestamo()
+        metrics.inc("netmonitor_db_checkouts_total", mode=modo)
             
         # Si la conexión fue exitosa, la proporcionamos al bloque 'with'
+        broken = False
+        discard = False
         try:
-            yield connection
+            if self.SLOW_QUERY_MS > 0:
+                yield _ConexionCronometrada(connection, self.SLOW_QUERY_MS / 1000, modo, endpoint_name(pool.config))
+            else:
+                yield connection
+        except mysql.connector.Error:
+            # Un error de MySQL puede dejar la conexión inservible: comprobarla
+            broken = not ConnectionPool._is_alive(connection)
+            raise
+        except GeneratorExit:
+            # Un stream abandonado a mitad deja filas sin leer: la conexión no se reutiliza
+            discard = True
+            raise
         
-        # El bloque finally garantiza que la conexión se cierre
+        # El bloque finally garantiza que la conexión vuelva al pool
+        finally:
+            pool.release(connection, discard=broken or discard)
+            if broken:
+                failover.record_failure(index, "conexión perdida durante la consulta")
+
+
+class _ConexionCronometrada:
+    """Envoltorio de la conexión prestada: sus cursores miden cada sentencia.
+
+    Las que superan el umbral se registran en el log de consultas lentas (sin
+    parámetros: pueden llevar hashes o datos personales). El resto de atributos
+    se delegan en la conexión real.
+    """
+
+    __slots__ = ("_conexion", "_umbral", "_modo", "_endpoint")
+
+    def __init__(self, conexion, umbral: float, modo: str, endpoint: str):
+        self._conexion = conexion
+        self._umbral = umbral
+        self._modo = modo
+        self._endpoint = endpoint
+
+    def cursor(self, *args, **kwargs):
+        return _CursorCronometrado(self._conexion.cursor(*args, **kwargs), self)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+
+class _CursorCronometrado:
+    __slots__ = ("_cursor", "_conexion")
+
+    def __init__(self, cursor, conexion: _ConexionCronometrada):
+        self._cursor = cursor
+        self._conexion = conexion
+
+    def execute(self, operation, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
         finally:
-            if connection and connection.is_connected():
-                connection.close()
-                print("Conexión a la BD cerrada.")
\ No newline at end of file
+            self._registrar(operation, time.perf_counter() - inicio, 1)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            lotes = len(seq_params) if hasattr(seq_params, "__len__") else None
+            self._registrar(operation, time.perf_counter() - inicio, lotes)
+
+    def _registrar(self, operation, duracion: float, lotes: Optional[int]):
+        if duracion < self._conexion._umbral:
+            return
+        metrics.inc("netmonitor_db_slow_queries_total", mode=self._conexion._modo)
+        slow_query_logger.warning("Consulta lenta", extra={
+            "statement": " ".join(str(operation).split())[:500],
+            "duration_ms": round(duracion * 1000, 2),
+            "batch_size": lotes,
+            "mode": self._conexion._modo,
+            "endpoint": self._conexion._endpoint,
+        })
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
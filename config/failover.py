@@ -0,0 +1,204 @@
+# config/failover.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CLOSED = "closed"        # Endpoint sano: se usa normalmente
+OPEN = "open"            # Endpoint caído: se salta hasta que venza el backoff
+HALF_OPEN = "half_open"  # Backoff vencido: se permite un único intento de prueba
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_name(config: Dict[str, Any]) -> str:
+    """Nombre legible de un endpoint para logs e introspección."""
+    port = config.get("port")
+    host = f"{config.get('host')}:{port}" if port else str(config.get("host"))
+    return f"{host}/{config.get('database')}"
+
+
+class CircuitBreaker:
+    """Circuit breaker con backoff exponencial para un endpoint de BD."""
+
+    def __init__(self, name: str, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.name = name
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        # Si hay sonda de fondo, las peticiones nunca hacen de sonda (no pagan el timeout)
+        self.background_probe = False
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Indica si se puede intentar conectar a este endpoint ahora."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if not self.background_probe and now >= self.retry_at:
+                # Solo una petición hace de sonda; el resto sigue saltando el endpoint.
+                # Si la sonda nunca informa, se vuelve a permitir tras otro backoff base.
+                self.state = HALF_OPEN
+                self.retry_at = now + self.base_backoff
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.retry_at = 0.0
+            self.last_error = None
+
+    def record_failure(self, error: Any = None):
+        with self._lock:
+            self.last_error = str(error) if error is not None else None
+            if self.state == OPEN:
+                # Fallo de una petición que ya estaba en vuelo: misma caída, mismo backoff
+                return
+            self.failures += 1
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** (self.failures - 1)))
+            self.state = OPEN
+            self.retry_at = time.monotonic() + backoff
+
+    def begin_probe(self) -> bool:
+        """Pasa a semiabierto si toca sondear; devuelve False si aún no vence el backoff."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self.retry_at:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = max(0.0, self.retry_at - time.monotonic()) if self.state != CLOSED else 0.0
+            return {
+                "endpoint": self.name,
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in_s": round(retry_in, 3),
+                "last_error": self.last_error,
+            }
+
+
+class FailoverManager:
+    """Recuerda qué endpoints están sanos para no pagar el timeout en cada petición.
+
+    Los endpoints se prueban siempre en orden de preferencia, saltando los que
+    tienen el breaker abierto. Un hilo de fondo sondea los endpoints caídos al
+    vencer su backoff; cuando el primario responde su breaker se cierra y las
+    siguientes peticiones vuelven a él (failback automático).
+    """
+
+    def __init__(self, configs: List[Dict[str, Any]], base_backoff: float = 1.0,
+                 max_backoff: float = 60.0, probe_interval: float = 1.0):
+        self.configs = configs
+        self.breakers = [CircuitBreaker(endpoint_name(c), base_backoff, max_backoff) for c in configs]
+        self.probe_interval = probe_interval
+        self.active: Optional[int] = None
+        self.failovers = 0
+        self.last_failover_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_pid: Optional[int] = None
+        self._probe_fn: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def candidates(self, start: int = 0) -> Iterator[int]:
+        """Índices de endpoints a intentar, en orden de preferencia.
+
+        `start` rota el orden (reparto round-robin entre réplicas equivalentes).
+        Es un generador: el breaker de cada endpoint solo se consulta cuando de
+        verdad se va a intentar. Si todos los breakers están abiertos se prueban
+        todos igualmente: es preferible un intento lento a rechazar sin probar.
+        """
+        count = len(self.breakers)
+        order = [(start + offset) % count for offset in range(count)]
+        tried = False
+        for index in order:
+            if self.breakers[index].allow_request():
+                tried = True
+                yield index
+        if not tried:
+            yield from order
+
+    def record_success(self, index: int, started_at: float, had_failures: bool, rotating: bool = False):
+        """Marca el endpoint como sano y registra si hubo cambio de endpoint activo.
+
+        Con reparto round-robin (`rotating`) cambiar de endpoint es lo normal;
+        solo cuenta como failover si antes falló otro endpoint.
+        """
+        self.breakers[index].record_success()
+        with self._lock:
+            changed = self.active is not None and self.active != index
+            if changed and (had_failures or not rotating):
+                self.failovers += 1
+                logger.warning("Failover: cambia la BD activa", extra={"endpoint": self.breakers[index].name})
+            if had_failures:
+                self.last_failover_ms = (time.monotonic() - started_at) * 1000
+            self.active = index
+
+    def record_failure(self, index: int, error: Any = None):
+        self.breakers[index].record_failure(error)
+        self._ensure_probe_thread()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self.active
+            return {
+                "active_endpoint": self.breakers[active].name if active is not None else None,
+                "failovers": self.failovers,
+                "last_failover_ms": round(self.last_failover_ms, 2) if self.last_failover_ms is not None else None,
+                "endpoints": [breaker.snapshot() for breaker in self.breakers],
+            }
+
+    # --- Sonda de salud en segundo plano ---
+
+    def set_probe(self, probe_fn: Callable[[Dict[str, Any]], None]):
+        """Define la función que comprueba un endpoint (lanza excepción si falla)."""
+        self._probe_fn = probe_fn
+        for breaker in self.breakers:
+            breaker.background_probe = True
+
+    def _ensure_probe_thread(self):
+        if self._probe_fn is None:
+            return
+        with self._lock:
+            # Tras un fork (workers de Gunicorn) el hilo del padre no existe en el hijo
+            alive = self._probe_thread is not None and self._probe_thread.is_alive()
+            if alive and self._probe_pid == os.getpid():
+                return
+            self._probe_pid = os.getpid()
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="db-health-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            pending = False
+            for index, breaker in enumerate(self.breakers):
+                if breaker.state == CLOSED:
+                    continue
+                pending = True
+                if not breaker.begin_probe():
+                    continue
+                try:
+                    self._probe_fn(self.configs[index])
+                    breaker.record_success()
+                    logger.info("Sonda de salud: el endpoint responde de nuevo", extra={"endpoint": breaker.name})
+                except Exception as err:
+                    breaker.record_failure(err)
+            if not pending:
+                # Todos sanos: el hilo termina y se relanza en el próximo fallo.
+                # Se confirma bajo el lock de _ensure_probe_thread: un fallo que
+                # llegue después encuentra el hilo dado de baja y lanza otro.
+                with self._lock:
+                    if any(breaker.state != CLOSED for breaker in self.breakers):
+                        continue
+                    if self._probe_thread is threading.current_thread():
+                        self._probe_thread = None
+                    return
@@ -0,0 +1,176 @@
+# config/logs.py
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Id de la petición en curso; lo fija el hook before_request de app.py
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos propios de LogRecord: todo lo demás viene de `extra=` y va al JSON
+_ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def iniciar_peticion(request_id: Optional[str] = None) -> str:
+    """Fija (o genera) el id de la petición actual y lo devuelve."""
+    request_id = (request_id or "")[:64] or uuid.uuid4().hex[:16]
+    _request_id.set(request_id)
+    return request_id
+
+
+def request_id_actual() -> Optional[str]:
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea: ts, level, logger, msg, request_id y los `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_ESTANDAR and clave not in datos:
+                datos[clave] = valor
+        if record.exc_info:
+            datos["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos["exc"] = record.exc_text
+        return json.dumps(datos, default=str, ensure_ascii=False)
+
+
+class ContextoFilter(logging.Filter):
+    """Añade el request_id y descarta por muestreo los registros de bajo nivel.
+
+    WARNING y superiores se conservan siempre. DEBUG/INFO se muestrean por
+    petición (hash del request_id): una petición muestreada conserva todas sus
+    líneas en lugar de quedar a trozos.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # El filtro corre en el hilo que registra: aquí el ContextVar aún es el de la petición
+        request_id = _request_id.get()
+        record.request_id = request_id
+        if record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        clave = request_id or f"{threading.get_ident()}:{time.monotonic_ns()}"
+        return zlib.crc32(clave.encode("utf-8")) % 10000 < self.sample_rate * 10000
+
+
+class ColaNoBloqueanteHandler(logging.handlers.QueueHandler):
+    """QueueHandler con cola acotada: si está llena el registro se descarta y se
+    cuenta, nunca se bloquea el hilo de la petición."""
+
+    def __init__(self, cola: queue.Queue):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Se resuelven los argumentos y la traza aquí (pueden cambiar o liberarse
+        # antes de que el hilo escritor los lea); el JSON se arma en el escritor
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _Estado:
+    handler: Optional[ColaNoBloqueanteHandler] = None
+    listener: Optional[logging.handlers.QueueListener] = None
+    destino: Optional[logging.Handler] = None
+    pid: Optional[int] = None
+    lock = threading.Lock()
+
+
+def configurar_logging(level: Optional[str] = None, sample_rate: Optional[float] = None,
+                       max_cola: int = 10000, stream=None):
+    """Configura el logger raíz: JSON por línea, escrito desde un hilo de fondo.
+
+    Los registros pasan por una cola acotada (QueueHandler) y un QueueListener
+    los escribe en `stream` (stderr por defecto), así la E/S de logs nunca
+    ocurre en el hilo de la petición. Nivel y muestreo se leen de
+    NETMONITOR_LOG_LEVEL y NETMONITOR_LOG_SAMPLE si no se indican.
+    """
+    level = level or os.environ.get("NETMONITOR_LOG_LEVEL", "INFO")
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("NETMONITOR_LOG_SAMPLE", "1.0"))
+
+    with _Estado.lock:
+        raiz = logging.getLogger()
+        if _Estado.handler is not None:
+            raiz.removeHandler(_Estado.handler)
+            if _Estado.listener is not None and _Estado.pid == os.getpid():
+                _Estado.listener.stop()
+
+        destino = logging.StreamHandler(stream or sys.stderr)
+        destino.setFormatter(JsonFormatter())
+        handler = ColaNoBloqueanteHandler(queue.Queue(maxsize=max_cola))
+        handler.addFilter(ContextoFilter(sample_rate))
+        listener = logging.handlers.QueueListener(handler.queue, destino, respect_handler_level=False)
+        listener.start()
+
+        raiz.addHandler(handler)
+        raiz.setLevel(level)
+        _Estado.handler, _Estado.listener, _Estado.destino = handler, listener, destino
+        _Estado.pid = os.getpid()
+
+
+def asegurar_listener():
+    """Relanza el hilo escritor tras un fork (workers de Gunicorn con --preload)."""
+    if _Estado.listener is None or _Estado.pid == os.getpid():
+        return
+    with _Estado.lock:
+        if _Estado.pid == os.getpid():
+            return
+        # El hilo del padre no existe en el hijo: nuevo listener sobre la misma cola
+        _Estado.listener = logging.handlers.QueueListener(
+            _Estado.handler.queue, _Estado.destino, respect_handler_level=False)
+        _Estado.listener.start()
+        _Estado.pid = os.getpid()
+
+
+def detener_logging():
+    """Vacía la cola y detiene el hilo escritor (al salir del proceso)."""
+    with _Estado.lock:
+        if _Estado.listener is not None and _Estado.pid == os.getpid():
+            _Estado.listener.stop()
+            _Estado.listener = None
+
+
+def descartados() -> int:
+    """Registros descartados por cola llena desde el arranque."""
+    return _Estado.handler.descartados if _Estado.handler else 0
+
+
+# Al salir se escriben los registros que queden en la cola
+atexit.register(detener_logging)
@@ -0,0 +1,436 @@
+# config/metrics.py
+import atexit
+import functools
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows (servidor de desarrollo): sin consolidación entre procesos
+    fcntl = None
+
+# Conexiones prestadas en el contexto actual (petición o hilo). get_connection()
+# lo incrementa; el instrumentado de repositorios lo usa para saber si una
+# llamada llegó a la BD o se resolvió en caché.
+_prestamos: ContextVar[int] = ContextVar("prestamos_bd", default=0)
+
+# Límites superiores (segundos) de los buckets de los histogramas
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """Contadores e histogramas del proceso, agregados entre workers con archivos.
+
+    Cada worker acumula en memoria y vuelca (como mucho cada FLUSH_INTERVAL
+    segundos) un archivo JSON propio en DIRECTORY. render() suma los archivos
+    de todos los workers del host y genera el formato de texto de Prometheus.
+
+    Los archivos de procesos terminados se suman en RETIRADOS y se borran
+    (retirar(): child_exit de gunicorn.conf.py, y render() para los procesos
+    sin ese hook, como Hypercorn o el monitor): sus contadores siguen sumando
+    y el directorio tiene un archivo por proceso vivo más uno. El maestro de
+    Gunicorn vacía el directorio al arrancar (on_starting).
+    """
+
+    DIRECTORY = os.environ.get("NETMONITOR_METRICS_DIR") or os.path.join(
+        tempfile.gettempdir(), "netmonitor-metrics")
+    FLUSH_INTERVAL = 1.0
+    RETIRADOS = "retirados.json"
+
+    def __init__(self, directory: Optional[str] = None, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.directory = directory or self.DIRECTORY
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._collectors = []
+        self._volcado_al_salir = False
+        self._reset()
+
+    # --- Registro ---
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """Declara tipo y descripción de una métrica (líneas # TYPE / # HELP)."""
+        self._help[name] = (kind, help_text)
+
+    def add_collector(self, fn: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]):
+        """Registra una función que devuelve contadores absolutos del proceso
+        (nombre, etiquetas, valor) en cada volcado; p. ej. los de una caché."""
+        self._collectors.append(fn)
+
+    # --- Medición ---
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, self._labels(labels))
+        index = len(self.buckets)
+        for i, limit in enumerate(self.buckets):
+            if seconds <= limit:
+                index = i
+                break
+        with self._lock:
+            self._check_fork()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Un contador por bucket (no acumulado), +Inf y la suma
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - inicio, **labels)
+
+    @staticmethod
+    def contar_prestamo():
+        """Anota un préstamo de conexión en el contexto actual."""
+        _prestamos.set(_prestamos.get() + 1)
+
+    @staticmethod
+    def prestamos() -> int:
+        """Préstamos de conexión acumulados en el contexto actual."""
+        return _prestamos.get()
+
+    # --- Agregación entre workers ---
+
+    def maybe_flush(self):
+        """Vuelca a disco si pasó FLUSH_INTERVAL desde el último volcado."""
+        if time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Escribe las métricas de este proceso en su archivo (reemplazo atómico)."""
+        with self._lock:
+            self._check_fork()
+            counters = [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()]
+            path = self._path
+            self._last_flush = time.monotonic()
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                counters.append([name, list(self._labels(labels)), value])
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"buckets": self.buckets, "counters": counters, "histograms": histograms}, f)
+        os.replace(tmp, path)
+
+    def volcar_al_salir(self):
+        """Vuelca el último intervalo al terminar el proceso (atexit).
+
+        Solo para procesos servidor (post_worker_init de gunicorn.conf.py,
+        asgi.py, el servidor de desarrollo): un script o un benchmark que
+        importe la app no deja archivos en el directorio.
+        """
+        if not self._volcado_al_salir:
+            self._volcado_al_salir = True
+            atexit.register(self._volcar_si_hay_datos)
+
+    def _volcar_si_hay_datos(self):
+        if self._counters or self._histograms:
+            self.flush()
+
+    def render(self) -> str:
+        """Texto de exposición de Prometheus con la suma de todos los workers."""
+        self.flush()
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], list] = {}
+        # Con el bloqueo, un archivo que se está retirando no se cuenta dos veces
+        with self._bloqueo(self.directory):
+            self._retirar(self.directory, None)
+            for nombre in sorted(os.listdir(self.directory)):
+                if nombre.endswith(".json"):
+                    self._sumar_archivo(os.path.join(self.directory, nombre), self.buckets, counters, histograms)
+
+        lines = []
+        for name in sorted({key[0] for key in counters}):
+            self._header(lines, name, COUNTER)
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._format_labels(labels)} {self._format_value(value)}")
+        self._render_hit_ratios(lines, counters)
+        for name in sorted({key[0] for key in histograms}):
+            self._header(lines, name, HISTOGRAM)
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                acumulado = 0
+                for limit, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                    acumulado += count
+                    le = labels + (("le", limit if limit == "+Inf" else repr(float(limit))),)
+                    lines.append(f"{name}_bucket{self._format_labels(le)} {acumulado}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {self._format_value(values[-1])}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {acumulado}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def limpiar_directorio(cls, directory: Optional[str] = None):
+        """Borra los archivos de métricas (on_starting del maestro de Gunicorn)."""
+        directory = directory or cls.DIRECTORY
+        if not os.path.isdir(directory):
+            return
+        for nombre in os.listdir(directory):
+            if nombre.endswith((".json", ".tmp")):
+                os.remove(os.path.join(directory, nombre))
+
+    @classmethod
+    def retirar(cls, pids: Optional[Iterable[int]] = None, directory: Optional[str] = None,
+                esperar: bool = True):
+        """Suma en RETIRADOS los archivos de procesos terminados y los borra.
+
+        `pids`: procesos que se sabe terminados (child_exit de Gunicorn); None =
+        los archivos cuyo proceso ya no existe en el host. Con esperar=False no
+        se bloquea si el directorio está ocupado: lo que quede lo retira el
+        siguiente render().
+        """
+        directory = directory or cls.DIRECTORY
+        if not os.path.isdir(directory):
+            return
+        with cls._bloqueo(directory, esperar) as bloqueado:
+            if bloqueado:
+                cls._retirar(directory, None if pids is None else set(pids))
+
+    @classmethod
+    def _retirar(cls, directory, pids):
+        if fcntl is None:
+            return
+        retirar = []
+        for nombre in os.listdir(directory):
+            pid = cls._pid_de(nombre)
+            if pid is None or pid == os.getpid():
+                continue
+            if (pid in pids) if pids is not None else not cls._vivo(pid):
+                retirar.append(os.path.join(directory, nombre))
+        if not retirar:
+            return
+        destino = os.path.join(directory, cls.RETIRADOS)
+        buckets = None
+        counters, histograms = {}, {}
+        for path in [destino] + retirar:
+            buckets = cls._sumar_archivo(path, buckets, counters, histograms) or buckets
+        if buckets is not None:
+            tmp = f"{destino}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "buckets": buckets,
+                    "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+                    "histograms": [[name, list(labels), values] for (name, labels), values in histograms.items()],
+                }, f)
+            os.replace(tmp, destino)
+        for path in retirar:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # --- Helpers internos ---
+
+    @staticmethod
+    def _sumar_archivo(path, buckets, counters, histograms):
+        """Suma un archivo de métricas en `counters`/`histograms` si sus buckets
+        coinciden con `buckets` (None = los del archivo). Devuelve sus buckets,
+        o None si no se pudo leer o no coinciden."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        propios = tuple(data.get("buckets", ()))
+        if buckets is not None and propios != tuple(buckets):
+            return None
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                total[i] += value
+        return propios
+
+    @staticmethod
+    @contextmanager
+    def _bloqueo(directory, esperar: bool = True):
+        """Bloqueo exclusivo del directorio entre procesos (flock). Produce si
+        se obtuvo; sin esperar, False cuando otro lo tiene."""
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, ".lock"), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _pid_de(nombre: str) -> Optional[int]:
+        """Pid de un archivo de worker ("<pid>-<token>.json"); None para los demás."""
+        pid, _, resto = nombre.partition("-")
+        if not resto.endswith(".json") or not pid.isdigit():
+            return None
+        return int(pid)
+
+    @staticmethod
+    def _vivo(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _reset(self):
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+        self._pid = os.getpid()
+        # pid + token: un pid reutilizado no pisa el archivo de un worker anterior
+        self._path = os.path.join(self.directory, f"{self._pid}-{uuid.uuid4().hex[:8]}.json")
+        self._last_flush = 0.0
+
+    def _check_fork(self):
+        # Tras un fork el hijo hereda los valores del padre: empieza de cero
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def _header(self, lines, name, kind):
+        kind, help_text = self._help.get(name, (kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def _render_hit_ratios(self, lines, counters):
+        """netmonitor_cache_hit_ratio a partir de los aciertos y fallos sumados."""
+        hits = {labels: v for (name, labels), v in counters.items() if name == "netmonitor_cache_hits_total"}
+        misses = {labels: v for (name, labels), v in counters.items() if name == "netmonitor_cache_misses_total"}
+        if not hits:
+            return
+        lines.append("# HELP netmonitor_cache_hit_ratio Aciertos / (aciertos + fallos) de cada caché")
+        lines.append("# TYPE netmonitor_cache_hit_ratio gauge")
+        for labels in sorted(hits):
+            total = hits[labels] + misses.get(labels, 0.0)
+            ratio = hits[labels] / total if total else 0.0
+            lines.append(f"netmonitor_cache_hit_ratio{self._format_labels(labels)} {ratio:.6f}")
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _format_labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        escapar = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in labels) + "}"
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Instancia compartida por todo el proceso
+metrics = Metrics()
+
+
+metrics.describe("netmonitor_http_request_duration_seconds", HISTOGRAM, "Latencia de cada ruta Flask")
+metrics.describe("netmonitor_http_requests_total", COUNTER, "Peticiones atendidas por ruta, método y código")
+metrics.describe("netmonitor_db_connections_opened_total", COUNTER, "Conexiones físicas abiertas por los pools")
+metrics.describe("netmonitor_db_checkouts_total", COUNTER, "Conexiones prestadas por get_connection()")
+metrics.describe("netmonitor_db_slow_queries_total", COUNTER, "Sentencias por encima de SLOW_QUERY_MS")
+metrics.describe("netmonitor_repository_query_seconds", HISTOGRAM,
+                 "Tiempo de los métodos de repositorio que llegaron a la BD")
+metrics.describe("netmonitor_bcrypt_seconds", HISTOGRAM, "Tiempo de cada hash o verificación bcrypt")
+metrics.describe("netmonitor_bcrypt_queue_seconds", HISTOGRAM, "Espera en cola del pool de bcrypt")
+metrics.describe("netmonitor_bcrypt_rejections_total", COUNTER, "Peticiones rechazadas con el pool de bcrypt lleno")
+metrics.describe("netmonitor_bcrypt_timeouts_total", COUNTER, "Hashes bcrypt que no terminaron en PasswordService.TIMEOUT")
+metrics.describe("netmonitor_cache_hits_total", COUNTER, "Aciertos de las cachés en memoria")
+metrics.describe("netmonitor_cache_misses_total", COUNTER, "Fallos de las cachés en memoria")
+metrics.describe("netmonitor_cache_evictions_total", COUNTER, "Expulsiones LRU de las cachés en memoria")
+
+
+def registrar_cache(nombre: str, cache):
+    """Exporta los contadores de una LRUCache con la etiqueta cache=<nombre>."""
+    def collector():
+        stats = cache.stats()
+        for clave in ("hits", "misses", "evictions"):
+            yield f"netmonitor_cache_{clave}_total", {"cache": nombre}, stats[clave]
+    metrics.add_collector(collector)
+
+
+def instrumentar_repositorio(cls):
+    """Decorador de clase: mide el tiempo de cada método público del repositorio.
+
+    Solo se registran las llamadas que pidieron una conexión (p. ej. un
+    find_by_id resuelto en caché no cuenta como consulta). Los métodos
+    generadores se miden hasta que se agotan o se cierran, y los async hasta
+    que termina la corrutina.
+    """
+    for nombre, atributo in list(vars(cls).items()):
+        if nombre.startswith("_") or not inspect.isfunction(atributo):
+            continue
+        setattr(cls, nombre, _cronometrar(cls.__name__, nombre, atributo))
+    return cls
+
+
+def _cronometrar(repositorio: str, metodo: str, fn):
+    etiquetas = {"repository": repositorio, "method": metodo}
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generador(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                yield from fn(*args, **kwargs)
+            finally:
+                metrics.observe("netmonitor_repository_query_seconds", time.perf_counter() - inicio, **etiquetas)
+        return generador
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def corrutina(*args, **kwargs):
+            antes = _prestamos.get()
+            inicio = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                if _prestamos.get() != antes:
+                    metrics.observe("netmonitor_repository_query_seconds", time.perf_counter() - inicio, **etiquetas)
+        return corrutina
+
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        antes = _prestamos.get()
+        inicio = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if _prestamos.get() != antes:
+                metrics.observe("netmonitor_repository_query_seconds", time.perf_counter() - inicio, **etiquetas)
+    return envoltura
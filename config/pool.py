@@ -0,0 +1,163 @@
+# config/pool.py
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import mysql.connector
+
+from config.failover import endpoint_name
+from config.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Excepción levantada cuando no se obtiene una conexión del pool a tiempo."""
+    pass
+
+
+class ConnectionPool:
+    """Pool acotado y thread-safe de conexiones MySQL para un único servidor.
+
+    - Nunca mantiene más de `size` conexiones físicas abiertas.
+    - `acquire()` espera hasta `timeout` segundos a que se libere una conexión.
+    - Las conexiones que llevan más de `validation_interval` segundos sin usarse
+      se validan con un ping antes de entregarlas.
+    - Las conexiones ociosas más de `max_idle` segundos se cierran (evicción).
+    """
+
+    def __init__(self, config: Dict[str, Any], size: int = 5, timeout: float = 10.0,
+                 max_idle: float = 300.0, validation_interval: float = 5.0,
+                 factory: Optional[Callable[..., Any]] = None):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.validation_interval = validation_interval
+        self.factory = factory or mysql.connector.connect
+
+        self._idle = deque()  # (conexión, instante en que se devolvió)
+        self._created = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    # --- Ciclo de vida de conexiones ---
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Toma una conexión del pool, creando una nueva si hay capacidad."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                self._evict_idle_locked()
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No hay conexiones libres hacia {self.config.get('host')} "
+                            f"tras {timeout:.1f}s (tamaño del pool: {self.size})"
+                        )
+                    self._cond.wait(remaining)
+                    self._evict_idle_locked()
+
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    # Reservamos el hueco antes de conectar para no rebasar `size`
+                    self._created += 1
+                    connection, returned_at = None, None
+
+            if connection is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._forget()
+                    raise
+
+            if time.monotonic() - returned_at < self.validation_interval or self._is_alive(connection):
+                return connection
+
+            # La conexión murió mientras estaba ociosa: se descarta y se reintenta
+            self._close_quietly(connection)
+            self._forget()
+
+    def release(self, connection, discard: bool = False):
+        """Devuelve una conexión al pool (o la cierra si está rota)."""
+        if not discard:
+            try:
+                # No dejar transacciones abiertas: otra petición vería un snapshot viejo
+                if connection.in_transaction:
+                    connection.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._close_quietly(connection)
+            self._forget()
+            return
+
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado actual del pool, útil para diagnóstico."""
+        with self._cond:
+            return {
+                "host": self.config.get("host"),
+                "size": self.size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+            }
+
+    # --- Helpers internos ---
+
+    def _connect(self):
+        logger.info("Abriendo nueva conexión del pool", extra={"endpoint": endpoint_name(self.config)})
+        metrics.inc("netmonitor_db_connections_opened_total", endpoint=endpoint_name(self.config))
+        return self.factory(**self.config)
+
+    def _forget(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _evict_idle_locked(self):
+        """Cierra las conexiones ociosas más antiguas que `max_idle` (con el lock tomado)."""
+        if not self._idle:
+            return
+        limit = time.monotonic() - self.max_idle
+        # Las más antiguas están a la izquierda: se reutiliza siempre la más reciente (LIFO)
+        while self._idle and self._idle[0][1] < limit:
+            connection, _ = self._idle.popleft()
+            self._created -= 1
+            self._close_quietly(connection)
+
+    @staticmethod
+    def _is_alive(connection) -> bool:
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,34 @@
+# gunicorn.conf.py - Despliegue síncrono (app.py)
+#
+#   gunicorn app:app      (Gunicorn lee este archivo del directorio actual)
+#
+# Las opciones de línea de comandos tienen prioridad sobre estos valores.
+# Los hooks mantienen el directorio de métricas de config/metrics.py: vacío
+# al arrancar el maestro y con los contadores de cada worker terminado sumados
+# en un único archivo, en lugar de un archivo por pid que no deja de crecer.
+import os
+
+from config.metrics import Metrics
+
+wsgi_app = "app:app"
+bind = os.environ.get("NETMONITOR_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("NETMONITOR_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("NETMONITOR_THREADS", "8"))
+
+
+def on_starting(server):
+    # Despliegue nuevo: fuera los archivos de procesos de la ejecución anterior
+    Metrics.limpiar_directorio()
+
+
+def post_worker_init(worker):
+    from config.metrics import metrics
+    metrics.volcar_al_salir()
+
+
+def child_exit(server, worker):
+    # Su último volcado (atexit) ya está escrito: se suma a los retirados.
+    # Gunicorn llama a este hook desde el manejador de SIGCHLD, que puede
+    # reentrar: sin esperar al bloqueo (si está ocupado, lo retira render()).
+    Metrics.retirar([worker.pid], esperar=False)
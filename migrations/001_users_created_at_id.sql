@@ -0,0 +1,4 @@
+-- migrations/001_users_created_at_id.sql
+-- Índice para la paginación keyset de /api/users y /api/users/search:
+-- ORDER BY created_at DESC, id DESC con filtro (created_at, id) < cursor.
+CREATE INDEX idx_users_created_at_id ON users (created_at, id);
@@ -0,0 +1,24 @@
+-- migrations/002_users_fulltext.sql
+-- Índice FULLTEXT con parser ngram para la búsqueda de usuarios por subcadena
+-- (UsuarioRepository.search_users) sin el escaneo completo de LIKE '%term%'.
+-- El tamaño del token lo fija la variable del servidor ngram_token_size (2 por
+-- defecto) y debe coincidir con UsuarioRepository.NGRAM_TOKEN_SIZE.
+--
+-- Sin stopwords: con ngram, InnoDB descarta todo token que contenga una
+-- stopword, y la lista por defecto incluye "a" e "i", así que no se indexarían
+-- la mayoría de bigramas de nombres reales ("ma", "ar", "ri", "an"...) y MATCH
+-- devolvería menos filas que LIKE. La tabla guarda el valor de la sesión que
+-- crea el índice, y las inserciones posteriores lo respetan.
+SET SESSION innodb_ft_enable_stopword = OFF;
+ALTER TABLE users ADD FULLTEXT INDEX ft_users_nombre_email (nombre, email) WITH PARSER ngram;
+
+-- Si el índice ya se creó con las stopwords activas, reconstruirlo en una
+-- sesión con la variable desactivada:
+-- SET SESSION innodb_ft_enable_stopword = OFF;
+-- ALTER TABLE users DROP INDEX ft_users_nombre_email;
+-- ALTER TABLE users ADD FULLTEXT INDEX ft_users_nombre_email (nombre, email) WITH PARSER ngram;
+
+-- Los términos de un solo carácter se buscan por prefijo (LIKE 'x%'), que usa
+-- índices B-tree. Si nombre/email no tienen ya un índice UNIQUE, crearlos:
+-- CREATE INDEX idx_users_nombre ON users (nombre);
+-- CREATE INDEX idx_users_email ON users (email);
@@ -0,0 +1,25 @@
+-- migrations/003_devices.sql
+-- Inventario de dispositivos monitorizados (/dispositivos, /api/dispositivos)
+-- y último estado de alcanzabilidad que escribe el monitor (scripts/monitor.py).
+CREATE TABLE devices (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    host VARCHAR(255) NOT NULL,
+    -- 'tcp' (connect a host:puerto) o 'icmp' (echo)
+    metodo VARCHAR(8) NOT NULL DEFAULT 'tcp',
+    -- 0 con ICMP: la clave única (host, metodo, puerto) no admite NULL repetidos
+    puerto INT NOT NULL DEFAULT 0,
+    intervalo_s INT NOT NULL DEFAULT 60,
+    activo TINYINT NOT NULL DEFAULT 1,
+    -- 'desconocido' hasta la primera comprobación; luego 'up' o 'down'
+    estado VARCHAR(16) NOT NULL DEFAULT 'desconocido',
+    latencia_ms DOUBLE NULL,
+    fallos_consecutivos INT NOT NULL DEFAULT 0,
+    ultimo_chequeo DATETIME NULL,
+    ultimo_cambio DATETIME NULL,
+    ultimo_error VARCHAR(255) NULL,
+    created_at DATETIME,
+    updated_at DATETIME,
+    UNIQUE KEY uq_devices_host_metodo_puerto (host, metodo, puerto),
+    INDEX idx_devices_estado (estado)
+);
@@ -0,0 +1,35 @@
+-- migrations/004_device_samples.sql
+-- Histórico de comprobaciones de dispositivos (services/historial_service.py).
+-- Lo escribe solo el monitor (scripts/monitor.py), por lotes; la API lo lee
+-- en /api/dispositivos/<id>/historial.
+
+-- Muestras crudas: una fila por comprobación, instantes en segundos epoch.
+-- La clave primaria agrupa cada dispositivo por tiempo (InnoDB ordena la
+-- tabla por ella): un rango de un dispositivo es una lectura contigua.
+CREATE TABLE device_samples (
+    dispositivo_id INT NOT NULL,
+    ts INT UNSIGNED NOT NULL,
+    ok TINYINT NOT NULL,
+    -- NULL si la comprobación falló
+    latencia_ms FLOAT NULL,
+    PRIMARY KEY (dispositivo_id, ts),
+    -- Purga por antigüedad (retención)
+    INDEX idx_device_samples_ts (ts)
+);
+
+-- Agregados por intervalo: resolucion en segundos (60, 3600, 86400) y
+-- bucket = inicio del intervalo. Se acumulan con INSERT ... ON DUPLICATE KEY
+-- UPDATE, así que un intervalo puede escribirse en varias veces.
+CREATE TABLE device_rollups (
+    dispositivo_id INT NOT NULL,
+    resolucion INT NOT NULL,
+    bucket INT UNSIGNED NOT NULL,
+    muestras INT NOT NULL,
+    exitos INT NOT NULL,
+    -- Suma de latencias de las comprobaciones correctas (media = suma / exitos)
+    latencia_suma DOUBLE NOT NULL DEFAULT 0,
+    latencia_min FLOAT NULL,
+    latencia_max FLOAT NULL,
+    PRIMARY KEY (dispositivo_id, resolucion, bucket),
+    INDEX idx_device_rollups_resolucion_bucket (resolucion, bucket)
+);
@@ -0,0 +1,16 @@
+-- migrations/005_device_events.sql
+-- Cambios de estado de los dispositivos (up/down) que registra el monitor.
+-- El id autoincremental es el id de evento de /api/dispositivos/eventos
+-- (Server-Sent Events): cada proceso web lee los nuevos con `id > último`
+-- y un cliente que se reconecta continúa desde su Last-Event-ID.
+CREATE TABLE device_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    dispositivo_id INT NOT NULL,
+    anterior VARCHAR(16) NOT NULL,
+    estado VARCHAR(16) NOT NULL,
+    -- Segundos epoch de la comprobación que provocó el cambio
+    ts INT UNSIGNED NOT NULL,
+    error VARCHAR(255) NULL,
+    -- Purga por antigüedad (retención)
+    INDEX idx_device_events_ts (ts)
+);
@@ -0,0 +1,95 @@
+-- migrations/006_user_stats.sql
+-- Agregados de usuarios para /api/stats (tarjeta "Estadísticas" del dashboard).
+-- Los mantienen triggers de users dentro de la misma sentencia que cada alta,
+-- baja, cambio de rol/estado o login: sin idas y vueltas extra desde la
+-- aplicación, y leerlos no depende del tamaño de users. Sin esta migración
+-- las escrituras funcionan igual; solo falla /api/stats.
+-- scripts/user_stats.py los recalcula desde users si se desviaron.
+--
+-- Contiene triggers con BEGIN ... END: aplicar con el cliente mysql
+-- (mysql netmonitor < migrations/006_user_stats.sql), que entiende DELIMITER.
+-- Mejor con poco tráfico: una escritura entre la carga inicial y la creación
+-- de los triggers no se cuenta (se corrige con scripts/user_stats.py).
+
+-- Usuarios por rol y estado. rol_id 0 = sin rol (la clave no admite NULL).
+CREATE TABLE user_counts (
+    rol_id INT NOT NULL,
+    activo TINYINT NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (rol_id, activo)
+);
+
+-- Usuarios por día (UTC) de su último acceso: cada usuario cuenta en un solo
+-- día, así que "accesos en los últimos 7 días" es la suma de 7 filas.
+CREATE TABLE user_access_days (
+    dia DATE NOT NULL PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0
+);
+
+-- Bloqueados = bloqueado_hasta > ahora: depende de la hora, no se puede
+-- acumular. Con el índice el recuento solo recorre los bloqueos vigentes.
+CREATE INDEX idx_users_bloqueado_hasta ON users (bloqueado_hasta);
+
+-- Carga inicial desde los usuarios existentes
+INSERT INTO user_counts (rol_id, activo, total)
+SELECT COALESCE(rol_id, 0), IF(activo, 1, 0), COUNT(*)
+FROM users GROUP BY COALESCE(rol_id, 0), IF(activo, 1, 0);
+
+INSERT INTO user_access_days (dia, total)
+SELECT DATE(ultimo_acceso), COUNT(*)
+FROM users WHERE ultimo_acceso IS NOT NULL GROUP BY DATE(ultimo_acceso);
+
+DELIMITER $$
+
+CREATE TRIGGER users_stats_insert AFTER INSERT ON users FOR EACH ROW
+BEGIN
+    INSERT INTO user_counts (rol_id, activo, total)
+    VALUES (COALESCE(NEW.rol_id, 0), IF(NEW.activo, 1, 0), 1)
+    ON DUPLICATE KEY UPDATE total = total + 1;
+    IF NEW.ultimo_acceso IS NOT NULL THEN
+        INSERT INTO user_access_days (dia, total) VALUES (DATE(NEW.ultimo_acceso), 1)
+        ON DUPLICATE KEY UPDATE total = total + 1;
+    END IF;
+END$$
+
+-- Solo toca los agregados si cambia el grupo: un login mueve al usuario de día
+-- una vez al día; el resto de logins y ediciones no escriben nada más. Los dos
+-- grupos se actualizan en orden de clave para que dos cambios cruzados (rol
+-- 1 -> 2 y 2 -> 1) bloqueen las filas en el mismo orden y no se interbloqueen.
+CREATE TRIGGER users_stats_update AFTER UPDATE ON users FOR EACH ROW
+BEGIN
+    IF (COALESCE(OLD.rol_id, 0), IF(OLD.activo, 1, 0)) < (COALESCE(NEW.rol_id, 0), IF(NEW.activo, 1, 0)) THEN
+        INSERT INTO user_counts (rol_id, activo, total)
+        VALUES (COALESCE(OLD.rol_id, 0), IF(OLD.activo, 1, 0), -1),
+               (COALESCE(NEW.rol_id, 0), IF(NEW.activo, 1, 0), 1)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+    ELSEIF (COALESCE(OLD.rol_id, 0), IF(OLD.activo, 1, 0)) > (COALESCE(NEW.rol_id, 0), IF(NEW.activo, 1, 0)) THEN
+        INSERT INTO user_counts (rol_id, activo, total)
+        VALUES (COALESCE(NEW.rol_id, 0), IF(NEW.activo, 1, 0), 1),
+               (COALESCE(OLD.rol_id, 0), IF(OLD.activo, 1, 0), -1)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+    END IF;
+    IF NOT (DATE(OLD.ultimo_acceso) <=> DATE(NEW.ultimo_acceso)) THEN
+        IF OLD.ultimo_acceso IS NOT NULL THEN
+            INSERT INTO user_access_days (dia, total) VALUES (DATE(OLD.ultimo_acceso), -1)
+            ON DUPLICATE KEY UPDATE total = total - 1;
+        END IF;
+        IF NEW.ultimo_acceso IS NOT NULL THEN
+            INSERT INTO user_access_days (dia, total) VALUES (DATE(NEW.ultimo_acceso), 1)
+            ON DUPLICATE KEY UPDATE total = total + 1;
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER users_stats_delete AFTER DELETE ON users FOR EACH ROW
+BEGIN
+    INSERT INTO user_counts (rol_id, activo, total)
+    VALUES (COALESCE(OLD.rol_id, 0), IF(OLD.activo, 1, 0), -1)
+    ON DUPLICATE KEY UPDATE total = total - 1;
+    IF OLD.ultimo_acceso IS NOT NULL THEN
+        INSERT INTO user_access_days (dia, total) VALUES (DATE(OLD.ultimo_acceso), -1)
+        ON DUPLICATE KEY UPDATE total = total - 1;
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,9 @@
+-- migrations/007_users_refresh.sql
+-- Revocación de tokens de refresco compartida por todos los workers.
+-- refresh_revocado_hasta es el instante (segundos epoch, el 'iat' del token)
+-- hasta el que los tokens de refresco del usuario ya no valen: refrescar o
+-- cerrar sesión con un token lo avanza hasta su 'iat' con un UPDATE
+-- condicional (UsuarioRepository.consumir_refresco), así que un token usado o
+-- cerrado no vuelve a servir en ningún proceso, y con él los emitidos antes.
+-- Sin esta migración el login funciona igual; /api/refresh falla.
+ALTER TABLE users ADD COLUMN refresh_revocado_hasta DOUBLE NOT NULL DEFAULT 0;
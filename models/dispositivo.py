@@ -0,0 +1,57 @@
+# models/dispositivo.py
+from datetime import datetime
+
+
+class Dispositivo:
+    """Modelo de dispositivo monitorizado que mapea la tabla `devices`.
+
+    Columnas: id, nombre, host, metodo, puerto, intervalo_s, activo, estado,
+    latencia_ms, fallos_consecutivos, ultimo_chequeo, ultimo_cambio,
+    ultimo_error, created_at, updated_at
+
+    `metodo` es 'tcp' (connect a host:puerto) o 'icmp' (echo; puerto 0).
+    Las columnas de estado solo las escribe el monitor (scripts/monitor.py).
+    """
+
+    __slots__ = ('id', 'nombre', 'host', 'metodo', 'puerto', 'intervalo_s', 'activo', 'estado',
+                 'latencia_ms', 'fallos_consecutivos', 'ultimo_chequeo', 'ultimo_cambio',
+                 'ultimo_error', 'created_at', 'updated_at')
+
+    METODOS = ('tcp', 'icmp')
+    ESTADOS = ('desconocido', 'up', 'down')
+
+    def __init__(self, id=None, nombre=None, host=None, metodo='tcp', puerto=0, intervalo_s=60,
+                 activo=1, estado='desconocido', latencia_ms=None, fallos_consecutivos=0,
+                 ultimo_chequeo=None, ultimo_cambio=None, ultimo_error=None,
+                 created_at=None, updated_at=None):
+        self.id = id
+        self.nombre = nombre
+        self.host = host
+        self.metodo = metodo
+        self.puerto = puerto
+        self.intervalo_s = intervalo_s
+        self.activo = activo
+        self.estado = estado
+        self.latencia_ms = latencia_ms
+        self.fallos_consecutivos = fallos_consecutivos
+        self.ultimo_chequeo = ultimo_chequeo
+        self.ultimo_cambio = ultimo_cambio
+        self.ultimo_error = ultimo_error
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @staticmethod
+    def from_dict(d: dict):
+        if not d:
+            return None
+        return Dispositivo(**{campo: d[campo] for campo in Dispositivo.__slots__ if campo in d})
+
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in Dispositivo.__slots__}
+
+    @staticmethod
+    def nuevo(nombre: str, host: str, metodo: str, puerto: int, intervalo_s: int, activo: int = 1):
+        """Instancia lista para insertar, con timestamps."""
+        now = datetime.utcnow()
+        return Dispositivo(nombre=nombre, host=host, metodo=metodo, puerto=puerto,
+                           intervalo_s=intervalo_s, activo=activo, created_at=now, updated_at=now)
@@ -1,20 +1,51 @@
 # models/usuario.py
 import hashlib
+import json
 import uuid as _uuid
-from datetime import datetime
+from datetime import date, datetime, timezone
+from json.encoder import encode_basestring_ascii
+from operator import itemgetter
 import bcrypt
 
+# Nombres en inglés de RFC 2822: los de strftime dependen del locale
+_DIAS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MESES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
 
 class Usuario:
     """Modelo de usuario que mapea la tabla `users`.
 
     Columnas esperadas: id, uuid, nombre, email, password_hash, rol_id, activo,
     ultimo_acceso, intentos_fallidos, bloqueado_hasta, created_at, updated_at
+
+    `rol` solo se rellena en los listados con ?include=rol (columnas rol_nombre
+    y rol_descripcion del JOIN con roles); si no, es None y to_dict lo omite.
+
+    Con `__slots__` cada instancia ocupa un bloque fijo sin __dict__: los
+    listados grandes se construyen con `fabrica()` a partir de filas tupla y
+    se serializan con `lista_json()` sin pasar por dicts intermedios.
     """
 
+    __slots__ = ('id', 'uuid', 'nombre', 'email', 'password_hash', 'rol_id', 'activo',
+                 'ultimo_acceso', 'intentos_fallidos', 'bloqueado_hasta', 'created_at',
+                 'updated_at', 'rol')
+
+    # Coste de bcrypt (log2 de iteraciones) para hashes nuevos
+    BCRYPT_ROUNDS = 12
+
+    # Nombres de columna alternativos por campo, los mismos que acepta
+    # from_dict; fabrica() usa el primero que traiga la consulta.
+    ALIAS = {
+        'id': ('id', 'Id'),
+        'uuid': ('uuid', 'UUID'),
+        'nombre': ('nombre', 'nombre_usuario', 'username'),
+        'email': ('email', 'correo_electronico'),
+        'password_hash': ('password_hash', 'contrasena', 'password'),
+    }
+
     def __init__(self, id=None, uuid=None, nombre=None, email=None, password_hash=None,
                  rol_id=None, activo=1, ultimo_acceso=None, intentos_fallidos=0,
-                 bloqueado_hasta=None, created_at=None, updated_at=None):
+                 bloqueado_hasta=None, created_at=None, updated_at=None, rol=None):
         self.id = id
         self.uuid = uuid
         self.nombre = nombre
@@ -27,13 +58,14 @@ class Usuario:
         self.bloqueado_hasta = bloqueado_hasta
         self.created_at = created_at
         self.updated_at = updated_at
+        self.rol = rol
 
     @staticmethod
     def hash_password(password: str) -> str:
         """Genera un hash de contraseña usando bcrypt."""
         if password is None:
             return None
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=Usuario.BCRYPT_ROUNDS))
         return hashed.decode('utf-8')
 
     def verify_password(self, password: str) -> bool:
@@ -55,6 +87,28 @@ class Usuario:
         # Fallback: legacy SHA-256 comparison
         return ph == hashlib.sha256(password.encode('utf-8')).hexdigest()
 
+    @staticmethod
+    def hash_info(password_hash) -> tuple:
+        """Clasifica un hash almacenado: ('bcrypt', coste), ('sha256', None) o ('desconocido', None)."""
+        if not password_hash:
+            return ('desconocido', None)
+        ph = str(password_hash)
+        if ph.startswith('$2a$') or ph.startswith('$2b$') or ph.startswith('$2y$'):
+            try:
+                return ('bcrypt', int(ph[4:6]))
+            except ValueError:
+                return ('desconocido', None)
+        if len(ph) == 64:
+            return ('sha256', None)
+        return ('desconocido', None)
+
+    def needs_rehash(self) -> bool:
+        """True si el hash es legacy SHA-256 o bcrypt con un coste distinto de BCRYPT_ROUNDS."""
+        tipo, coste = Usuario.hash_info(self.password_hash)
+        if tipo == 'sha256':
+            return True
+        return tipo == 'bcrypt' and coste != Usuario.BCRYPT_ROUNDS
+
     @staticmethod
     def from_dict(d: dict):
         if not d:
@@ -72,11 +126,58 @@ class Usuario:
             intentos_fallidos=d.get('intentos_fallidos'),
             bloqueado_hasta=d.get('bloqueado_hasta'),
             created_at=d.get('created_at'),
-            updated_at=d.get('updated_at')
+            updated_at=d.get('updated_at'),
+            rol=Usuario._rol_de_fila(d)
         )
 
+    @staticmethod
+    def _rol_de_fila(d: dict):
+        """Rol expandido de una fila con JOIN a roles, o None si la fila no lo trae."""
+        if 'rol_nombre' not in d:
+            return None
+        # Con LEFT JOIN un rol_id huérfano llega con nombre NULL: se devuelve igual
+        return {'id': d.get('rol_id'), 'nombre': d['rol_nombre'], 'descripcion': d.get('rol_descripcion')}
+
+    @staticmethod
+    def fabrica(columnas):
+        """Constructor de Usuario para las filas tupla de una consulta.
+
+        Resuelve una sola vez, con los nombres de columna del cursor
+        (`cursor.description`), qué posición alimenta cada campo; después
+        cada fila cuesta una llamada, sin dict por fila ni búsqueda de alias.
+        Los campos sin columna quedan en None, como en from_dict.
+        """
+        columnas = [c[0] if isinstance(c, (tuple, list)) else c for c in columnas]
+        posiciones = {}
+        for i, columna in enumerate(columnas):
+            posiciones.setdefault(columna, i)
+
+        indices = []
+        for campo in Usuario.__slots__[:-1]:
+            alias = Usuario.ALIAS.get(campo, (campo,))
+            indices.append(next((posiciones[a] for a in alias if a in posiciones), None))
+
+        # Los campos sin columna leen una posición de relleno que vale None
+        relleno = (None,)
+        extraer = itemgetter(*[len(columnas) if i is None else i for i in indices])
+        i_rol = posiciones.get('rol_nombre')
+        if i_rol is None:
+            def construir(fila):
+                return Usuario(*extraer(fila + relleno))
+        else:
+            i_rol_id = posiciones.get('rol_id')
+            i_rol_desc = posiciones.get('rol_descripcion')
+
+            def construir(fila):
+                fila = fila + relleno
+                rol = {'id': fila[-1 if i_rol_id is None else i_rol_id], 'nombre': fila[i_rol],
+                       'descripcion': fila[-1 if i_rol_desc is None else i_rol_desc]}
+                return Usuario(*extraer(fila), rol=rol)
+
+        return construir
+
     def to_dict(self):
-        return {
+        datos = {
             'id': self.id,
             'uuid': self.uuid,
             'nombre': self.nombre,
@@ -90,19 +191,82 @@ class Usuario:
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
+        if self.rol is not None:
+            datos['rol'] = self.rol
+        return datos
+
+    @staticmethod
+    def lista_json(usuarios) -> str:
+        """JSON de `[u.to_dict() for u in usuarios]` escrito directamente.
+
+        Mismo texto que jsonify (claves ordenadas, ASCII, compacto y fechas
+        RFC 2822 en UTC) sin crear un dict por usuario ni recorrerlo después.
+        """
+        valor = _valor_json
+        partes = []
+        for u in usuarios:
+            rol = u.rol
+            partes.append(
+                '{"activo":%s,"bloqueado_hasta":%s,"created_at":%s,"email":%s,"id":%s,'
+                '"intentos_fallidos":%s,"nombre":%s,%s"rol_id":%s,"ultimo_acceso":%s,'
+                '"updated_at":%s,"username":%s,"uuid":%s}' % (
+                    valor(u.activo), valor(u.bloqueado_hasta), valor(u.created_at),
+                    valor(u.email), valor(u.id), valor(u.intentos_fallidos), valor(u.nombre),
+                    '' if rol is None else f'"rol":{valor(rol)},',
+                    valor(u.rol_id), valor(u.ultimo_acceso), valor(u.updated_at),
+                    valor(u.nombre), valor(u.uuid),
+                )
+            )
+        return '[' + ','.join(partes) + ']'
 
     @staticmethod
     def new_from_plain_password(nombre: str, email: str, plain_password: str, rol_id: int = None):
         """Crear instancia lista para insertar: genera uuid, hashea contraseña y timestamps."""
+        return Usuario.new_from_hash(nombre, email, Usuario.hash_password(plain_password), rol_id)
+
+    @staticmethod
+    def new_from_hash(nombre: str, email: str, password_hash: str, rol_id: int = None):
+        """Crear instancia lista para insertar con una contraseña ya hasheada."""
         now = datetime.utcnow()
         return Usuario(
             uuid=str(_uuid.uuid4()),
             nombre=nombre,
             email=email,
-            password_hash=Usuario.hash_password(plain_password),
+            password_hash=password_hash,
             rol_id=rol_id,
             activo=1,
             created_at=now,
             updated_at=now
         )
 
+
+def _fecha_http(fecha) -> str:
+    """Fecha RFC 2822 en UTC, como werkzeug.http.http_date (lo que usa jsonify)."""
+    if not isinstance(fecha, datetime):
+        fecha = datetime(fecha.year, fecha.month, fecha.day)
+    elif fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc)
+    return (f"{_DIAS[fecha.weekday()]}, {fecha.day:02d} {_MESES[fecha.month - 1]} {fecha.year:04d} "
+            f"{fecha.hour:02d}:{fecha.minute:02d}:{fecha.second:02d} GMT")
+
+
+def _por_defecto(valor):
+    if isinstance(valor, date):
+        return _fecha_http(valor)
+    return str(valor)
+
+
+def _valor_json(valor) -> str:
+    """Un valor de to_dict en JSON; los tipos de las columnas de users van por atajo."""
+    if valor is None:
+        return 'null'
+    tipo = type(valor)
+    if tipo is str:
+        return encode_basestring_ascii(valor)
+    if tipo is int:
+        return int.__repr__(valor)
+    if tipo is datetime:
+        return f'"{_fecha_http(valor)}"'
+    if tipo is bool:
+        return 'true' if valor else 'false'
+    return json.dumps(valor, default=_por_defecto, sort_keys=True, separators=(',', ':'))
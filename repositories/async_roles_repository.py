@@ -0,0 +1,44 @@
+# repositories/async_roles_repository.py
+from config.async_database import AsyncDatabaseConfig
+from config.database import ConnectionError, READ
+from config.metrics import instrumentar_repositorio
+from repositories.roles_repository import RolesRepository
+from typing import List, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@instrumentar_repositorio
+class AsyncRolesRepository(RolesRepository):
+    """Lecturas de la tabla 'roles' para el modo asyncio (asgi.py).
+
+    Las altas, cambios y bajas de roles se atienden en el modo síncrono.
+    """
+    def __init__(self):
+        self.db_config = AsyncDatabaseConfig()
+
+    async def _execute_query(self, query: str, params: tuple = None, fetch_one: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Ejecuta una consulta de lectura y devuelve sus filas (None si falla la consulta)."""
+        try:
+            async with self.db_config.get_connection(READ) as conn:
+                cursor = await conn.cursor(dictionary=True)
+                await cursor.execute(query, params)
+                result = await cursor.fetchone() if fetch_one else list(await cursor.fetchall())
+                await cursor.close()
+                return result
+        except ConnectionError:
+            # El Service maneja los errores de conexión
+            raise
+        except Exception:
+            logger.exception("Error en la consulta de lectura")
+            return None
+
+    async def get_all(self) -> List[Dict[str, Any]]:
+        """Obtiene todos los roles."""
+        query = "SELECT id, nombre, descripcion, created_at FROM roles"
+        return await self._execute_query(query) or []
+
+    async def get_by_id(self, role_id: int) -> Optional[Dict[str, Any]]:
+        """Obtiene un rol por su ID."""
+        query = "SELECT id, nombre, descripcion, created_at FROM roles WHERE id = %s"
+        return await self._execute_query(query, (role_id,), fetch_one=True)
@@ -0,0 +1,212 @@
+# repositories/async_usuario_repository.py
+from datetime import datetime
+import logging
+
+import pymysql
+
+from config.async_database import AsyncDatabaseConfig
+from config.database import DatabaseConfig, READ, WRITE, PRIMARY
+from config.metrics import instrumentar_repositorio
+from models.usuario import Usuario
+from repositories.usuario_repository import (
+    ER_FT_MATCHING_KEY_NOT_FOUND, UsuarioRepository, usuarios_cache, usuarios_generation,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@instrumentar_repositorio
+class AsyncUsuarioRepository(UsuarioRepository):
+    """Versión asyncio de UsuarioRepository para el modo ASGI (asgi.py).
+
+    Reutiliza el SQL, los cursores de paginación, la caché de usuarios y los
+    validadores de la clase síncrona: solo cambia la E/S, que se espera con
+    await sobre AsyncDatabaseConfig. Implementa los métodos que usan las rutas
+    asyncio; importación y exportación masivas siguen en el modo síncrono.
+    """
+
+    def __init__(self):
+        self.db_config = AsyncDatabaseConfig()
+
+    async def find_by_username_or_email(self, username_or_email):
+        """Buscar usuario por nombre o email (en el primario, como la versión síncrona)."""
+        async with self.db_config.get_connection(PRIMARY) as con:
+            cursor = await con.cursor(dictionary=True)
+            await cursor.execute(self.SELECT_USUARIO + " WHERE nombre = %s OR email = %s",
+                                 (username_or_email, username_or_email))
+            result = await cursor.fetchone()
+            await cursor.close()
+        return Usuario.from_dict(result) if result else None
+
+    async def find_by_id(self, user_id):
+        """Buscar usuario por ID a través de la caché de usuarios (ver UsuarioRepository.find_by_id)."""
+        if DatabaseConfig.escritura_reciente():
+            row = await self._select_by_id(user_id)
+        else:
+            clave = int(user_id)
+            marcador = object()
+            row = usuarios_cache.get(clave, marcador)
+            if row is marcador:
+                # Como en get_or_load: la generación se lee antes de cargar
+                token = usuarios_cache.key_generation(clave).current()
+                row = await self._select_by_id(user_id)
+                if row is not None:
+                    usuarios_cache.set(clave, row, token)
+        return Usuario.from_dict(row) if row else None
+
+    async def _select_by_id(self, user_id):
+        async with self.db_config.get_connection(READ) as con:
+            cursor = await con.cursor(dictionary=True)
+            await cursor.execute(self.SELECT_USUARIO + " WHERE id = %s", (user_id,))
+            result = await cursor.fetchone()
+            await cursor.close()
+            return result
+
+    async def create_user(self, usuario: Usuario):
+        """Crear nuevo usuario. Devuelve el id asignado."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            await cursor.execute(self.INSERT_USUARIO, self._fila_insert(usuario))
+            await con.commit()
+            usuarios_generation.bump()
+            user_id = cursor.lastrowid
+            await cursor.close()
+            return user_id
+
+    async def get_users_page(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                             limit: int = 50, cursor: str = None, include_rol: bool = False):
+        """Página de usuarios con paginación keyset (ver UsuarioRepository.get_users_page)."""
+        if search_term:
+            return await self.search_users(search_term, rol_id, activo, limit=limit, include_rol=include_rol), None
+
+        query, params = self._page_query(rol_id, activo, limit, cursor, include_rol)
+        async with self.db_config.get_connection(READ) as con:
+            cursor_db = await con.cursor()
+            await cursor_db.execute(query, params)
+            usuarios = self._usuarios(cursor_db.description, await cursor_db.fetchall())
+            await cursor_db.close()
+        return self._page_result(usuarios, limit)
+
+    async def approx_count(self):
+        """Total aproximado de usuarios según las estadísticas de InnoDB."""
+        async with self.db_config.get_connection(READ) as con:
+            cursor = await con.cursor()
+            await cursor.execute(self.APPROX_COUNT)
+            result = await cursor.fetchone()
+            await cursor.close()
+            return int(result[0]) if result and result[0] is not None else None
+
+    async def search_users(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                           limit: int = None, include_rol: bool = False):
+        """Buscar usuarios con filtros opcionales (ver UsuarioRepository.search_users)."""
+        try:
+            return await self._search(search_term, rol_id, activo, limit, include_rol)
+        except pymysql.err.MySQLError as e:
+            errno = e.args[0] if e.args else None
+            if errno != ER_FT_MATCHING_KEY_NOT_FOUND or UsuarioRepository.SEARCH_BACKEND == 'like':
+                raise
+            logger.warning("Índice FULLTEXT de users no encontrado; usando búsqueda LIKE")
+            UsuarioRepository.SEARCH_BACKEND = 'like'
+            return await self._search(search_term, rol_id, activo, limit, include_rol)
+
+    async def _search(self, search_term, rol_id, activo, limit, include_rol=False):
+        query, params = self._search_query(search_term, rol_id, activo, limit, include_rol)
+        async with self.db_config.get_connection(READ) as con:
+            cursor = await con.cursor()
+            await cursor.execute(query, params)
+            usuarios = self._usuarios(cursor.description, await cursor.fetchall())
+            await cursor.close()
+            return usuarios
+
+    async def update_user(self, user_id: int, data: dict):
+        """Actualizar campos de un usuario. Devuelve True si se modificó alguna fila."""
+        sentencia = self._update_query(user_id, data)
+        if sentencia is None:
+            return False
+        query, valores = sentencia
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            try:
+                await cursor.execute(query, valores)
+                await con.commit()
+            except Exception:
+                await con.rollback()
+                raise
+            finally:
+                await cursor.close()
+            self._invalidar(user_id)
+            return cursor.rowcount > 0
+
+    async def delete_user(self, user_id: int):
+        """Eliminar usuario por ID. Devuelve True si existía."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            try:
+                await cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                await con.commit()
+            except Exception:
+                await con.rollback()
+                raise
+            finally:
+                await cursor.close()
+            self._invalidar(user_id)
+            return cursor.rowcount > 0
+
+    async def registrar_login_exitoso(self, user_id: int, ahora: datetime, nuevo_hash: str = None):
+        """Login correcto en un único UPDATE (ver UsuarioRepository.registrar_login_exitoso)."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            await cursor.execute(*self._login_exitoso_query(user_id, ahora, nuevo_hash))
+            await con.commit()
+            self._invalidar_usuario(user_id)
+            await cursor.close()
+
+    async def registrar_login_fallido(self, user_id: int, max_intentos: int, bloqueo_hasta: datetime,
+                                      ahora: datetime) -> int:
+        """Login fallido en un único UPDATE atómico. Devuelve los intentos acumulados."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            await cursor.execute(self.LOGIN_FALLIDO, (ahora, max_intentos, bloqueo_hasta, ahora, user_id))
+            intentos = cursor.lastrowid
+            await con.commit()
+            self._invalidar_usuario(user_id)
+            await cursor.close()
+            return intentos or 0
+
+    async def desbloquear_usuario(self, user_id: int):
+        """Desbloquear usuario (bloqueado_hasta a NULL y contador a cero)."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            await cursor.execute(
+                "UPDATE users SET bloqueado_hasta = NULL, intentos_fallidos = 0 WHERE id = %s", (user_id,))
+            await con.commit()
+            self._invalidar_usuario(user_id)
+            await cursor.close()
+
+    async def consumir_refresco(self, user_id: int, emitido: float) -> bool:
+        """Revoca el token de refresco emitido en `emitido` y los anteriores (ver la versión síncrona)."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor()
+            await cursor.execute(self.CONSUMIR_REFRESCO, (emitido, user_id, emitido))
+            consumido = cursor.rowcount > 0
+            await con.commit()
+            await cursor.close()
+            return consumido
+
+    async def toggle_activo(self, user_id: int):
+        """Alternar el estado activo/inactivo. Devuelve el nuevo estado o None si no existe."""
+        async with self.db_config.get_connection(WRITE) as con:
+            cursor = await con.cursor(dictionary=True)
+            await cursor.execute("SELECT activo FROM users WHERE id = %s", (user_id,))
+            result = await cursor.fetchone()
+            if not result:
+                await cursor.close()
+                return None
+
+            nuevo_estado = 0 if result['activo'] else 1
+            await cursor.execute("UPDATE users SET activo = %s, updated_at = %s WHERE id = %s",
+                                 (nuevo_estado, datetime.utcnow(), user_id))
+            await con.commit()
+            self._invalidar(user_id)
+            await cursor.close()
+            return bool(nuevo_estado)
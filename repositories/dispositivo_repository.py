@@ -0,0 +1,298 @@
+# repositories/dispositivo_repository.py
+from config.cache import Generation
+from config.database import DatabaseConfig, READ, WRITE, PRIMARY
+from config.metrics import instrumentar_repositorio
+from models.dispositivo import Dispositivo
+from datetime import datetime
+import mysql.connector
+
+# Generación del inventario: cambia con altas, bajas y ediciones (no con los
+# resultados del monitor). El monitor la vigila para recargar la lista de
+# dispositivos sin consultar la BD en cada vuelta.
+dispositivos_generation = Generation("devices")
+
+
+@instrumentar_repositorio
+class DispositivoRepository:
+    COLUMNAS = Dispositivo.__slots__
+    SELECT_DISPOSITIVO = f"SELECT {', '.join(COLUMNAS)} FROM devices"
+    INSERT_DISPOSITIVO = (
+        "INSERT INTO devices (nombre, host, metodo, puerto, intervalo_s, activo, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    # Descubrimiento: alta de los destinos que respondieron. Si el destino ya
+    # existe no se toca (nombre e intervalo son del administrador, estado del monitor)
+    INSERT_DESCUBIERTO = INSERT_DISPOSITIVO + " ON DUPLICATE KEY UPDATE id = id"
+    # Último resultado de cada dispositivo; lo escribe el monitor por lotes
+    REGISTRAR_RESULTADO = (
+        "UPDATE devices SET estado = %s, latencia_ms = %s, fallos_consecutivos = %s, "
+        "ultimo_chequeo = %s, ultimo_cambio = %s, ultimo_error = %s WHERE id = %s"
+    )
+    # Campos editables desde la API
+    CAMPOS_EDITABLES = ('nombre', 'host', 'metodo', 'puerto', 'intervalo_s', 'activo')
+
+    def __init__(self):
+        self.db_config = DatabaseConfig()
+
+    def find_by_id(self, dispositivo_id):
+        """Buscar dispositivo por ID."""
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor(dictionary=True)
+            cursor.execute(self.SELECT_DISPOSITIVO + " WHERE id = %s", (dispositivo_id,))
+            result = cursor.fetchone()
+            cursor.close()
+        return Dispositivo.from_dict(result) if result else None
+
+    def find_by_destino(self, host: str, metodo: str, puerto: int):
+        """Dispositivo que ya comprueba ese destino (host, método, puerto), o None.
+
+        Se lee del primario, como las comprobaciones de duplicados de usuarios.
+        """
+        with self.db_config.get_connection(PRIMARY) as con:
+            cursor = con.cursor(dictionary=True)
+            cursor.execute(self.SELECT_DISPOSITIVO + " WHERE host = %s AND metodo = %s AND puerto = %s",
+                           (host, metodo, puerto))
+            result = cursor.fetchone()
+            cursor.close()
+        return Dispositivo.from_dict(result) if result else None
+
+    def find_existing_destinos(self, destinos, chunk_size: int = 1000):
+        """Destinos (host, metodo, puerto) de `destinos` que ya existen en devices.
+
+        Una consulta IN por hosts cada `chunk_size` destinos en lugar de una
+        búsqueda por fila (usa el índice único, que empieza por host); método y
+        puerto se filtran aquí. Los hosts se comparan en minúsculas.
+        """
+        buscados = {(host.lower(), metodo, puerto) for host, metodo, puerto in destinos}
+        hosts = sorted({host for host, _, _ in buscados})
+        existentes = set()
+        with self.db_config.get_connection(PRIMARY) as con:
+            cursor = con.cursor()
+            for inicio in range(0, len(hosts), chunk_size):
+                lote = hosts[inicio:inicio + chunk_size]
+                cursor.execute(
+                    f"SELECT host, metodo, puerto FROM devices WHERE host IN ({', '.join(['%s'] * len(lote))})",
+                    tuple(lote))
+                for host, metodo, puerto in cursor.fetchall():
+                    destino = (host.lower(), metodo, puerto)
+                    if destino in buscados:
+                        existentes.add(destino)
+            cursor.close()
+        return existentes
+
+    def get_page(self, search_term: str = None, estado: str = None, activo: bool = None,
+                 limit: int = 50, cursor: str = None):
+        """Página de dispositivos ordenada por id (paginación keyset).
+
+        Returns:
+            tuple: (lista de Dispositivo, cursor de la siguiente página o None)
+        """
+        query = self.SELECT_DISPOSITIVO + " WHERE 1=1"
+        params = []
+        if search_term:
+            pattern = f"%{self._escape_like(search_term.strip())}%"
+            query += " AND (nombre LIKE %s OR host LIKE %s)"
+            params.extend([pattern, pattern])
+        if estado is not None:
+            query += " AND estado = %s"
+            params.append(estado)
+        if activo is not None:
+            query += " AND activo = %s"
+            params.append(1 if activo else 0)
+        if cursor:
+            query += " AND id > %s"
+            params.append(self.decode_cursor(cursor))
+        # Una fila de más para saber si existe otra página
+        query += " ORDER BY id LIMIT %s"
+        params.append(limit + 1)
+
+        with self.db_config.get_connection(READ) as con:
+            cursor_db = con.cursor(dictionary=True)
+            cursor_db.execute(query, tuple(params))
+            results = cursor_db.fetchall()
+            cursor_db.close()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = str(results[-1]['id'])
+        return [Dispositivo.from_dict(row) for row in results], next_cursor
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """Cursor de get_page (último id visto). Levanta ValueError si no es válido."""
+        try:
+            return int(cursor)
+        except (TypeError, ValueError):
+            raise ValueError('Cursor de paginación inválido')
+
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def listar_para_sondeo(self):
+        """Todos los dispositivos activos, con su último estado (carga del monitor)."""
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor(dictionary=True)
+            cursor.execute(self.SELECT_DISPOSITIVO + " WHERE activo = 1 ORDER BY id")
+            results = cursor.fetchall()
+            cursor.close()
+        return [Dispositivo.from_dict(row) for row in results]
+
+    def contar_por_estado(self):
+        """Contadores del inventario: {'total', 'inactivos', 'up', 'down', 'desconocido'}.
+
+        Los estados cuentan solo dispositivos activos (los inactivos no se comprueban).
+        """
+        contadores = {'total': 0, 'inactivos': 0}
+        contadores.update({estado: 0 for estado in Dispositivo.ESTADOS})
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute("SELECT estado, activo, COUNT(*) FROM devices GROUP BY estado, activo")
+            filas = cursor.fetchall()
+            cursor.close()
+        for estado, activo, cantidad in filas:
+            contadores['total'] += cantidad
+            if not activo:
+                contadores['inactivos'] += cantidad
+            elif estado in contadores:
+                contadores[estado] += cantidad
+        return contadores
+
+    def create(self, dispositivo: Dispositivo):
+        """Crear dispositivo. Devuelve el id asignado."""
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            cursor.execute(self.INSERT_DISPOSITIVO, self._fila_insert(dispositivo))
+            con.commit()
+            dispositivos_generation.bump()
+            dispositivo_id = cursor.lastrowid
+            cursor.close()
+            return dispositivo_id
+
+    @staticmethod
+    def _fila_insert(dispositivo: Dispositivo) -> tuple:
+        """Parámetros de INSERT_DISPOSITIVO para un Dispositivo."""
+        return (dispositivo.nombre, dispositivo.host, dispositivo.metodo, dispositivo.puerto,
+                dispositivo.intervalo_s, dispositivo.activo, dispositivo.created_at, dispositivo.updated_at)
+
+    def bulk_create(self, dispositivos, chunk_size: int = 500):
+        """Insertar muchos dispositivos con executemany, en transacciones por bloques.
+
+        Como UsuarioRepository.bulk_create_users: si un bloque falla (p. ej. un
+        destino dado de alta mientras tanto) se deshace y sus filas se insertan
+        una a una para aislar la que falla.
+
+        Returns:
+            tuple: (número de filas insertadas, dict {posición en `dispositivos`: error})
+        """
+        filas = [self._fila_insert(d) for d in dispositivos]
+        insertados = 0
+        errores = {}
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            for inicio in range(0, len(filas), chunk_size):
+                bloque = filas[inicio:inicio + chunk_size]
+                try:
+                    cursor.executemany(self.INSERT_DISPOSITIVO, bloque)
+                    con.commit()
+                    insertados += len(bloque)
+                    continue
+                except mysql.connector.Error:
+                    con.rollback()
+                for offset, fila in enumerate(bloque):
+                    try:
+                        cursor.execute(self.INSERT_DISPOSITIVO, fila)
+                        con.commit()
+                        insertados += 1
+                    except mysql.connector.Error as e:
+                        con.rollback()
+                        errores[inicio + offset] = str(e)
+            cursor.close()
+        if insertados:
+            dispositivos_generation.bump()
+        return insertados, errores
+
+    def upsert_descubiertos(self, dispositivos, chunk_size: int = 500):
+        """Dar de alta los destinos descubiertos que aún no existan (INSERT_DESCUBIERTO).
+
+        Idempotente: repetir un descubrimiento no duplica ni modifica dispositivos.
+        """
+        filas = [self._fila_insert(d) for d in dispositivos]
+        if not filas:
+            return 0
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                for inicio in range(0, len(filas), chunk_size):
+                    cursor.executemany(self.INSERT_DESCUBIERTO, filas[inicio:inicio + chunk_size])
+                    con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        dispositivos_generation.bump()
+        return len(filas)
+
+    def update(self, dispositivo_id: int, data: dict):
+        """Actualizar los campos editables de `data`. Devuelve True si se modificó alguna fila."""
+        campos = [campo for campo in self.CAMPOS_EDITABLES if campo in data]
+        if not campos:
+            return False
+        asignaciones = [f"{campo} = %s" for campo in campos] + ["updated_at = %s"]
+        valores = [data[campo] for campo in campos] + [datetime.utcnow(), dispositivo_id]
+
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                cursor.execute(f"UPDATE devices SET {', '.join(asignaciones)} WHERE id = %s", tuple(valores))
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+            dispositivos_generation.bump()
+            return cursor.rowcount > 0
+
+    def delete(self, dispositivo_id: int):
+        """Eliminar dispositivo por ID. Devuelve True si existía."""
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                cursor.execute("DELETE FROM devices WHERE id = %s", (dispositivo_id,))
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+            dispositivos_generation.bump()
+            return cursor.rowcount > 0
+
+    def registrar_resultados(self, filas, chunk_size: int = 1000):
+        """Guardar el último resultado de muchos dispositivos con executemany.
+
+        `filas` son tuplas con los parámetros de REGISTRAR_RESULTADO. No toca
+        la generación del inventario: el estado cambia en cada vuelta del
+        monitor y no debe provocar recargas.
+        """
+        filas = list(filas)
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                for inicio in range(0, len(filas), chunk_size):
+                    cursor.executemany(self.REGISTRAR_RESULTADO, filas[inicio:inicio + chunk_size])
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        return len(filas)
+
+    @staticmethod
+    def version():
+        """Validador del inventario: (token, instante de la última alta, baja o edición)."""
+        return dispositivos_generation.ensure(), dispositivos_generation.modified()
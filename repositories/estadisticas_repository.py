@@ -0,0 +1,84 @@
+# repositories/estadisticas_repository.py
+from datetime import datetime
+
+from config.database import DatabaseConfig, READ, WRITE
+from config.metrics import instrumentar_repositorio
+
+
+@instrumentar_repositorio
+class EstadisticasRepository:
+    """Lectura de los agregados de usuarios (migrations/006_user_stats.sql).
+
+    Los escriben los triggers de users con cada alta, baja o cambio, dentro de
+    la misma sentencia; aquí solo se leen, y se recalculan desde users si hace
+    falta (scripts/user_stats.py).
+    """
+
+    CONTEOS = (
+        "SELECT c.rol_id, r.nombre, c.activo, c.total FROM user_counts c "
+        "LEFT JOIN roles r ON r.id = c.rol_id WHERE c.total <> 0"
+    )
+    # Una fila por día con algún último acceso: unos cientos, no uno por usuario
+    ACCESOS = (
+        "SELECT COALESCE(SUM(total), 0), "
+        "COALESCE(SUM(CASE WHEN dia >= %s THEN total ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN dia >= %s THEN total ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN dia >= %s THEN total ELSE 0 END), 0) "
+        "FROM user_access_days"
+    )
+    # Rango sobre idx_users_bloqueado_hasta: solo recorre los bloqueos vigentes
+    BLOQUEADOS = "SELECT COUNT(*) FROM users WHERE bloqueado_hasta > %s"
+    RECALCULAR = (
+        "DELETE FROM user_counts",
+        "INSERT INTO user_counts (rol_id, activo, total) "
+        "SELECT COALESCE(rol_id, 0), IF(activo, 1, 0), COUNT(*) "
+        "FROM users GROUP BY COALESCE(rol_id, 0), IF(activo, 1, 0)",
+        "DELETE FROM user_access_days",
+        "INSERT INTO user_access_days (dia, total) "
+        "SELECT DATE(ultimo_acceso), COUNT(*) "
+        "FROM users WHERE ultimo_acceso IS NOT NULL GROUP BY DATE(ultimo_acceso)",
+    )
+
+    def __init__(self):
+        self.db_config = DatabaseConfig()
+
+    def resumen(self, ahora: datetime, desde_dias: tuple):
+        """Agregados actuales en una conexión.
+
+        `desde_dias` son tres fechas (p. ej. hoy, hace 6 y hace 29 días): se
+        cuentan los usuarios cuyo último acceso es de esa fecha o posterior.
+
+        Returns:
+            dict: {'conteos': [(rol_id, nombre del rol, activo, total)],
+                   'accesos': (con algún acceso, desde cada fecha de `desde_dias`...),
+                   'bloqueados': usuarios con bloqueado_hasta > ahora}
+        """
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(self.CONTEOS)
+            conteos = cursor.fetchall()
+            cursor.execute(self.ACCESOS, tuple(desde_dias))
+            accesos = tuple(int(valor) for valor in cursor.fetchone())
+            cursor.execute(self.BLOQUEADOS, (ahora,))
+            bloqueados = int(cursor.fetchone()[0])
+            cursor.close()
+        return {'conteos': conteos, 'accesos': accesos, 'bloqueados': bloqueados}
+
+    def recalcular(self):
+        """Rehacer los agregados desde users en una transacción (escanea la tabla).
+
+        Para la carga inicial o si los agregados se desviaron (p. ej. triggers
+        creados con tráfico). Las escrituras de usuarios que toquen los mismos
+        contadores esperan al commit.
+        """
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                for sentencia in self.RECALCULAR:
+                    cursor.execute(sentencia)
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
@@ -0,0 +1,78 @@
+# repositories/evento_repository.py
+from config.database import DatabaseConfig, WRITE, PRIMARY
+from config.metrics import instrumentar_repositorio
+
+
+@instrumentar_repositorio
+class EventoRepository:
+    """Cambios de estado de dispositivos (device_events)."""
+
+    COLUMNAS = ('id', 'dispositivo_id', 'nombre', 'anterior', 'estado', 'ts', 'error')
+    # LEFT JOIN: el evento sobrevive al borrado del dispositivo (nombre NULL)
+    SELECT_EVENTO = (
+        "SELECT e.id, e.dispositivo_id, d.nombre, e.anterior, e.estado, e.ts, e.error "
+        "FROM device_events e LEFT JOIN devices d ON d.id = e.dispositivo_id"
+    )
+    INSERT_EVENTO = (
+        "INSERT INTO device_events (dispositivo_id, anterior, estado, ts, error) VALUES (%s, %s, %s, %s, %s)"
+    )
+
+    def __init__(self):
+        self.db_config = DatabaseConfig()
+
+    def insertar(self, filas, chunk_size: int = 1000):
+        """Guardar eventos (dispositivo_id, anterior, estado, ts, error) con executemany."""
+        filas = list(filas)
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                for inicio in range(0, len(filas), chunk_size):
+                    cursor.executemany(self.INSERT_EVENTO, filas[inicio:inicio + chunk_size])
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        return len(filas)
+
+    def siguientes(self, despues_de: int, limit: int = 1000):
+        """Eventos con id mayor que `despues_de`, en orden (tuplas con COLUMNAS).
+
+        Se lee del primario: una réplica con retraso devolvería un hueco que
+        los clientes ya no recuperarían al avanzar el último id.
+        """
+        with self.db_config.get_connection(PRIMARY) as con:
+            cursor = con.cursor()
+            cursor.execute(self.SELECT_EVENTO + " WHERE e.id > %s ORDER BY e.id LIMIT %s", (despues_de, limit))
+            filas = cursor.fetchall()
+            cursor.close()
+        return filas
+
+    def recientes(self, limit: int):
+        """Los `limit` eventos más recientes, del más antiguo al más nuevo."""
+        with self.db_config.get_connection(PRIMARY) as con:
+            cursor = con.cursor()
+            cursor.execute(self.SELECT_EVENTO + " ORDER BY e.id DESC LIMIT %s", (limit,))
+            filas = cursor.fetchall()
+            cursor.close()
+        return filas[::-1]
+
+    def purgar(self, antes: int, lote: int = 10000):
+        """Borrar eventos anteriores a `antes` (segundos epoch), por lotes."""
+        borradas = 0
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                while True:
+                    cursor.execute("DELETE FROM device_events WHERE ts < %s LIMIT %s", (antes, lote))
+                    con.commit()
+                    borradas += cursor.rowcount
+                    if cursor.rowcount < lote:
+                        break
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        return borradas
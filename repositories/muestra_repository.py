@@ -0,0 +1,110 @@
+# repositories/muestra_repository.py
+from config.database import DatabaseConfig, READ, WRITE
+from config.metrics import instrumentar_repositorio
+
+
+@instrumentar_repositorio
+class MuestraRepository:
+    """Muestras crudas (device_samples) y agregados (device_rollups) de los dispositivos."""
+
+    # INSERT IGNORE: reintentar un lote ya escrito en parte no duplica ni falla
+    INSERT_MUESTRA = (
+        "INSERT IGNORE INTO device_samples (dispositivo_id, ts, ok, latencia_ms) VALUES (%s, %s, %s, %s)"
+    )
+    # Los agregados se suman al intervalo existente: el monitor escribe lo
+    # acumulado desde el último volcado, no el intervalo completo
+    ACUMULAR_AGREGADO = (
+        "INSERT INTO device_rollups "
+        "(dispositivo_id, resolucion, bucket, muestras, exitos, latencia_suma, latencia_min, latencia_max) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE muestras = muestras + VALUES(muestras), exitos = exitos + VALUES(exitos), "
+        "latencia_suma = latencia_suma + VALUES(latencia_suma), "
+        "latencia_min = LEAST(COALESCE(latencia_min, VALUES(latencia_min)), "
+        "COALESCE(VALUES(latencia_min), latencia_min)), "
+        "latencia_max = GREATEST(COALESCE(latencia_max, VALUES(latencia_max)), "
+        "COALESCE(VALUES(latencia_max), latencia_max))"
+    )
+
+    def __init__(self):
+        self.db_config = DatabaseConfig()
+
+    def insertar_muestras(self, filas, chunk_size: int = 1000):
+        """Guardar muestras (dispositivo_id, ts, ok, latencia_ms) con executemany."""
+        return self._escribir(self.INSERT_MUESTRA, filas, chunk_size)
+
+    def acumular_agregados(self, filas, chunk_size: int = 1000):
+        """Sumar agregados (dispositivo_id, resolucion, bucket, muestras, exitos,
+        latencia_suma, latencia_min, latencia_max) a los ya guardados."""
+        return self._escribir(self.ACUMULAR_AGREGADO, filas, chunk_size)
+
+    def _escribir(self, sql: str, filas, chunk_size: int):
+        filas = list(filas)
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                for inicio in range(0, len(filas), chunk_size):
+                    cursor.executemany(sql, filas[inicio:inicio + chunk_size])
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        return len(filas)
+
+    def rango_muestras(self, dispositivo_id: int, desde: int, hasta: int, limit: int):
+        """Muestras crudas en [desde, hasta): lista de tuplas (ts, ok, latencia_ms)."""
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(
+                "SELECT ts, ok, latencia_ms FROM device_samples "
+                "WHERE dispositivo_id = %s AND ts >= %s AND ts < %s ORDER BY ts LIMIT %s",
+                (dispositivo_id, desde, hasta, limit)
+            )
+            filas = cursor.fetchall()
+            cursor.close()
+        return filas
+
+    def rango_agregados(self, dispositivo_id: int, resolucion: int, desde: int, hasta: int, limit: int):
+        """Agregados de una resolución con bucket en [desde, hasta): tuplas
+        (bucket, muestras, exitos, latencia_suma, latencia_min, latencia_max)."""
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(
+                "SELECT bucket, muestras, exitos, latencia_suma, latencia_min, latencia_max FROM device_rollups "
+                "WHERE dispositivo_id = %s AND resolucion = %s AND bucket >= %s AND bucket < %s "
+                "ORDER BY bucket LIMIT %s",
+                (dispositivo_id, resolucion, desde, hasta, limit)
+            )
+            filas = cursor.fetchall()
+            cursor.close()
+        return filas
+
+    def purgar_muestras(self, antes: int, lote: int = 10000):
+        """Borrar muestras crudas anteriores a `antes`. Devuelve las filas borradas."""
+        return self._purgar("DELETE FROM device_samples WHERE ts < %s LIMIT %s", (antes,), lote)
+
+    def purgar_agregados(self, resolucion: int, antes: int, lote: int = 10000):
+        """Borrar agregados de una resolución con bucket anterior a `antes`."""
+        return self._purgar("DELETE FROM device_rollups WHERE resolucion = %s AND bucket < %s LIMIT %s",
+                            (resolucion, antes), lote)
+
+    def _purgar(self, sql: str, params: tuple, lote: int):
+        # Por lotes, con commit en cada uno: un DELETE enorme bloquea filas y
+        # engorda el undo log mientras el monitor sigue escribiendo
+        borradas = 0
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                while True:
+                    cursor.execute(sql, params + (lote,))
+                    con.commit()
+                    borradas += cursor.rowcount
+                    if cursor.rowcount < lote:
+                        break
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cursor.close()
+        return borradas
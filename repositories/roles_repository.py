@@ -1,6 +1,11 @@
-from config.database import DatabaseConfig, ConnectionError # Importamos tu clase
+from config.database import DatabaseConfig, ConnectionError, READ, WRITE # Importamos tu clase
+from config.metrics import instrumentar_repositorio
 from typing import List, Dict, Any, Optional
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrumentar_repositorio
 class RolesRepository:
     """Clase para operaciones CRUD directas en la tabla 'roles'."""
     def __init__(self):
@@ -12,7 +17,7 @@ class RolesRepository:
         result = None
         try:
             # Usamos el context manager para obtener y cerrar la conexión automáticamente
-            with self.db_config.get_connection() as conn:
+            with self.db_config.get_connection(READ) as conn:
                 # Nota: Asume que conn.cursor(dictionary=True) funciona para tu motor de BD
                 cursor = conn.cursor(dictionary=True) 
                 cursor.execute(query, params)
@@ -26,7 +31,7 @@ class RolesRepository:
             # Re-lanzar el error de conexión para que el Service lo maneje
             raise e
         except Exception as e:
-            print(f"Error en la consulta de lectura: {e}")
+            logger.exception("Error en la consulta de lectura")
             return None 
 
         return result
@@ -38,7 +43,7 @@ class RolesRepository:
         # pero no revisa si se afectó alguna fila. Esto es aceptable para INSERT,
         # pero DELETE y UPDATE suelen requerir el chequeo de rowcount.
         try:
-            with self.db_config.get_connection() as conn:
+            with self.db_config.get_connection(WRITE) as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, params)
                 conn.commit() # ¡Importante! Confirmar los cambios
@@ -47,7 +52,7 @@ class RolesRepository:
         except ConnectionError as e:
             raise e
         except Exception as e:
-            print(f"Error en la consulta de escritura: {e}")
+            logger.exception("Error en la consulta de escritura")
             return False
 
     # --- Métodos de la tabla 'roles' ---
@@ -96,7 +101,7 @@ class RolesRepository:
 
         try:
             # Manejamos la conexión aquí para poder acceder al rowcount
-            with self.db_config.get_connection() as conn:
+            with self.db_config.get_connection(WRITE) as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, (role_id,))
                 
@@ -116,6 +121,6 @@ class RolesRepository:
             # Re-lanzar el error de conexión
             raise e
         except Exception as e:
-            print(f"Error en la consulta de eliminación: {e}")
+            logger.exception("Error en la consulta de eliminación")
             # La conexión se cerrará automáticamente, pero marcamos fallo
             return False
\ No newline at end of file
@@ -1,22 +1,83 @@
 # repositories/usuario_repository.py
-from config.database import DatabaseConfig
+from config.cache import Generation, LRUCache
+from config.database import DatabaseConfig, READ, WRITE, PRIMARY
+from config.metrics import instrumentar_repositorio, registrar_cache
 from models.usuario import Usuario
 from datetime import datetime
+import base64
+import logging
+import mysql.connector
 
+logger = logging.getLogger(__name__)
 
+# "Can't find FULLTEXT index matching the column list"
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+
+# Caché de filas de users por id (find_by_id). Cada método que modifica un
+# usuario invalida su clave en todos los workers del host (generación por clave).
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 30
+usuarios_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, namespace="users")
+# Generación de la tabla completa: cambia con cualquier alta, baja o modificación.
+# Es el validador barato de los listados (ETag / Last-Modified) sin tocar la BD.
+usuarios_generation = Generation("users")
+registrar_cache("usuarios", usuarios_cache)
+
+
+@instrumentar_repositorio
 class UsuarioRepository:
+    # Backend de búsqueda: 'fulltext' (migrations/002_users_fulltext.sql) o 'like'
+    SEARCH_BACKEND = 'fulltext'
+    # Debe coincidir con la variable ngram_token_size del servidor MySQL
+    NGRAM_TOKEN_SIZE = 2
+    # Columnas de listados, búsquedas y exportación (nunca password_hash)
+    LIST_COLUMNS = ('id', 'uuid', 'nombre', 'email', 'rol_id', 'activo',
+                    'ultimo_acceso', 'created_at', 'updated_at')
+    # Datos del rol que los listados devuelven con ?include=rol, en la misma consulta
+    ROL_COLUMNS = ('r.nombre AS rol_nombre', 'r.descripcion AS rol_descripcion')
+
+    # Sentencias compartidas con AsyncUsuarioRepository (modo asyncio)
+    SELECT_USUARIO = (
+        "SELECT id, uuid, nombre, email, password_hash, rol_id, activo, "
+        "ultimo_acceso, intentos_fallidos, bloqueado_hasta, created_at, updated_at "
+        "FROM users"
+    )
+    INSERT_USUARIO = (
+        "INSERT INTO users (uuid, nombre, email, password_hash, rol_id, activo, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    LOGIN_FALLIDO = (
+        "UPDATE users SET "
+        "intentos_fallidos = LAST_INSERT_ID("
+        "IF(bloqueado_hasta IS NOT NULL AND bloqueado_hasta <= %s, 0, "
+        "COALESCE(intentos_fallidos, 0)) + 1), "
+        "bloqueado_hasta = IF(intentos_fallidos >= %s, %s, "
+        "IF(bloqueado_hasta <= %s, NULL, bloqueado_hasta)) "
+        "WHERE id = %s"
+    )
+    # Consume un token de refresco emitido en %s (su 'iat'): solo afecta a la
+    # fila si ese token aún no estaba revocado (migrations/007_users_refresh.sql)
+    CONSUMIR_REFRESCO = (
+        "UPDATE users SET refresh_revocado_hasta = %s "
+        "WHERE id = %s AND refresh_revocado_hasta < %s"
+    )
+    APPROX_COUNT = (
+        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'users'"
+    )
+
     def __init__(self):
         self.db_config = DatabaseConfig()
 
     def find_by_username_or_email(self, username_or_email):
-        """Buscar usuario por nombre o email en la tabla users"""
-        with self.db_config.get_connection() as con:
+        """Buscar usuario por nombre o email en la tabla users.
+
+        Se lee del primario: el login y las comprobaciones de duplicados necesitan
+        el estado más reciente (intentos fallidos, bloqueos, altas recientes).
+        """
+        with self.db_config.get_connection(PRIMARY) as con:
             cursor = con.cursor(dictionary=True)
-            query = (
-                "SELECT id, uuid, nombre, email, password_hash, rol_id, activo, "
-                "ultimo_acceso, intentos_fallidos, bloqueado_hasta, created_at, updated_at "
-                "FROM users WHERE nombre = %s OR email = %s"
-            )
+            query = self.SELECT_USUARIO + " WHERE nombre = %s OR email = %s"
             cursor.execute(query, (username_or_email, username_or_email))
             result = cursor.fetchone()
             cursor.close()
@@ -26,58 +87,238 @@ class UsuarioRepository:
             return None
 
     def find_by_id(self, user_id):
-        """Buscar usuario por ID"""
-        with self.db_config.get_connection() as con:
+        """Buscar usuario por ID, a través de la caché de usuarios.
+
+        Si la sesión escribió hace poco (ventana read-your-writes) se lee siempre
+        de la BD sin poblar la caché: así nunca se cachea una fila vieja de una
+        réplica con retraso justo después de una invalidación.
+        """
+        if DatabaseConfig.escritura_reciente():
+            row = self._select_by_id(user_id)
+        else:
+            row = usuarios_cache.get_or_load(int(user_id), lambda: self._select_by_id(user_id))
+        # Instancia nueva en cada llamada: quien la modifique no altera la caché
+        return Usuario.from_dict(row) if row else None
+
+    def _select_by_id(self, user_id):
+        with self.db_config.get_connection(READ) as con:
             cursor = con.cursor(dictionary=True)
-            query = (
-                "SELECT id, uuid, nombre, email, password_hash, rol_id, activo, "
-                "ultimo_acceso, intentos_fallidos, bloqueado_hasta, created_at, updated_at "
-                "FROM users WHERE id = %s"
-            )
+            query = self.SELECT_USUARIO + " WHERE id = %s"
             cursor.execute(query, (user_id,))
             result = cursor.fetchone()
             cursor.close()
+            return result
 
-            if result:
-                return Usuario.from_dict(result)
-            return None
+    @staticmethod
+    def _invalidar(user_id):
+        """Saca al usuario de la caché (en este y en los demás workers) y cambia
+        el validador de los listados."""
+        usuarios_cache.invalidate(int(user_id))
+        usuarios_generation.bump()
+
+    @staticmethod
+    def _invalidar_usuario(user_id):
+        """Solo la caché y el validador del usuario: para escrituras de login
+        (intentos, bloqueo, último acceso) que no deben caducar los ETag de los
+        listados en cada inicio de sesión."""
+        usuarios_cache.invalidate(int(user_id))
+
+    @staticmethod
+    def version():
+        """Validador de los listados de usuarios: (token, instante de la última escritura).
+
+        Cambia con altas, bajas y ediciones; no con los logins, así que un
+        listado validado puede llevar un ultimo_acceso atrasado.
+        """
+        return usuarios_generation.ensure(), usuarios_generation.modified()
+
+    @staticmethod
+    def version_usuario(user_id):
+        """Validador de un usuario concreto: (token, instante de la última escritura)."""
+        generation = usuarios_cache.key_generation(int(user_id))
+        return generation.ensure(), generation.modified()
 
     def create_user(self, usuario: Usuario):
         """Crear nuevo usuario en la tabla users. Espera una instancia Usuario con uuid y password_hash ya seteados."""
-        with self.db_config.get_connection() as con:
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor()
-            query = (
-                "INSERT INTO users (uuid, nombre, email, password_hash, rol_id, activo, created_at, updated_at) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
-            )
-            cursor.execute(query, (
-                usuario.uuid,
-                usuario.nombre,
-                usuario.email,
-                usuario.password_hash,
-                usuario.rol_id,
-                usuario.activo,
-                usuario.created_at,
-                usuario.updated_at
-            ))
+            cursor.execute(self.INSERT_USUARIO, self._fila_insert(usuario))
             con.commit()
+            usuarios_generation.bump()
             user_id = cursor.lastrowid
             cursor.close()
             return user_id
 
-    def get_all_users(self):
-        """Obtener todos los usuarios (resumen)"""
-        with self.db_config.get_connection() as con:
-            cursor = con.cursor(dictionary=True)
-            query = (
-                "SELECT id, uuid, nombre, email, rol_id, activo, "
-                "created_at, updated_at FROM users ORDER BY created_at DESC"
-            )
+    @staticmethod
+    def _fila_insert(usuario: Usuario) -> tuple:
+        """Parámetros de INSERT_USUARIO para un Usuario."""
+        return (usuario.uuid, usuario.nombre, usuario.email, usuario.password_hash,
+                usuario.rol_id, usuario.activo, usuario.created_at, usuario.updated_at)
+
+    def find_existing(self, nombres, emails, chunk_size: int = 1000):
+        """Nombres y emails que ya existen en users, con consultas por conjuntos.
+
+        Una consulta IN por cada `chunk_size` valores en lugar de una búsqueda
+        por fila. Las comparaciones se hacen en minúsculas (collation *_ci).
+
+        Returns:
+            tuple: (set de nombres existentes, set de emails existentes)
+        """
+        nombres = list(nombres)
+        emails = list(emails)
+        existentes_nombre, existentes_email = set(), set()
+        with self.db_config.get_connection(PRIMARY) as con:
+            cursor = con.cursor()
+            for i in range(0, max(len(nombres), len(emails)), chunk_size):
+                lote_nombres = nombres[i:i + chunk_size] or [None]
+                lote_emails = emails[i:i + chunk_size] or [None]
+                query = (
+                    "SELECT nombre, email FROM users WHERE nombre IN ({}) OR email IN ({})".format(
+                        ", ".join(["%s"] * len(lote_nombres)), ", ".join(["%s"] * len(lote_emails))
+                    )
+                )
+                cursor.execute(query, tuple(lote_nombres) + tuple(lote_emails))
+                for nombre, email in cursor.fetchall():
+                    existentes_nombre.add((nombre or '').lower())
+                    existentes_email.add((email or '').lower())
+            cursor.close()
+        return existentes_nombre, existentes_email
+
+    def bulk_create_users(self, usuarios, chunk_size: int = 500):
+        """Insertar muchos usuarios con executemany, en transacciones por bloques.
+
+        Si un bloque falla (p. ej. un duplicado insertado mientras tanto) se
+        deshace y sus filas se insertan una a una para aislar la que falla.
+
+        Returns:
+            tuple: (número de filas insertadas, dict {posición en `usuarios`: error})
+        """
+        query = self.INSERT_USUARIO
+        filas = [self._fila_insert(u) for u in usuarios]
+        insertados = 0
+        errores = {}
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            for inicio in range(0, len(filas), chunk_size):
+                bloque = filas[inicio:inicio + chunk_size]
+                try:
+                    cursor.executemany(query, bloque)
+                    con.commit()
+                    insertados += len(bloque)
+                    continue
+                except mysql.connector.Error:
+                    con.rollback()
+                for offset, fila in enumerate(bloque):
+                    try:
+                        cursor.execute(query, fila)
+                        con.commit()
+                        insertados += 1
+                    except mysql.connector.Error as e:
+                        con.rollback()
+                        errores[inicio + offset] = str(e)
+            cursor.close()
+        if insertados:
+            usuarios_generation.bump()
+        return insertados, errores
+
+    def get_all_users(self, include_rol: bool = False):
+        """Obtener todos los usuarios (resumen).
+
+        Con `include_rol` cada Usuario trae su rol (nombre y descripción) por un
+        LEFT JOIN en la misma consulta, no con una consulta por fila.
+        """
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            query = self._select_listado(include_rol) + " ORDER BY u.created_at DESC"
             cursor.execute(query)
-            results = cursor.fetchall()
+            usuarios = self._usuarios(cursor.description, cursor.fetchall())
             cursor.close()
 
-            return [Usuario.from_dict(row) for row in results]
+            return usuarios
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, user_id: int) -> str:
+        """Cursor opaco para paginación keyset sobre (created_at, id)."""
+        raw = f"{created_at.isoformat()}|{user_id}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Decodifica un cursor. Levanta ValueError si no es válido."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, user_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+            return datetime.fromisoformat(created_at), int(user_id)
+        except Exception:
+            raise ValueError('Cursor de paginación inválido')
+
+    def get_users_page(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                       limit: int = 50, cursor: str = None, include_rol: bool = False):
+        """Página de usuarios ordenada por (created_at, id) descendente.
+
+        Paginación keyset: en vez de OFFSET se filtra por la última fila vista,
+        así cada página cuesta lo mismo sin importar su posición (requiere el
+        índice de migrations/001_users_created_at_id.sql).
+
+        Con `search_term` los resultados se ordenan por relevancia y se devuelven
+        solo los `limit` mejores (sin siguiente página). `include_rol` como en
+        get_all_users.
+
+        Returns:
+            tuple: (lista de Usuario, cursor de la siguiente página o None)
+        """
+        if search_term:
+            return self.search_users(search_term, rol_id, activo, limit=limit, include_rol=include_rol), None
+
+        query, params = self._page_query(rol_id, activo, limit, cursor, include_rol)
+        with self.db_config.get_connection(READ) as con:
+            cursor_db = con.cursor()
+            cursor_db.execute(query, params)
+            usuarios = self._usuarios(cursor_db.description, cursor_db.fetchall())
+            cursor_db.close()
+        return self._page_result(usuarios, limit)
+
+    def _page_query(self, rol_id, activo, limit, cursor, include_rol=False):
+        """SELECT de una página keyset (una fila de más para saber si hay otra)."""
+        query, params = self._build_search_query(None, rol_id, activo, include_rol)
+
+        if cursor:
+            created_at, last_id = self.decode_cursor(cursor)
+            query += " AND (u.created_at < %s OR (u.created_at = %s AND u.id < %s))"
+            params.extend([created_at, created_at, last_id])
+
+        # Se pide una fila de más para saber si existe otra página
+        query += " ORDER BY u.created_at DESC, u.id DESC LIMIT %s"
+        params.append(limit + 1)
+        return query, tuple(params)
+
+    def _page_result(self, usuarios, limit):
+        """(usuarios, cursor de la siguiente página) a partir de los usuarios de _page_query."""
+        next_cursor = None
+        if len(usuarios) > limit:
+            del usuarios[limit:]
+            last = usuarios[-1]
+            next_cursor = self.encode_cursor(last.created_at, last.id)
+        return usuarios, next_cursor
+
+    @staticmethod
+    def _usuarios(description, filas):
+        """Usuarios a partir de las filas tupla de un listado.
+
+        Los listados leen con cursor de tuplas: los nombres de columna se
+        resuelven una vez por consulta (Usuario.fabrica) y no hay un dict por fila.
+        """
+        construir = Usuario.fabrica(description)
+        return [construir(fila) for fila in filas]
+
+    def approx_count(self):
+        """Total aproximado de usuarios según las estadísticas de InnoDB (sin escanear la tabla)."""
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(self.APPROX_COUNT)
+            result = cursor.fetchone()
+            cursor.close()
+            return int(result[0]) if result and result[0] is not None else None
 
     def update_user(self, user_id: int, data: dict):
         """Actualizar campos específicos de un usuario.
@@ -89,8 +330,30 @@ class UsuarioRepository:
         Returns:
             bool: True si se actualizó correctamente, False en caso contrario
         """
-        if not data:
+        sentencia = self._update_query(user_id, data)
+        if sentencia is None:
             return False
+        query, valores = sentencia
+
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            try:
+                cursor.execute(query, valores)
+                con.commit()
+                self._invalidar(user_id)
+                affected_rows = cursor.rowcount
+                cursor.close()
+                return affected_rows > 0
+            except Exception as e:
+                con.rollback()
+                cursor.close()
+                raise e
+
+    @staticmethod
+    def _update_query(user_id: int, data: dict):
+        """(UPDATE, parámetros) con los campos permitidos de `data`, o None si no hay ninguno."""
+        if not data:
+            return None
 
         # Construir la query dinámicamente según los campos recibidos
         campos_permitidos = ['nombre', 'email', 'password_hash', 'rol_id', 'activo']
@@ -103,27 +366,14 @@ class UsuarioRepository:
                 valores.append(data[campo])
 
         if not campos_actualizar:
-            return False
+            return None
 
         # Siempre actualizar el timestamp
         campos_actualizar.append("updated_at = %s")
         valores.append(datetime.utcnow())
         valores.append(user_id)
 
-        query = f"UPDATE users SET {', '.join(campos_actualizar)} WHERE id = %s"
-
-        with self.db_config.get_connection() as con:
-            cursor = con.cursor()
-            try:
-                cursor.execute(query, tuple(valores))
-                con.commit()
-                affected_rows = cursor.rowcount
-                cursor.close()
-                return affected_rows > 0
-            except Exception as e:
-                con.rollback()
-                cursor.close()
-                raise e
+        return f"UPDATE users SET {', '.join(campos_actualizar)} WHERE id = %s", tuple(valores)
 
     def delete_user(self, user_id: int):
         """Eliminar usuario por ID (eliminación física).
@@ -134,12 +384,13 @@ class UsuarioRepository:
         Returns:
             bool: True si se eliminó correctamente, False en caso contrario
         """
-        with self.db_config.get_connection() as con:
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor()
             try:
                 query = "DELETE FROM users WHERE id = %s"
                 cursor.execute(query, (user_id,))
                 con.commit()
+                self._invalidar(user_id)
                 affected_rows = cursor.rowcount
                 cursor.close()
                 return affected_rows > 0
@@ -148,81 +399,239 @@ class UsuarioRepository:
                 cursor.close()
                 raise e
 
-    def search_users(self, search_term: str = None, rol_id: int = None, activo: bool = None):
+    def search_users(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                     limit: int = None, include_rol: bool = False):
         """Buscar usuarios con filtros opcionales.
         
         Args:
             search_term: Término de búsqueda (busca en nombre y email)
             rol_id: Filtrar por rol
             activo: Filtrar por estado activo/inactivo
+            limit: Máximo de resultados (None = sin límite)
+            include_rol: Traer el rol de cada usuario en la misma consulta (JOIN)
         
         Returns:
-            list: Lista de objetos Usuario que coinciden con los filtros
+            list: Lista de objetos Usuario que coinciden con los filtros. Con
+            término de búsqueda van primero las coincidencias por prefijo y
+            después por relevancia del índice FULLTEXT.
         """
-        query = (
-            "SELECT id, uuid, nombre, email, rol_id, activo, "
-            "ultimo_acceso, created_at, updated_at FROM users WHERE 1=1"
-        )
+        try:
+            return self._search(search_term, rol_id, activo, limit, include_rol)
+        except mysql.connector.Error as e:
+            if e.errno != ER_FT_MATCHING_KEY_NOT_FOUND or UsuarioRepository.SEARCH_BACKEND == 'like':
+                raise
+            # Migración 002 no aplicada: se vuelve al LIKE para no romper la búsqueda
+            logger.warning("Índice FULLTEXT de users no encontrado; usando búsqueda LIKE")
+            UsuarioRepository.SEARCH_BACKEND = 'like'
+            return self._search(search_term, rol_id, activo, limit, include_rol)
+
+    def iter_users(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                   batch_size: int = 500):
+        """Recorre los usuarios filtrados en lotes, sin cargarlos todos en memoria.
+
+        Usa un cursor sin buffer: MySQL envía las filas según se leen, así que
+        la memoria es constante y el primer lote llega enseguida. La conexión
+        queda prestada hasta que el generador termina o se cierra.
+
+        Yields:
+            list: lote de filas como tuplas, en el orden de LIST_COLUMNS
+        """
+        query, params = self._build_search_query(search_term, rol_id, activo)
+        query += " ORDER BY u.created_at DESC, u.id DESC"
+
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            # Solo se cierra si se leyó todo; si el stream se abandona,
+            # get_connection descarta la conexión con las filas pendientes
+            cursor.close()
+
+    def _search(self, search_term, rol_id, activo, limit, include_rol=False):
+        query, params = self._search_query(search_term, rol_id, activo, limit, include_rol)
+        with self.db_config.get_connection(READ) as con:
+            cursor = con.cursor()
+            cursor.execute(query, params)
+            usuarios = self._usuarios(cursor.description, cursor.fetchall())
+            cursor.close()
+
+            return usuarios
+
+    def _search_query(self, search_term, rol_id, activo, limit, include_rol=False):
+        """SELECT completo de una búsqueda: filtros, orden por relevancia y límite."""
+        query, params = self._build_search_query(search_term, rol_id, activo, include_rol)
+        order, order_params = self._search_order(search_term)
+        query += f" ORDER BY {order}u.created_at DESC, u.id DESC"
+        params.extend(order_params)
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+
+    def _select_listado(self, include_rol=False):
+        """SELECT ... FROM de los listados; con `include_rol`, LEFT JOIN a roles.
+
+        La tabla users va siempre con el alias `u` para que las condiciones y
+        el orden sirvan con y sin el JOIN.
+        """
+        columnas = [f"u.{columna}" for columna in self.LIST_COLUMNS]
+        if not include_rol:
+            return f"SELECT {', '.join(columnas)} FROM users u"
+        columnas.extend(self.ROL_COLUMNS)
+        return f"SELECT {', '.join(columnas)} FROM users u LEFT JOIN roles r ON r.id = u.rol_id"
+
+    def _build_search_query(self, search_term, rol_id, activo, include_rol=False):
+        """SELECT base con los filtros comunes de listado y búsqueda."""
+        query = self._select_listado(include_rol) + " WHERE 1=1"
         params = []
 
         if search_term:
-            query += " AND (nombre LIKE %s OR email LIKE %s)"
-            search_pattern = f"%{search_term}%"
-            params.extend([search_pattern, search_pattern])
+            condition, condition_params = self._search_condition(search_term)
+            query += f" AND {condition}"
+            params.extend(condition_params)
 
         if rol_id is not None:
-            query += " AND rol_id = %s"
+            query += " AND u.rol_id = %s"
             params.append(rol_id)
 
         if activo is not None:
-            query += " AND activo = %s"
+            query += " AND u.activo = %s"
             params.append(1 if activo else 0)
 
-        query += " ORDER BY created_at DESC"
+        return query, params
 
-        with self.db_config.get_connection() as con:
-            cursor = con.cursor(dictionary=True)
-            cursor.execute(query, tuple(params))
-            results = cursor.fetchall()
-            cursor.close()
+    def _search_condition(self, search_term):
+        """Condición WHERE para el término de búsqueda según el backend activo.
+
+        - fulltext: búsqueda de frase sobre el índice ngram (subcadenas sin
+          escanear la tabla). Términos más cortos que el token ngram se buscan
+          por prefijo, que usa los índices B-tree de nombre/email.
+        - like: LIKE '%term%' (escaneo completo), solo si falta el índice.
+        """
+        term = search_term.strip()
+        if self.SEARCH_BACKEND == 'like':
+            pattern = f"%{self._escape_like(term)}%"
+            return "(u.nombre LIKE %s OR u.email LIKE %s)", [pattern, pattern]
+        if len(term) < self.NGRAM_TOKEN_SIZE:
+            prefix = f"{self._escape_like(term)}%"
+            return "(u.nombre LIKE %s OR u.email LIKE %s)", [prefix, prefix]
+        return "MATCH(u.nombre, u.email) AGAINST (%s IN BOOLEAN MODE)", [self._ft_phrase(term)]
+
+    def _search_order(self, search_term):
+        """Prefijo del ORDER BY: coincidencias por prefijo primero, luego relevancia."""
+        if not search_term:
+            return "", []
+        term = search_term.strip()
+        prefix = f"{self._escape_like(term)}%"
+        order = "(u.nombre LIKE %s OR u.email LIKE %s) DESC, "
+        params = [prefix, prefix]
+        if self.SEARCH_BACKEND == 'fulltext' and len(term) >= self.NGRAM_TOKEN_SIZE:
+            order += "MATCH(u.nombre, u.email) AGAINST (%s IN BOOLEAN MODE) DESC, "
+            params.append(self._ft_phrase(term))
+        return order, params
 
-            return [Usuario.from_dict(row) for row in results]
+    @staticmethod
+    def _ft_phrase(term: str) -> str:
+        # Entre comillas los operadores booleanos son literales; solo sobran las comillas
+        return '"' + term.replace('"', ' ') + '"'
 
-    def update_ultimo_acceso(self, user_id: int):
-        """Actualizar la fecha y hora del último acceso del usuario."""
-        with self.db_config.get_connection() as con:
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def registrar_login_exitoso(self, user_id: int, ahora: datetime, nuevo_hash: str = None):
+        """Login correcto: resetea intentos, quita el bloqueo y actualiza el último
+        acceso en un único UPDATE. Si se pasa `nuevo_hash`, la contraseña se
+        re-hashea en la misma sentencia (migración de hashes legacy/coste viejo)."""
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor()
-            query = "UPDATE users SET ultimo_acceso = %s WHERE id = %s"
-            cursor.execute(query, (datetime.utcnow(), user_id))
+            cursor.execute(*self._login_exitoso_query(user_id, ahora, nuevo_hash))
             con.commit()
+            self._invalidar_usuario(user_id)
             cursor.close()
 
-    def update_intentos_fallidos(self, user_id: int, intentos: int):
-        """Actualizar el contador de intentos fallidos de login."""
-        with self.db_config.get_connection() as con:
+    @staticmethod
+    def _login_exitoso_query(user_id: int, ahora: datetime, nuevo_hash: str = None):
+        query = (
+            "UPDATE users SET intentos_fallidos = 0, bloqueado_hasta = NULL, "
+            "ultimo_acceso = %s"
+        )
+        params = [ahora]
+        if nuevo_hash:
+            query += ", password_hash = %s"
+            params.append(nuevo_hash)
+        query += " WHERE id = %s"
+        params.append(user_id)
+        return query, tuple(params)
+
+    def registrar_login_fallido(self, user_id: int, max_intentos: int, bloqueo_hasta: datetime,
+                                ahora: datetime) -> int:
+        """Login fallido: incrementa los intentos y bloquea al llegar al máximo,
+        todo en un único UPDATE atómico (sin leer-modificar-escribir desde Python).
+
+        Si el bloqueo anterior ya expiró, el contador se reinicia antes de sumar.
+        MySQL evalúa las asignaciones de izquierda a derecha, así que la segunda
+        ya ve el contador incrementado. LAST_INSERT_ID(expr) devuelve el nuevo
+        valor en el paquete OK, sin un SELECT adicional.
+
+        Returns:
+            int: Número de intentos fallidos tras este intento
+        """
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor()
-            query = "UPDATE users SET intentos_fallidos = %s WHERE id = %s"
-            cursor.execute(query, (intentos, user_id))
+            cursor.execute(self.LOGIN_FALLIDO, (ahora, max_intentos, bloqueo_hasta, ahora, user_id))
+            intentos = cursor.lastrowid
             con.commit()
+            self._invalidar_usuario(user_id)
             cursor.close()
+            return intentos or 0
+
+    def hash_distribution(self):
+        """Distribución de tipos de hash y costes bcrypt en la tabla users.
 
-    def bloquear_usuario(self, user_id: int, bloqueado_hasta: datetime):
-        """Bloquear usuario hasta una fecha específica."""
-        with self.db_config.get_connection() as con:
+        Agrupa en el servidor por el prefijo del hash ('$2b$12$', ...), así no
+        se transfieren los hashes. Returns: lista de tuplas (prefijo, total).
+        """
+        with self.db_config.get_connection(READ) as con:
             cursor = con.cursor()
-            query = "UPDATE users SET bloqueado_hasta = %s WHERE id = %s"
-            cursor.execute(query, (bloqueado_hasta, user_id))
-            con.commit()
+            query = (
+                "SELECT CASE WHEN password_hash LIKE '$2%' THEN LEFT(password_hash, 7) "
+                "WHEN CHAR_LENGTH(password_hash) = 64 THEN 'sha256' "
+                "ELSE 'desconocido' END AS tipo, COUNT(*) AS total "
+                "FROM users GROUP BY tipo ORDER BY total DESC"
+            )
+            cursor.execute(query)
+            results = cursor.fetchall()
             cursor.close()
+            return results
 
     def desbloquear_usuario(self, user_id: int):
         """Desbloquear usuario (establecer bloqueado_hasta a NULL)."""
-        with self.db_config.get_connection() as con:
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor()
             query = "UPDATE users SET bloqueado_hasta = NULL, intentos_fallidos = 0 WHERE id = %s"
             cursor.execute(query, (user_id,))
             con.commit()
+            self._invalidar_usuario(user_id)
+            cursor.close()
+
+    def consumir_refresco(self, user_id: int, emitido: float) -> bool:
+        """Revoca en todos los procesos el token de refresco emitido en `emitido`
+        y los anteriores del usuario. False si ya estaba revocado (usado o cerrado).
+
+        La columna no forma parte de Usuario: no hace falta invalidar la caché.
+        """
+        with self.db_config.get_connection(WRITE) as con:
+            cursor = con.cursor()
+            cursor.execute(self.CONSUMIR_REFRESCO, (emitido, user_id, emitido))
+            consumido = cursor.rowcount > 0
+            con.commit()
             cursor.close()
+            return consumido
 
     def toggle_activo(self, user_id: int):
         """Alternar el estado activo/inactivo de un usuario.
@@ -230,7 +639,7 @@ class UsuarioRepository:
         Returns:
             bool: Nuevo estado (True = activo, False = inactivo)
         """
-        with self.db_config.get_connection() as con:
+        with self.db_config.get_connection(WRITE) as con:
             cursor = con.cursor(dictionary=True)
             
             # Obtener estado actual
@@ -248,6 +657,7 @@ class UsuarioRepository:
             query = "UPDATE users SET activo = %s, updated_at = %s WHERE id = %s"
             cursor.execute(query, (nuevo_estado, datetime.utcnow(), user_id))
             con.commit()
+            self._invalidar(user_id)
             cursor.close()
             
             return bool(nuevo_estado)
\ No newline at end of file
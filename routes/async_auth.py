@@ -0,0 +1,15 @@
+# routes/async_auth.py
+from quart import g, request, session
+
+from routes.auth import resolver
+
+
+def identidad():
+    """Usuario autenticado de la petición actual en el modo asyncio, o None.
+
+    Igual que routes.auth.identidad pero con el contexto de Quart.
+    """
+    if 'identidad' in g:
+        return g.identidad
+    g.identidad = resolver(request.headers, session)
+    return g.identidad
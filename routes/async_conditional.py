@@ -0,0 +1,29 @@
+# routes/async_conditional.py
+from quart import jsonify, request, Response
+
+from routes.conditional import no_modificado
+
+
+async def respuesta_condicional(etag, last_modified, construir):
+    """Versión asyncio de routes.conditional.respuesta_condicional.
+
+    `construir()` es una corrutina que devuelve (dict de respuesta o texto
+    JSON, código); no se espera si el cliente ya tiene la versión actual.
+    """
+    if no_modificado(etag, last_modified, request):
+        response = Response('', status=304)
+    else:
+        cuerpo, status = await construir()
+        if isinstance(cuerpo, str):
+            response = Response(cuerpo, status=status, mimetype='application/json')
+        else:
+            response = jsonify(cuerpo)
+            response.status_code = status
+        if status != 200:
+            return response
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # no-cache: el navegador guarda la respuesta pero revalida siempre
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,52 @@
+# routes/async_dispositivo_routes.py
+import asyncio
+
+from quart import Blueprint, Response, request, jsonify
+from routes.async_auth import identidad
+from services.eventos_service import publicador, SuscripcionAsync, PublicadorLlenoError, LATIDO
+
+# Eventos en vivo de dispositivos en el modo asyncio: cada cliente es una
+# corrutina y no un hilo. El resto de /api/dispositivos lo atiende la app
+# síncrona (ver asgi.py).
+dispositivo_bp = Blueprint('dispositivo', __name__, url_prefix='/api/dispositivos')
+
+
+@dispositivo_bp.route('/eventos', methods=['GET'])
+async def eventos_dispositivos():
+    """Endpoint GET /api/dispositivos/eventos (ver routes/dispositivo_routes.py)."""
+    if not identidad():
+        return jsonify({
+            'success': False,
+            'message': 'Acceso denegado'
+        }), 401
+    suscripcion = SuscripcionAsync(publicador.MAX_COLA)
+    try:
+        # La primera suscripción del proceso precarga de la BD
+        iniciales = await asyncio.to_thread(publicador.suscribir, suscripcion,
+                                            request.headers.get('Last-Event-ID'))
+    except PublicadorLlenoError as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al suscribirse a eventos: {str(e)}'
+        }), 500
+
+    async def generar():
+        try:
+            yield ('retry: 3000\n\n' + ''.join(iniciales)).encode()
+            # Al desbordarse se corta: el navegador se reconecta con Last-Event-ID
+            while not suscripcion.desbordada:
+                await suscripcion.esperar(publicador.LATIDO)
+                textos = suscripcion.tomar()
+                yield (''.join(textos) if textos else LATIDO).encode()
+        finally:
+            publicador.desuscribir(suscripcion)
+
+    response = Response(generar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # Sin límite de duración (RESPONSE_TIMEOUT) para una respuesta que no termina
+    response.timeout = None
+    return response
@@ -0,0 +1,39 @@
+# routes/async_roles_routes.py
+from datetime import datetime, timezone
+from quart import Blueprint, jsonify
+from services.async_roles_service import AsyncRolesService
+from routes.conditional import validadores
+from routes.async_conditional import respuesta_condicional
+
+# Lecturas de roles en el modo asyncio; POST/PUT/DELETE los atiende la app
+# síncrona (ver asgi.py).
+role_bp = Blueprint('role_bp', __name__, url_prefix='/api/roles')
+
+roles_service = AsyncRolesService()
+
+@role_bp.route('/', methods=['GET'])
+async def get_roles():
+    """Endpoint GET /api/roles - Obtener todos los roles (ver routes/roles_routes.py)."""
+    response = await roles_service.obtener_todos()
+    etag = response.pop('etag', None)
+    cargado = response.pop('last_modified', None)
+    status_code = response.get('status', 200 if response['success'] else 500)
+    if not etag:
+        return jsonify(response), status_code
+    last_modified = datetime.fromtimestamp(int(cargado), tz=timezone.utc)
+
+    async def construir():
+        return response, status_code
+
+    return await respuesta_condicional(etag, last_modified, construir)
+
+@role_bp.route('/<int:role_id>', methods=['GET'])
+async def get_role_by_id(role_id):
+    """Endpoint GET /api/roles/<int:role_id> - Obtener rol por ID."""
+    etag, last_modified = validadores(roles_service.version(), role_id)
+
+    async def construir():
+        response = await roles_service.obtener_por_id(role_id)
+        return response, response.get('status', 200 if response['success'] else 500)
+
+    return await respuesta_condicional(etag, last_modified, construir)
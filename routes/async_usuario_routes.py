@@ -0,0 +1,423 @@
+# routes/async_usuario_routes.py
+from quart import Blueprint, request, jsonify, session
+from services.async_usuario_service import AsyncUsuarioService
+from services.token_service import TokenInvalidoError
+from routes.conditional import validadores
+from routes.async_conditional import respuesta_condicional
+from routes.async_auth import identidad
+
+# Mismas rutas, códigos y cuerpos que routes/usuario_routes.py, servidas por
+# asgi.py. Importación y exportación masivas siguen en el modo síncrono.
+usuario_bp = Blueprint('usuario', __name__)
+usuario_service = AsyncUsuarioService()
+
+
+def _include_rol():
+    """True si ?include= (o ?expand=) pide el rol. ValueError si pide algo desconocido."""
+    valor = request.args.get('include') or request.args.get('expand')
+    return 'rol' in usuario_service.parse_include(valor)
+
+
+def _activo(valor):
+    return None if valor is None else valor.lower() in ['true', '1', 'yes']
+
+
+@usuario_bp.route('/api/login', methods=['POST'])
+async def login():
+    """Endpoint para autenticación de usuarios"""
+    try:
+        data = await request.get_json(silent=True)
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+
+        username_or_email = data.get('usuario')
+        password = data.get('contrasena')
+
+        if not username_or_email or not password:
+            return jsonify({
+                'success': False,
+                'message': 'Usuario y contraseña son requeridos'
+            }), 400
+
+        result = await usuario_service.authenticate_user(username_or_email, password)
+
+        if result['success'] and data.get('modo') == 'token':
+            result['tokens'] = usuario_service.token_service.emitir(result['user'])
+            return jsonify(result), 200
+        elif result['success']:
+            session['user_id'] = result['user']['id']
+            session['username'] = result['user'].get('username') or result['user'].get('nombre')
+            session['rol_id'] = result['user'].get('rol_id')
+            session['logged_in'] = True
+            return jsonify(result), 200
+        else:
+            return jsonify(result), result.get('status', 401)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error interno del servidor: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/logout', methods=['POST'])
+async def logout():
+    """Endpoint para cerrar sesión"""
+    try:
+        actual = identidad()
+        if actual and actual['modo'] == 'token':
+            usuario_service.token_service.revocar(actual['claims'])
+        refresh_token = (await request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                await usuario_service.cerrar_refresco(refresh_token)
+            except TokenInvalidoError:
+                pass
+        session.clear()
+        return jsonify({
+            'success': True,
+            'message': 'Sesión cerrada exitosamente'
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al cerrar sesión: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/token/refresh', methods=['POST'])
+async def refresh_token():
+    """Canjear un token de refresco por un par nuevo (modo de sesión por tokens)"""
+    try:
+        data = await request.get_json(silent=True) or {}
+        if not data.get('refresh_token'):
+            return jsonify({
+                'success': False,
+                'message': 'refresh_token es requerido'
+            }), 400
+
+        result = await usuario_service.refresh_tokens(data['refresh_token'])
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al refrescar la sesión: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/user/current', methods=['GET'])
+async def get_current_user():
+    """Obtener información del usuario actual"""
+    try:
+        actual = identidad()
+        if not actual:
+            return jsonify({
+                'success': False,
+                'message': 'No hay sesión activa'
+            }), 401
+
+        if actual['modo'] == 'token':
+            claims = actual['claims']
+            return jsonify({'success': True, 'user': {
+                'id': claims['sub'],
+                'nombre': claims.get('nom'),
+                'username': claims.get('nom'),
+                'rol_id': claims.get('rol'),
+                'activo': claims.get('act'),
+            }}), 200
+
+        user_id = actual['user_id']
+        etag, last_modified = validadores(usuario_service.version_usuario(user_id), 'current', user_id)
+
+        async def construir():
+            result = await usuario_service.get_user_by_id(user_id)
+            return result, 200 if result['success'] else 404
+
+        return await respuesta_condicional(etag, last_modified, construir)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener usuario: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/register', methods=['POST'])
+async def register():
+    """Endpoint para registrar nuevos usuarios"""
+    try:
+        data = await request.get_json(silent=True)
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+
+        nombre_usuario = data.get('nombre_usuario')
+        correo_electronico = data.get('correo_electronico')
+        contrasena = data.get('contrasena')
+        rol_id = data.get('rol_id', 2)
+
+        if not all([nombre_usuario, correo_electronico, contrasena]):
+            return jsonify({
+                'success': False,
+                'message': 'Todos los campos son requeridos'
+            }), 400
+
+        result = await usuario_service.create_user(nombre_usuario, correo_electronico, contrasena, rol_id)
+        return jsonify(result), 201 if result['success'] else result.get('status', 400)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error interno del servidor: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/check-session', methods=['GET'])
+async def check_session():
+    """Verificar si hay una sesión activa"""
+    try:
+        actual = identidad()
+        if actual:
+            return jsonify({
+                'success': True,
+                'logged_in': True,
+                'user': {
+                    'id': actual['user_id'],
+                    'username': actual['username'],
+                    'rol_id': actual['rol_id']
+                }
+            }), 200
+        return jsonify({
+            'success': True,
+            'logged_in': False
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al verificar sesión: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users', methods=['GET'])
+async def get_users():
+    """Obtener lista paginada de usuarios con filtros opcionales (ver routes/usuario_routes.py)"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        search_term = request.args.get('search')
+        rol_id = request.args.get('rol_id', type=int)
+        activo = _activo(request.args.get('activo'))
+
+        try:
+            include_rol = _include_rol()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        etag, last_modified = validadores(usuario_service.version_listado(include_rol), request.full_path)
+
+        async def construir():
+            result = await usuario_service.get_users_page(
+                search_term, rol_id, activo,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('total', '').lower() in ['true', '1', 'yes'],
+                include_rol=include_rol,
+                serializar=False
+            )
+            return usuario_service.listado_json(result), 200 if result['success'] else result.get('status', 500)
+
+        return await respuesta_condicional(etag, last_modified, construir)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener usuarios: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/search', methods=['GET'])
+async def search_users():
+    """Endpoint específico para búsqueda de usuarios (ver routes/usuario_routes.py)"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        search_term = request.args.get('q') or request.args.get('query')
+        rol_id = request.args.get('rol_id', type=int)
+        activo = _activo(request.args.get('activo'))
+
+        try:
+            include_rol = _include_rol()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        etag, last_modified = validadores(usuario_service.version_listado(include_rol), request.full_path)
+
+        async def construir():
+            result = await usuario_service.get_users_page(
+                search_term, rol_id, activo,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                include_rol=include_rol,
+                serializar=False
+            )
+            return usuario_service.listado_json(result), 200 if result['success'] else result.get('status', 500)
+
+        return await respuesta_condicional(etag, last_modified, construir)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error en la búsqueda: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/<int:user_id>', methods=['GET'])
+async def get_user(user_id):
+    """Obtener un usuario específico por ID"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        etag, last_modified = validadores(usuario_service.version_usuario(user_id), user_id)
+
+        async def construir():
+            result = await usuario_service.get_user_by_id(user_id)
+            return result, 200 if result['success'] else 404
+
+        return await respuesta_condicional(etag, last_modified, construir)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener usuario: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/<int:user_id>', methods=['PUT'])
+async def update_user(user_id):
+    """Actualizar datos de usuario"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        data = await request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+
+        result = await usuario_service.update_user(user_id, data)
+        return jsonify(result), 200 if result['success'] else result.get('status', 400)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al actualizar usuario: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/<int:user_id>', methods=['DELETE'])
+async def delete_user(user_id):
+    """Eliminar usuario"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        if identidad()['user_id'] == user_id:
+            return jsonify({
+                'success': False,
+                'message': 'No puedes eliminar tu propia cuenta'
+            }), 400
+
+        result = await usuario_service.delete_user(user_id)
+        return jsonify(result), 200 if result['success'] else 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al eliminar usuario: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/<int:user_id>/toggle-active', methods=['PATCH'])
+async def toggle_user_active(user_id):
+    """Activar o desactivar un usuario"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        if identidad()['user_id'] == user_id:
+            return jsonify({
+                'success': False,
+                'message': 'No puedes desactivar tu propia cuenta'
+            }), 400
+
+        result = await usuario_service.toggle_user_status(user_id)
+        return jsonify(result), 200 if result['success'] else 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al cambiar estado: {str(e)}'
+        }), 500
+
+
+@usuario_bp.route('/api/users/<int:user_id>/unlock', methods=['PATCH'])
+async def unlock_user(user_id):
+    """Desbloquear un usuario manualmente"""
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        if identidad()['rol_id'] != 1:
+            return jsonify({
+                'success': False,
+                'message': 'Solo administradores pueden desbloquear usuarios'
+            }), 403
+
+        result = await usuario_service.unlock_user(user_id)
+        return jsonify(result), 200 if result['success'] else 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al desbloquear usuario: {str(e)}'
+        }), 500
@@ -0,0 +1,49 @@
+# routes/auth.py
+from flask import g, request, session
+
+from services.token_service import token_service, TokenInvalidoError
+
+
+def identidad():
+    """Usuario autenticado de la petición actual, o None.
+
+    Acepta los dos modos de sesión: un token de acceso en la cabecera
+    `Authorization: Bearer ...` (sin consultar la BD) o la cookie de sesión de
+    Flask. Si llega una cabecera Bearer inválida no se usa la cookie.
+
+    Returns:
+        dict: {'user_id', 'username', 'rol_id', 'modo', 'claims'} o None
+    """
+    if 'identidad' in g:
+        return g.identidad
+    g.identidad = resolver(request.headers, session)
+    return g.identidad
+
+
+def resolver(cabeceras, sesion):
+    """Identidad a partir de las cabeceras y la sesión de la petición.
+
+    Independiente del framework: la comparten la app Flask y la asyncio (asgi.py).
+    """
+    cabecera = cabeceras.get('Authorization', '')
+    if cabecera[:7].lower() == 'bearer ':
+        try:
+            claims = token_service.verificar_acceso(cabecera[7:].strip())
+        except TokenInvalidoError:
+            return None
+        return {
+            'user_id': claims['sub'],
+            'username': claims.get('nom'),
+            'rol_id': claims.get('rol'),
+            'modo': 'token',
+            'claims': claims,
+        }
+    if sesion.get('logged_in'):
+        return {
+            'user_id': sesion.get('user_id'),
+            'username': sesion.get('username'),
+            'rol_id': sesion.get('rol_id'),
+            'modo': 'cookie',
+            'claims': None,
+        }
+    return None
@@ -0,0 +1,63 @@
+# routes/conditional.py
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from flask import jsonify, make_response, request
+
+# Los validadores se renuevan al menos cada VALIDATOR_TTL segundos: las
+# escrituras hechas fuera de la aplicación (otro host, SQL directo) no cambian
+# la generación, así que como mucho se sirven 304 viejos durante este tiempo.
+VALIDATOR_TTL = 60
+
+
+def validadores(version, *partes):
+    """ETag y Last-Modified a partir de una versión (token, instante de escritura).
+
+    `partes` distingue respuestas con la misma versión (URL, filtros, id...).
+    """
+    token, modificado = version
+    ventana = int(time.time() // VALIDATOR_TTL)
+    semilla = "|".join([token, str(ventana)] + [str(p) for p in partes])
+    etag = hashlib.sha1(semilla.encode("utf-8")).hexdigest()
+    instante = max(modificado or 0.0, ventana * VALIDATOR_TTL)
+    last_modified = datetime.fromtimestamp(int(instante), tz=timezone.utc)
+    return etag, last_modified
+
+
+def no_modificado(etag, last_modified, peticion=None) -> bool:
+    """Evalúa If-None-Match / If-Modified-Since de la petición actual.
+
+    Si el cliente envía If-None-Match se ignora If-Modified-Since (RFC 9110).
+    `peticion` permite pasar la petición de Quart (modo asyncio).
+    """
+    peticion = request if peticion is None else peticion
+    if peticion.if_none_match:
+        return peticion.if_none_match.contains(etag)
+    since = peticion.if_modified_since
+    return bool(since and last_modified and last_modified <= since)
+
+
+def respuesta_condicional(etag, last_modified, construir):
+    """304 sin construir el cuerpo si el cliente ya tiene la versión actual.
+
+    `construir()` devuelve (dict de respuesta, código); el cuerpo puede ser
+    también texto JSON ya serializado. Solo las respuestas 200 llevan
+    validadores; los errores no se cachean.
+    """
+    if no_modificado(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        cuerpo, status = construir()
+        if isinstance(cuerpo, str):
+            response = make_response(cuerpo, status, {'Content-Type': 'application/json'})
+        else:
+            response = make_response(jsonify(cuerpo), status)
+        if status != 200:
+            return response
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # no-cache: el navegador guarda la respuesta pero revalida siempre
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
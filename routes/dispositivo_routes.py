@@ -0,0 +1,299 @@
+# routes/dispositivo_routes.py
+import threading
+
+from flask import Blueprint, Response, request, jsonify
+from services.dispositivo_service import DispositivoService
+from services.eventos_service import publicador, Suscripcion, PublicadorLlenoError, LATIDO
+from services.historial_service import HistorialService
+from routes.auth import identidad
+
+dispositivo_bp = Blueprint('dispositivo', __name__, url_prefix='/api/dispositivos')
+dispositivo_service = DispositivoService()
+historial_service = HistorialService()
+
+# Clientes SSE por proceso en modo síncrono: cada uno ocupa un hilo del worker
+# (gthread, 8 por defecto) mientras está conectado. Por encima, 503 y el
+# navegador sondea el listado; para muchos clientes en vivo, asgi.py.
+MAX_EVENTOS_SINCRONO = 2
+_eventos_libres = threading.BoundedSemaphore(MAX_EVENTOS_SINCRONO)
+
+
+def _acceso_denegado():
+    return jsonify({
+        'success': False,
+        'message': 'Acceso denegado'
+    }), 401
+
+
+@dispositivo_bp.route('/', methods=['GET'])
+def get_dispositivos():
+    """Listado paginado de dispositivos con su último estado
+
+    Query params:
+    - q: busca en nombre y host
+    - estado: desconocido, up o down
+    - activo: filtrar por dispositivos activos/inactivos
+    - limit: tamaño de página (por defecto 50, máximo 500)
+    - cursor: valor de next_cursor de la página anterior
+    """
+    try:
+        if not identidad():
+            return _acceso_denegado()
+
+        activo_param = request.args.get('activo')
+        activo = None if activo_param is None else activo_param.lower() in ['true', '1', 'yes']
+
+        result = dispositivo_service.get_devices_page(
+            request.args.get('q'), request.args.get('estado'), activo,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener dispositivos: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/eventos', methods=['GET'])
+def eventos_dispositivos():
+    """Cambios de estado y contadores en vivo (Server-Sent Events)
+
+    Eventos: 'transicion' (con id; el navegador lo reenvía en Last-Event-ID
+    al reconectar), 'contadores' y 'reset' (recargar el listado). En modo
+    síncrono cada cliente ocupa un hilo, así que se admiten como mucho
+    MAX_EVENTOS_SINCRONO por proceso; con asgi.py lo atiende Quart.
+    """
+    if not identidad():
+        return _acceso_denegado()
+    if not _eventos_libres.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'message': 'Demasiados clientes en vivo en este servidor'
+        }), 503
+    suscripcion = Suscripcion(publicador.MAX_COLA)
+    try:
+        iniciales = publicador.suscribir(suscripcion, request.headers.get('Last-Event-ID'))
+    except PublicadorLlenoError as e:
+        _eventos_libres.release()
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        _eventos_libres.release()
+        return jsonify({
+            'success': False,
+            'message': f'Error al suscribirse a eventos: {str(e)}'
+        }), 500
+
+    def generar():
+        yield 'retry: 3000\n\n' + ''.join(iniciales)
+        # Al desbordarse se corta: el navegador se reconecta con Last-Event-ID
+        while not suscripcion.desbordada:
+            suscripcion.esperar(publicador.LATIDO)
+            textos = suscripcion.tomar()
+            yield ''.join(textos) if textos else LATIDO
+
+    def cerrar():
+        publicador.desuscribir(suscripcion)
+        _eventos_libres.release()
+
+    respuesta = Response(generar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # El servidor cierra la respuesta aunque el generador no llegue a empezar
+    respuesta.call_on_close(cerrar)
+    return respuesta
+
+
+@dispositivo_bp.route('/<int:dispositivo_id>', methods=['GET'])
+def get_dispositivo(dispositivo_id):
+    """Obtener un dispositivo por ID"""
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        result = dispositivo_service.get_device_by_id(dispositivo_id)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener dispositivo: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/', methods=['POST'])
+def create_dispositivo():
+    """Crear dispositivo: {nombre, host, metodo ('tcp'|'icmp'), puerto, intervalo_s, activo}"""
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+        result = dispositivo_service.create_device(data)
+        return jsonify(result), 201 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al crear dispositivo: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/import', methods=['POST'])
+def import_dispositivos():
+    """Importar dispositivos en bloque (solo administradores)
+
+    Acepta un archivo multipart `file` (.csv o .json), un cuerpo JSON
+    (lista o {"dispositivos": [...]}) o un cuerpo text/csv.
+    """
+    try:
+        if not identidad():
+            return _acceso_denegado()
+
+        if identidad()['rol_id'] != 1:
+            return jsonify({
+                'success': False,
+                'message': 'Solo administradores pueden importar dispositivos'
+            }), 403
+
+        archivo = request.files.get('file')
+        try:
+            if archivo:
+                formato = 'csv' if archivo.filename.lower().endswith('.csv') else 'json'
+                filas = dispositivo_service.parse_import(archivo.read().decode('utf-8-sig'), formato)
+            elif request.mimetype == 'text/csv':
+                filas = dispositivo_service.parse_import(request.get_data(as_text=True), 'csv')
+            else:
+                filas = dispositivo_service.parse_import(request.get_data(as_text=True), 'json')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Archivo inválido: {str(e)}'
+            }), 400
+
+        result = dispositivo_service.import_devices(filas)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al importar dispositivos: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/descubrir', methods=['POST'])
+def descubrir_dispositivos():
+    """Barrer una red y dar de alta los destinos que respondan (solo administradores)
+
+    Cuerpo JSON:
+    - red: CIDR a recorrer (p. ej. 192.168.1.0/24)
+    - puertos: puertos TCP a probar (por defecto 22, 80 y 443)
+    - icmp: enviar también un echo ICMP a cada host
+    - tasa: sondas por segundo (por defecto 500), timeout: segundos por sonda
+    - intervalo_s, activo: para los dispositivos que se den de alta
+    La respuesta llega al terminar el barrido (hosts x destinos / tasa segundos).
+    """
+    try:
+        if not identidad():
+            return _acceso_denegado()
+
+        if identidad()['rol_id'] != 1:
+            return jsonify({
+                'success': False,
+                'message': 'Solo administradores pueden descubrir dispositivos'
+            }), 403
+
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+        result = dispositivo_service.discover_devices(data)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al descubrir dispositivos: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/<int:dispositivo_id>', methods=['PUT'])
+def update_dispositivo(dispositivo_id):
+    """Actualizar un dispositivo (solo los campos enviados)"""
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'No se recibieron datos'
+            }), 400
+        result = dispositivo_service.update_device(dispositivo_id, data)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al actualizar dispositivo: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/<int:dispositivo_id>', methods=['DELETE'])
+def delete_dispositivo(dispositivo_id):
+    """Eliminar un dispositivo"""
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        result = dispositivo_service.delete_device(dispositivo_id)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al eliminar dispositivo: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/<int:dispositivo_id>/comprobar', methods=['POST'])
+def check_dispositivo(dispositivo_id):
+    """Comprobar un dispositivo ahora (no modifica el estado que guarda el monitor)"""
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        result = dispositivo_service.check_device(dispositivo_id)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al comprobar dispositivo: {str(e)}'
+        }), 500
+
+
+@dispositivo_bp.route('/<int:dispositivo_id>/historial', methods=['GET'])
+def get_historial(dispositivo_id):
+    """Histórico de disponibilidad y latencia de un dispositivo
+
+    Query params:
+    - desde, hasta: segundos epoch o fecha ISO 8601 (por defecto, el último día)
+    - resolucion: raw, 1m, 1h, 1d o auto (por defecto; la más fina que quepa en ~1500 puntos)
+
+    Cada punto es [ts, muestras, exitos, latencia_media, latencia_min, latencia_max]
+    (ver 'columnas'); la latencia en ms, solo de las comprobaciones correctas.
+    """
+    try:
+        if not identidad():
+            return _acceso_denegado()
+        result = historial_service.get_history(
+            dispositivo_id, request.args.get('desde'), request.args.get('hasta'),
+            request.args.get('resolucion')
+        )
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener histórico: {str(e)}'
+        }), 500
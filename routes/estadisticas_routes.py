@@ -0,0 +1,28 @@
+# routes/estadisticas_routes.py
+from flask import Blueprint, jsonify
+from services.estadisticas_service import EstadisticasService
+from routes.auth import identidad
+
+estadisticas_bp = Blueprint('estadisticas', __name__)
+estadisticas_service = EstadisticasService()
+
+
+@estadisticas_bp.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Endpoint para el resumen de usuarios del dashboard
+
+    Respuesta en 'stats':
+    - usuarios: total, activos, inactivos y bloqueados ahora
+    - roles: por rol, total y activos (rol_id null = sin rol)
+    - accesos: usuarios con último acceso hoy, en 7 y en 30 días (UTC), y nunca
+    - generado: instante del cálculo (se cachea unos segundos)
+    """
+    if not identidad():
+        return jsonify({
+            'success': False,
+            'message': 'Acceso denegado'
+        }), 401
+    result = estadisticas_service.get_stats()
+    if result['success']:
+        return jsonify(result), 200
+    return jsonify(result), result.get('status', 500)
@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
 from flask import Blueprint, jsonify, request
 from services.roles_service import RolesService # Importamos la clase de servicio
+from routes.conditional import validadores, respuesta_condicional
 
 # Inicializar Blueprint con prefijo /api/roles
 role_bp = Blueprint('role_bp', __name__, url_prefix='/api/roles')
@@ -9,19 +11,33 @@ roles_service = RolesService()
 
 @role_bp.route('/', methods=['GET'])
 def get_roles():
-    """Endpoint GET /api/roles - Obtener todos los roles."""
+    """Endpoint GET /api/roles - Obtener todos los roles.
+
+    Responde 304 sin cuerpo si el If-None-Match (o If-Modified-Since) del cliente
+    coincide con la lista actual, que casi siempre sale de la caché en memoria."""
     response = roles_service.obtener_todos()
+    etag = response.pop('etag', None)
+    cargado = response.pop('last_modified', None)
     # Determina el código de estado: 200 si es exitoso, o usa 'status' del servicio si falla
     status_code = response.get('status', 200 if response['success'] else 500)
-    return jsonify(response), status_code
+    if not etag:
+        return jsonify(response), status_code
+    last_modified = datetime.fromtimestamp(int(cargado), tz=timezone.utc)
+    return respuesta_condicional(etag, last_modified, lambda: (response, status_code))
 
 @role_bp.route('/<int:role_id>', methods=['GET'])
 def get_role_by_id(role_id):
-    """Endpoint GET /api/roles/<int:role_id> - Obtener rol por ID."""
-    response = roles_service.obtener_por_id(role_id)
-    # Determina el código de estado: 200 si es exitoso, o usa 'status' (ej. 404)
-    status_code = response.get('status', 200 if response['success'] else 500)
-    return jsonify(response), status_code
+    """Endpoint GET /api/roles/<int:role_id> - Obtener rol por ID.
+
+    Responde 304 sin consultar la BD si la generación de roles no cambió."""
+    etag, last_modified = validadores(roles_service.version(), role_id)
+
+    def construir():
+        response = roles_service.obtener_por_id(role_id)
+        # Determina el código de estado: 200 si es exitoso, o usa 'status' (ej. 404)
+        return response, response.get('status', 200 if response['success'] else 500)
+
+    return respuesta_condicional(etag, last_modified, construir)
 
 @role_bp.route('/', methods=['POST'])
 def create_role():
@@ -1,10 +1,19 @@
 # routes/usuario_routes.py
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
 from services.usuario_service import UsuarioService
+from services.token_service import TokenInvalidoError
+from routes.conditional import validadores, respuesta_condicional
+from routes.auth import identidad
 
 usuario_bp = Blueprint('usuario', __name__)
 usuario_service = UsuarioService()
 
+
+def _include_rol():
+    """True si ?include= (o ?expand=) pide el rol. ValueError si pide algo desconocido."""
+    valor = request.args.get('include') or request.args.get('expand')
+    return 'rol' in usuario_service.parse_include(valor)
+
 @usuario_bp.route('/api/login', methods=['POST'])
 def login():
     """Endpoint para autenticación de usuarios"""
@@ -29,7 +38,11 @@ def login():
         # Autenticar usuario
         result = usuario_service.authenticate_user(username_or_email, password)
         
-        if result['success']:
+        if result['success'] and data.get('modo') == 'token':
+            # Modo sin estado: tokens firmados en lugar de la cookie de sesión
+            result['tokens'] = usuario_service.token_service.emitir(result['user'])
+            return jsonify(result), 200
+        elif result['success']:
             # Guardar información del usuario en la sesión
             session['user_id'] = result['user']['id']
             session['username'] = result['user'].get('username') or result['user'].get('nombre')
@@ -38,7 +51,8 @@ def login():
             
             return jsonify(result), 200
         else:
-            return jsonify(result), 401
+            # 503 si el pool de bcrypt está saturado; 401 para credenciales inválidas
+            return jsonify(result), result.get('status', 401)
             
     except Exception as e:
         return jsonify({
@@ -50,6 +64,16 @@ def login():
 def logout():
     """Endpoint para cerrar sesión"""
     try:
+        # En modo token se revocan el token de acceso y, si se envía, el de refresco
+        actual = identidad()
+        if actual and actual['modo'] == 'token':
+            usuario_service.token_service.revocar(actual['claims'])
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                usuario_service.cerrar_refresco(refresh_token)
+            except TokenInvalidoError:
+                pass
         session.clear()
         return jsonify({
             'success': True,
@@ -61,20 +85,57 @@ def logout():
             'message': f'Error al cerrar sesión: {str(e)}'
         }), 500
 
+@usuario_bp.route('/api/token/refresh', methods=['POST'])
+def refresh_token():
+    """Canjear un token de refresco por un par nuevo (modo de sesión por tokens)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('refresh_token'):
+            return jsonify({
+                'success': False,
+                'message': 'refresh_token es requerido'
+            }), 400
+
+        result = usuario_service.refresh_tokens(data['refresh_token'])
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al refrescar la sesión: {str(e)}'
+        }), 500
+
 @usuario_bp.route('/api/user/current', methods=['GET'])
 def get_current_user():
     """Obtener información del usuario actual"""
     try:
-        if not session.get('logged_in'):
+        actual = identidad()
+        if not actual:
             return jsonify({
                 'success': False,
                 'message': 'No hay sesión activa'
             }), 401
-        
-        user_id = session.get('user_id')
-        result = usuario_service.get_user_by_id(user_id)
-        
-        return jsonify(result), 200 if result['success'] else 404
+
+        if actual['modo'] == 'token':
+            # Los datos viajan firmados en el token: cero consultas
+            claims = actual['claims']
+            return jsonify({'success': True, 'user': {
+                'id': claims['sub'],
+                'nombre': claims.get('nom'),
+                'username': claims.get('nom'),
+                'rol_id': claims.get('rol'),
+                'activo': claims.get('act'),
+            }}), 200
+        
+        user_id = actual['user_id']
+        # Validadores sin consultar la BD: un 304 no necesita ni la caché de usuarios
+        etag, last_modified = validadores(usuario_service.version_usuario(user_id), 'current', user_id)
+
+        def construir():
+            result = usuario_service.get_user_by_id(user_id)
+            return result, 200 if result['success'] else 404
+
+        return respuesta_condicional(etag, last_modified, construir)
         
     except Exception as e:
         return jsonify({
@@ -108,7 +169,7 @@ def register():
         # Crear usuario
         result = usuario_service.create_user(nombre_usuario, correo_electronico, contrasena, rol_id)
         
-        return jsonify(result), 201 if result['success'] else 400
+        return jsonify(result), 201 if result['success'] else result.get('status', 400)
         
     except Exception as e:
         return jsonify({
@@ -120,14 +181,15 @@ def register():
 def check_session():
     """Verificar si hay una sesión activa"""
     try:
-        if session.get('logged_in'):
+        actual = identidad()
+        if actual:
             return jsonify({
                 'success': True,
                 'logged_in': True,
                 'user': {
-                    'id': session.get('user_id'),
-                    'username': session.get('username'),
-                    'rol_id': session.get('rol_id')
+                    'id': actual['user_id'],
+                    'username': actual['username'],
+                    'rol_id': actual['rol_id']
                 }
             }), 200
         else:
@@ -143,16 +205,21 @@ def check_session():
         
 @usuario_bp.route('/api/users', methods=['GET'])
 def get_users():
-    """Obtener lista de usuarios con filtros opcionales
+    """Obtener lista paginada de usuarios con filtros opcionales
     
     Query params:
     - search: término de búsqueda (nombre o email)
     - rol_id: filtrar por rol
     - activo: filtrar por estado (true/false)
+    - limit: tamaño de página (por defecto 50, máximo 200)
+    - cursor: valor de next_cursor de la página anterior
+    - total: si es true incluye approx_total (solo sin filtros)
+    - include (o expand): 'rol' añade a cada usuario su rol {id, nombre, descripcion},
+      resuelto con un JOIN en la misma consulta
     """
     try:
         # Verificar si hay sesión activa
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
@@ -168,13 +235,29 @@ def get_users():
         if activo_param is not None:
             activo = activo_param.lower() in ['true', '1', 'yes']
         
-        # Si hay filtros, usar búsqueda; si no, obtener todos
-        if search_term or rol_id or activo is not None:
-            result = usuario_service.search_users(search_term, rol_id, activo)
-        else:
-            result = usuario_service.get_all_users()
-            
-        return jsonify(result), 200 if result['success'] else 500
+        try:
+            include_rol = _include_rol()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        # La URL completa (filtros, cursor, límite, include) distingue cada página
+        etag, last_modified = validadores(usuario_service.version_listado(include_rol), request.full_path)
+
+        def construir():
+            result = usuario_service.get_users_page(
+                search_term, rol_id, activo,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('total', '').lower() in ['true', '1', 'yes'],
+                include_rol=include_rol,
+                serializar=False
+            )
+            return usuario_service.listado_json(result), 200 if result['success'] else result.get('status', 500)
+
+        return respuesta_condicional(etag, last_modified, construir)
         
     except Exception as e:
         return jsonify({
@@ -190,9 +273,12 @@ def search_users():
     - q o query: término de búsqueda
     - rol_id: filtrar por rol
     - activo: filtrar por estado
+    - limit: tamaño de página (por defecto 50, máximo 200)
+    - cursor: valor de next_cursor de la página anterior
+    - include (o expand): 'rol', como en /api/users
     """
     try:
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
@@ -206,27 +292,136 @@ def search_users():
         if activo_param is not None:
             activo = activo_param.lower() in ['true', '1', 'yes']
         
-        result = usuario_service.search_users(search_term, rol_id, activo)
-        return jsonify(result), 200 if result['success'] else 500
+        try:
+            include_rol = _include_rol()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        etag, last_modified = validadores(usuario_service.version_listado(include_rol), request.full_path)
+
+        def construir():
+            result = usuario_service.get_users_page(
+                search_term, rol_id, activo,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                include_rol=include_rol,
+                serializar=False
+            )
+            return usuario_service.listado_json(result), 200 if result['success'] else result.get('status', 500)
+
+        return respuesta_condicional(etag, last_modified, construir)
         
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error en la búsqueda: {str(e)}'
         }), 500
+
+@usuario_bp.route('/api/users/import', methods=['POST'])
+def import_users():
+    """Importar usuarios en bloque (solo administradores)
+
+    Acepta un archivo multipart `file` (.csv o .json), un cuerpo JSON
+    (lista o {"users": [...]}) o un cuerpo text/csv.
+    """
+    try:
+        if not identidad():
+            return jsonify({
+                'success': False,
+                'message': 'Acceso denegado'
+            }), 401
+
+        if identidad()['rol_id'] != 1:
+            return jsonify({
+                'success': False,
+                'message': 'Solo administradores pueden importar usuarios'
+            }), 403
+
+        archivo = request.files.get('file')
+        try:
+            if archivo:
+                formato = 'csv' if archivo.filename.lower().endswith('.csv') else 'json'
+                filas = usuario_service.parse_import(archivo.read().decode('utf-8-sig'), formato)
+            elif request.mimetype == 'text/csv':
+                filas = usuario_service.parse_import(request.get_data(as_text=True), 'csv')
+            else:
+                filas = usuario_service.parse_import(request.get_data(as_text=True), 'json')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Archivo inválido: {str(e)}'
+            }), 400
+
+        result = usuario_service.import_users(filas)
+        return jsonify(result), 200 if result['success'] else result.get('status', 500)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al importar usuarios: {str(e)}'
+        }), 500
+
+@usuario_bp.route('/api/users/export', methods=['GET'])
+def export_users():
+    """Exportar usuarios en streaming (NDJSON o CSV)
+
+    Query params:
+    - format: ndjson (por defecto) o csv
+    - search, rol_id, activo: mismos filtros que /api/users
+    """
+    if not identidad():
+        return jsonify({
+            'success': False,
+            'message': 'Acceso denegado'
+        }), 401
+
+    formato = (request.args.get('format') or 'ndjson').lower()
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({
+            'success': False,
+            'message': 'Formato no soportado (usa ndjson o csv)'
+        }), 400
+
+    search_term = request.args.get('search') or request.args.get('q')
+    rol_id = request.args.get('rol_id', type=int)
+    activo_param = request.args.get('activo')
+
+    activo = None
+    if activo_param is not None:
+        activo = activo_param.lower() in ['true', '1', 'yes']
+
+    chunks = usuario_service.export_users(formato, search_term, rol_id, activo)
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename=usuarios.{formato}',
+            'X-Accel-Buffering': 'no'  # que un proxy nginx no acumule la respuesta
+        }
+    )
+
         # http://127.0.0.1:5000/api/users/5
 @usuario_bp.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Obtener un usuario específico por ID"""
     try:
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
             }), 401
         
-        result = usuario_service.get_user_by_id(user_id)
-        return jsonify(result), 200 if result['success'] else 404
+        etag, last_modified = validadores(usuario_service.version_usuario(user_id), user_id)
+
+        def construir():
+            result = usuario_service.get_user_by_id(user_id)
+            return result, 200 if result['success'] else 404
+
+        return respuesta_condicional(etag, last_modified, construir)
         
     except Exception as e:
         return jsonify({
@@ -239,7 +434,7 @@ def update_user(user_id):
     """Actualizar datos de usuario"""
     try:
         # Verificar sesión
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
@@ -254,7 +449,7 @@ def update_user(user_id):
             }), 400
             
         result = usuario_service.update_user(user_id, data)
-        return jsonify(result), 200 if result['success'] else 400
+        return jsonify(result), 200 if result['success'] else result.get('status', 400)
         
     except Exception as e:
         return jsonify({
@@ -267,14 +462,14 @@ def delete_user(user_id):
     """Eliminar usuario"""
     try:
         # Verificar sesión
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
             }), 401
         
         # Prevenir que un usuario se elimine a sí mismo
-        if session.get('user_id') == user_id:
+        if identidad()['user_id'] == user_id:
             return jsonify({
                 'success': False,
                 'message': 'No puedes eliminar tu propia cuenta'
@@ -293,14 +488,14 @@ def delete_user(user_id):
 def toggle_user_active(user_id):
     """Activar o desactivar un usuario"""
     try:
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
             }), 401
         
         # Prevenir que un usuario se desactive a sí mismo
-        if session.get('user_id') == user_id:
+        if identidad()['user_id'] == user_id:
             return jsonify({
                 'success': False,
                 'message': 'No puedes desactivar tu propia cuenta'
@@ -319,14 +514,14 @@ def toggle_user_active(user_id):
 def unlock_user(user_id):
     """Desbloquear un usuario manualmente"""
     try:
-        if not session.get('logged_in'):
+        if not identidad():
             return jsonify({
                 'success': False,
                 'message': 'Acceso denegado'
             }), 401
         
         # Solo administradores pueden desbloquear
-        if session.get('rol_id') != 1:
+        if identidad()['rol_id'] != 1:
             return jsonify({
                 'success': False,
                 'message': 'Solo administradores pueden desbloquear usuarios'
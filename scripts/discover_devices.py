@@ -0,0 +1,59 @@
+# scripts/discover_devices.py
+"""Barre una red y da de alta los destinos que respondan.
+
+El mismo camino que POST /api/dispositivos/descubrir, sin los límites de
+sondas y de duración de la API (el barrido de una /16 a 500 sondas/s dura más
+que una petición).
+ICMP necesita net.ipv4.ping_group_range o CAP_NET_RAW.
+
+Uso:
+    python -m scripts.discover_devices 192.168.1.0/24
+    python -m scripts.discover_devices 10.0.0.0/16 --puertos 22 443 --icmp --tasa 2000
+    python -m scripts.discover_devices 10.0.0.0/24 --puertos 80 --intervalo 300 --inactivos
+"""
+import argparse
+import sys
+
+from services.dispositivo_service import DispositivoService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('red', help='red en notación CIDR')
+    parser.add_argument('--puertos', type=int, nargs='*', default=None,
+                        help='puertos TCP (por defecto 22 80 443; vacío con --icmp para solo ICMP)')
+    parser.add_argument('--icmp', action='store_true', help='enviar también un echo ICMP a cada host')
+    parser.add_argument('--tasa', type=float, default=None, help='sondas por segundo (por defecto 500)')
+    parser.add_argument('--timeout', type=float, default=None, help='segundos por sonda (por defecto 1)')
+    parser.add_argument('--intervalo', type=int, default=60, help='intervalo_s de los dispositivos nuevos')
+    parser.add_argument('--inactivos', action='store_true', help='dar de alta los nuevos como inactivos')
+    parser.add_argument('--show', type=int, default=50, help='respuestas a mostrar')
+    args = parser.parse_args()
+
+    service = DispositivoService()
+    service.MAX_SONDAS_DESCUBRIMIENTO = float('inf')
+    service.MAX_DURACION_DESCUBRIMIENTO = float('inf')
+    data = {'red': args.red, 'icmp': args.icmp, 'tasa': args.tasa, 'timeout': args.timeout,
+            'intervalo_s': args.intervalo, 'activo': not args.inactivos}
+    if args.puertos is not None:
+        data['puertos'] = args.puertos
+
+    result = service.discover_devices(data)
+    if not result['success']:
+        print(result['message'])
+        return 1
+
+    print(f"{result['red']}: {result['hosts']} hosts, {result['sondas']} sondas en {result['segundos']} s "
+          f"({result['hosts_por_segundo']} hosts/s, {result['sondas_por_segundo']} sondas/s)")
+    print(result['message'])
+    for respuesta in result['respuestas'][:args.show]:
+        destino = respuesta['host'] if respuesta['metodo'] == 'icmp' else f"{respuesta['host']}:{respuesta['puerto']}"
+        estado = 'nuevo' if respuesta['nuevo'] else 'ya existía'
+        print(f"  {respuesta['metodo']:<5} {destino:<40} {respuesta['latencia_ms']:>9.3f} ms  {estado}")
+    if len(result['respuestas']) > args.show:
+        print(f"  ... y {len(result['respuestas']) - args.show} respuestas más")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
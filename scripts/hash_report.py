@@ -0,0 +1,73 @@
+# scripts/hash_report.py
+"""Informe offline de los hashes de contraseña de la tabla users.
+
+Muestra cuántos usuarios tienen hash legacy SHA-256 y cuántos bcrypt de
+cada coste, y mide cuánto tarda bcrypt en esta máquina para cada coste,
+recomendando el mayor que cabe en el presupuesto de CPU por login.
+
+Uso:
+    python -m scripts.hash_report                  # informe + calibración
+    python -m scripts.hash_report --budget-ms 250  # presupuesto por login
+    python -m scripts.hash_report --no-db          # solo calibración
+"""
+import argparse
+import time
+
+import bcrypt
+
+from models.usuario import Usuario
+
+
+def distribucion():
+    from repositories.usuario_repository import UsuarioRepository
+
+    filas = UsuarioRepository().hash_distribution()
+    total = sum(count for _, count in filas) or 1
+    print("Distribución de hashes en users:")
+    for tipo, count in filas:
+        if tipo.startswith('$2'):
+            etiqueta = f"bcrypt coste {int(tipo[4:6])}"
+            if int(tipo[4:6]) != Usuario.BCRYPT_ROUNDS:
+                etiqueta += " (se re-hashea al iniciar sesión)"
+        elif tipo == 'sha256':
+            etiqueta = "SHA-256 legacy (se re-hashea al iniciar sesión)"
+        else:
+            etiqueta = tipo
+        print(f"  {etiqueta:<50} {count:>8}  {count * 100 / total:5.1f}%")
+
+
+def calibrar(budget_ms, muestras):
+    print(f"\nCalibración de bcrypt (presupuesto por login: {budget_ms:.0f} ms):")
+    recomendado = None
+    for rounds in range(8, 16):
+        salt = bcrypt.gensalt(rounds=rounds)
+        inicio = time.perf_counter()
+        for _ in range(muestras):
+            bcrypt.hashpw(b'calibracion', salt)
+        ms = (time.perf_counter() - inicio) * 1000 / muestras
+        marca = " <- actual" if rounds == Usuario.BCRYPT_ROUNDS else ""
+        print(f"  coste {rounds:>2}: {ms:8.1f} ms{marca}")
+        if ms <= budget_ms:
+            recomendado = rounds
+        else:
+            break
+    if recomendado is None:
+        print("Ningún coste cabe en el presupuesto; usa al menos 10.")
+    else:
+        print(f"Coste recomendado: {recomendado} (Usuario.BCRYPT_ROUNDS = {Usuario.BCRYPT_ROUNDS})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=250.0)
+    parser.add_argument('--samples', type=int, default=3)
+    parser.add_argument('--no-db', action='store_true', help='no consultar la base de datos')
+    args = parser.parse_args()
+
+    if not args.no_db:
+        distribucion()
+    calibrar(args.budget_ms, args.samples)
+
+
+if __name__ == '__main__':
+    main()
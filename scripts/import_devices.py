@@ -0,0 +1,49 @@
+# scripts/import_devices.py
+"""Importa dispositivos desde un archivo CSV o JSON directamente a la BD.
+
+Usa las mismas validaciones y el mismo camino que POST /api/dispositivos/import.
+
+Uso:
+    python -m scripts.import_devices dispositivos.csv
+    python -m scripts.import_devices dispositivos.json --show-errors 50
+"""
+import argparse
+import sys
+
+from services.dispositivo_service import DispositivoService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivo', help='archivo .csv o .json')
+    parser.add_argument('--show-errors', type=int, default=20, help='errores por fila a mostrar')
+    args = parser.parse_args()
+
+    formato = 'csv' if args.archivo.lower().endswith('.csv') else 'json'
+    with open(args.archivo, encoding='utf-8-sig') as f:
+        contenido = f.read()
+
+    service = DispositivoService()
+    # Sin límite de filas: el límite existe para proteger la API, no la CLI
+    service.MAX_IMPORT_ROWS = float('inf')
+    try:
+        filas = service.parse_import(contenido, formato)
+    except ValueError as e:
+        print(f"Archivo inválido: {e}")
+        return 1
+
+    result = service.import_devices(filas)
+    if not result['success']:
+        print(result['message'])
+        return 1
+
+    print(f"{result['message']} en {result['segundos']} s ({result['filas_por_segundo']} filas/s)")
+    for error in result['errores'][:args.show_errors]:
+        print(f"  fila {error['fila']}: {error['message']}")
+    if len(result['errores']) > args.show_errors:
+        print(f"  ... y {len(result['errores']) - args.show_errors} errores más")
+    return 0 if not result['errores'] else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# scripts/monitor.py
+"""Monitor de dispositivos: comprueba la tabla `devices` y guarda su estado.
+
+Un solo proceso por despliegue (junto a Gunicorn o Hypercorn): un bucle
+asyncio comprueba cada dispositivo activo cada `intervalo_s` segundos con
+TCP connect o ICMP echo y escribe el estado por lotes. Las altas, bajas y
+ediciones hechas desde /api/dispositivos se recogen solas en unos segundos.
+ICMP necesita net.ipv4.ping_group_range o CAP_NET_RAW.
+
+Uso:
+    python -m scripts.monitor
+    python -m scripts.monitor --concurrencia 512 --timeout 1.5
+"""
+import argparse
+import asyncio
+import signal
+import sys
+
+from config import logs
+from services.monitor_service import Monitor
+
+
+async def ejecutar(monitor: Monitor):
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(senal, monitor.detener)
+    await monitor.ejecutar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrencia', type=int, default=256, help='comprobaciones en vuelo como máximo')
+    parser.add_argument('--timeout', type=float, default=2.0, help='segundos por comprobación')
+    parser.add_argument('--jitter', type=float, default=0.1, help='variación de cada intervalo (fracción)')
+    parser.add_argument('--volcado', type=float, default=Monitor.INTERVALO_VOLCADO,
+                        help='segundos entre escrituras del estado')
+    args = parser.parse_args()
+
+    logs.configurar_logging()
+    monitor = Monitor(max_concurrentes=args.concurrencia, timeout=args.timeout, jitter=args.jitter)
+    monitor.INTERVALO_VOLCADO = args.volcado
+    asyncio.run(ejecutar(monitor))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# scripts/user_stats.py
+"""Recalcula desde users los agregados de /api/stats (migrations/006_user_stats.sql).
+
+Los triggers de users los mantienen con cada escritura, también las hechas a
+mano; esto solo hace falta si se desviaron: escrituras mientras se aplicaba la
+migración, o una restauración que no dispara triggers. La recarga agrupa toda
+la tabla en una transacción: mejor con poco tráfico.
+
+Uso:
+    python -m scripts.user_stats            # resumen, recálculo y diferencias
+    python -m scripts.user_stats --dry-run  # solo el resumen actual
+"""
+import argparse
+
+
+def aplanar(stats):
+    """{'usuarios.total': n, 'roles.Usuario.activos': n, ...} para comparar resúmenes."""
+    valores = {f'usuarios.{clave}': valor for clave, valor in stats['usuarios'].items()}
+    valores.update({f'accesos.{clave}': valor for clave, valor in stats['accesos'].items()})
+    for rol in stats['roles']:
+        nombre = rol['nombre'] or (f"rol {rol['rol_id']}" if rol['rol_id'] else 'sin rol')
+        valores[f'roles.{nombre}.total'] = rol['total']
+        valores[f'roles.{nombre}.activos'] = rol['activos']
+    return valores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='no recalcular, solo mostrar el resumen')
+    args = parser.parse_args()
+
+    from services.estadisticas_service import EstadisticasService
+
+    service = EstadisticasService()
+    antes = aplanar(service._calcular())
+    if args.dry_run:
+        for clave, valor in sorted(antes.items()):
+            print(f"  {clave:<40} {valor:>10}")
+        return
+
+    service.repository.recalcular()
+    despues = aplanar(service._calcular())
+    diferencias = sorted(clave for clave in antes.keys() | despues.keys()
+                         if antes.get(clave, 0) != despues.get(clave, 0))
+    if not diferencias:
+        print("Agregados al día: sin diferencias con users.")
+    for clave in diferencias:
+        print(f"  {clave:<40} {antes.get(clave, 0):>10} -> {despues.get(clave, 0)}")
+
+
+if __name__ == '__main__':
+    main()
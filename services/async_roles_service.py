@@ -0,0 +1,66 @@
+from repositories.async_roles_repository import AsyncRolesRepository
+from services.roles_service import RolesService, roles_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncRolesService(RolesService):
+    """
+    Lecturas de roles para el modo asyncio. Comparte la caché de roles (y su
+    generación entre workers) con RolesService.
+    """
+
+    def __init__(self):
+        self.repository = AsyncRolesRepository()
+
+    async def obtener_todos(self):
+        """Retorna todos los roles, desde la caché si está vigente (ver RolesService.obtener_todos)."""
+        try:
+            cached = roles_cache.get("all")
+            if cached is None:
+                # Generación leída antes de consultar, como en get_or_load
+                token = roles_cache.generation.current()
+                roles = await self.repository.get_all()
+                cached = self._empaquetar(roles)
+                # Una lista vacía puede venir de un error de consulta: no se cachea
+                if roles:
+                    roles_cache.set("all", cached, token)
+            roles, etag, cargado = cached
+            return {
+                "success": True,
+                "data": roles,
+                "message": "Roles obtenidos exitosamente",
+                "etag": etag,
+                "last_modified": cargado
+            }
+        except Exception:
+            logger.exception("Error al obtener roles")
+            return {
+                "success": False,
+                "data": [],
+                "message": "Error interno del servidor al acceder a la lista de roles.",
+                "status": 500
+            }
+
+    async def obtener_por_id(self, role_id):
+        """Retorna un rol por su ID, o un error si no existe."""
+        try:
+            role = await self.repository.get_by_id(role_id)
+            if role:
+                return {
+                    "success": True,
+                    "data": role,
+                    "message": f"Rol {role_id} obtenido"
+                }
+            return {
+                "success": False,
+                "message": f"Rol {role_id} no encontrado",
+                "status": 404
+            }
+        except Exception:
+            logger.exception("Error al obtener rol por ID", extra={"role_id": role_id})
+            return {
+                "success": False,
+                "message": "Error interno del servidor al acceder al rol.",
+                "status": 500
+            }
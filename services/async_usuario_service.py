@@ -0,0 +1,246 @@
+# services/async_usuario_service.py
+from repositories.async_usuario_repository import AsyncUsuarioRepository
+from models.usuario import Usuario
+from services.password_service import HasherSaturadoError
+from services.token_service import TokenInvalidoError
+from services.usuario_service import UsuarioService
+from datetime import datetime, timedelta
+
+
+class AsyncUsuarioService(UsuarioService):
+    """Versión asyncio de UsuarioService para las rutas de asgi.py.
+
+    Mismas reglas de negocio, validaciones y mensajes (se heredan); las
+    consultas se esperan con await y bcrypt corre en el mismo pool acotado
+    de PasswordService sin bloquear el bucle de eventos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.usuario_repository = AsyncUsuarioRepository()
+
+    async def authenticate_user(self, username_or_email, password):
+        """Autenticar usuario con credenciales (ver UsuarioService.authenticate_user)."""
+        try:
+            usuario = await self.usuario_repository.find_by_username_or_email(username_or_email)
+            ahora = datetime.utcnow()
+            rechazo = self._rechazo_login(usuario, ahora)
+            if rechazo:
+                return rechazo
+
+            if await self.password_service.verificar_async(usuario, password):
+                nuevo_hash = await self._rehash_si_necesario(usuario, password)
+                await self.usuario_repository.registrar_login_exitoso(usuario.id, ahora, nuevo_hash)
+                return self._login_exitoso(usuario, ahora)
+
+            bloqueo_hasta = ahora + timedelta(minutes=self.TIEMPO_BLOQUEO_MINUTOS)
+            intentos = await self.usuario_repository.registrar_login_fallido(
+                usuario.id, self.MAX_INTENTOS_FALLIDOS, bloqueo_hasta, ahora
+            )
+            return self._login_fallido(intentos)
+
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'user': None, 'status': 503}
+        except Exception as e:
+            return {'success': False, 'message': f'Error en la autenticación: {str(e)}', 'user': None}
+
+    async def _rehash_si_necesario(self, usuario, password):
+        if not usuario.needs_rehash():
+            return None
+        try:
+            return await self.password_service.hashear_async(password)
+        except HasherSaturadoError:
+            return None
+
+    async def get_user_by_id(self, user_id):
+        """Obtener usuario por ID"""
+        try:
+            usuario = await self.usuario_repository.find_by_id(user_id)
+            if usuario:
+                return {'success': True, 'user': usuario.to_dict()}
+            return {'success': False, 'message': 'Usuario no encontrado'}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al obtener usuario: {str(e)}'}
+
+    async def refresh_tokens(self, refresh_token: str):
+        """Canjear un token de refresco por un par nuevo (ver UsuarioService.refresh_tokens)."""
+        try:
+            claims = self.token_service.verificar_refresco(refresh_token)
+            usuario = await self.usuario_repository.find_by_id(claims['sub'])
+            return await self._rotar_tokens(claims, usuario)
+        except TokenInvalidoError as e:
+            return {'success': False, 'message': str(e), 'status': 401}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al refrescar la sesión: {str(e)}'}
+
+    async def _rotar_tokens(self, claims, usuario):
+        """Revoca el token de refresco usado y emite un par nuevo si el usuario sigue habilitado."""
+        rechazo = self._rechazo_refresco(usuario)
+        if rechazo:
+            return rechazo
+        if not await self.usuario_repository.consumir_refresco(usuario.id, claims['iat']):
+            return {'success': False, 'message': 'Token revocado', 'status': 401}
+        return {'success': True, 'tokens': self.token_service.emitir(usuario.to_dict())}
+
+    async def cerrar_refresco(self, refresh_token: str):
+        """Logout: revoca un token de refresco (ver UsuarioService.cerrar_refresco)."""
+        claims = self.token_service.verificar_refresco(refresh_token)
+        await self.usuario_repository.consumir_refresco(claims['sub'], claims['iat'])
+
+    async def create_user(self, nombre, email, plain_password, rol_id: int = None):
+        """Crear nuevo usuario. Hashea la contraseña y genera uuid."""
+        try:
+            validacion = self._validar_datos_usuario(nombre, email, plain_password)
+            if not validacion['valid']:
+                return {'success': False, 'message': validacion['message']}
+
+            if await self.usuario_repository.find_by_username_or_email(nombre):
+                return {'success': False, 'message': 'El nombre de usuario ya existe'}
+            if await self.usuario_repository.find_by_username_or_email(email):
+                return {'success': False, 'message': 'El email ya está registrado'}
+
+            if rol_id is None:
+                rol_id = 2
+
+            password_hash = await self.password_service.hashear_async(plain_password)
+            nuevo_usuario = Usuario.new_from_hash(nombre, email, password_hash, rol_id)
+            user_id = await self.usuario_repository.create_user(nuevo_usuario)
+
+            return {'success': True, 'message': 'Usuario creado exitosamente', 'user_id': user_id}
+
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'status': 503}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al crear usuario: {str(e)}'}
+
+    async def update_user(self, user_id: int, data: dict):
+        """Actualizar datos de usuario"""
+        try:
+            user = await self.usuario_repository.find_by_id(user_id)
+            if not user:
+                return {'success': False, 'message': 'Usuario no encontrado'}
+
+            update_data = {}
+
+            if 'password' in data and data['password']:
+                validacion = self._validar_contrasena(data['password'])
+                if not validacion['valid']:
+                    return {'success': False, 'message': validacion['message']}
+                update_data['password_hash'] = await self.password_service.hashear_async(data['password'])
+
+            if 'nombre' in data and data['nombre'] != user.nombre:
+                validacion = self._validar_nombre(data['nombre'])
+                if not validacion['valid']:
+                    return {'success': False, 'message': validacion['message']}
+                existing = await self.usuario_repository.find_by_username_or_email(data['nombre'])
+                if existing and existing.id != user_id:
+                    return {'success': False, 'message': 'El nombre de usuario ya existe'}
+                update_data['nombre'] = data['nombre']
+
+            if 'email' in data and data['email'] != user.email:
+                validacion = self._validar_email(data['email'])
+                if not validacion['valid']:
+                    return {'success': False, 'message': validacion['message']}
+                existing = await self.usuario_repository.find_by_username_or_email(data['email'])
+                if existing and existing.id != user_id:
+                    return {'success': False, 'message': 'El email ya está registrado'}
+                update_data['email'] = data['email']
+
+            if 'rol_id' in data:
+                update_data['rol_id'] = int(data['rol_id'])
+
+            if 'activo' in data:
+                update_data['activo'] = 1 if data['activo'] else 0
+
+            if not update_data:
+                return {'success': False, 'message': 'No hay datos para actualizar'}
+
+            if await self.usuario_repository.update_user(user_id, update_data):
+                if {'rol_id', 'activo', 'password_hash'} & update_data.keys():
+                    # Los tokens de acceso llevan rol y estado: que no sigan valiendo
+                    self.token_service.revocar_usuario(user_id)
+                return {'success': True, 'message': 'Usuario actualizado correctamente'}
+            return {'success': False, 'message': 'No se pudo actualizar el usuario'}
+
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'status': 503}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al actualizar usuario: {str(e)}'}
+
+    async def delete_user(self, user_id: int):
+        """Eliminar usuario por ID"""
+        try:
+            user = await self.usuario_repository.find_by_id(user_id)
+            if not user:
+                return {'success': False, 'message': 'Usuario no encontrado'}
+
+            # Prevenir eliminar el último administrador
+            if user.rol_id == 1:
+                admins = await self.usuario_repository.search_users(rol_id=1)
+                if len(admins) <= 1:
+                    return {
+                        'success': False,
+                        'message': 'No se puede eliminar el último administrador del sistema'
+                    }
+
+            if await self.usuario_repository.delete_user(user_id):
+                self.token_service.revocar_usuario(user_id)
+                return {'success': True, 'message': 'Usuario eliminado correctamente'}
+            return {'success': False, 'message': 'No se pudo eliminar el usuario'}
+
+        except Exception as e:
+            return {'success': False, 'message': f'Error al eliminar usuario: {str(e)}'}
+
+    async def get_users_page(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                             limit: int = None, cursor: str = None, include_total: bool = False,
+                             include_rol: bool = False, serializar: bool = True):
+        """Obtener una página de usuarios (ver UsuarioService.get_users_page)"""
+        try:
+            limit = self.PAGE_SIZE if limit is None else max(1, min(limit, self.MAX_PAGE_SIZE))
+            users, next_cursor = await self.usuario_repository.get_users_page(
+                search_term, rol_id, activo, limit, cursor, include_rol
+            )
+            result = {
+                'success': True,
+                'users': [user.to_dict() for user in users] if serializar else users,
+                'count': len(users),
+                'next_cursor': next_cursor
+            }
+            if include_total:
+                filtrado = search_term or rol_id is not None or activo is not None
+                result['approx_total'] = None if filtrado else await self.usuario_repository.approx_count()
+            return result
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'status': 400}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al obtener usuarios: {str(e)}'}
+
+    async def toggle_user_status(self, user_id: int):
+        """Activar o desactivar un usuario"""
+        try:
+            if not await self.usuario_repository.find_by_id(user_id):
+                return {'success': False, 'message': 'Usuario no encontrado'}
+
+            nuevo_estado = await self.usuario_repository.toggle_activo(user_id)
+            if nuevo_estado is None:
+                return {'success': False, 'message': 'No se pudo cambiar el estado del usuario'}
+            if not nuevo_estado:
+                self.token_service.revocar_usuario(user_id)
+            estado_texto = 'activado' if nuevo_estado else 'desactivado'
+            return {
+                'success': True,
+                'message': f'Usuario {estado_texto} correctamente',
+                'activo': nuevo_estado
+            }
+        except Exception as e:
+            return {'success': False, 'message': f'Error al cambiar estado: {str(e)}'}
+
+    async def unlock_user(self, user_id: int):
+        """Desbloquear un usuario manualmente"""
+        try:
+            if not await self.usuario_repository.find_by_id(user_id):
+                return {'success': False, 'message': 'Usuario no encontrado'}
+            await self.usuario_repository.desbloquear_usuario(user_id)
+            return {'success': True, 'message': 'Usuario desbloqueado correctamente'}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al desbloquear usuario: {str(e)}'}
@@ -0,0 +1,414 @@
+# services/dispositivo_service.py
+from repositories.dispositivo_repository import DispositivoRepository
+from models.dispositivo import Dispositivo
+from services.sondeo_service import comprobar_uno, descubrir, SondeoNoDisponibleError
+import asyncio
+import csv
+import io
+import ipaddress
+import json
+import re
+import time
+
+# Nombre DNS: etiquetas de 1-63 caracteres alfanuméricos o guiones, sin guion en los extremos
+_HOSTNAME = re.compile(r'^(?=.{1,253}\.?$)(?!-)[A-Za-z0-9-]{1,63}(?<!-)(\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*\.?$')
+
+
+class DispositivoService:
+    def __init__(self):
+        self.repository = DispositivoRepository()
+        self.PAGE_SIZE = 50
+        self.MAX_PAGE_SIZE = 500
+        self.MIN_INTERVALO = 10
+        self.MAX_INTERVALO = 86400
+        # Timeout de la comprobación a demanda (POST /api/dispositivos/<id>/comprobar)
+        self.TIMEOUT_COMPROBACION = 2.0
+        self.MAX_IMPORT_ROWS = 10000
+        # Descubrimiento (POST /api/dispositivos/descubrir). La petición espera
+        # al barrido: sondas (hosts x destinos) / tasa es su duración, acotada
+        # por MAX_DURACION_DESCUBRIMIENTO para no retener el hilo del worker.
+        self.PUERTOS_DESCUBRIMIENTO = [22, 80, 443]
+        self.MAX_PUERTOS_DESCUBRIMIENTO = 32
+        self.MAX_SONDAS_DESCUBRIMIENTO = 8192
+        self.TASA_DESCUBRIMIENTO = 500        # sondas por segundo
+        self.MAX_TASA_DESCUBRIMIENTO = 5000
+        self.MAX_DURACION_DESCUBRIMIENTO = 60   # segundos
+        self.TIMEOUT_DESCUBRIMIENTO = 1.0
+        self.MAX_TIMEOUT_DESCUBRIMIENTO = 10.0
+        self.CONCURRENCIA_DESCUBRIMIENTO = 256
+
+    def get_devices_page(self, search_term: str = None, estado: str = None, activo: bool = None,
+                         limit: int = None, cursor: str = None):
+        """Obtener una página de dispositivos (paginación por cursor)"""
+        try:
+            if estado is not None and estado not in Dispositivo.ESTADOS:
+                return {'success': False, 'message': f'Estado inválido: {estado}', 'status': 400}
+            limit = self.PAGE_SIZE if limit is None else max(1, min(limit, self.MAX_PAGE_SIZE))
+            dispositivos, next_cursor = self.repository.get_page(search_term, estado, activo, limit, cursor)
+            return {
+                'success': True,
+                'dispositivos': [d.to_dict() for d in dispositivos],
+                'count': len(dispositivos),
+                'next_cursor': next_cursor
+            }
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'status': 400}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al obtener dispositivos: {str(e)}'}
+
+    def get_device_by_id(self, dispositivo_id: int):
+        """Obtener dispositivo por ID"""
+        try:
+            dispositivo = self.repository.find_by_id(dispositivo_id)
+            if dispositivo:
+                return {'success': True, 'dispositivo': dispositivo.to_dict()}
+            return {'success': False, 'message': 'Dispositivo no encontrado', 'status': 404}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al obtener dispositivo: {str(e)}'}
+
+    def create_device(self, data: dict):
+        """Crear dispositivo. El monitor lo empieza a comprobar al recargar el inventario."""
+        try:
+            validacion = self._validar_dispositivo(data)
+            if not validacion['valid']:
+                return {'success': False, 'message': validacion['message'], 'status': 400}
+            datos = validacion['datos']
+
+            if self.repository.find_by_destino(datos['host'], datos['metodo'], datos['puerto']):
+                return {'success': False, 'message': 'Ya existe un dispositivo con ese destino', 'status': 409}
+
+            dispositivo_id = self.repository.create(Dispositivo.nuevo(**datos))
+            return {'success': True, 'message': 'Dispositivo creado exitosamente', 'dispositivo_id': dispositivo_id}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al crear dispositivo: {str(e)}'}
+
+    def update_device(self, dispositivo_id: int, data: dict):
+        """Actualizar datos de un dispositivo (los campos ausentes conservan su valor)"""
+        try:
+            actual = self.repository.find_by_id(dispositivo_id)
+            if not actual:
+                return {'success': False, 'message': 'Dispositivo no encontrado', 'status': 404}
+
+            validacion = self._validar_dispositivo(data, actual)
+            if not validacion['valid']:
+                return {'success': False, 'message': validacion['message'], 'status': 400}
+            datos = validacion['datos']
+
+            existente = self.repository.find_by_destino(datos['host'], datos['metodo'], datos['puerto'])
+            if existente and existente.id != dispositivo_id:
+                return {'success': False, 'message': 'Ya existe un dispositivo con ese destino', 'status': 409}
+
+            if self.repository.update(dispositivo_id, datos):
+                return {'success': True, 'message': 'Dispositivo actualizado correctamente'}
+            return {'success': False, 'message': 'No se pudo actualizar el dispositivo'}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al actualizar dispositivo: {str(e)}'}
+
+    def delete_device(self, dispositivo_id: int):
+        """Eliminar dispositivo por ID"""
+        try:
+            if self.repository.delete(dispositivo_id):
+                return {'success': True, 'message': 'Dispositivo eliminado correctamente'}
+            return {'success': False, 'message': 'Dispositivo no encontrado', 'status': 404}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al eliminar dispositivo: {str(e)}'}
+
+    def check_device(self, dispositivo_id: int):
+        """Comprobar un dispositivo ahora.
+
+        Devuelve el resultado sin guardarlo: el estado en la BD es del monitor,
+        que aplica la regla de fallos consecutivos.
+        """
+        try:
+            dispositivo = self.repository.find_by_id(dispositivo_id)
+            if not dispositivo:
+                return {'success': False, 'message': 'Dispositivo no encontrado', 'status': 404}
+            resultado = asyncio.run(comprobar_uno(dispositivo, self.TIMEOUT_COMPROBACION))
+            return {
+                'success': True,
+                'resultado': {
+                    'ok': resultado.ok,
+                    'latencia_ms': resultado.latencia_ms,
+                    'error': resultado.error,
+                }
+            }
+        except Exception as e:
+            return {'success': False, 'message': f'Error al comprobar dispositivo: {str(e)}'}
+
+    def import_devices(self, filas):
+        """Importar dispositivos en bloque.
+
+        Valida cada fila con las reglas de alta, detecta destinos repetidos
+        (dentro del archivo y contra la BD con consultas por conjuntos) e
+        inserta con executemany por bloques. Informa errores por fila
+        (numeradas desde 1) y el throughput."""
+        try:
+            inicio = time.perf_counter()
+            if len(filas) > self.MAX_IMPORT_ROWS:
+                return {
+                    'success': False,
+                    'message': f'Máximo {self.MAX_IMPORT_ROWS} dispositivos por importación',
+                    'status': 413
+                }
+
+            errores = []
+            candidatos = []
+            vistos = set()
+            for numero, fila in enumerate(filas, start=1):
+                if not isinstance(fila, dict):
+                    errores.append({'fila': numero, 'message': 'Formato de fila inválido'})
+                    continue
+                # Las celdas vacías del CSV toman el valor por defecto
+                validacion = self._validar_dispositivo(
+                    {campo: valor for campo, valor in fila.items() if valor not in (None, '')}
+                )
+                if not validacion['valid']:
+                    errores.append({'fila': numero, 'message': validacion['message']})
+                    continue
+                datos = validacion['datos']
+                destino = (datos['host'], datos['metodo'], datos['puerto'])
+                if destino in vistos:
+                    errores.append({'fila': numero, 'message': 'Destino repetido en el archivo'})
+                    continue
+                vistos.add(destino)
+                candidatos.append((numero, datos))
+
+            # Destinos ya dados de alta: una consulta por bloque, no una por fila
+            if candidatos:
+                existentes = self.repository.find_existing_destinos(vistos)
+                nuevos = []
+                for numero, datos in candidatos:
+                    if (datos['host'], datos['metodo'], datos['puerto']) in existentes:
+                        errores.append({'fila': numero, 'message': 'Ya existe un dispositivo con ese destino'})
+                    else:
+                        nuevos.append((numero, datos))
+                candidatos = nuevos
+
+            insertados = 0
+            if candidatos:
+                insertados, errores_bd = self.repository.bulk_create(
+                    [Dispositivo.nuevo(**datos) for _, datos in candidatos]
+                )
+                for posicion, error in errores_bd.items():
+                    errores.append({'fila': candidatos[posicion][0], 'message': f'Error al insertar: {error}'})
+
+            segundos = time.perf_counter() - inicio
+            errores.sort(key=lambda e: e['fila'])
+            return {
+                'success': True,
+                'message': f'{insertados} de {len(filas)} dispositivos importados',
+                'total': len(filas),
+                'insertados': insertados,
+                'errores': errores,
+                'segundos': round(segundos, 3),
+                'filas_por_segundo': round(len(filas) / segundos, 1) if segundos > 0 else None
+            }
+
+        except Exception as e:
+            return {'success': False, 'message': f'Error al importar dispositivos: {str(e)}'}
+
+    @staticmethod
+    def parse_import(contenido: str, formato: str):
+        """Convertir un archivo CSV o JSON en una lista de filas (dict).
+
+        CSV: cabecera con nombre, host, metodo, puerto, intervalo_s y activo
+        (las columnas ausentes o vacías toman el valor por defecto). JSON: una
+        lista de objetos o {"dispositivos": [...]}. Levanta ValueError si no se
+        puede leer."""
+        if formato == 'csv':
+            return list(csv.DictReader(io.StringIO(contenido)))
+        if formato == 'json':
+            datos = json.loads(contenido)
+            if isinstance(datos, dict):
+                datos = datos.get('dispositivos')
+            if not isinstance(datos, list):
+                raise ValueError('El JSON debe ser una lista de dispositivos o {"dispositivos": [...]}')
+            return datos
+        raise ValueError('Formato no soportado (usa csv o json)')
+
+    def discover_devices(self, data: dict):
+        """Sondear una red y dar de alta los destinos que respondan.
+
+        data: {red (CIDR), puertos, icmp, tasa (sondas/s), timeout (s) y el
+        intervalo_s y activo de las altas}. Los destinos que ya existían se
+        informan pero no se modifican; repetir el barrido no duplica nada.
+        """
+        try:
+            validacion = self._validar_descubrimiento(data)
+            if not validacion['valid']:
+                return {'success': False, 'message': validacion['message'], 'status': 400}
+            datos = validacion['datos']
+
+            try:
+                resultado = asyncio.run(descubrir(
+                    datos['red'], datos['puertos'], datos['icmp'], datos['tasa'], datos['timeout'],
+                    self.CONCURRENCIA_DESCUBRIMIENTO,
+                ))
+            except SondeoNoDisponibleError as e:
+                return {'success': False, 'message': str(e), 'status': 503}
+
+            respuestas = sorted(resultado.respuestas,
+                                key=lambda r: (ipaddress.ip_address(r.host), r.metodo, r.puerto))
+            existentes = self.repository.find_existing_destinos(
+                [(r.host, r.metodo, r.puerto) for r in respuestas]
+            )
+            nuevos = [r for r in respuestas if (r.host, r.metodo, r.puerto) not in existentes]
+            self.repository.upsert_descubiertos([
+                Dispositivo.nuevo(self._nombre_descubierto(r), r.host, r.metodo, r.puerto,
+                                  datos['intervalo_s'], datos['activo'])
+                for r in nuevos
+            ])
+
+            segundos = resultado.segundos
+            return {
+                'success': True,
+                'message': f'{len(respuestas)} destinos respondieron; {len(nuevos)} dispositivos nuevos',
+                'red': str(datos['red']),
+                'hosts': resultado.hosts,
+                'sondas': resultado.sondas,
+                'nuevos': len(nuevos),
+                'existentes': len(respuestas) - len(nuevos),
+                'respuestas': [{
+                    'host': r.host,
+                    'metodo': r.metodo,
+                    'puerto': r.puerto,
+                    'latencia_ms': r.latencia_ms,
+                    'nuevo': (r.host, r.metodo, r.puerto) not in existentes,
+                } for r in respuestas],
+                'segundos': round(segundos, 3),
+                'hosts_por_segundo': round(resultado.hosts / segundos, 1) if segundos > 0 else None,
+                'sondas_por_segundo': round(resultado.sondas / segundos, 1) if segundos > 0 else None
+            }
+        except Exception as e:
+            return {'success': False, 'message': f'Error al descubrir dispositivos: {str(e)}'}
+
+    @staticmethod
+    def _nombre_descubierto(respuesta):
+        """Nombre de un alta por descubrimiento: host (icmp) o host:puerto ([v6]:puerto)."""
+        if respuesta.metodo == 'icmp':
+            return respuesta.host
+        host = f'[{respuesta.host}]' if ':' in respuesta.host else respuesta.host
+        return f'{host}:{respuesta.puerto}'
+
+    def _validar_descubrimiento(self, data: dict):
+        """Validar los parámetros de un descubrimiento y aplicar los valores por defecto."""
+        if not isinstance(data, dict):
+            return {'valid': False, 'message': 'Datos inválidos'}
+        try:
+            red = ipaddress.ip_network(str(data.get('red') or '').strip(), strict=False)
+        except ValueError:
+            return {'valid': False, 'message': 'Red inválida: usa notación CIDR (p. ej. 192.168.1.0/24)'}
+
+        puertos = data.get('puertos', self.PUERTOS_DESCUBRIMIENTO)
+        if isinstance(puertos, str):
+            puertos = [p for p in re.split(r'[\s,]+', puertos) if p]
+        icmp = data.get('icmp', False)
+        if isinstance(icmp, str):
+            icmp = icmp.lower() in ['true', '1', 'yes']
+        try:
+            puertos = sorted({int(p) for p in puertos or []})
+            tasa = float(data.get('tasa') or self.TASA_DESCUBRIMIENTO)
+            timeout = float(data.get('timeout') or self.TIMEOUT_DESCUBRIMIENTO)
+        except (TypeError, ValueError):
+            return {'valid': False, 'message': 'Puertos, tasa y timeout deben ser números'}
+        if not puertos and not icmp:
+            return {'valid': False, 'message': 'Indica al menos un puerto TCP o icmp'}
+        if len(puertos) > self.MAX_PUERTOS_DESCUBRIMIENTO:
+            return {'valid': False, 'message': f'Máximo {self.MAX_PUERTOS_DESCUBRIMIENTO} puertos'}
+        if any(not 1 <= p <= 65535 for p in puertos):
+            return {'valid': False, 'message': 'Los puertos TCP deben estar entre 1 y 65535'}
+        if not 1 <= tasa <= self.MAX_TASA_DESCUBRIMIENTO:
+            return {'valid': False, 'message': f'La tasa debe estar entre 1 y {self.MAX_TASA_DESCUBRIMIENTO} sondas/s'}
+        if not 0 < timeout <= self.MAX_TIMEOUT_DESCUBRIMIENTO:
+            return {'valid': False,
+                    'message': f'El timeout debe estar entre 0 y {self.MAX_TIMEOUT_DESCUBRIMIENTO} segundos'}
+
+        hosts = red.num_addresses - 2 if red.num_addresses > 2 else red.num_addresses
+        sondas = hosts * (len(puertos) + bool(icmp))
+        if sondas > self.MAX_SONDAS_DESCUBRIMIENTO:
+            return {'valid': False,
+                    'message': f'Demasiadas sondas ({sondas}): máximo {self.MAX_SONDAS_DESCUBRIMIENTO} '
+                               f'(reduce la red o los puertos, o usa scripts/discover_devices.py)'}
+        # La última tanda de sondas puede esperar su timeout completo
+        duracion = sondas / tasa + timeout
+        if duracion > self.MAX_DURACION_DESCUBRIMIENTO:
+            return {'valid': False,
+                    'message': f'El barrido duraría unos {duracion:.0f} s ({sondas} sondas a {tasa:g}/s): '
+                               f'máximo {self.MAX_DURACION_DESCUBRIMIENTO} s (sube la tasa, reduce la red '
+                               f'o usa scripts/discover_devices.py)'}
+
+        # intervalo_s y activo de las altas, con las reglas de _validar_dispositivo
+        try:
+            intervalo_s = int(data.get('intervalo_s') or 60)
+        except (TypeError, ValueError):
+            return {'valid': False, 'message': 'El intervalo debe ser un número entero'}
+        if not self.MIN_INTERVALO <= intervalo_s <= self.MAX_INTERVALO:
+            return {'valid': False,
+                    'message': f'El intervalo debe estar entre {self.MIN_INTERVALO} y {self.MAX_INTERVALO} segundos'}
+        activo = data.get('activo', True)
+        if isinstance(activo, str):
+            activo = activo.lower() in ['true', '1', 'yes']
+        return {'valid': True, 'datos': {
+            'red': red, 'puertos': puertos, 'icmp': bool(icmp), 'tasa': tasa, 'timeout': timeout,
+            'intervalo_s': intervalo_s, 'activo': 1 if activo else 0,
+        }}
+
+    def _validar_dispositivo(self, data: dict, actual: Dispositivo = None):
+        """Validar un alta (o una edición sobre `actual`) y normalizar sus campos.
+
+        Returns:
+            dict: {'valid': True, 'datos': {...}} o {'valid': False, 'message': ...}
+        """
+        if not isinstance(data, dict):
+            return {'valid': False, 'message': 'Datos inválidos'}
+        base = actual.to_dict() if actual else {'metodo': 'tcp', 'puerto': 0, 'intervalo_s': 60, 'activo': 1}
+        valores = {campo: data.get(campo, base.get(campo)) for campo in DispositivoRepository.CAMPOS_EDITABLES}
+
+        nombre = (valores['nombre'] or '').strip() if isinstance(valores['nombre'], str) else ''
+        if not nombre:
+            return {'valid': False, 'message': 'El nombre es requerido'}
+        if len(nombre) > 100:
+            return {'valid': False, 'message': 'El nombre no puede exceder 100 caracteres'}
+
+        validacion = self._validar_host(valores['host'])
+        if not validacion['valid']:
+            return validacion
+        host = validacion['host']
+
+        metodo = str(valores['metodo'] or '').lower()
+        if metodo not in Dispositivo.METODOS:
+            return {'valid': False, 'message': f"Método inválido (disponibles: {', '.join(Dispositivo.METODOS)})"}
+
+        try:
+            puerto = int(valores['puerto'] or 0)
+            intervalo_s = int(valores['intervalo_s'])
+        except (TypeError, ValueError):
+            return {'valid': False, 'message': 'Puerto e intervalo deben ser números enteros'}
+        if metodo == 'icmp':
+            puerto = 0
+        elif not 1 <= puerto <= 65535:
+            return {'valid': False, 'message': 'El puerto TCP debe estar entre 1 y 65535'}
+        if not self.MIN_INTERVALO <= intervalo_s <= self.MAX_INTERVALO:
+            return {'valid': False,
+                    'message': f'El intervalo debe estar entre {self.MIN_INTERVALO} y {self.MAX_INTERVALO} segundos'}
+
+        activo = valores['activo']
+        if isinstance(activo, str):
+            activo = activo.lower() in ['true', '1', 'yes']
+        return {'valid': True, 'datos': {
+            'nombre': nombre, 'host': host, 'metodo': metodo, 'puerto': puerto,
+            'intervalo_s': intervalo_s, 'activo': 1 if activo else 0,
+        }}
+
+    def _validar_host(self, host):
+        """Validar IP (v4/v6) o nombre DNS"""
+        if not isinstance(host, str) or not host.strip():
+            return {'valid': False, 'message': 'El host es requerido'}
+        host = host.strip()
+        try:
+            return {'valid': True, 'host': str(ipaddress.ip_address(host))}
+        except ValueError:
+            pass
+        if not _HOSTNAME.match(host):
+            return {'valid': False, 'message': 'Host inválido: debe ser una IP o un nombre DNS'}
+        return {'valid': True, 'host': host.lower()}
@@ -0,0 +1,82 @@
+# services/estadisticas_service.py
+from datetime import datetime, timedelta
+import logging
+
+from config.cache import LRUCache
+from config.metrics import registrar_cache
+from repositories.estadisticas_repository import EstadisticasRepository
+from repositories.usuario_repository import usuarios_generation
+
+logger = logging.getLogger(__name__)
+
+# Segundos que el resumen se sirve desde memoria. Las altas, bajas y cambios de
+# rol o estado invalidan la caché (usuarios_generation); el TTL acota lo demás:
+# los logins (último acceso, bloqueos por intentos fallidos), lo que depende de
+# la hora (bloqueos que expiran, ventanas de accesos) y los nombres de rol.
+ESTADISTICAS_TTL = 10
+
+estadisticas_cache = LRUCache(maxsize=1, ttl=ESTADISTICAS_TTL, generation=usuarios_generation)
+registrar_cache("estadisticas", estadisticas_cache)
+
+
+class EstadisticasService:
+    """Resumen de usuarios para el dashboard (/api/stats).
+
+    Sale de los agregados que mantienen los triggers de users, no de recorrerla:
+    cuesta lo mismo con cien usuarios que con millones, y entre cambios se
+    sirve desde la caché del proceso sin tocar la BD.
+    """
+
+    # Ventanas de "accesos recientes", en días contando hoy (UTC)
+    VENTANAS_ACCESO = (('hoy', 1), ('ultimos_7_dias', 7), ('ultimos_30_dias', 30))
+
+    def __init__(self):
+        self.repository = EstadisticasRepository()
+
+    def get_stats(self):
+        """Totales por estado y por rol, bloqueados y accesos recientes."""
+        try:
+            return {'success': True, 'stats': estadisticas_cache.get_or_load('usuarios', self._calcular)}
+        except Exception as e:
+            logger.exception("Error al obtener estadísticas")
+            return {
+                'success': False,
+                'message': f'Error al obtener estadísticas: {str(e)}'
+            }
+
+    def _calcular(self):
+        ahora = datetime.utcnow()
+        hoy = ahora.date()
+        desde = tuple(hoy - timedelta(days=dias - 1) for _, dias in self.VENTANAS_ACCESO)
+        datos = self.repository.resumen(ahora, desde)
+
+        roles = {}
+        activos = inactivos = 0
+        for rol_id, nombre, activo, total in datos['conteos']:
+            rol = roles.setdefault(rol_id, {
+                'rol_id': rol_id or None,
+                'nombre': nombre if rol_id else None,
+                'total': 0,
+                'activos': 0,
+            })
+            rol['total'] += total
+            if activo:
+                rol['activos'] += total
+                activos += total
+            else:
+                inactivos += total
+
+        con_acceso, *recientes = datos['accesos']
+        accesos = {clave: total for (clave, _), total in zip(self.VENTANAS_ACCESO, recientes)}
+        accesos['nunca'] = activos + inactivos - con_acceso
+        return {
+            'usuarios': {
+                'total': activos + inactivos,
+                'activos': activos,
+                'inactivos': inactivos,
+                'bloqueados': datos['bloqueados'],
+            },
+            'roles': sorted(roles.values(), key=lambda rol: (-rol['total'], rol['rol_id'] or 0)),
+            'accesos': accesos,
+            'generado': ahora.isoformat(),
+        }
@@ -0,0 +1,256 @@
+# services/eventos_service.py
+"""Reparto en vivo de cambios de estado de dispositivos (Server-Sent Events).
+
+Un Publicador por proceso web: un hilo lee device_events (id > último) cada
+INTERVALO segundos mientras haya algún cliente conectado y reparte cada
+evento, serializado una sola vez, a las colas de los clientes. Con N
+navegadores abiertos la BD recibe las mismas consultas que con uno.
+
+- Contrapresión: cada cliente tiene una cola acotada (MAX_COLA). Si se llena
+  (cliente lento o parado) se desconecta; el navegador se reconecta solo con
+  Last-Event-ID y se pone al día desde el buffer de repetición. Los
+  contadores no se encolan: el cliente recibe solo el último.
+- Repetición: los últimos MAX_REPLAY eventos se guardan en memoria (se
+  precargan de la BD al arrancar). Si el Last-Event-ID es anterior al buffer
+  se envía `reset` y el cliente recarga el listado.
+
+Eventos SSE: `transicion` (con id), `contadores` y `reset`.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from config.metrics import metrics, COUNTER
+from repositories.dispositivo_repository import DispositivoRepository, dispositivos_generation
+from repositories.evento_repository import EventoRepository
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("netmonitor_sse_connections_total", COUNTER, "Conexiones a /api/dispositivos/eventos")
+metrics.describe("netmonitor_sse_overflows_total", COUNTER, "Clientes SSE desconectados por cola llena")
+
+RESET = "event: reset\ndata: {}\n\n"
+LATIDO = ": latido\n\n"
+
+
+def formatear(evento: str, datos: dict, evento_id: int = None) -> str:
+    """Mensaje SSE ya serializado (se comparte entre todos los clientes)."""
+    cabecera = f"id: {evento_id}\n" if evento_id is not None else ""
+    return f"{cabecera}event: {evento}\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n"
+
+
+class PublicadorLlenoError(Exception):
+    """No se aceptan más clientes en este proceso."""
+    pass
+
+
+class Suscripcion:
+    """Cola acotada de un cliente; el consumidor espera en un hilo (Flask)."""
+
+    def __init__(self, max_cola: int):
+        self.max_cola = max_cola
+        self.desbordada = False
+        self._cola = deque()
+        self._contadores = None
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+
+    def entregar(self, textos) -> bool:
+        """Encolar mensajes. Devuelve False si el cliente no da abasto (queda desbordada)."""
+        with self._lock:
+            if self.desbordada:
+                return False
+            if len(self._cola) + len(textos) > self.max_cola:
+                self.desbordada = True
+                self._cola.clear()
+            else:
+                self._cola.extend(textos)
+        self._avisar()
+        return not self.desbordada
+
+    def actualizar_contadores(self, texto: str):
+        with self._lock:
+            self._contadores = texto
+        self._avisar()
+
+    def tomar(self):
+        """Mensajes pendientes, con los contadores (si cambiaron) al final."""
+        with self._lock:
+            textos = list(self._cola)
+            self._cola.clear()
+            if self._contadores is not None:
+                textos.append(self._contadores)
+                self._contadores = None
+        return textos
+
+    def _avisar(self):
+        self._aviso.set()
+
+    def esperar(self, timeout: float):
+        self._aviso.wait(timeout)
+        self._aviso.clear()
+
+
+class SuscripcionAsync(Suscripcion):
+    """Suscripción para el modo asyncio: el hilo del publicador despierta al bucle."""
+
+    def __init__(self, max_cola: int):
+        super().__init__(max_cola)
+        self._loop = asyncio.get_running_loop()
+        self._evento = asyncio.Event()
+
+    def _avisar(self):
+        try:
+            self._loop.call_soon_threadsafe(self._evento.set)
+        except RuntimeError:
+            # Bucle cerrado: el cliente ya no existe
+            pass
+
+    async def esperar(self, timeout: float):
+        try:
+            async with asyncio.timeout(timeout):
+                await self._evento.wait()
+        except TimeoutError:
+            pass
+        self._evento.clear()
+
+
+class Publicador:
+    # Segundos entre lecturas de device_events con clientes conectados
+    INTERVALO = 1.0
+    # Segundos entre recuentos del inventario aunque no haya eventos
+    INTERVALO_CONTADORES = 30.0
+    # Eventos que se conservan para los clientes que se reconectan
+    MAX_REPLAY = 1000
+    # Mensajes pendientes por cliente antes de desconectarlo
+    MAX_COLA = 256
+    # Clientes por proceso
+    MAX_SUSCRIPTORES = 1000
+    # Segundos entre comentarios de latido (mantienen viva la conexión en proxies)
+    LATIDO = 15.0
+
+    def __init__(self):
+        self.repository = EventoRepository()
+        self.dispositivos = DispositivoRepository()
+        self._lock = threading.Lock()
+        self._suscriptores = set()
+        self._hay_suscriptores = threading.Condition(self._lock)
+        # (id, mensaje SSE)
+        self._replay = deque(maxlen=self.MAX_REPLAY)
+        self._ultimo_id = None
+        self._contadores = None
+        self._texto_contadores = None
+        self._hilo = None
+        self.consultas = 0
+
+    def suscribir(self, suscripcion: Suscripcion, ultimo_id=None):
+        """Registrar un cliente. Devuelve los mensajes iniciales: los eventos
+        posteriores a `ultimo_id` (o `reset`) y los contadores actuales.
+
+        Hace E/S con la BD la primera vez (precarga): en asyncio, llamarlo en un hilo.
+        """
+        try:
+            ultimo_id = int(ultimo_id) if ultimo_id not in (None, '') else None
+        except (TypeError, ValueError):
+            ultimo_id = None
+        with self._lock:
+            if len(self._suscriptores) >= self.MAX_SUSCRIPTORES:
+                raise PublicadorLlenoError('Demasiados clientes conectados')
+            if self._ultimo_id is None:
+                self._precargar()
+            iniciales = []
+            if ultimo_id is not None and ultimo_id < self._ultimo_id:
+                if self._replay and ultimo_id >= self._replay[0][0] - 1:
+                    iniciales.extend(texto for evento_id, texto in self._replay if evento_id > ultimo_id)
+                else:
+                    iniciales.append(RESET)
+            if self._texto_contadores:
+                iniciales.append(self._texto_contadores)
+            self._suscriptores.add(suscripcion)
+            self._hay_suscriptores.notify()
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='publicador-eventos', daemon=True)
+                self._hilo.start()
+        metrics.inc('netmonitor_sse_connections_total')
+        return iniciales
+
+    def desuscribir(self, suscripcion: Suscripcion):
+        with self._lock:
+            self._suscriptores.discard(suscripcion)
+
+    def _precargar(self):
+        # Con el lock tomado: los primeros clientes esperan a tener estado coherente
+        filas = self.repository.recientes(self.MAX_REPLAY)
+        self.consultas += 1
+        self._replay.extend((fila[0], self._mensaje(fila)) for fila in filas)
+        self._ultimo_id = filas[-1][0] if filas else 0
+        self._recontar()
+
+    def _bucle(self):
+        proximo_recuento = time.monotonic() + self.INTERVALO_CONTADORES
+        version = dispositivos_generation.current()
+        while True:
+            with self._lock:
+                while not self._suscriptores:
+                    # Sin clientes no se consulta la BD
+                    self._hay_suscriptores.wait()
+            time.sleep(self.INTERVALO)
+            try:
+                lleno = self._leer()
+                generacion = dispositivos_generation.current()
+                if lleno or generacion != version or time.monotonic() >= proximo_recuento:
+                    version = generacion
+                    proximo_recuento = time.monotonic() + self.INTERVALO_CONTADORES
+                    self._recontar(repartir=True)
+            except Exception:
+                logger.exception('Publicador de eventos: error leyendo la BD')
+
+    def _leer(self) -> bool:
+        """Repartir los eventos nuevos. Devuelve True si hubo alguno."""
+        hubo = False
+        while True:
+            filas = self.repository.siguientes(self._ultimo_id, self.MAX_REPLAY)
+            self.consultas += 1
+            if not filas:
+                return hubo
+            hubo = True
+            mensajes = [(fila[0], self._mensaje(fila)) for fila in filas]
+            with self._lock:
+                self._replay.extend(mensajes)
+                self._ultimo_id = filas[-1][0]
+                suscriptores = list(self._suscriptores)
+            textos = [texto for _, texto in mensajes]
+            for suscripcion in suscriptores:
+                if not suscripcion.entregar(textos):
+                    metrics.inc('netmonitor_sse_overflows_total')
+                    self.desuscribir(suscripcion)
+            if len(filas) < self.MAX_REPLAY:
+                return hubo
+
+    def _recontar(self, repartir: bool = False):
+        contadores = self.dispositivos.contar_por_estado()
+        self.consultas += 1
+        if contadores == self._contadores:
+            return
+        self._contadores = contadores
+        self._texto_contadores = formatear('contadores', contadores)
+        if repartir:
+            with self._lock:
+                suscriptores = list(self._suscriptores)
+            for suscripcion in suscriptores:
+                suscripcion.actualizar_contadores(self._texto_contadores)
+
+    @staticmethod
+    def _mensaje(fila) -> str:
+        datos = dict(zip(EventoRepository.COLUMNAS, fila))
+        return formatear('transicion', datos, datos['id'])
+
+    def __len__(self):
+        return len(self._suscriptores)
+
+
+# Un publicador por proceso, compartido por la app Flask y la asyncio
+publicador = Publicador()
@@ -0,0 +1,213 @@
+# services/historial_service.py
+"""Histórico de comprobaciones de dispositivos: muestras crudas y agregados.
+
+El monitor acumula en memoria (AcumuladorMuestras) cada resultado como
+muestra cruda y en los agregados de 1m, 1h y 1d, y los escribe por lotes:
+las muestras con cada volcado del estado, los agregados cada minuto, sumados
+a lo ya guardado. Así la BD recibe un executemany por tabla y volcado en vez
+de una sentencia por comprobación, y los agregados no se recalculan nunca
+desde las muestras.
+
+Cada nivel tiene su retención (HistorialService.RETENCION). Las consultas de
+rango eligen el nivel más fino que cubre el rango en MAX_PUNTOS puntos o
+menos, así que leen como mucho unas mil filas contiguas de la clave primaria
+aunque haya meses de datos.
+"""
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from repositories.dispositivo_repository import DispositivoRepository
+from repositories.muestra_repository import MuestraRepository
+
+# Niveles de agregación: nombre -> segundos por intervalo
+RESOLUCIONES = {'1m': 60, '1h': 3600, '1d': 86400}
+
+# Columnas de cada punto de /api/dispositivos/<id>/historial
+COLUMNAS = ('ts', 'muestras', 'exitos', 'latencia_media', 'latencia_min', 'latencia_max')
+
+
+class AcumuladorMuestras:
+    """Resultados pendientes de escribir: muestras crudas y agregados parciales.
+
+    Si la BD no está disponible se conservan las MAX_MUESTRAS más recientes;
+    los agregados no se pierden (un intervalo ocupa una entrada por
+    dispositivo, sin importar cuántas comprobaciones sume).
+    """
+    MAX_MUESTRAS = 200000
+
+    def __init__(self):
+        self._muestras = deque(maxlen=self.MAX_MUESTRAS)
+        # (dispositivo_id, resolucion, bucket) -> [muestras, exitos, suma, mínima, máxima]
+        self._agregados = {}
+        self.descartadas = 0
+
+    def agregar(self, resultado):
+        ts = int(resultado.instante)
+        ok = 1 if resultado.ok else 0
+        latencia = resultado.latencia_ms if ok else None
+        if len(self._muestras) == self.MAX_MUESTRAS:
+            self.descartadas += 1
+        self._muestras.append((resultado.dispositivo_id, ts, ok, latencia))
+        for resolucion in RESOLUCIONES.values():
+            self._sumar((resultado.dispositivo_id, resolucion, ts - ts % resolucion),
+                        1, ok, latencia or 0.0, latencia, latencia)
+
+    def _sumar(self, clave, muestras, exitos, suma, minima, maxima):
+        agregado = self._agregados.get(clave)
+        if agregado is None:
+            self._agregados[clave] = [muestras, exitos, suma, minima, maxima]
+            return
+        agregado[0] += muestras
+        agregado[1] += exitos
+        agregado[2] += suma
+        if minima is not None and (agregado[3] is None or minima < agregado[3]):
+            agregado[3] = minima
+        if maxima is not None and (agregado[4] is None or maxima > agregado[4]):
+            agregado[4] = maxima
+
+    def extraer_muestras(self):
+        """Muestras pendientes (dispositivo_id, ts, ok, latencia_ms); las retira del buffer."""
+        filas = list(self._muestras)
+        self._muestras.clear()
+        return filas
+
+    def devolver_muestras(self, filas):
+        """Volver a encolar un lote que no se pudo escribir (delante de las nuevas).
+
+        Si no cabe todo se descartan las más antiguas, como en agregar().
+        """
+        pendientes = filas + list(self._muestras)
+        self.descartadas += max(0, len(pendientes) - self.MAX_MUESTRAS)
+        self._muestras = deque(pendientes, maxlen=self.MAX_MUESTRAS)
+
+    def extraer_agregados(self):
+        """Agregados parciales con el formato de MuestraRepository.acumular_agregados."""
+        filas = [clave + tuple(valores) for clave, valores in self._agregados.items()]
+        self._agregados.clear()
+        return filas
+
+    def devolver_agregados(self, filas):
+        for fila in filas:
+            self._sumar(fila[:3], *fila[3:])
+
+    def __len__(self):
+        return len(self._muestras)
+
+
+class HistorialService:
+    # Segundos que se conserva cada nivel
+    RETENCION = {
+        'raw': 2 * 86400,
+        '1m': 14 * 86400,
+        '1h': 400 * 86400,
+        '1d': 5 * 365 * 86400,
+    }
+    # Puntos por respuesta con resolución automática
+    MAX_PUNTOS = 1500
+    # Tope de filas con resolución explícita
+    MAX_FILAS = 20000
+    # Segundos entre muestras crudas en el peor caso (intervalo mínimo de un dispositivo)
+    INTERVALO_CRUDO = 10
+    # Rango por defecto: último día
+    RANGO_DEFECTO = 86400
+
+    def __init__(self):
+        self.repository = MuestraRepository()
+        self.dispositivos = DispositivoRepository()
+
+    def get_history(self, dispositivo_id: int, desde=None, hasta=None, resolucion: str = None):
+        """Histórico de un dispositivo en [desde, hasta).
+
+        Args:
+            desde, hasta: segundos epoch o fecha ISO 8601 (por defecto, el último día)
+            resolucion: 'raw', '1m', '1h', '1d' o None/'auto'
+        """
+        try:
+            ahora = int(time.time())
+            hasta = ahora if hasta is None else self._instante(hasta)
+            desde = hasta - self.RANGO_DEFECTO if desde is None else self._instante(desde)
+            if desde >= hasta:
+                return {'success': False, 'message': "'desde' debe ser anterior a 'hasta'", 'status': 400}
+
+            if resolucion in (None, '', 'auto'):
+                resolucion = self._elegir_resolucion(desde, hasta, ahora)
+            elif resolucion != 'raw' and resolucion not in RESOLUCIONES:
+                return {'success': False, 'status': 400,
+                        'message': f"Resolución inválida (disponibles: raw, {', '.join(RESOLUCIONES)}, auto)"}
+            elif (hasta - desde) / self._segundos(resolucion) > self.MAX_FILAS:
+                return {'success': False, 'message': 'Rango demasiado amplio para esa resolución', 'status': 400}
+
+            if not self.dispositivos.find_by_id(dispositivo_id):
+                return {'success': False, 'message': 'Dispositivo no encontrado', 'status': 404}
+
+            if resolucion == 'raw':
+                puntos = [
+                    [ts, 1, ok, self._redondear(latencia), self._redondear(latencia), self._redondear(latencia)]
+                    for ts, ok, latencia in self.repository.rango_muestras(dispositivo_id, desde, hasta,
+                                                                           self.MAX_FILAS)
+                ]
+            else:
+                segundos = RESOLUCIONES[resolucion]
+                # Incluye el intervalo que contiene `desde`
+                filas = self.repository.rango_agregados(dispositivo_id, segundos, desde - desde % segundos,
+                                                        hasta, self.MAX_FILAS)
+                puntos = [
+                    [bucket, muestras, exitos, self._redondear(suma / exitos) if exitos else None,
+                     self._redondear(minima), self._redondear(maxima)]
+                    for bucket, muestras, exitos, suma, minima, maxima in filas
+                ]
+            return {
+                'success': True,
+                'dispositivo_id': dispositivo_id,
+                'resolucion': resolucion,
+                'desde': desde,
+                'hasta': hasta,
+                'columnas': list(COLUMNAS),
+                'puntos': puntos,
+            }
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'status': 400}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al obtener histórico: {str(e)}'}
+
+    def purgar(self, ahora: int = None):
+        """Borrar lo que supera la retención de cada nivel. Devuelve filas borradas por nivel."""
+        ahora = int(time.time()) if ahora is None else ahora
+        borradas = {'raw': self.repository.purgar_muestras(ahora - self.RETENCION['raw'])}
+        for nombre, segundos in RESOLUCIONES.items():
+            borradas[nombre] = self.repository.purgar_agregados(segundos, ahora - self.RETENCION[nombre])
+        return borradas
+
+    def _elegir_resolucion(self, desde: int, hasta: int, ahora: int) -> str:
+        """Nivel más fino que conserva `desde` y cubre el rango en MAX_PUNTOS puntos."""
+        for nombre in ('raw', *RESOLUCIONES):
+            if desde < ahora - self.RETENCION[nombre]:
+                continue
+            if (hasta - desde) / self._segundos(nombre) <= self.MAX_PUNTOS:
+                return nombre
+        return '1d'
+
+    def _segundos(self, resolucion: str) -> int:
+        return self.INTERVALO_CRUDO if resolucion == 'raw' else RESOLUCIONES[resolucion]
+
+    @staticmethod
+    def _instante(valor) -> int:
+        """Segundos epoch a partir de un entero o de una fecha ISO 8601 (UTC si no lleva zona)."""
+        if isinstance(valor, (int, float)):
+            return int(valor)
+        texto = str(valor).strip()
+        if texto.lstrip('-').isdigit():
+            return int(texto)
+        try:
+            fecha = datetime.fromisoformat(texto.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'Fecha inválida: {valor}')
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        return int(fecha.timestamp())
+
+    @staticmethod
+    def _redondear(valor):
+        # FLOAT en la BD: sin redondeo saldrían valores como 0.16699999570846558
+        return None if valor is None else round(valor, 3)
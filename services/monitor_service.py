@@ -0,0 +1,257 @@
+# services/monitor_service.py
+"""Monitor de dispositivos: planificador de sondeos + estado + escritura por lotes.
+
+Corre en su propio proceso (scripts/monitor.py), uno por despliegue: los
+workers de Gunicorn no sondean, solo leen el estado que el monitor guarda en
+`devices`. El inventario se recarga cuando cambia su generación (altas, bajas
+y ediciones desde la API) y, en todo caso, cada INTERVALO_RECARGA segundos:
+la generación es un archivo local, así que un monitor en otro host o
+contenedor no ve sus cambios. El estado se escribe cada INTERVALO_VOLCADO
+segundos con un executemany del último resultado de cada dispositivo.
+
+Cada resultado se guarda además en el histórico (services/historial_service.py):
+las muestras crudas con cada volcado, los agregados 1m/1h/1d cada
+INTERVALO_AGREGADOS segundos y la purga por retención cada INTERVALO_PURGA.
+Los cambios de estado se registran en device_events, de donde los reparten
+a los navegadores los procesos web (services/eventos_service.py); un cambio
+adelanta el volcado para que llegue en torno a INTERVALO_EVENTOS segundos.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable
+
+from config.metrics import metrics, HISTOGRAM, COUNTER
+from repositories.dispositivo_repository import DispositivoRepository, dispositivos_generation
+from repositories.evento_repository import EventoRepository
+from services.historial_service import AcumuladorMuestras, HistorialService
+from services.sondeo_service import Planificador, Resultado
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("netmonitor_device_checks_total", COUNTER, "Comprobaciones de dispositivos por método y resultado")
+metrics.describe("netmonitor_device_check_seconds", HISTOGRAM, "Latencia de las comprobaciones correctas")
+metrics.describe("netmonitor_device_transitions_total", COUNTER, "Cambios de estado de dispositivos (up/down)")
+
+
+class Monitor:
+    # Fallos seguidos para pasar de 'up' a 'down' (evita parpadeos por un paquete perdido)
+    FALLOS_PARA_CAIDO = 2
+    # Segundos entre escrituras por lotes del estado
+    INTERVALO_VOLCADO = 5.0
+    # Segundos entre comprobaciones de la generación del inventario
+    INTERVALO_SINCRONIZACION = 10.0
+    # Segundos máximos entre recargas del inventario aunque la generación no cambie
+    INTERVALO_RECARGA = 300.0
+    # Segundos entre escrituras de los agregados del histórico
+    INTERVALO_AGREGADOS = 60.0
+    # Segundos entre purgas del histórico por retención
+    INTERVALO_PURGA = 3600.0
+    # Segundos que se agrupan los cambios de estado antes del volcado adelantado
+    INTERVALO_EVENTOS = 1.0
+    # Segundos que se conservan los cambios de estado en device_events
+    RETENCION_EVENTOS = 90 * 86400
+
+    def __init__(self, repository: DispositivoRepository = None, max_concurrentes: int = 256,
+                 timeout: float = 2.0, jitter: float = 0.1, historial: HistorialService = None):
+        self.repository = repository or DispositivoRepository()
+        self.historial = historial or HistorialService()
+        self.muestras = AcumuladorMuestras()
+        self.eventos = EventoRepository()
+        self.planificador = Planificador(self._al_resultado, max_concurrentes=max_concurrentes,
+                                         timeout=timeout, jitter=jitter)
+        # id -> [estado, fallos consecutivos, último cambio, método]
+        self._estados = {}
+        # id -> fila de REGISTRAR_RESULTADO con el último resultado sin guardar
+        self._pendientes = {}
+        # Filas de device_events pendientes de escribir
+        self._eventos = []
+        self._suscriptores = []
+        self._version = None
+        self._detenido = False
+        self._despertar = asyncio.Event()
+        self.transiciones = 0
+        self.volcados = 0
+
+    def suscribir(self, fn: Callable):
+        """Llamar a `fn(dispositivo_id, anterior, nuevo, resultado)` en cada cambio de estado."""
+        self._suscriptores.append(fn)
+
+    async def sincronizar(self, forzar: bool = False):
+        """Recargar el inventario si su generación cambió desde la última carga."""
+        version = dispositivos_generation.current()
+        if version == self._version and not forzar:
+            return False
+        dispositivos = await asyncio.to_thread(self.repository.listar_para_sondeo)
+        self._version = version
+
+        vigentes = {d.id for d in dispositivos}
+        for dispositivo_id in list(self._estados):
+            if dispositivo_id not in vigentes:
+                del self._estados[dispositivo_id]
+                self._pendientes.pop(dispositivo_id, None)
+        for d in dispositivos:
+            estado = self._estados.get(d.id)
+            if estado is None:
+                self._estados[d.id] = [d.estado, d.fallos_consecutivos or 0, d.ultimo_cambio, d.metodo]
+            else:
+                estado[3] = d.metodo
+        self.planificador.sincronizar(dispositivos)
+        logger.info('Inventario de dispositivos cargado', extra={'dispositivos': len(dispositivos)})
+        return True
+
+    def _al_resultado(self, resultado: Resultado):
+        estado = self._estados.get(resultado.dispositivo_id)
+        if estado is None:
+            # Eliminado o desactivado mientras se comprobaba
+            return
+        anterior, fallos, ultimo_cambio, metodo = estado
+        if resultado.ok:
+            fallos = 0
+            nuevo = 'up'
+            metrics.observe('netmonitor_device_check_seconds', resultado.latencia_ms / 1000, metodo=metodo)
+        else:
+            fallos += 1
+            caido = fallos >= self.FALLOS_PARA_CAIDO or anterior == 'desconocido'
+            nuevo = 'down' if caido else anterior
+        metrics.inc('netmonitor_device_checks_total', metodo=metodo, resultado='ok' if resultado.ok else 'fallo')
+        self.muestras.agregar(resultado)
+
+        instante = datetime.utcfromtimestamp(resultado.instante)
+        if nuevo != anterior:
+            ultimo_cambio = instante
+            self._transicion(resultado, anterior, nuevo)
+        estado[:3] = [nuevo, fallos, ultimo_cambio]
+        error = resultado.error[:255] if resultado.error else None
+        self._pendientes[resultado.dispositivo_id] = (
+            nuevo, resultado.latencia_ms, fallos, instante, ultimo_cambio, error, resultado.dispositivo_id
+        )
+
+    def _transicion(self, resultado: Resultado, anterior: str, nuevo: str):
+        self.transiciones += 1
+        metrics.inc('netmonitor_device_transitions_total', estado=nuevo)
+        logger.info('Cambio de estado de dispositivo', extra={
+            'dispositivo_id': resultado.dispositivo_id,
+            'anterior': anterior,
+            'estado': nuevo,
+            'error': resultado.error,
+        })
+        self._eventos.append((resultado.dispositivo_id, anterior, nuevo, int(resultado.instante),
+                              resultado.error[:255] if resultado.error else None))
+        self._despertar.set()
+        for fn in self._suscriptores:
+            try:
+                fn(resultado.dispositivo_id, anterior, nuevo, resultado)
+            except Exception:
+                logger.exception('Error notificando un cambio de estado')
+
+    async def volcar(self):
+        """Guardar en la BD el último resultado pendiente de cada dispositivo (un executemany),
+        los cambios de estado y las muestras pendientes del histórico."""
+        await self.volcar_muestras()
+        if not self._pendientes:
+            return 0
+        lote = list(self._pendientes.values())
+        self._pendientes.clear()
+        try:
+            await asyncio.to_thread(self.repository.registrar_resultados, lote)
+        except Exception:
+            logger.exception('No se pudo guardar el estado de los dispositivos; se reintenta')
+            # Se reintenta salvo lo que ya tenga un resultado más nuevo
+            for fila in lote:
+                self._pendientes.setdefault(fila[-1], fila)
+            return 0
+        self.volcados += 1
+        # Los eventos después del estado: quien los recibe y relee el listado ya ve el cambio
+        if self._eventos:
+            eventos, self._eventos = self._eventos, []
+            try:
+                await asyncio.to_thread(self.eventos.insertar, eventos)
+            except Exception:
+                logger.exception('No se pudieron guardar los cambios de estado; se reintenta')
+                self._eventos[:0] = eventos
+        return len(lote)
+
+    async def volcar_muestras(self, agregados: bool = False):
+        """Escribir las muestras crudas pendientes y, con `agregados`, los agregados parciales."""
+        if self.muestras.descartadas:
+            logger.warning('Histórico: muestras descartadas por falta de espacio en el buffer',
+                           extra={'descartadas': self.muestras.descartadas})
+            self.muestras.descartadas = 0
+        filas = self.muestras.extraer_muestras()
+        if filas:
+            try:
+                await asyncio.to_thread(self.historial.repository.insertar_muestras, filas)
+            except Exception:
+                logger.exception('No se pudieron guardar las muestras del histórico; se reintenta')
+                self.muestras.devolver_muestras(filas)
+        if agregados:
+            filas = self.muestras.extraer_agregados()
+            if filas:
+                try:
+                    await asyncio.to_thread(self.historial.repository.acumular_agregados, filas)
+                except Exception:
+                    logger.exception('No se pudieron guardar los agregados del histórico; se reintenta')
+                    self.muestras.devolver_agregados(filas)
+
+    async def purgar(self):
+        """Aplicar la retención del histórico (en un hilo: son DELETE por lotes)."""
+        try:
+            borradas = await asyncio.to_thread(self.historial.purgar)
+            borradas['eventos'] = await asyncio.to_thread(self.eventos.purgar,
+                                                          int(time.time()) - self.RETENCION_EVENTOS)
+        except Exception:
+            logger.exception('No se pudo purgar el histórico de dispositivos')
+            return
+        if any(borradas.values()):
+            logger.info('Histórico purgado', extra={'borradas': borradas})
+
+    def detener(self):
+        self._detenido = True
+        self._despertar.set()
+
+    async def ejecutar(self):
+        """Sondear hasta detener(); al salir guarda los resultados pendientes."""
+        self._detenido = False
+        await self.sincronizar(forzar=True)
+        tarea = asyncio.create_task(self.planificador.ejecutar())
+        loop = asyncio.get_running_loop()
+        proxima_sincronizacion = loop.time() + self.INTERVALO_SINCRONIZACION
+        proxima_recarga = loop.time() + self.INTERVALO_RECARGA
+        proximos_agregados = loop.time() + self.INTERVALO_AGREGADOS
+        # La primera purga al arrancar, por si el monitor estuvo parado
+        proxima_purga = loop.time()
+        try:
+            while not self._detenido:
+                try:
+                    async with asyncio.timeout(self.INTERVALO_VOLCADO):
+                        await self._despertar.wait()
+                    # Un cambio de estado: se espera un poco para agrupar los de
+                    # una caída masiva en un solo volcado
+                    if not self._detenido:
+                        await asyncio.sleep(self.INTERVALO_EVENTOS)
+                except TimeoutError:
+                    pass
+                self._despertar.clear()
+                await self.volcar()
+                if loop.time() >= proximos_agregados:
+                    proximos_agregados = loop.time() + self.INTERVALO_AGREGADOS
+                    await self.volcar_muestras(agregados=True)
+                if loop.time() >= proxima_purga:
+                    proxima_purga = loop.time() + self.INTERVALO_PURGA
+                    await self.purgar()
+                metrics.maybe_flush()
+                if loop.time() >= proxima_sincronizacion:
+                    proxima_sincronizacion = loop.time() + self.INTERVALO_SINCRONIZACION
+                    try:
+                        if await self.sincronizar(forzar=loop.time() >= proxima_recarga):
+                            proxima_recarga = loop.time() + self.INTERVALO_RECARGA
+                    except Exception:
+                        logger.exception('No se pudo recargar el inventario de dispositivos')
+        finally:
+            self.planificador.detener()
+            await tarea
+            await self.volcar()
+            await self.volcar_muestras(agregados=True)
+            metrics.flush()
@@ -0,0 +1,176 @@
+# services/password_service.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from config.metrics import metrics
+from models.usuario import Usuario
+
+
+class HasherSaturadoError(Exception):
+    """Excepción levantada cuando la cola de hashing está llena o el resultado
+    no llega en TIMEOUT segundos (se responde 503)."""
+    pass
+
+
+class PasswordService:
+    """Ejecuta bcrypt en un pool de hilos dedicado y acotado.
+
+    bcrypt libera el GIL mientras calcula, así que un ThreadPoolExecutor
+    aprovecha varios núcleos sin procesos extra. Como mucho hay `max_workers`
+    hashes en curso y `max_cola` esperando; si la cola está llena la petición
+    se rechaza al instante en lugar de bloquear un worker de Gunicorn.
+    """
+
+    MAX_WORKERS = os.cpu_count() or 1  # Hashes simultáneos
+    MAX_COLA = 32                      # Peticiones esperando turno antes de rechazar
+    TIMEOUT = 10.0                     # Segundos máximos esperando el resultado
+
+    def __init__(self, max_workers: int = None, max_cola: int = None):
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.max_cola = self.MAX_COLA if max_cola is None else max_cola
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+        self._admision = threading.BoundedSemaphore(self.max_workers + self.max_cola)
+        self._lote = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._en_vuelo = 0
+        self._rechazos = 0
+        self._espera = {'count': 0, 'sum_s': 0.0, 'max_s': 0.0}
+        self._hash = {'count': 0, 'sum_s': 0.0, 'max_s': 0.0}
+
+    def verificar(self, usuario: Usuario, password: str) -> bool:
+        """Verifica la contraseña de un usuario en el pool de bcrypt."""
+        return self._ejecutar(usuario.verify_password, password)
+
+    def hashear(self, password: str) -> str:
+        """Genera un hash bcrypt (con Usuario.BCRYPT_ROUNDS) en el pool de bcrypt."""
+        return self._ejecutar(Usuario.hash_password, password)
+
+    async def verificar_async(self, usuario: Usuario, password: str) -> bool:
+        """verificar() para el modo asyncio: espera el resultado sin bloquear el bucle de eventos."""
+        return await self._ejecutar_async(usuario.verify_password, password)
+
+    async def hashear_async(self, password: str) -> str:
+        """hashear() para el modo asyncio."""
+        return await self._ejecutar_async(Usuario.hash_password, password)
+
+    def hashear_lote(self, passwords) -> list:
+        """Hashea muchas contraseñas en paralelo (importaciones masivas).
+
+        A diferencia de hashear(), espera turno en vez de rechazar, y nunca ocupa
+        más de `max_workers` huecos: la cola queda libre para los logins.
+        """
+        futures = []
+        try:
+            for password in passwords:
+                self._lote.acquire()
+                self._admision.acquire()
+                try:
+                    future = self._enviar(Usuario.hash_password, password)
+                except Exception:
+                    self._lote.release()
+                    raise
+                future.add_done_callback(lambda _: self._lote.release())
+                futures.append(future)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        """Métricas de espera en cola y de tiempo de hash."""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_cola': self.max_cola,
+                'bcrypt_rounds': Usuario.BCRYPT_ROUNDS,
+                'en_vuelo': self._en_vuelo,
+                'rechazos': self._rechazos,
+                'espera_cola': self._resumen(self._espera),
+                'hash': self._resumen(self._hash),
+            }
+
+    # --- Helpers internos ---
+
+    def _ejecutar(self, fn, *args):
+        self._admitir()
+        future = self._enviar(fn, *args)
+        try:
+            return future.result(timeout=self.TIMEOUT)
+        except FuturesTimeoutError:
+            # Si aún no empezó, deja libre su hueco
+            future.cancel()
+            raise self._timeout() from None
+
+    async def _ejecutar_async(self, fn, *args):
+        # Mismo pool y misma admisión que el modo síncrono; solo cambia la espera
+        self._admitir()
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self._enviar(fn, *args)), self.TIMEOUT)
+        except asyncio.TimeoutError:
+            # wait_for ya canceló el future
+            raise self._timeout() from None
+
+    def _timeout(self) -> HasherSaturadoError:
+        """El hash no terminó a tiempo: es saturación, no credenciales malas."""
+        metrics.inc('netmonitor_bcrypt_timeouts_total')
+        return HasherSaturadoError('Servidor ocupado verificando contraseñas. Intenta de nuevo en unos segundos')
+
+    def _admitir(self):
+        """Control de admisión: sin hueco se rechaza sin esperar."""
+        if not self._admision.acquire(blocking=False):
+            with self._lock:
+                self._rechazos += 1
+            metrics.inc('netmonitor_bcrypt_rejections_total')
+            raise HasherSaturadoError('Servidor ocupado verificando contraseñas. Intenta de nuevo en unos segundos')
+
+    def _enviar(self, fn, *args):
+        """Envía la tarea al pool (con el hueco de admisión ya tomado)."""
+        encolado = time.perf_counter()
+
+        def tarea():
+            inicio = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._registrar(inicio - encolado, time.perf_counter() - inicio)
+
+        with self._lock:
+            self._en_vuelo += 1
+        try:
+            future = self._executor.submit(tarea)
+        except Exception:
+            self._liberar()
+            raise
+        future.add_done_callback(lambda _: self._liberar())
+        return future
+
+    def _liberar(self):
+        with self._lock:
+            self._en_vuelo -= 1
+        self._admision.release()
+
+    def _registrar(self, espera: float, duracion: float):
+        with self._lock:
+            for metrica, valor in ((self._espera, espera), (self._hash, duracion)):
+                metrica['count'] += 1
+                metrica['sum_s'] += valor
+                metrica['max_s'] = max(metrica['max_s'], valor)
+        metrics.observe('netmonitor_bcrypt_queue_seconds', espera)
+        metrics.observe('netmonitor_bcrypt_seconds', duracion)
+
+    @staticmethod
+    def _resumen(metrica: dict) -> dict:
+        count = metrica['count']
+        return {
+            'count': count,
+            'avg_ms': round(metrica['sum_s'] / count * 1000, 3) if count else 0.0,
+            'max_ms': round(metrica['max_s'] * 1000, 3),
+        }
+
+
+# Pool compartido por todo el proceso
+password_service = PasswordService()
@@ -1,5 +1,21 @@
 from repositories.roles_repository import RolesRepository
+from config.cache import LRUCache, Generation
+from config.metrics import registrar_cache
 from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Segundos que la lista de roles se sirve desde memoria sin consultar la BD
+ROLES_TTL = 300
+
+# Caché de la lista de roles compartida por el proceso. crear/actualizar/eliminar
+# la invalidan aquí y, vía el archivo de generación, en los demás workers.
+roles_cache = LRUCache(maxsize=1, ttl=ROLES_TTL, generation=Generation("roles"))
+registrar_cache("roles", roles_cache)
 
 class RolesService:
     """
@@ -13,18 +29,27 @@ class RolesService:
         self.repository = RolesRepository()
 
     def obtener_todos(self):
-        """Retorna todos los roles en el formato de respuesta esperado, consultando a la BD."""
+        """Retorna todos los roles en el formato de respuesta esperado.
+
+        Se sirven desde la caché en memoria; solo se consulta la BD al expirar el
+        TTL o tras una modificación. Incluye 'etag' y 'last_modified' (instante en
+        que se cargó la lista) para respuestas condicionales; la ruta los quita
+        del cuerpo."""
         try:
-            # Llama al método get_all() del Repositorio (Acceso a BD real)
-            roles = self.repository.get_all()
+            # get_or_load guarda la generación leída antes de consultar: una
+            # modificación durante la carga no deja la lista vieja en la caché
+            cached = roles_cache.get_or_load("all", self._cargar_todos) or self._empaquetar([])
+            roles, etag, cargado = cached
             return {
                 "success": True, 
                 "data": roles,
-                "message": "Roles obtenidos exitosamente"
+                "message": "Roles obtenidos exitosamente",
+                "etag": etag,
+                "last_modified": cargado
             }
         except Exception as e: 
             # Captura errores de conexión o de consulta del Repositorio
-            print(f"Error al obtener roles: {e}")
+            logger.exception("Error al obtener roles")
             return {
                 "success": False, 
                 "data": [],
@@ -32,6 +57,26 @@ class RolesService:
                 "status": 500
             }
 
+    def _cargar_todos(self):
+        # Llama al método get_all() del Repositorio (Acceso a BD real)
+        roles = self.repository.get_all()
+        # Una lista vacía puede venir de un error de consulta: no se cachea
+        return self._empaquetar(roles) if roles else None
+
+    @classmethod
+    def _empaquetar(cls, roles):
+        """Entrada de la caché: (roles, etag, instante de carga)."""
+        return roles, cls._etag(roles), time.time()
+
+    @staticmethod
+    def _etag(roles) -> str:
+        """Validador fuerte de la lista de roles (hash de su contenido)."""
+        contenido = json.dumps(roles, sort_keys=True, default=str)
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+    def version(self):
+        """Validador barato de los roles: (token de generación, instante de escritura)."""
+        return roles_cache.generation.ensure(), roles_cache.generation.modified()
 
     def obtener_por_id(self, role_id):
         """Retorna un rol por su ID, o un error si no existe, consultando a la BD."""
@@ -51,7 +96,7 @@ class RolesService:
                     "status": 404 # Estado HTTP en caso de error
                 }
         except Exception as e:
-            print(f"Error al obtener rol por ID: {e}")
+            logger.exception("Error al obtener rol por ID", extra={"role_id": role_id})
             return {
                 "success": False, 
                 "message": "Error interno del servidor al acceder al rol.",
@@ -75,6 +120,7 @@ class RolesService:
             success = self.repository.create(nombre, descripcion)
             
             if success:
+                roles_cache.invalidate_all()
                 # CRÍTICO: El front-end debe recargar la lista para obtener el ID real de la BD.
                 return {
                     "success": True, 
@@ -89,7 +135,7 @@ class RolesService:
                 }
 
         except Exception as e:
-            print(f"Error al crear rol: {e}")
+            logger.exception("Error al crear rol")
             return {
                 "success": False, 
                 "message": "Error interno del servidor al intentar crear el rol.",
@@ -121,6 +167,7 @@ class RolesService:
             success = self.repository.update(role_id, nombre, descripcion)
             
             if success:
+                roles_cache.invalidate_all()
                 return {
                     "success": True, 
                     "message": f"Rol {role_id} actualizado exitosamente."
@@ -133,7 +180,7 @@ class RolesService:
                 }
 
         except Exception as e:
-            print(f"Error al actualizar rol: {e}")
+            logger.exception("Error al actualizar rol", extra={"role_id": role_id})
             return {
                 "success": False, 
                 "message": "Error interno del servidor al intentar actualizar el rol.",
@@ -157,6 +204,7 @@ class RolesService:
             success = self.repository.delete(role_id)
             
             if success:
+                roles_cache.invalidate_all()
                 return {
                     "success": True, 
                     "message": f"Rol {role_id} eliminado exitosamente."
@@ -169,7 +217,7 @@ class RolesService:
                 }
 
         except Exception as e:
-            print(f"Error al eliminar rol: {e}")
+            logger.exception("Error al eliminar rol", extra={"role_id": role_id})
             return {
                 "success": False, 
                 "message": "Error interno del servidor al intentar eliminar el rol.",
@@ -0,0 +1,501 @@
+# services/sondeo_service.py
+"""Comprobaciones de alcanzabilidad (TCP connect e ICMP echo) y su planificador.
+
+Todo corre en un bucle asyncio: un solo hilo mantiene cientos de
+comprobaciones en vuelo mientras esperan a la red. Lo usa el monitor
+(services/monitor_service.py) y, para una comprobación suelta, la API.
+
+- TCP: connect no bloqueante a host:puerto; se cierra con RST (SO_LINGER 0)
+  para no acumular TIME_WAIT a miles de conexiones por minuto.
+- ICMP: un único socket por familia para todos los echo en vuelo; las
+  respuestas se reparten por número de secuencia. Usa el socket ICMP sin
+  privilegios de Linux (net.ipv4.ping_group_range) y, si no está permitido,
+  uno RAW (root o CAP_NET_RAW).
+
+Los nombres se resuelven una vez cada RESOLUCION_TTL segundos por host: la
+resolución de asyncio va a un hilo y haría de cuello de botella. Las IP
+literales no pasan por getaddrinfo ni por la caché.
+
+descubrir() recorre una red (CIDR) con las mismas sondas, a una tasa máxima.
+"""
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import logging
+import os
+import random
+import socket
+import struct
+import time
+from typing import Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se reutiliza la dirección resuelta de un host
+RESOLUCION_TTL = 300.0
+
+_LINGER_RST = struct.pack('ii', 1, 0)
+
+
+class Resultado(NamedTuple):
+    """Resultado de una comprobación. `latencia_ms` es None si falló."""
+    dispositivo_id: Optional[int]
+    ok: bool
+    latencia_ms: Optional[float]
+    error: Optional[str]
+    instante: float  # epoch
+
+
+class SondeoNoDisponibleError(Exception):
+    """El método de comprobación no se puede usar en este host (p. ej. ICMP sin permisos)."""
+
+
+# --- Resolución con caché ---
+
+_resueltos = {}
+
+
+async def resolver(host: str, puerto: int = 0):
+    """(familia, sockaddr) de `host`, con caché de RESOLUCION_TTL segundos."""
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        pass
+    else:
+        return (socket.AF_INET6 if ip.version == 6 else socket.AF_INET), (host, puerto)
+    ahora = time.monotonic()
+    clave = (host, puerto)
+    cacheado = _resueltos.get(clave)
+    if cacheado and cacheado[0] > ahora:
+        return cacheado[1]
+    infos = await asyncio.get_running_loop().getaddrinfo(host, puerto, type=socket.SOCK_STREAM)
+    if not infos:
+        raise OSError(f'No se pudo resolver {host}')
+    familia, _, _, _, direccion = infos[0]
+    _resueltos[clave] = (ahora + RESOLUCION_TTL, (familia, direccion))
+    return familia, direccion
+
+
+# --- TCP ---
+
+async def comprobar_tcp(host: str, puerto: int, timeout: float) -> float:
+    """Latencia en ms de un connect TCP a host:puerto.
+
+    Levanta TimeoutError u OSError (p. ej. ConnectionRefusedError) si falla.
+    """
+    async with asyncio.timeout(timeout):
+        familia, direccion = await resolver(host, puerto)
+        sock = socket.socket(familia, socket.SOCK_STREAM)
+        try:
+            sock.setblocking(False)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+            inicio = time.perf_counter()
+            await asyncio.get_running_loop().sock_connect(sock, direccion)
+            return (time.perf_counter() - inicio) * 1000
+        finally:
+            sock.close()
+
+
+# --- ICMP ---
+
+def _checksum(datos: bytes) -> int:
+    if len(datos) % 2:
+        datos += b'\0'
+    total = sum(struct.unpack(f'!{len(datos) // 2}H', datos))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+class PingICMP:
+    """Echo ICMP con un socket compartido por familia.
+
+    Cada ping en vuelo espera en un futuro indexado por su número de
+    secuencia; el lector del socket resuelve el que corresponda a cada
+    respuesta. Debe usarse dentro de un único bucle de eventos.
+    """
+
+    # (tipo de echo request, tipo de echo reply, protocolo) por familia
+    TIPOS = {
+        socket.AF_INET: (8, 0, socket.IPPROTO_ICMP),
+        socket.AF_INET6: (128, 129, socket.IPPROTO_ICMPV6),
+    }
+
+    def __init__(self):
+        self._sockets = {}
+        self._pendientes = {}
+        self._secuencias = itertools.cycle(range(1, 0x10000))
+        self._identificador = os.getpid() & 0xffff
+
+    async def ping(self, host: str, timeout: float) -> float:
+        """Latencia en ms de un echo a `host`. Levanta TimeoutError u OSError si falla."""
+        async with asyncio.timeout(timeout):
+            familia, direccion = await resolver(host)
+            sock, raw = self._socket(familia)
+            tipo_peticion = self.TIPOS[familia][0]
+            secuencia = next(self._secuencias)
+            while secuencia in self._pendientes:
+                secuencia = next(self._secuencias)
+            cabecera = struct.pack('!BBHHH', tipo_peticion, 0, 0, self._identificador, secuencia)
+            carga = b'netmonitor'
+            paquete = cabecera[:2] + struct.pack('!H', _checksum(cabecera + carga)) + cabecera[4:] + carga
+
+            futuro = asyncio.get_running_loop().create_future()
+            self._pendientes[secuencia] = (futuro, direccion[0], raw)
+            try:
+                inicio = time.perf_counter()
+                sock.sendto(paquete, direccion)
+                await futuro
+                return (time.perf_counter() - inicio) * 1000
+            finally:
+                self._pendientes.pop(secuencia, None)
+
+    def _socket(self, familia):
+        if familia in self._sockets:
+            return self._sockets[familia]
+        protocolo = self.TIPOS[familia][2]
+        try:
+            sock, raw = socket.socket(familia, socket.SOCK_DGRAM, protocolo), False
+        except PermissionError:
+            try:
+                sock, raw = socket.socket(familia, socket.SOCK_RAW, protocolo), True
+            except PermissionError:
+                raise SondeoNoDisponibleError(
+                    'ICMP no permitido: ajusta net.ipv4.ping_group_range o da CAP_NET_RAW al proceso'
+                )
+        sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._leer, sock, familia, raw)
+        self._sockets[familia] = (sock, raw)
+        return sock, raw
+
+    def _leer(self, sock, familia, raw):
+        tipo_respuesta = self.TIPOS[familia][1]
+        while True:
+            try:
+                datos, origen = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                logger.exception('Error leyendo el socket ICMP')
+                return
+            if raw and familia == socket.AF_INET:
+                # El socket RAW de IPv4 entrega también la cabecera IP
+                datos = datos[(datos[0] & 0x0f) * 4:]
+            if len(datos) < 8:
+                continue
+            tipo, _, _, identificador, secuencia = struct.unpack('!BBHHH', datos[:8])
+            pendiente = self._pendientes.get(secuencia)
+            if tipo != tipo_respuesta or pendiente is None:
+                continue
+            futuro, destino, es_raw = pendiente
+            # Con RAW llegan las respuestas de todo el host: se filtra por identificador.
+            # Con DGRAM el núcleo reescribe el identificador y ya filtra por socket.
+            if (es_raw and identificador != self._identificador) or origen[0] != destino:
+                continue
+            if not futuro.done():
+                futuro.set_result(None)
+
+    def cerrar(self):
+        loop = asyncio.get_running_loop()
+        for sock, _ in self._sockets.values():
+            loop.remove_reader(sock.fileno())
+            sock.close()
+        self._sockets.clear()
+
+
+# --- Comprobación genérica ---
+
+def _mensaje_error(e: BaseException) -> str:
+    if isinstance(e, TimeoutError):
+        return 'Tiempo de espera agotado'
+    if isinstance(e, ConnectionRefusedError):
+        return 'Conexión rechazada'
+    return str(e) or type(e).__name__
+
+
+async def comprobar(dispositivo, timeout: float, ping: PingICMP = None) -> Resultado:
+    """Comprobar un dispositivo (tcp o icmp) sin levantar excepciones de red."""
+    instante = time.time()
+    try:
+        if dispositivo.metodo == 'icmp':
+            if ping is None:
+                raise SondeoNoDisponibleError('Comprobación ICMP sin PingICMP')
+            latencia = await ping.ping(dispositivo.host, timeout)
+        else:
+            latencia = await comprobar_tcp(dispositivo.host, dispositivo.puerto, timeout)
+        return Resultado(dispositivo.id, True, round(latencia, 3), None, instante)
+    except (OSError, TimeoutError, SondeoNoDisponibleError) as e:
+        return Resultado(dispositivo.id, False, None, _mensaje_error(e), instante)
+
+
+async def comprobar_uno(dispositivo, timeout: float = 2.0) -> Resultado:
+    """Comprobación suelta (API): crea y cierra su propio socket ICMP si hace falta."""
+    ping = PingICMP()
+    try:
+        return await comprobar(dispositivo, timeout, ping)
+    finally:
+        ping.cerrar()
+
+
+# --- Descubrimiento ---
+
+class Respuesta(NamedTuple):
+    """Destino que respondió durante un descubrimiento (puerto 0 para icmp)."""
+    host: str
+    metodo: str
+    puerto: int
+    latencia_ms: float
+
+
+class Descubrimiento(NamedTuple):
+    respuestas: list  # Respuesta, en orden de llegada
+    hosts: int        # direcciones recorridas
+    sondas: int       # sondas lanzadas (hosts x destinos)
+    segundos: float
+
+
+async def descubrir(red, puertos=(), icmp: bool = False, tasa: float = 200.0, timeout: float = 1.0,
+                    max_concurrentes: int = 256) -> Descubrimiento:
+    """Sondear las direcciones de `red` (ipaddress.ip_network) con connect TCP y/o echo ICMP.
+
+    - Cada host recibe un connect por puerto de `puertos` y, con `icmp`, un echo.
+      Un puerto cerrado (RST) o sin respuesta en `timeout` segundos no cuenta.
+    - Como mucho `tasa` sondas por segundo, repartidas a intervalos regulares
+      (la sonda n sale en el instante n / tasa, sin ráfagas), y `max_concurrentes`
+      en vuelo: con destinos lentos se espera un hueco, no se acumulan tareas.
+    - Las sondas de un host van seguidas; así los hosts se recorren en orden y
+      ninguno recibe más de len(puertos) + 1 sondas.
+
+    Levanta SondeoNoDisponibleError si se pide ICMP y el proceso no puede usarlo.
+    """
+    if tasa <= 0:
+        raise ValueError('La tasa debe ser positiva')
+    destinos = [('tcp', puerto) for puerto in puertos]
+    if icmp:
+        destinos.append(('icmp', 0))
+    loop = asyncio.get_running_loop()
+    cupo = asyncio.Semaphore(max_concurrentes)
+    ping = PingICMP() if icmp else None
+    respuestas = []
+    en_vuelo = set()
+    fallo = None
+    hosts = sondas = 0
+
+    async def una(host, metodo, puerto):
+        nonlocal fallo
+        try:
+            if metodo == 'icmp':
+                latencia = await ping.ping(host, timeout)
+            else:
+                latencia = await comprobar_tcp(host, puerto, timeout)
+        except (OSError, TimeoutError):
+            return
+        except SondeoNoDisponibleError as e:
+            fallo = e
+            return
+        finally:
+            cupo.release()
+        respuestas.append(Respuesta(host, metodo, puerto, round(latencia, 3)))
+
+    inicio = loop.time()
+    try:
+        # hosts() excluye red y broadcast (salvo en /31 y /32, donde no existen)
+        for direccion in red.hosts():
+            if fallo:
+                break
+            host = str(direccion)
+            hosts += 1
+            for metodo, puerto in destinos:
+                espera = inicio + sondas / tasa - loop.time()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                await cupo.acquire()
+                tarea = loop.create_task(una(host, metodo, puerto))
+                en_vuelo.add(tarea)
+                tarea.add_done_callback(en_vuelo.discard)
+                sondas += 1
+        if en_vuelo:
+            await asyncio.gather(*en_vuelo)
+    finally:
+        for tarea in en_vuelo:
+            tarea.cancel()
+        if ping is not None:
+            ping.cerrar()
+    if fallo:
+        raise fallo
+    return Descubrimiento(respuestas, hosts, sondas, loop.time() - inicio)
+
+
+# --- Planificador ---
+
+class Planificador:
+    """Comprueba cada dispositivo cada `intervalo_s` segundos con concurrencia acotada.
+
+    - Cola de prioridad por instante de vencimiento: el bucle duerme hasta el
+      siguiente vencimiento en lugar de recorrer la lista.
+    - Como mucho `max_concurrentes` comprobaciones en vuelo (semáforo): si la
+      red va lenta, el bucle espera un hueco en lugar de acumular tareas.
+    - La primera comprobación de cada dispositivo cae en un instante aleatorio
+      de su primer intervalo y cada intervalo varía ±`jitter` (fracción), para
+      que miles de dispositivos con el mismo intervalo no se comprueben a la vez.
+    - La siguiente comprobación se programa al terminar la actual: un
+      dispositivo nunca tiene dos en vuelo. Si el planificador va con retraso
+      se pierden vueltas en lugar de encadenarlas.
+
+    `al_resultado(resultado)` se llama en el bucle por cada comprobación.
+    """
+
+    def __init__(self, al_resultado: Callable[[Resultado], None], max_concurrentes: int = 256,
+                 timeout: float = 2.0, jitter: float = 0.1, comprobar_fn=None):
+        self.al_resultado = al_resultado
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self.jitter = jitter
+        self._comprobar = comprobar_fn or comprobar
+        self._dispositivos = {}
+        # Entradas (vencimiento, secuencia, id, versión); las de versiones viejas se ignoran.
+        # Las versiones salen de _contador: nunca se repiten, ni tras quitar y volver a añadir
+        self._cola = []
+        self._versiones = {}
+        self._contador = itertools.count()
+        self._en_vuelo = set()
+        self._cambios = asyncio.Event()
+        self._detenido = False
+        self._ping = PingICMP()
+        self._azar = random.Random()
+        # Estadísticas
+        self.comprobaciones = 0
+        self.fallos = 0
+        self.retraso_max = 0.0
+        self._retrasos = []
+
+    def __len__(self):
+        return len(self._dispositivos)
+
+    @property
+    def en_vuelo(self) -> int:
+        return len(self._en_vuelo)
+
+    def programar(self, dispositivo, primera_en: Optional[float] = None):
+        """Añadir o reemplazar un dispositivo. Su primera comprobación cae dentro de su intervalo."""
+        loop = asyncio.get_running_loop()
+        self._dispositivos[dispositivo.id] = dispositivo
+        version = next(self._contador)
+        self._versiones[dispositivo.id] = version
+        if primera_en is None:
+            primera_en = loop.time() + self._azar.uniform(0, dispositivo.intervalo_s)
+        heapq.heappush(self._cola, (primera_en, next(self._contador), dispositivo.id, version))
+        self._cambios.set()
+
+    def quitar(self, dispositivo_id):
+        """Dejar de comprobar un dispositivo (la comprobación en vuelo, si hay, termina igual)."""
+        self._dispositivos.pop(dispositivo_id, None)
+        self._versiones.pop(dispositivo_id, None)
+
+    def sincronizar(self, dispositivos):
+        """Igualar el conjunto programado a `dispositivos`.
+
+        Los que no cambiaron de destino ni de intervalo conservan su turno; los
+        nuevos o modificados se programan de nuevo y los ausentes se quitan.
+        """
+        nuevos = {d.id: d for d in dispositivos}
+        for dispositivo_id in list(self._dispositivos):
+            if dispositivo_id not in nuevos:
+                self.quitar(dispositivo_id)
+        for dispositivo_id, dispositivo in nuevos.items():
+            actual = self._dispositivos.get(dispositivo_id)
+            if actual is not None and self._mismo_destino(actual, dispositivo):
+                self._dispositivos[dispositivo_id] = dispositivo
+            else:
+                self.programar(dispositivo)
+
+    @staticmethod
+    def _mismo_destino(a, b) -> bool:
+        return (a.host, a.metodo, a.puerto, a.intervalo_s) == (b.host, b.metodo, b.puerto, b.intervalo_s)
+
+    def detener(self):
+        self._detenido = True
+        self._cambios.set()
+
+    async def ejecutar(self):
+        """Bucle principal; termina tras detener() cuando acaban las comprobaciones en vuelo."""
+        loop = asyncio.get_running_loop()
+        cupo = asyncio.Semaphore(self.max_concurrentes)
+        try:
+            while not self._detenido:
+                espera = self._siguiente_espera(loop.time())
+                if espera is None or espera > 0:
+                    self._cambios.clear()
+                    try:
+                        async with asyncio.timeout(espera):
+                            await self._cambios.wait()
+                    except TimeoutError:
+                        pass
+                    continue
+
+                vencimiento, _, dispositivo_id, version = heapq.heappop(self._cola)
+                if self._versiones.get(dispositivo_id) != version:
+                    continue
+                await cupo.acquire()
+                if self._detenido:
+                    cupo.release()
+                    break
+                tarea = loop.create_task(
+                    self._una(self._dispositivos[dispositivo_id], version, vencimiento, cupo)
+                )
+                self._en_vuelo.add(tarea)
+                tarea.add_done_callback(self._en_vuelo.discard)
+            if self._en_vuelo:
+                await asyncio.gather(*self._en_vuelo, return_exceptions=True)
+        finally:
+            self._ping.cerrar()
+
+    def _siguiente_espera(self, ahora: float):
+        """Segundos hasta el próximo vencimiento vigente (None si no hay ninguno)."""
+        while self._cola:
+            _, _, dispositivo_id, version = self._cola[0]
+            if self._versiones.get(dispositivo_id) == version:
+                return self._cola[0][0] - ahora
+            heapq.heappop(self._cola)
+        return None
+
+    async def _una(self, dispositivo, version, vencimiento, cupo):
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        retraso = inicio - vencimiento
+        try:
+            resultado = await self._comprobar(dispositivo, self.timeout, self._ping)
+        except Exception as e:
+            # Un fallo inesperado no debe sacar al dispositivo del planificador
+            logger.exception('Error comprobando el dispositivo %s', dispositivo.id)
+            resultado = Resultado(dispositivo.id, False, None, _mensaje_error(e), time.time())
+        finally:
+            cupo.release()
+        self.comprobaciones += 1
+        self.fallos += not resultado.ok
+        self.retraso_max = max(self.retraso_max, retraso)
+        if len(self._retrasos) < 100_000:
+            self._retrasos.append(retraso)
+
+        if self._versiones.get(dispositivo.id) == version:
+            intervalo = dispositivo.intervalo_s * (1 + self._azar.uniform(-self.jitter, self.jitter))
+            siguiente = vencimiento + intervalo
+            ahora = loop.time()
+            if siguiente <= ahora:
+                # Con retraso: se salta a la próxima vuelta futura en lugar de encadenar
+                siguiente = ahora + self._azar.uniform(0, dispositivo.intervalo_s * self.jitter)
+            heapq.heappush(self._cola, (siguiente, next(self._contador), dispositivo.id, version))
+            self._cambios.set()
+
+        try:
+            self.al_resultado(resultado)
+        except Exception:
+            logger.exception('Error procesando el resultado del dispositivo %s', dispositivo.id)
+
+    def retrasos(self, reiniciar: bool = False):
+        """Retrasos de arranque (s) respecto al vencimiento desde el último reinicio."""
+        retrasos = self._retrasos
+        if reiniciar:
+            self._retrasos = []
+        return retrasos
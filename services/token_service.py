@@ -0,0 +1,150 @@
+# services/token_service.py
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+
+class TokenInvalidoError(Exception):
+    """Excepción levantada cuando un token no es válido, expiró o fue revocado."""
+    pass
+
+
+class Denylist:
+    """Lista de revocación compacta en memoria (por proceso) de tokens de acceso.
+
+    Guarda jti revocados y, por usuario, el instante desde el que sus tokens
+    anteriores dejan de valer. Cada entrada caduca cuando ya no hay token vivo
+    al que pueda afectar, así la lista nunca crece más allá de los tokens en
+    circulación.
+    """
+
+    PURGA_CADA = 256  # Revocaciones entre purgas de entradas caducadas
+
+    def __init__(self):
+        self._jti = {}       # jti -> instante en que expira el token
+        self._usuarios = {}  # user_id -> (revocado desde, instante en que caduca la entrada)
+        self._lock = threading.Lock()
+        self._altas = 0
+
+    def revocar_jti(self, jti: str, expira: float):
+        with self._lock:
+            self._jti[jti] = expira
+            self._purgar_si_toca()
+
+    def revocar_usuario(self, user_id: int, caduca: float):
+        with self._lock:
+            self._usuarios[int(user_id)] = (time.time(), caduca)
+            self._purgar_si_toca()
+
+    def revocado(self, jti: str, user_id: int, emitido: float) -> bool:
+        with self._lock:
+            if jti in self._jti:
+                return True
+            entrada = self._usuarios.get(int(user_id))
+            return entrada is not None and emitido <= entrada[0]
+
+    def stats(self):
+        with self._lock:
+            return {'jti': len(self._jti), 'usuarios': len(self._usuarios)}
+
+    def _purgar_si_toca(self):
+        self._altas += 1
+        if self._altas % self.PURGA_CADA:
+            return
+        ahora = time.time()
+        self._jti = {jti: exp for jti, exp in self._jti.items() if exp > ahora}
+        self._usuarios = {uid: e for uid, e in self._usuarios.items() if e[1] > ahora}
+
+
+class TokenService:
+    """Modo de sesión sin estado: tokens firmados de acceso y de refresco.
+
+    El token de acceso lleva id, nombre, rol y estado (activo / bloqueado), así
+    que autorizar una petición no consulta la BD. Vive ACCESS_TTL segundos: es
+    el retraso máximo con el que una desactivación llega a los demás workers,
+    porque el refresco sí vuelve a leer al usuario y rechaza a los inactivos.
+
+    Los tokens de refresco no pasan por la denylist: su revocación se guarda en
+    la fila del usuario (UsuarioRepository.consumir_refresco) para que un token
+    usado o cerrado no sirva en otro worker. Hay una cadena de refresco por
+    usuario: usar un token invalida también los emitidos antes que él.
+    """
+
+    ACCESS_TTL = 300              # Segundos de vida del token de acceso
+    REFRESH_TTL = 7 * 24 * 3600   # Segundos de vida del token de refresco
+
+    def __init__(self, secret_key: str = None):
+        self.denylist = Denylist()
+        # Sin clave propia se usa la de la app Flask en curso; el modo asyncio
+        # (asgi.py) la fija aquí porque no corre dentro de un contexto de Flask
+        self.secret_key = secret_key
+
+    def emitir(self, user: dict) -> dict:
+        """Emite un par acceso/refresco para un usuario (dict de Usuario.to_dict())."""
+        ahora = time.time()
+        bloqueado = user.get('bloqueado_hasta')
+        if isinstance(bloqueado, str):
+            bloqueado = datetime.fromisoformat(bloqueado)
+        acceso = {
+            'sub': user['id'],
+            'nom': user.get('nombre'),
+            'rol': user.get('rol_id'),
+            'act': bool(user.get('activo')),
+            # bloqueado_hasta se guarda en UTC sin zona horaria
+            'blq': bloqueado.replace(tzinfo=timezone.utc).timestamp() if bloqueado else None,
+            'iat': ahora,
+            'jti': uuid.uuid4().hex,
+        }
+        refresco = {'sub': user['id'], 'iat': ahora, 'jti': uuid.uuid4().hex}
+        return {
+            'access_token': self._serializer('access').dumps(acceso),
+            'refresh_token': self._serializer('refresh').dumps(refresco),
+            'token_type': 'Bearer',
+            'expires_in': self.ACCESS_TTL,
+        }
+
+    def verificar_acceso(self, token: str) -> dict:
+        """Valida firma, caducidad, revocación y estado del usuario. Devuelve los claims."""
+        claims = self._cargar(token, 'access', self.ACCESS_TTL)
+        if not claims.get('act'):
+            raise TokenInvalidoError('Usuario inactivo')
+        if claims.get('blq') and claims['blq'] > time.time():
+            raise TokenInvalidoError('Usuario bloqueado')
+        return claims
+
+    def verificar_refresco(self, token: str) -> dict:
+        """Valida firma y caducidad de un token de refresco (estado del usuario y
+        revocación los comprueba quien refresca, con la fila del usuario)."""
+        return self._cargar(token, 'refresh', self.REFRESH_TTL)
+
+    def revocar(self, claims: dict):
+        """Revoca en este proceso un token de acceso concreto (logout)."""
+        self.denylist.revocar_jti(claims['jti'], claims['iat'] + self.ACCESS_TTL)
+
+    def revocar_usuario(self, user_id: int):
+        """Invalida en este proceso todos los tokens de acceso ya emitidos al usuario."""
+        self.denylist.revocar_usuario(user_id, time.time() + self.ACCESS_TTL)
+
+    def _cargar(self, token: str, tipo: str, max_age: int) -> dict:
+        try:
+            claims = self._serializer(tipo).loads(token, max_age=max_age)
+        except SignatureExpired:
+            raise TokenInvalidoError('Token expirado')
+        except BadSignature:
+            raise TokenInvalidoError('Token inválido')
+        # Solo los tokens de acceso: el refresco lee al usuario, que guarda su revocación
+        if tipo == 'access' and self.denylist.revocado(claims['jti'], claims['sub'], claims['iat']):
+            raise TokenInvalidoError('Token revocado')
+        return claims
+
+    def _serializer(self, tipo: str) -> URLSafeTimedSerializer:
+        # La sal separa ambos tipos: un token de refresco no sirve como acceso
+        return URLSafeTimedSerializer(self.secret_key or current_app.secret_key, salt=f'netmonitor-{tipo}-token')
+
+
+# Instancia compartida por todo el proceso (la denylist es por worker)
+token_service = TokenService()
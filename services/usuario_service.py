@@ -1,79 +1,120 @@
 # services/usuario_service.py
 from repositories.usuario_repository import UsuarioRepository
 from models.usuario import Usuario
+from services.password_service import password_service, HasherSaturadoError
+from services.roles_service import roles_cache
+from services.token_service import token_service, TokenInvalidoError
 from datetime import datetime, timedelta
+import csv
+import io
+import json
 import re
+import time
 
 
 class UsuarioService:
+    # Datos relacionados que los listados pueden incluir (?include=rol)
+    EXPANSIONES = ('rol',)
+
     def __init__(self):
         self.usuario_repository = UsuarioRepository()
+        self.password_service = password_service
+        self.token_service = token_service
         self.MAX_INTENTOS_FALLIDOS = 5
         self.TIEMPO_BLOQUEO_MINUTOS = 30
+        self.PAGE_SIZE = 50
+        self.MAX_PAGE_SIZE = 200
+        self.MAX_IMPORT_ROWS = 10000
 
     def authenticate_user(self, username_or_email, password):
         """Autenticar usuario con credenciales (nombre o email).
-        Maneja bloqueos por intentos fallidos."""
+        Maneja bloqueos por intentos fallidos.
+
+        Hace como máximo dos consultas: la búsqueda del usuario y un único
+        UPDATE atómico que actualiza contador, bloqueo y último acceso."""
         try:
             usuario = self.usuario_repository.find_by_username_or_email(username_or_email)
-
-            if not usuario:
-                return {'success': False, 'message': 'Usuario no encontrado', 'user': None}
-
-            # Verificar si el usuario está activo
-            if not usuario.activo:
-                return {'success': False, 'message': 'Usuario inactivo. Contacta al administrador', 'user': None}
-
-            # Verificar si el usuario está bloqueado
-            if usuario.bloqueado_hasta:
-                if datetime.utcnow() < usuario.bloqueado_hasta:
-                    tiempo_restante = (usuario.bloqueado_hasta - datetime.utcnow()).seconds // 60
-                    return {
-                        'success': False,
-                        'message': f'Usuario bloqueado. Intenta en {tiempo_restante} minutos',
-                        'user': None
-                    }
-                else:
-                    # Desbloquear si ya pasó el tiempo
-                    self.usuario_repository.desbloquear_usuario(usuario.id)
-                    usuario.intentos_fallidos = 0
-                    usuario.bloqueado_hasta = None
+            ahora = datetime.utcnow()
+            rechazo = self._rechazo_login(usuario, ahora)
+            if rechazo:
+                return rechazo
 
             # Verificar contraseña
-            if usuario.verify_password(password):
-                # Login exitoso: resetear intentos fallidos y actualizar último acceso
-                self.usuario_repository.update_intentos_fallidos(usuario.id, 0)
-                self.usuario_repository.update_ultimo_acceso(usuario.id)
-                
-                return {
-                    'success': True,
-                    'message': f'Bienvenido {usuario.nombre}',
-                    'user': usuario.to_dict()
-                }
+            if self.password_service.verificar(usuario, password):
+                # Login exitoso: resetear intentos, desbloquear y actualizar último acceso.
+                # Si el hash es legacy o de otro coste, se re-hashea en el mismo UPDATE.
+                nuevo_hash = self._rehash_si_necesario(usuario, password)
+                self.usuario_repository.registrar_login_exitoso(usuario.id, ahora, nuevo_hash)
+                return self._login_exitoso(usuario, ahora)
+
+            # Contraseña incorrecta: incrementar intentos fallidos (y bloquear si toca)
+            bloqueo_hasta = ahora + timedelta(minutes=self.TIEMPO_BLOQUEO_MINUTOS)
+            intentos = self.usuario_repository.registrar_login_fallido(
+                usuario.id, self.MAX_INTENTOS_FALLIDOS, bloqueo_hasta, ahora
+            )
+            return self._login_fallido(intentos)
+
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'user': None, 'status': 503}
+        except Exception as e:
+            return {'success': False, 'message': f'Error en la autenticación: {str(e)}', 'user': None}
 
-            # Contraseña incorrecta: incrementar intentos fallidos
-            intentos = (usuario.intentos_fallidos or 0) + 1
-            self.usuario_repository.update_intentos_fallidos(usuario.id, intentos)
+    def _rechazo_login(self, usuario, ahora):
+        """Respuesta de error si el usuario no puede iniciar sesión antes de verificar la contraseña."""
+        if not usuario:
+            return {'success': False, 'message': 'Usuario no encontrado', 'user': None}
 
-            if intentos >= self.MAX_INTENTOS_FALLIDOS:
-                # Bloquear usuario
-                bloqueado_hasta = datetime.utcnow() + timedelta(minutes=self.TIEMPO_BLOQUEO_MINUTOS)
-                self.usuario_repository.bloquear_usuario(usuario.id, bloqueado_hasta)
-                return {
-                    'success': False,
-                    'message': f'Usuario bloqueado por {self.TIEMPO_BLOQUEO_MINUTOS} minutos debido a múltiples intentos fallidos',
-                    'user': None
-                }
+        # Verificar si el usuario está activo
+        if not usuario.activo:
+            return {'success': False, 'message': 'Usuario inactivo. Contacta al administrador', 'user': None}
 
-            intentos_restantes = self.MAX_INTENTOS_FALLIDOS - intentos
+        # Verificar si el usuario está bloqueado (un bloqueo expirado se limpia en el UPDATE)
+        if usuario.bloqueado_hasta and ahora < usuario.bloqueado_hasta:
+            tiempo_restante = (usuario.bloqueado_hasta - ahora).seconds // 60
+            return {
+                'success': False,
+                'message': f'Usuario bloqueado. Intenta en {tiempo_restante} minutos',
+                'user': None
+            }
+        return None
+
+    @staticmethod
+    def _login_exitoso(usuario, ahora):
+        usuario.intentos_fallidos = 0
+        usuario.bloqueado_hasta = None
+        usuario.ultimo_acceso = ahora
+        return {
+            'success': True,
+            'message': f'Bienvenido {usuario.nombre}',
+            'user': usuario.to_dict()
+        }
+
+    def _login_fallido(self, intentos):
+        if intentos >= self.MAX_INTENTOS_FALLIDOS:
             return {
                 'success': False,
-                'message': f'Contraseña incorrecta. {intentos_restantes} intentos restantes',
+                'message': f'Usuario bloqueado por {self.TIEMPO_BLOQUEO_MINUTOS} minutos debido a múltiples intentos fallidos',
                 'user': None
             }
 
-        except Exception as e:
-            return {'success': False, 'message': f'Error en la autenticación: {str(e)}', 'user': None}
+        intentos_restantes = self.MAX_INTENTOS_FALLIDOS - intentos
+        return {
+            'success': False,
+            'message': f'Contraseña incorrecta. {intentos_restantes} intentos restantes',
+            'user': None
+        }
+
+    def _rehash_si_necesario(self, usuario, password):
+        """Devuelve un hash nuevo con el coste actual si el almacenado está desfasado.
+
+        Si el pool de bcrypt está saturado se omite: el login no debe fallar por
+        la migración, se reintentará en el siguiente acceso."""
+        if not usuario.needs_rehash():
+            return None
+        try:
+            return self.password_service.hashear(password)
+        except HasherSaturadoError:
+            return None
 
     def get_user_by_id(self, user_id):
         """Obtener usuario por ID"""
@@ -85,6 +126,78 @@ class UsuarioService:
         except Exception as e:
             return {'success': False, 'message': f'Error al obtener usuario: {str(e)}'}
 
+    def refresh_tokens(self, refresh_token: str):
+        """Canjear un token de refresco por un par nuevo (modo de sesión por tokens).
+
+        Es el único punto del modo por tokens que lee al usuario: un usuario
+        desactivado, bloqueado o eliminado ya no obtiene tokens nuevos. El token
+        de refresco usado se revoca en la BD (rotación), para todos los workers."""
+        try:
+            claims = self.token_service.verificar_refresco(refresh_token)
+            usuario = self.usuario_repository.find_by_id(claims['sub'])
+            return self._rotar_tokens(claims, usuario)
+        except TokenInvalidoError as e:
+            return {'success': False, 'message': str(e), 'status': 401}
+        except Exception as e:
+            return {'success': False, 'message': f'Error al refrescar la sesión: {str(e)}'}
+
+    def _rotar_tokens(self, claims, usuario):
+        """Revoca el token de refresco usado y emite un par nuevo si el usuario sigue habilitado."""
+        rechazo = self._rechazo_refresco(usuario)
+        if rechazo:
+            return rechazo
+        if not self.usuario_repository.consumir_refresco(usuario.id, claims['iat']):
+            return {'success': False, 'message': 'Token revocado', 'status': 401}
+        return {'success': True, 'tokens': self.token_service.emitir(usuario.to_dict())}
+
+    @staticmethod
+    def _rechazo_refresco(usuario):
+        """Respuesta de error si el usuario ya no puede refrescar; None si puede."""
+        if not usuario:
+            return {'success': False, 'message': 'Usuario no encontrado', 'status': 401}
+        if not usuario.activo:
+            return {'success': False, 'message': 'Usuario inactivo. Contacta al administrador', 'status': 401}
+        if usuario.bloqueado_hasta and datetime.utcnow() < usuario.bloqueado_hasta:
+            return {'success': False, 'message': 'Usuario bloqueado', 'status': 401}
+        return None
+
+    def cerrar_refresco(self, refresh_token: str):
+        """Logout: revoca un token de refresco (y los anteriores del usuario) en todos los workers.
+
+        Levanta TokenInvalidoError si el token no es válido."""
+        claims = self.token_service.verificar_refresco(refresh_token)
+        self.usuario_repository.consumir_refresco(claims['sub'], claims['iat'])
+
+    def version_listado(self, include_rol: bool = False):
+        """Validador barato de los listados de usuarios (sin consultar la BD).
+
+        Con `include_rol` la respuesta lleva nombres de rol: cambia también
+        cuando se edita un rol.
+        """
+        token, modificado = self.usuario_repository.version()
+        if not include_rol:
+            return token, modificado
+        generation = roles_cache.generation
+        return f"{token}+{generation.ensure()}", max(modificado or 0.0, generation.modified() or 0.0)
+
+    def parse_include(self, valor: str) -> set:
+        """Expansiones pedidas en ?include= (o ?expand=), separadas por comas.
+
+        Levanta ValueError si alguna no existe.
+        """
+        pedidas = {parte.strip().lower() for parte in (valor or '').split(',') if parte.strip()}
+        desconocidas = pedidas - set(self.EXPANSIONES)
+        if desconocidas:
+            raise ValueError(
+                f"include no soportado: {', '.join(sorted(desconocidas))} "
+                f"(disponibles: {', '.join(self.EXPANSIONES)})"
+            )
+        return pedidas
+
+    def version_usuario(self, user_id):
+        """Validador barato de un usuario concreto (sin consultar la BD)."""
+        return self.usuario_repository.version_usuario(user_id)
+
     def create_user(self, nombre, email, plain_password, rol_id: int = None):
         """Crear nuevo usuario. Hashea la contraseña y genera uuid."""
         try:
@@ -106,18 +219,132 @@ class UsuarioService:
             if rol_id is None:
                 rol_id = 2
 
-            nuevo_usuario = Usuario.new_from_plain_password(nombre, email, plain_password, rol_id)
+            password_hash = self.password_service.hashear(plain_password)
+            nuevo_usuario = Usuario.new_from_hash(nombre, email, password_hash, rol_id)
             user_id = self.usuario_repository.create_user(nuevo_usuario)
 
             return {'success': True, 'message': 'Usuario creado exitosamente', 'user_id': user_id}
 
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'status': 503}
         except Exception as e:
             return {'success': False, 'message': f'Error al crear usuario: {str(e)}'}
             
-    def get_all_users(self):
+    def import_users(self, filas):
+        """Importar usuarios en bloque.
+
+        Valida cada fila con las reglas de alta, detecta duplicados (dentro del
+        archivo y contra la BD con consultas por conjuntos), hashea en paralelo
+        e inserta con executemany por bloques. Informa errores por fila
+        (numeradas desde 1) y el throughput."""
+        try:
+            inicio = time.perf_counter()
+            if len(filas) > self.MAX_IMPORT_ROWS:
+                return {
+                    'success': False,
+                    'message': f'Máximo {self.MAX_IMPORT_ROWS} usuarios por importación',
+                    'status': 413
+                }
+
+            errores = []
+            candidatos = []
+            nombres_vistos, emails_vistos = set(), set()
+            for numero, fila in enumerate(filas, start=1):
+                if not isinstance(fila, dict):
+                    errores.append({'fila': numero, 'message': 'Formato de fila inválido'})
+                    continue
+                nombre = fila.get('nombre') or fila.get('nombre_usuario') or fila.get('username') or ''
+                email = fila.get('email') or fila.get('correo_electronico') or ''
+                password = fila.get('contrasena') or fila.get('password') or ''
+                # JSON admite números, listas u objetos en cualquier campo
+                if not all(isinstance(valor, str) for valor in (nombre, email, password)):
+                    errores.append({'fila': numero, 'message': 'Nombre, email y contraseña deben ser texto'})
+                    continue
+                nombre, email = nombre.strip(), email.strip()
+                try:
+                    rol_id = int(fila.get('rol_id') or 2)
+                except (TypeError, ValueError):
+                    errores.append({'fila': numero, 'message': 'rol_id inválido'})
+                    continue
+
+                validacion = self._validar_datos_usuario(nombre, email, password)
+                if not validacion['valid']:
+                    errores.append({'fila': numero, 'message': validacion['message']})
+                    continue
+                if nombre.lower() in nombres_vistos:
+                    errores.append({'fila': numero, 'message': 'Nombre de usuario repetido en el archivo'})
+                    continue
+                if email.lower() in emails_vistos:
+                    errores.append({'fila': numero, 'message': 'Email repetido en el archivo'})
+                    continue
+                nombres_vistos.add(nombre.lower())
+                emails_vistos.add(email.lower())
+                candidatos.append((numero, nombre, email, password, rol_id))
+
+            # Duplicados contra la BD: una consulta por bloque, no dos por fila
+            if candidatos:
+                nombres_bd, emails_bd = self.usuario_repository.find_existing(
+                    [c[1] for c in candidatos], [c[2] for c in candidatos]
+                )
+                nuevos = []
+                for candidato in candidatos:
+                    numero, nombre, email = candidato[:3]
+                    if nombre.lower() in nombres_bd:
+                        errores.append({'fila': numero, 'message': 'El nombre de usuario ya existe'})
+                    elif email.lower() in emails_bd:
+                        errores.append({'fila': numero, 'message': 'El email ya está registrado'})
+                    else:
+                        nuevos.append(candidato)
+                candidatos = nuevos
+
+            insertados = 0
+            if candidatos:
+                hashes = self.password_service.hashear_lote([c[3] for c in candidatos])
+                usuarios = [
+                    Usuario.new_from_hash(nombre, email, password_hash, rol_id)
+                    for (_, nombre, email, _, rol_id), password_hash in zip(candidatos, hashes)
+                ]
+                insertados, errores_bd = self.usuario_repository.bulk_create_users(usuarios)
+                for posicion, error in errores_bd.items():
+                    errores.append({'fila': candidatos[posicion][0], 'message': f'Error al insertar: {error}'})
+
+            segundos = time.perf_counter() - inicio
+            errores.sort(key=lambda e: e['fila'])
+            return {
+                'success': True,
+                'message': f'{insertados} de {len(filas)} usuarios importados',
+                'total': len(filas),
+                'insertados': insertados,
+                'errores': errores,
+                'segundos': round(segundos, 3),
+                'filas_por_segundo': round(len(filas) / segundos, 1) if segundos > 0 else None
+            }
+
+        except Exception as e:
+            return {'success': False, 'message': f'Error al importar usuarios: {str(e)}'}
+
+    @staticmethod
+    def parse_import(contenido: str, formato: str):
+        """Convertir un archivo CSV o JSON en una lista de filas (dict).
+
+        CSV: cabecera con nombre, email, contrasena y rol_id (se aceptan los
+        alias nombre_usuario, correo_electronico y password). JSON: una lista
+        de objetos o {"users": [...]}. Levanta ValueError si no se puede leer."""
+        if formato == 'csv':
+            return list(csv.DictReader(io.StringIO(contenido)))
+        if formato == 'json':
+            datos = json.loads(contenido)
+            if isinstance(datos, dict):
+                datos = datos.get('users')
+            if not isinstance(datos, list):
+                raise ValueError('El JSON debe ser una lista de usuarios o {"users": [...]}')
+            return datos
+        raise ValueError('Formato no soportado (usa csv o json)')
+
+    def get_all_users(self, include_rol: bool = False):
         """Obtener lista de todos los usuarios"""
         try:
-            users = self.usuario_repository.get_all_users()
+            users = self.usuario_repository.get_all_users(include_rol)
             return {
                 'success': True,
                 'users': [user.to_dict() for user in users],
@@ -145,7 +372,7 @@ class UsuarioService:
                 validacion = self._validar_contrasena(data['password'])
                 if not validacion['valid']:
                     return {'success': False, 'message': validacion['message']}
-                update_data['password_hash'] = Usuario.hash_password(data['password'])
+                update_data['password_hash'] = self.password_service.hashear(data['password'])
                 
             # Si se intenta cambiar nombre, verificar que no exista
             if 'nombre' in data and data['nombre'] != user.nombre:
@@ -184,6 +411,9 @@ class UsuarioService:
             # Intentar actualizar
             updated = self.usuario_repository.update_user(user_id, update_data)
             if updated:
+                if {'rol_id', 'activo', 'password_hash'} & update_data.keys():
+                    # Los tokens de acceso llevan rol y estado: que no sigan valiendo
+                    self.token_service.revocar_usuario(user_id)
                 return {
                     'success': True,
                     'message': 'Usuario actualizado correctamente'
@@ -193,6 +423,8 @@ class UsuarioService:
                 'message': 'No se pudo actualizar el usuario'
             }
             
+        except HasherSaturadoError as e:
+            return {'success': False, 'message': str(e), 'status': 503}
         except Exception as e:
             return {
                 'success': False,
@@ -219,6 +451,7 @@ class UsuarioService:
             # Intentar eliminar
             deleted = self.usuario_repository.delete_user(user_id)
             if deleted:
+                self.token_service.revocar_usuario(user_id)
                 return {
                     'success': True,
                     'message': 'Usuario eliminado correctamente'
@@ -234,10 +467,11 @@ class UsuarioService:
                 'message': f'Error al eliminar usuario: {str(e)}'
             }
 
-    def search_users(self, search_term: str = None, rol_id: int = None, activo: bool = None):
+    def search_users(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                     include_rol: bool = False):
         """Buscar usuarios con filtros opcionales"""
         try:
-            users = self.usuario_repository.search_users(search_term, rol_id, activo)
+            users = self.usuario_repository.search_users(search_term, rol_id, activo, include_rol=include_rol)
             return {
                 'success': True,
                 'users': [user.to_dict() for user in users],
@@ -249,6 +483,89 @@ class UsuarioService:
                 'message': f'Error al buscar usuarios: {str(e)}'
             }
 
+    def get_users_page(self, search_term: str = None, rol_id: int = None, activo: bool = None,
+                       limit: int = None, cursor: str = None, include_total: bool = False,
+                       include_rol: bool = False, serializar: bool = True):
+        """Obtener una página de usuarios (paginación por cursor).
+
+        Con `include_rol` cada usuario lleva `rol` ({id, nombre, descripcion})
+        resuelto en la misma consulta. Con `serializar=False` 'users' queda
+        como lista de Usuario, para escribir la respuesta con listado_json.
+        """
+        try:
+            limit = self.PAGE_SIZE if limit is None else max(1, min(limit, self.MAX_PAGE_SIZE))
+            users, next_cursor = self.usuario_repository.get_users_page(
+                search_term, rol_id, activo, limit, cursor, include_rol
+            )
+            result = {
+                'success': True,
+                'users': [user.to_dict() for user in users] if serializar else users,
+                'count': len(users),
+                'next_cursor': next_cursor
+            }
+            if include_total:
+                # Aproximado y solo sin filtros: un COUNT(*) filtrado escanearía la tabla
+                filtrado = search_term or rol_id is not None or activo is not None
+                result['approx_total'] = None if filtrado else self.usuario_repository.approx_count()
+            return result
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'status': 400}
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Error al obtener usuarios: {str(e)}'
+            }
+
+    @staticmethod
+    def listado_json(result):
+        """Cuerpo de respuesta de get_users_page(serializar=False).
+
+        Si salió bien, el texto JSON que daría jsonify con los usuarios en
+        dicts, pero escrito directamente desde los Usuario (Usuario.lista_json).
+        Si no, el mismo dict de error.
+        """
+        if not result['success']:
+            return result
+        partes = [
+            f'{json.dumps(clave)}:'
+            + (Usuario.lista_json(valor) if clave == 'users'
+               else json.dumps(valor, sort_keys=True, separators=(',', ':')))
+            for clave, valor in sorted(result.items())
+        ]
+        return '{' + ','.join(partes) + '}\n'
+
+    def export_users(self, formato: str, search_term: str = None, rol_id: int = None, activo: bool = None):
+        """Generar la exportación de usuarios ('ndjson' o 'csv') trozo a trozo.
+
+        Devuelve un generador de cadenas pensado para una respuesta en streaming:
+        cada trozo corresponde a un lote leído del cursor sin buffer."""
+        lotes = self.usuario_repository.iter_users(search_term, rol_id, activo)
+        columnas = UsuarioRepository.LIST_COLUMNS
+        if formato == 'csv':
+            return self._export_csv(columnas, lotes)
+        return self._export_ndjson(columnas, lotes)
+
+    @staticmethod
+    def _export_ndjson(columnas, lotes):
+        for filas in lotes:
+            yield ''.join(
+                json.dumps(dict(zip(columnas, fila)), default=_valor_exportable, ensure_ascii=False) + '\n'
+                for fila in filas
+            )
+
+    @staticmethod
+    def _export_csv(columnas, lotes):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # La cabecera sale antes de ejecutar la consulta: el primer byte es inmediato
+        writer.writerow(columnas)
+        yield buffer.getvalue()
+        for filas in lotes:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_valor_exportable(valor) for valor in fila] for fila in filas)
+            yield buffer.getvalue()
+
     def toggle_user_status(self, user_id: int):
         """Activar o desactivar un usuario"""
         try:
@@ -259,6 +576,9 @@ class UsuarioService:
             nuevo_estado = self.usuario_repository.toggle_activo(user_id)
             
             if nuevo_estado is not None:
+                if not nuevo_estado:
+                    # Inmediato en este worker; en los demás al caducar el token de acceso
+                    self.token_service.revocar_usuario(user_id)
                 estado_texto = 'activado' if nuevo_estado else 'desactivado'
                 return {
                     'success': True,
@@ -335,4 +655,13 @@ class UsuarioService:
             return {'valid': False, 'message': 'La contraseña debe tener al menos 6 caracteres'}
         if len(password) > 100:
             return {'valid': False, 'message': 'La contraseña es demasiado larga'}
-        return {'valid': True}
\ No newline at end of file
+        return {'valid': True}
+
+
+def _valor_exportable(valor):
+    """Fechas en ISO 8601 para la exportación (JSON y CSV)."""
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if valor is None or isinstance(valor, (int, float, str)):
+        return valor
+    return str(valor)
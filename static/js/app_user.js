@@ -43,16 +43,115 @@ app.config(function ($routeProvider, $locationProvider) {
     })
 })
 
+// ========================================
+// GET CONDICIONAL (ETag / 304)
+// ========================================
+// Guarda la última respuesta de cada URL con su ETag y la revalida con
+// If-None-Match: si el servidor responde 304 se reutiliza la copia guardada.
+app.factory("cachedGet", ["$http", "$q", function($http, $q) {
+    const MAX_ENTRIES = 50
+    const entries = new Map()
+
+    return function(url, config = {}) {
+        const key = url + '?' + JSON.stringify(config.params || {})
+        const cached = entries.get(key)
+        const headers = Object.assign({}, config.headers)
+        if (cached) headers['If-None-Match'] = cached.etag
+
+        return $http.get(url, Object.assign({}, config, { headers: headers }))
+        .then(function(response) {
+            const etag = response.headers('ETag')
+            entries.delete(key)
+            if (etag) {
+                entries.set(key, { etag: etag, data: response.data })
+                // Map conserva el orden de inserción: la primera es la más antigua
+                if (entries.size > MAX_ENTRIES) entries.delete(entries.keys().next().value)
+            }
+            return response
+        })
+        .catch(function(response) {
+            if (response.status === 304 && cached) {
+                // Copia: los controladores pueden modificar lo que reciben
+                return { data: angular.copy(cached.data), status: 200, headers: response.headers, notModified: true }
+            }
+            return $q.reject(response)
+        })
+    }
+}])
+
+// ========================================
+// EVENTOS EN VIVO DE DISPOSITIVOS (SSE)
+// ========================================
+// Una sola conexión EventSource compartida por las vistas abiertas: se abre
+// con el primer suscriptor y se cierra con el último. Si se corta, el
+// navegador reconecta solo con Last-Event-ID y el servidor repite lo perdido
+// (o envía 'reset' si fue demasiado). Si el servidor la rechaza (503: sin
+// hueco para más clientes en vivo) el navegador no reintenta: se vuelve a
+// abrir pasado REOPEN_MS y, mientras tanto, las vistas sondean.
+app.factory("deviceEvents", ["$rootScope", function($rootScope) {
+    const supported = 'EventSource' in window
+    const REOPEN_MS = 60000
+    const listeners = new Set()
+    let source = null
+    let reopenTimer = null
+
+    function dispatch(type, data) {
+        $rootScope.$applyAsync(function() {
+            listeners.forEach(function(listener) {
+                if (listener[type]) listener[type](data)
+            })
+        })
+    }
+
+    function open() {
+        if (source || !supported) return
+        source = new EventSource('/api/dispositivos/eventos', { withCredentials: true })
+        source.addEventListener('transicion', function(e) { dispatch('transicion', JSON.parse(e.data)) })
+        source.addEventListener('contadores', function(e) { dispatch('contadores', JSON.parse(e.data)) })
+        source.addEventListener('reset', function() { dispatch('reset') })
+        source.onopen = function() { dispatch('conexion', true) }
+        source.onerror = function() {
+            dispatch('conexion', false)
+            if (source && source.readyState === EventSource.CLOSED) {
+                source = null
+                reopenTimer = setTimeout(function() {
+                    reopenTimer = null
+                    if (listeners.size) open()
+                }, REOPEN_MS)
+            }
+        }
+    }
+
+    return {
+        supported: supported,
+        // listener: { transicion(evento), contadores(c), reset(), conexion(abierta) }
+        subscribe: function(listener) {
+            listeners.add(listener)
+            open()
+            return function() {
+                listeners.delete(listener)
+                if (listeners.size) return
+                if (source) {
+                    source.close()
+                    source = null
+                }
+                clearTimeout(reopenTimer)
+                reopenTimer = null
+            }
+        }
+    }
+}])
+
 // ========================================
 // CONFIGURACIÓN GLOBAL Y AUTENTICACIÓN
 // ========================================
-app.run(["$rootScope", "$http", "$location", function($rootScope, $http, $location) {
+app.run(["$rootScope", "$http", "$location", "cachedGet", function($rootScope, $http, $location, cachedGet) {
     $rootScope.currentUser = null
     $rootScope.loggedIn = false
 
     // Obtener usuario actual
     $rootScope.getCurrentUser = function() {
-        return $http.get('/api/user/current')
+        return cachedGet('/api/user/current')
         .then(function(response) {
             if (response.data.success) {
                 $rootScope.currentUser = response.data.user
@@ -181,7 +280,7 @@ app.controller("loginCtrl", function ($scope, $http, $rootScope, $location) {
 // ========================================
 // CONTROLLER: GESTIÓN DE USUARIOS
 // ========================================
-app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
+app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout, cachedGet) {
     // Inicialización de variables de estado
     $scope.users = []
     $scope.loading = true
@@ -195,26 +294,46 @@ app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
     let userModal = null
     
     // ========================================
-    // CARGAR USUARIOS
+    // CARGAR USUARIOS (paginación por cursor)
     // ========================================
-    function loadUsers(showLoading = true) {
-        if (showLoading) $scope.loading = true
-        
+    const PAGE_SIZE = 50
+    let nextCursor = null
+    let loadSeq = 0   // descarta respuestas de cargas anteriores a un cambio de filtros
+
+    $scope.hasMore = false
+    $scope.loadingMore = false
+    $scope.approxTotal = null
+
+    function buildParams() {
         // Construir query params para filtros
-        let params = {}
+        let params = { limit: PAGE_SIZE }
         if ($scope.searchText) params.search = $scope.searchText
         if ($scope.filterRol) params.rol_id = $scope.filterRol
         if ($scope.filterActivo !== "") params.activo = $scope.filterActivo
+        return params
+    }
+
+    function loadUsers(showLoading = true) {
+        if (showLoading) $scope.loading = true
+        const seq = ++loadSeq
+        
+        let params = buildParams()
+        params.total = true
+        params.include = 'rol'   // nombre del rol en la misma respuesta (JOIN en el servidor)
         
-        $http.get('/api/users', { 
+        cachedGet('/api/users', { 
             params: params,
             withCredentials: true 
         })
         .then(function(response) {
+            if (seq !== loadSeq) return
             if (response.data.success) {
                 $scope.users = response.data.users
+                $scope.approxTotal = response.data.approx_total || null
+                nextCursor = response.data.next_cursor
+                $scope.hasMore = !!nextCursor
                 if (!showLoading) {
-                    toast(`${response.data.count} usuarios encontrados`, 2)
+                    toast(`${response.data.count}${$scope.hasMore ? '+' : ''} usuarios encontrados`, 2)
                 }
             } else {
                 toast(response.data.message || 'Error al cargar usuarios', 3)
@@ -224,8 +343,62 @@ app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
             toast('Error al cargar usuarios: ' + (error.data?.message || error.statusText), 3)
         })
         .finally(function() {
-            $scope.loading = false
+            if (seq === loadSeq) $scope.loading = false
+        })
+    }
+
+    $scope.loadMore = function() {
+        if (!$scope.hasMore || $scope.loadingMore || $scope.loading) return
+        $scope.loadingMore = true
+        const seq = loadSeq
+
+        let params = buildParams()
+        params.cursor = nextCursor
+        params.include = 'rol'
+
+        cachedGet('/api/users', { params: params, withCredentials: true })
+        .then(function(response) {
+            if (seq !== loadSeq) return
+            if (response.data.success) {
+                $scope.users = $scope.users.concat(response.data.users)
+                nextCursor = response.data.next_cursor
+                $scope.hasMore = !!nextCursor
+            } else {
+                toast(response.data.message || 'Error al cargar usuarios', 3)
+            }
+        })
+        .catch(function(error) {
+            toast('Error al cargar usuarios: ' + (error.data?.message || error.statusText), 3)
         })
+        .finally(function() {
+            $scope.loadingMore = false
+        })
+    }
+
+    // Exportación en streaming con los filtros actuales
+    $scope.exportUrl = function(format) {
+        let params = buildParams()
+        delete params.limit
+        params.format = format
+        const query = Object.keys(params).map(function(key) {
+            return encodeURIComponent(key) + '=' + encodeURIComponent(params[key])
+        }).join('&')
+        return '/api/users/export?' + query
+    }
+
+    // Carga la siguiente página cuando el final de la tabla entra en pantalla
+    function initInfiniteScroll() {
+        if (!('IntersectionObserver' in window)) return
+        const observer = new IntersectionObserver(function(entries) {
+            if (entries.some(function(entry) { return entry.isIntersecting })) {
+                $scope.$applyAsync($scope.loadMore)
+            }
+        })
+        $timeout(function() {
+            const sentinel = document.getElementById('usersPageEnd')
+            if (sentinel) observer.observe(sentinel)
+        })
+        $scope.$on('$destroy', function() { observer.disconnect() })
     }
     
     // ========================================
@@ -427,11 +600,13 @@ app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
     // ========================================
     // HELPER: BADGE DE ROL Y ESTADO
     // ========================================
-    $scope.getRolBadge = function(rol_id) {
-        switch(parseInt(rol_id)) {
-            case 1: return { text: 'Admin', class: 'bg-primary' }
-            case 2: return { text: 'Usuario', class: 'bg-success' }
-            default: return { text: 'N/A', class: 'bg-secondary' }
+    $scope.getRolBadge = function(user) {
+        // El nombre llega en user.rol (include=rol); el color sigue dependiendo del id
+        const nombre = user.rol && user.rol.nombre
+        switch(parseInt(user.rol_id)) {
+            case 1: return { text: nombre || 'Admin', class: 'bg-primary' }
+            case 2: return { text: nombre || 'Usuario', class: 'bg-success' }
+            default: return { text: nombre || 'N/A', class: 'bg-secondary' }
         }
     }
 
@@ -445,6 +620,7 @@ app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
     // INICIALIZACIÓN
     // ========================================
     initModal()
+    initInfiniteScroll()
     loadUsers()
     activeMenuOption("#/users")
 })
@@ -452,7 +628,7 @@ app.controller("usersCtrl", function ($scope, $http, $rootScope, $timeout) {
 // ========================================
 // CONTROLLER: GESTIÓN DE ROLES
 // ========================================
-app.controller("rolesCtrl", function ($scope, $http, $rootScope, $timeout) {
+app.controller("rolesCtrl", function ($scope, $http, $rootScope, $timeout, cachedGet) {
     $scope.roles = []
     $scope.loading = true
     $scope.saving = false
@@ -483,7 +659,7 @@ app.controller("rolesCtrl", function ($scope, $http, $rootScope, $timeout) {
     function loadRoles(showLoading = true) {
         if (showLoading) $scope.loading = true
         
-        $http.get('/api/roles', { withCredentials: true })
+        cachedGet('/api/roles', { withCredentials: true })
         .then(function(response) {
             if (response.data.success) {
                 // Tu API devuelve 'data' en el JSON, lo cual es correcto
@@ -670,8 +846,307 @@ app.controller("rolesCtrl", function ($scope, $http, $rootScope, $timeout) {
     activeMenuOption("#/roles")
 })
 
-app.controller("dispositivosCtrl", function ($scope, $http, $rootScope, $location) {
-  
+// ========================================
+// CONTROLLER: DISPOSITIVOS
+// ========================================
+// El estado lo escribe el monitor (scripts/monitor.py); aquí se lee, se
+// actualiza en vivo con los eventos SSE y se gestiona el inventario.
+app.controller("dispositivosCtrl", function ($scope, $http, $rootScope, $interval, $timeout, deviceEvents) {
+    $scope.dispositivos = []
+    $scope.loading = true
+    $scope.saving = false
+    $scope.checking = {}   // id -> true mientras se comprueba a demanda
+    $scope.searchText = ""
+    $scope.filterEstado = ""
+    $scope.formDispositivo = { metodo: 'tcp', intervalo_s: 60 }
+    $scope.contadores = null
+    $scope.enVivo = false
+    $scope.importing = false
+    $scope.importResult = null
+    $scope.discovering = false
+    $scope.discoverResult = null
+    $scope.formDescubrir = { puertos: '22, 80, 443', tasa: 500, icmp: false }
+
+    // ========================================
+    // CARGAR DISPOSITIVOS (paginación por cursor)
+    // ========================================
+    const PAGE_SIZE = 50
+    const REFRESH_MS = 15000   // solo sin conexión en vivo
+    let nextCursor = null
+    let loadSeq = 0   // descarta respuestas de cargas anteriores a un cambio de filtros
+
+    $scope.hasMore = false
+    $scope.loadingMore = false
+
+    function buildParams() {
+        let params = { limit: PAGE_SIZE }
+        if ($scope.searchText) params.q = $scope.searchText
+        if ($scope.filterEstado) params.estado = $scope.filterEstado
+        return params
+    }
+
+    function loadDispositivos(showLoading = true) {
+        if (showLoading) $scope.loading = true
+        const seq = ++loadSeq
+
+        // Al refrescar se pide de nuevo lo que ya está en pantalla (hasta el máximo de página)
+        let params = buildParams()
+        if (!showLoading) params.limit = Math.min(Math.max($scope.dispositivos.length, PAGE_SIZE), 500)
+
+        $http.get('/api/dispositivos/', { params: params, withCredentials: true })
+        .then(function(response) {
+            if (seq !== loadSeq) return
+            if (response.data.success) {
+                $scope.dispositivos = response.data.dispositivos
+                nextCursor = response.data.next_cursor
+                $scope.hasMore = !!nextCursor
+            } else {
+                toast(response.data.message || 'Error al cargar dispositivos', 3)
+            }
+        })
+        .catch(function(error) {
+            if (seq === loadSeq && showLoading) {
+                toast('Error al cargar dispositivos: ' + (error.data?.message || error.statusText), 3)
+            }
+        })
+        .finally(function() {
+            if (seq === loadSeq) $scope.loading = false
+        })
+    }
+
+    $scope.loadMore = function() {
+        if (!$scope.hasMore || $scope.loadingMore || $scope.loading) return
+        $scope.loadingMore = true
+        const seq = loadSeq
+
+        let params = buildParams()
+        params.cursor = nextCursor
+
+        $http.get('/api/dispositivos/', { params: params, withCredentials: true })
+        .then(function(response) {
+            if (seq !== loadSeq) return
+            if (response.data.success) {
+                $scope.dispositivos = $scope.dispositivos.concat(response.data.dispositivos)
+                nextCursor = response.data.next_cursor
+                $scope.hasMore = !!nextCursor
+            } else {
+                toast(response.data.message || 'Error al cargar dispositivos', 3)
+            }
+        })
+        .catch(function(error) {
+            toast('Error al cargar dispositivos: ' + (error.data?.message || error.statusText), 3)
+        })
+        .finally(function() {
+            $scope.loadingMore = false
+        })
+    }
+
+    $scope.refresh = function() {
+        loadDispositivos()
+    }
+
+    // Búsqueda con espera para no lanzar una petición por tecla
+    let searchTimer = null
+    $scope.applyFilters = function() {
+        if (searchTimer) $timeout.cancel(searchTimer)
+        searchTimer = $timeout(function() { loadDispositivos() }, 300)
+    }
+
+    // ========================================
+    // PRESENTACIÓN
+    // ========================================
+    $scope.estadoClass = function(estado) {
+        if (estado === 'up') return 'bg-success'
+        if (estado === 'down') return 'bg-danger'
+        return 'bg-secondary'
+    }
+
+    $scope.destino = function(d) {
+        return d.metodo === 'icmp' ? `${d.host} (ICMP)` : `${d.host}:${d.puerto}`
+    }
+
+    // ========================================
+    // CREAR DISPOSITIVO (POST /api/dispositivos)
+    // ========================================
+    $scope.addDispositivo = function() {
+        if ($scope.saving) return
+        const form = $scope.formDispositivo
+
+        if (!form.nombre || !form.host) {
+            toast('Nombre y host son requeridos', 3)
+            return
+        }
+        if (form.metodo === 'tcp' && !form.puerto) {
+            toast('El puerto es requerido para TCP', 3)
+            return
+        }
+
+        $scope.saving = true
+        let payload = {
+            nombre: form.nombre,
+            host: form.host,
+            metodo: form.metodo,
+            puerto: form.metodo === 'tcp' ? parseInt(form.puerto, 10) : 0,
+            intervalo_s: parseInt(form.intervalo_s, 10)
+        }
+
+        $http.post('/api/dispositivos/', payload, {
+            withCredentials: true,
+            headers: { 'Content-Type': 'application/json' }
+        })
+        .then(function(response) {
+            if (response.data && response.data.success) {
+                toast(response.data.message || 'Dispositivo creado', 2)
+                $scope.formDispositivo = { metodo: form.metodo, intervalo_s: form.intervalo_s }
+                loadDispositivos(false)
+            } else {
+                toast(response.data?.message || 'Error al crear dispositivo', 3)
+            }
+        })
+        .catch(function(error) {
+            toast('Error: ' + (error.data?.message || error.statusText || 'Error desconocido'), 4)
+        })
+        .finally(function() {
+            $scope.saving = false
+        })
+    }
+
+    // ========================================
+    // IMPORTAR (POST /api/dispositivos/import)
+    // ========================================
+    $scope.importDispositivos = function() {
+        const input = document.getElementById('dispArchivo')
+        if (!input || !input.files.length) {
+            toast('Selecciona un archivo CSV o JSON', 3)
+            return
+        }
+        const data = new FormData()
+        data.append('file', input.files[0])
+
+        $scope.importing = true
+        $scope.importResult = null
+        $http.post('/api/dispositivos/import', data, {
+            withCredentials: true,
+            // Sin Content-Type: el navegador pone multipart con su boundary
+            headers: { 'Content-Type': undefined },
+            transformRequest: angular.identity
+        })
+        .then(function(response) {
+            $scope.importResult = response.data
+            toast(response.data.message, 2)
+            input.value = ''
+            if (response.data.insertados) loadDispositivos(false)
+        })
+        .catch(function(error) {
+            toast('Error: ' + (error.data?.message || error.statusText), 4)
+        })
+        .finally(function() {
+            $scope.importing = false
+        })
+    }
+
+    // ========================================
+    // DESCUBRIR (POST /api/dispositivos/descubrir)
+    // ========================================
+    $scope.descubrir = function() {
+        const form = $scope.formDescubrir
+        const payload = {
+            red: form.red,
+            puertos: (form.puertos || '').split(/[\s,]+/).filter(Boolean).map(function(p) { return parseInt(p, 10) }),
+            icmp: !!form.icmp,
+            tasa: parseFloat(form.tasa) || undefined
+        }
+
+        $scope.discovering = true
+        $scope.discoverResult = null
+        $http.post('/api/dispositivos/descubrir', payload, { withCredentials: true })
+        .then(function(response) {
+            $scope.discoverResult = response.data
+            toast(response.data.message, 3)
+            if (response.data.nuevos) loadDispositivos(false)
+        })
+        .catch(function(error) {
+            toast('Error: ' + (error.data?.message || error.statusText), 4)
+        })
+        .finally(function() {
+            $scope.discovering = false
+        })
+    }
+
+    // ========================================
+    // COMPROBAR AHORA (POST /api/dispositivos/:id/comprobar)
+    // ========================================
+    $scope.checkNow = function(d) {
+        if ($scope.checking[d.id]) return
+        $scope.checking[d.id] = true
+
+        $http.post(`/api/dispositivos/${d.id}/comprobar`, {}, { withCredentials: true })
+        .then(function(response) {
+            if (response.data.success) {
+                const r = response.data.resultado
+                if (r.ok) {
+                    toast(`${d.nombre}: responde en ${r.latencia_ms.toFixed(1)} ms`, 3)
+                } else {
+                    toast(`${d.nombre}: sin respuesta (${r.error || 'error'})`, 3)
+                }
+            } else {
+                toast(response.data.message || 'Error al comprobar dispositivo', 3)
+            }
+        })
+        .catch(function(error) {
+            toast('Error: ' + (error.data?.message || error.statusText), 3)
+        })
+        .finally(function() {
+            delete $scope.checking[d.id]
+        })
+    }
+
+    // ========================================
+    // ELIMINAR DISPOSITIVO (DELETE /api/dispositivos/:id)
+    // ========================================
+    $scope.deleteDispositivo = function(d) {
+        if (!confirm(`¿Eliminar el dispositivo ${d.nombre}?`)) return
+
+        $http.delete(`/api/dispositivos/${d.id}`, { withCredentials: true })
+        .then(function(response) {
+            if (response.data.success) {
+                toast(response.data.message || 'Dispositivo eliminado', 2)
+                $scope.dispositivos = $scope.dispositivos.filter(function(item) { return item.id !== d.id })
+            } else {
+                toast(response.data.message || 'Error al eliminar dispositivo', 3)
+            }
+        })
+        .catch(function(error) {
+            toast('Error: ' + (error.data?.message || error.statusText), 3)
+        })
+    }
+
+    // ========================================
+    // INICIALIZACIÓN
+    // ========================================
+    if (deviceEvents.supported) {
+        const unsubscribe = deviceEvents.subscribe({
+            transicion: function(evento) {
+                const d = $scope.dispositivos.find(function(item) { return item.id === evento.dispositivo_id })
+                if (!d) return
+                d.estado = evento.estado
+                d.ultimo_cambio = new Date(evento.ts * 1000).toUTCString()
+                d.ultimo_error = evento.error
+            },
+            contadores: function(contadores) { $scope.contadores = contadores },
+            // Eventos perdidos (desconexión larga): recargar lo que hay en pantalla
+            reset: function() { loadDispositivos(false) },
+            conexion: function(abierta) { $scope.enVivo = abierta }
+        })
+        $scope.$on('$destroy', unsubscribe)
+    }
+    const refreshTimer = $interval(function() {
+        if (!$scope.enVivo && !$scope.loading && !$scope.loadingMore) loadDispositivos(false)
+    }, REFRESH_MS)
+    $scope.$on('$destroy', function() { $interval.cancel(refreshTimer) })
+
+    loadDispositivos()
+    activeMenuOption("#/dispositivos")
 })
 
 
@@ -680,9 +1155,32 @@ app.controller("dispositivosCtrl", function ($scope, $http, $rootScope, $locatio
 // ========================================
 // CONTROLLER: DASHBOARD
 // ========================================
-app.controller("dashboardCtrl", function ($scope, $http, $rootScope, $location) {
+app.controller("dashboardCtrl", function ($scope, $http, $rootScope, $location, deviceEvents) {
     $scope.currentUser = null
     $scope.loading = true
+    $scope.contadores = null
+    $scope.cambios = []   // últimos cambios de estado de dispositivos, el más reciente primero
+    $scope.enVivo = false
+    $scope.stats = null
+    $scope.statsError = null
+    $scope.verDetalle = false
+
+    const MAX_CAMBIOS = 10
+
+    // Resumen de usuarios: agregados precalculados en el servidor, no recorre la tabla
+    function loadStats() {
+        $http.get('/api/stats').then(function(response) {
+            $scope.stats = response.data.stats
+            $scope.statsError = null
+        }).catch(function(response) {
+            $scope.statsError = (response.data && response.data.message) || 'No se pudieron cargar las estadísticas'
+        })
+    }
+
+    $scope.toggleDetalle = function() {
+        $scope.verDetalle = !$scope.verDetalle
+        if ($scope.verDetalle) loadStats()
+    }
 
     $rootScope.getCurrentUser().then(function(user) {
         $scope.currentUser = user || null
@@ -690,6 +1188,18 @@ app.controller("dashboardCtrl", function ($scope, $http, $rootScope, $location)
             $location.path('/login')
             return
         }
+        if ($scope.$$destroyed) return
+        loadStats()
+        const unsubscribe = deviceEvents.subscribe({
+            transicion: function(evento) {
+                $scope.cambios.unshift(evento)
+                if ($scope.cambios.length > MAX_CAMBIOS) $scope.cambios.pop()
+            },
+            contadores: function(contadores) { $scope.contadores = contadores },
+            reset: function() { $scope.cambios = [] },
+            conexion: function(abierta) { $scope.enVivo = abierta }
+        })
+        $scope.$on('$destroy', unsubscribe)
     }).finally(function() {
         $scope.loading = false
         activeMenuOption("#/")